@@ -16,8 +16,10 @@ import os
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Literal
 from logging_config import get_logger
-from supabase import create_client, Client
+from supabase import Client
 from settings import settings
+from core.utils.supabase_pool import supabase_pool
+from core.utils.event_sink import event_sink
 
 logger = get_logger(__name__)
 
@@ -45,7 +47,9 @@ try:
     # Try service role key first, fallback to anon key
     supabase_key = settings.SUPABASE_SERVICE_ROLE_KEY or settings.SUPABASE_ANON_KEY
     if supabase_url and supabase_key:
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase: Client = supabase_pool.sync_client(
+            use_service_role=bool(settings.SUPABASE_SERVICE_ROLE_KEY)
+        )
     else:
         logger.warning("Supabase credentials not found - telemetry will only log to console")
         supabase = None
@@ -62,7 +66,8 @@ class ACETelemetry:
     - Storing all events in Supabase telemetry_events table
     - Ready to integrate with analytics services (Mixpanel, Amplitude, etc.)
     
-    All tracking is non-blocking and failures won't break the application.
+    All tracking is non-blocking: events are queued on the shared event sink and
+    bulk-inserted in the background. Failures won't break the application.
     Only errors are logged to console.
     """
     
@@ -80,14 +85,14 @@ class ACETelemetry:
             user_id: User identifier
             properties: Additional event properties
         """
-        # Store in database (if Supabase is available)
+        # Queue for the database (if Supabase is available)
         if supabase:
             try:
-                supabase.table('telemetry_events').insert({
+                event_sink.emit('telemetry_events', {
                     'event': event,
                     'user_id': user_id,
                     'properties': properties or {}
-                }).execute()
+                })
             except Exception as e:
                 # Don't let telemetry errors break the application
                 logger.error(f"Failed to store telemetry event '{event}': {e}")
@@ -10,9 +10,10 @@ This class provides the foundation for all specialist agents with:
 
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-from supabase import create_client, Client
+from supabase import Client
 from core.training.helpers.llm_client import LLMClient
 from core.utils.env_loader import is_test_environment
+from core.utils.supabase_pool import supabase_pool
 from settings import settings
 
 
@@ -53,7 +54,7 @@ class BaseAgent(ABC):
             supabase_key = settings.SUPABASE_ANON_KEY
             if not supabase_url or not supabase_key:
                 raise ValueError("Supabase credentials not found in environment variables")
-            self.supabase: Client = create_client(supabase_url, supabase_key)
+            self.supabase: Client = supabase_pool.sync_client(use_service_role=False)
 
     @abstractmethod
     def process_request(self, user_request: str) -> str:
@@ -0,0 +1,146 @@
+"""
+Embedding Cache for EvolveAI
+
+Process-wide LRU cache for query embeddings, with optional SQLite persistence.
+
+`RAGTool.generate_embedding` used to make a remote embedding call for every text,
+even when the same query was embedded twice within one hybrid search (filtered,
+then broader) or the same playbook lesson text came up for another user. Entries
+are keyed by (embedding model, dimensionality, normalized text); failed calls
+(empty embeddings) are never cached.
+
+When EMBEDDING_CACHE_PATH is set, entries are also written to a small SQLite file
+(float32 blobs, see `TieredCache`), so restarts and other workers on the host
+reuse them.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.tiered_cache import TieredCache
+
+logger = get_logger(__name__)
+
+_WHITESPACE_TABLE = {ord(c): " " for c in "\t\n\r\f\v"}
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: collapse whitespace and trim (case is kept - it can change the embedding)."""
+    return " ".join(text.translate(_WHITESPACE_TABLE).split())
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    """Stable cache key for (model, dimensionality, normalized text)."""
+    payload = f"{model}\x00{dimensions or 'default'}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode_vector(embedding: List[float]) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _decode_vector(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of embeddings with hit/miss counters and an optional SQLite tier."""
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: In-memory capacity (defaults to settings.EMBEDDING_CACHE_MAX_ENTRIES)
+            path: SQLite file for persistence (defaults to settings.EMBEDDING_CACHE_PATH;
+                  empty disables persistence)
+        """
+        self._max_entries = max_entries
+        self._path = path
+        self._entries = TieredCache(
+            "embedding_vectors",
+            max_entries=lambda: self.max_entries,
+            path=lambda: self.path,
+            encode=_encode_vector,
+            decode=_decode_vector,
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        """Effective in-memory capacity."""
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.EMBEDDING_CACHE_MAX_ENTRIES
+
+    @property
+    def path(self) -> str:
+        """Effective SQLite path ('' when persistence is disabled)."""
+        if self._path is not None:
+            return self._path
+        return settings.EMBEDDING_CACHE_PATH
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, model: str, dimensions: Optional[int], text: str) -> Optional[List[float]]:
+        """
+        Look up an embedding, checking memory first and then the disk tier.
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        key = cache_key(model, dimensions, text)
+        embedding = self._entries.get(key)
+        from_disk = False
+        if embedding is None:
+            embedding = self._entries.load(key)
+            from_disk = embedding is not None
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += int(from_disk)
+            return embedding
+
+    def put(self, model: str, dimensions: Optional[int], text: str, embedding: List[float]) -> None:
+        """Store an embedding (empty embeddings are ignored)."""
+        if not embedding or self.max_entries <= 0:
+            return
+        key = cache_key(model, dimensions, text)
+        self._entries.remember(key, list(embedding))
+        self._entries.store(key, embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for logging and monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop in-memory entries and reset counters (the disk tier is kept)."""
+        self._entries.clear()
+        with self._lock:
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self) -> None:
+        """Close the SQLite connection, if open."""
+        self._entries.close()
+
+
+# Shared by every RAGTool in the process
+embedding_cache = EmbeddingCache()
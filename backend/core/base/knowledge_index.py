@@ -0,0 +1,543 @@
+"""
+Knowledge Index for EvolveAI
+
+Process-wide, in-memory vector index over the `documents` / `document_embeddings`
+tables, one per topic.
+
+Searching used to download and JSON-parse every embedding of the topic on each
+query. The index keeps the embeddings as one L2-normalized float32 matrix (plus
+chunk and document lookups), so a query is a single matrix-vector product and an
+`argpartition` top-k. The corpus is re-checked periodically with a cheap
+fingerprint query (row count + max id) and reloaded only when it changed.
+
+The index can also be exported to / loaded from an on-disk snapshot (one directory
+per topic) that is memory-mapped instead of parsed:
+
+    embeddings.npy  float32 (n, d) matrix, rows already L2-normalized
+    chunks.npy      structured array: document (row in manifest documents),
+                    chunk_index, text_offset, text_length
+    chunks.bin      UTF-8 chunk texts, concatenated
+    manifest.json   format version, topic, counts, fingerprint, documents (id, title, keywords)
+
+Several workers on one host then share one page-cache copy of the vectors, and
+cold start does not depend on pulling the table from Supabase.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+# Supabase caps a single select at 1000 rows, so embeddings are loaded in pages
+_PAGE_SIZE = 1000
+
+# Minimum delay between two load attempts after a failed load (avoids retry storms)
+_RETRY_BACKOFF_SECONDS = 30.0
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+_CHUNK_DTYPE = np.dtype([
+    ("document", "<i4"),
+    ("chunk_index", "<i4"),
+    ("text_offset", "<i8"),
+    ("text_length", "<i4"),
+])
+
+
+def parse_embedding(embedding: Any) -> Optional[List[float]]:
+    """Parse an embedding stored as a JSON string or list; None if unusable."""
+    if isinstance(embedding, str):
+        try:
+            embedding = json.loads(embedding)
+        except (json.JSONDecodeError, ValueError):
+            return None
+    if not isinstance(embedding, (list, tuple)) or not embedding:
+        return None
+    return embedding
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place (zero rows stay zero) and return the matrix."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class KnowledgeIndex:
+    """In-memory (or memory-mapped) embedding matrix for one topic with top-k cosine search."""
+
+    def __init__(
+        self,
+        topic: str,
+        refresh_seconds: Optional[float] = None,
+        snapshot_dir: Optional[str] = None,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            topic: Document topic this index covers
+            refresh_seconds: Seconds between corpus change checks
+                             (defaults to settings.RAG_INDEX_REFRESH_SECONDS)
+            snapshot_dir: Snapshot directory for this topic, loaded before the database
+                          (defaults to <settings.RAG_SNAPSHOT_DIR>/<topic> when configured)
+        """
+        self.topic = topic
+        self._refresh_seconds = refresh_seconds
+        self._snapshot_dir = snapshot_dir
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._last_failed_attempt: Optional[float] = None
+        self._fingerprint: Optional[Tuple[Any, Any]] = None
+        self.version: int = 0
+        self.source: Optional[str] = None
+
+        # Snapshot (replaced atomically on every load)
+        self._matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._chunks: np.ndarray = np.zeros(0, dtype=_CHUNK_DTYPE)
+        self._text: Any = b""
+        self._documents: List[Dict[str, Any]] = []
+
+    # ------------------------------------------------------------------
+    # Loading / refresh
+    # ------------------------------------------------------------------
+
+    @property
+    def refresh_seconds(self) -> float:
+        """Effective interval between corpus change checks."""
+        if self._refresh_seconds is not None:
+            return self._refresh_seconds
+        return settings.RAG_INDEX_REFRESH_SECONDS
+
+    @property
+    def snapshot_dir(self) -> Optional[str]:
+        """Effective snapshot directory for this topic (None when snapshots are disabled)."""
+        if self._snapshot_dir is not None:
+            return self._snapshot_dir
+        if settings.RAG_SNAPSHOT_DIR:
+            return os.path.join(settings.RAG_SNAPSHOT_DIR, self.topic)
+        return None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the index currently holds data."""
+        return self._loaded_at is not None
+
+    @property
+    def dimensions(self) -> int:
+        """Embedding dimensionality (0 when empty)."""
+        return int(self._matrix.shape[1]) if self._matrix.ndim == 2 else 0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def ensure_loaded(self, supabase_client: Any) -> bool:
+        """
+        Make sure the index is loaded and matches the current corpus.
+
+        Loads the on-disk snapshot first when one is configured, then (periodically)
+        compares its fingerprint with the database. Never raises: on failure the
+        previous snapshot (if any) keeps being served.
+
+        Args:
+            supabase_client: Supabase client used to (re)load the embeddings
+
+        Returns:
+            True if the index can answer queries, False otherwise
+        """
+        if self.is_loaded and not self._check_due():
+            return True
+
+        with self._lock:
+            if self.is_loaded and not self._check_due():
+                return True
+
+            if not self.is_loaded and self.snapshot_dir:
+                self.load_snapshot(self.snapshot_dir)
+
+            # Tests populate the index explicitly via load_records(); never hit the DB
+            if supabase_client is None or is_test_environment():
+                return self.is_loaded
+
+            if (
+                self._last_failed_attempt is not None
+                and time.monotonic() - self._last_failed_attempt < _RETRY_BACKOFF_SECONDS
+            ):
+                return self.is_loaded
+
+            if self.is_loaded:
+                try:
+                    fingerprint = self._fetch_fingerprint(supabase_client)
+                    self._checked_at = time.monotonic()
+                    if fingerprint == self._fingerprint:
+                        return True
+                    logger.info(f"🔄 Knowledge base changed for topic '{self.topic}', reloading index")
+                except Exception as e:
+                    self._checked_at = time.monotonic()
+                    logger.warning(f"⚠️ Knowledge index change check failed, keeping snapshot: {e}")
+                    return True
+            return self.load(supabase_client)
+
+    def _check_due(self) -> bool:
+        """Whether the corpus should be re-checked for changes."""
+        if self._checked_at is None:
+            return True
+        return (time.monotonic() - self._checked_at) > self.refresh_seconds
+
+    @staticmethod
+    def _fetch_fingerprint(supabase_client: Any) -> Tuple[Any, Any]:
+        """Cheap corpus fingerprint: (embedding row count, max embedding id)."""
+        response = (
+            supabase_client.table("document_embeddings")
+            .select("id", count="exact")
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+        )
+        max_id = response.data[0]["id"] if response.data else None
+        return response.count, max_id
+
+    def load(self, supabase_client: Any) -> bool:
+        """
+        Load the topic's documents and embeddings from Supabase and rebuild the matrix.
+
+        Args:
+            supabase_client: Supabase client
+
+        Returns:
+            True if the load succeeded, False otherwise
+        """
+        start_time = time.time()
+        try:
+            fingerprint = self._fetch_fingerprint(supabase_client)
+
+            docs_response = (
+                supabase_client.table("documents")
+                .select("id, title, content, topic, keywords")
+                .eq("topic", self.topic)
+                .execute()
+            )
+            documents = docs_response.data
+            if not isinstance(documents, list):
+                raise ValueError(f"Unexpected response type for documents: {type(documents).__name__}")
+
+            embeddings: List[Dict[str, Any]] = []
+            doc_ids = [doc["id"] for doc in documents]
+            if doc_ids:
+                offset = 0
+                while True:
+                    response = (
+                        supabase_client.table("document_embeddings")
+                        .select("id, chunk_text, chunk_index, embedding, document_id")
+                        .in_("document_id", doc_ids)
+                        .order("id", desc=False)
+                        .range(offset, offset + _PAGE_SIZE - 1)
+                        .execute()
+                    )
+                    page = response.data
+                    if not isinstance(page, list):
+                        raise ValueError(f"Unexpected response type for embeddings page: {type(page).__name__}")
+                    embeddings.extend(page)
+                    if len(page) < _PAGE_SIZE:
+                        break
+                    offset += _PAGE_SIZE
+
+            self.load_records(documents, embeddings)
+            self._fingerprint = fingerprint
+            logger.info(
+                f"✅ Knowledge index loaded for topic '{self.topic}': {len(self)} chunks "
+                f"({self.dimensions} dims) in {time.time() - start_time:.2f}s (version {self.version})"
+            )
+            return True
+
+        except Exception as e:
+            self._last_failed_attempt = time.monotonic()
+            logger.warning(f"⚠️ Failed to load knowledge index for topic '{self.topic}': {e}")
+            return self.is_loaded
+
+    def load_records(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        embeddings: Iterable[Dict[str, Any]],
+    ) -> None:
+        """
+        Replace the index content with the given rows and rebuild the matrix.
+
+        Chunks whose embedding is missing, unparsable or of a different dimensionality
+        than the first valid one are skipped.
+
+        Args:
+            documents: `documents` rows (id, title, keywords, ...)
+            embeddings: `document_embeddings` rows (chunk_text, chunk_index, embedding, document_id)
+        """
+        document_list = [
+            {"id": doc["id"], "title": doc.get("title"), "keywords": doc.get("keywords", [])}
+            for doc in documents
+        ]
+        document_rows = {doc["id"]: row for row, doc in enumerate(document_list)}
+        chunk_rows: List[Tuple[int, int, int, int]] = []
+        texts: List[bytes] = []
+        vectors: List[List[float]] = []
+        dimensions: Optional[int] = None
+        text_offset = 0
+        skipped = 0
+
+        for row in embeddings:
+            document_row = document_rows.get(row.get("document_id"))
+            if document_row is None:
+                continue
+            vector = parse_embedding(row.get("embedding"))
+            if vector is None or (dimensions is not None and len(vector) != dimensions):
+                skipped += 1
+                continue
+            dimensions = len(vector)
+            vectors.append(vector)
+            text = (row.get("chunk_text") or "").encode("utf-8")
+            texts.append(text)
+            chunk_rows.append((document_row, row.get("chunk_index") or 0, text_offset, len(text)))
+            text_offset += len(text)
+
+        if skipped:
+            logger.warning(f"Skipped {skipped} embeddings without a valid vector for topic '{self.topic}'")
+
+        matrix = (
+            normalize_rows(np.asarray(vectors, dtype=np.float32))
+            if vectors else np.zeros((0, 0), dtype=np.float32)
+        )
+        self._set_snapshot(
+            matrix, np.array(chunk_rows, dtype=_CHUNK_DTYPE), b"".join(texts), document_list, "database"
+        )
+
+    def _set_snapshot(
+        self,
+        matrix: np.ndarray,
+        chunks: np.ndarray,
+        text: Any,
+        documents: List[Dict[str, Any]],
+        source: str,
+    ) -> None:
+        """Atomically swap in a new snapshot."""
+        with self._lock:
+            self._matrix = matrix
+            self._chunks = chunks
+            self._text = text
+            self._documents = documents
+            self._loaded_at = time.monotonic()
+            self._checked_at = self._loaded_at
+            self._last_failed_attempt = None
+            self.source = source
+            self.version += 1
+
+    def invalidate(self) -> None:
+        """Force a corpus check on the next access (e.g. after re-populating the knowledge base)."""
+        with self._lock:
+            self._checked_at = None
+            self._fingerprint = None
+
+    def clear(self) -> None:
+        """Drop all data (used by tests)."""
+        with self._lock:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._chunks = np.zeros(0, dtype=_CHUNK_DTYPE)
+            self._text = b""
+            self._documents = []
+            self._loaded_at = None
+            self._checked_at = None
+            self._fingerprint = None
+            self.source = None
+
+    # ------------------------------------------------------------------
+    # On-disk snapshot
+    # ------------------------------------------------------------------
+
+    def export_snapshot(self, directory: str) -> None:
+        """
+        Write the loaded index to `directory` (see module docstring for the layout).
+
+        Files are written under temporary names and renamed into place, manifest last,
+        so running workers never map a half-written snapshot.
+
+        Args:
+            directory: Target directory for this topic's snapshot
+        """
+        os.makedirs(directory, exist_ok=True)
+        matrix, chunks, text, documents = self._matrix, self._chunks, self._text, self._documents
+        suffix = f".tmp-{os.getpid()}"
+
+        def write(name: str, writer) -> None:
+            tmp_path = os.path.join(directory, name + suffix)
+            with open(tmp_path, "wb") as f:
+                writer(f)
+            os.replace(tmp_path, os.path.join(directory, name))
+
+        write("embeddings.npy", lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=np.float32)))
+        write("chunks.npy", lambda f: np.save(f, np.ascontiguousarray(chunks)))
+        write("chunks.bin", lambda f: f.write(bytes(text)))
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "topic": self.topic,
+            "count": int(len(chunks)),
+            "dimensions": self.dimensions,
+            "fingerprint": list(self._fingerprint) if self._fingerprint else None,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "documents": documents,
+        }
+        write("manifest.json", lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+        logger.info(f"💾 Exported knowledge snapshot for topic '{self.topic}' ({len(chunks)} chunks) to {directory}")
+
+    def load_snapshot(self, directory: str) -> bool:
+        """
+        Memory-map a snapshot written by export_snapshot.
+
+        Never raises: returns False (keeping the current data) if the snapshot is
+        missing, incompatible or inconsistent.
+
+        Args:
+            directory: Snapshot directory for this topic
+
+        Returns:
+            True if the snapshot was loaded
+        """
+        manifest_path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return False
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"unsupported format version {manifest.get('format_version')}")
+
+            matrix = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+            chunks = np.load(os.path.join(directory, "chunks.npy"), mmap_mode="r")
+            text_path = os.path.join(directory, "chunks.bin")
+            text = (
+                np.memmap(text_path, dtype=np.uint8, mode="r")
+                if os.path.getsize(text_path) > 0 else b""
+            )
+            count = manifest.get("count")
+            if matrix.dtype != np.float32 or chunks.dtype != _CHUNK_DTYPE:
+                raise ValueError("unexpected array types")
+            if len(chunks) != count or (count and matrix.shape != (count, manifest.get("dimensions"))):
+                raise ValueError("array shapes don't match manifest")
+
+            fingerprint = manifest.get("fingerprint")
+            self._set_snapshot(matrix, chunks, text, manifest.get("documents") or [], "snapshot")
+            with self._lock:
+                self._fingerprint = tuple(fingerprint) if fingerprint else None
+                # Verify against the database on the next access that has a client
+                self._checked_at = None
+            logger.info(
+                f"✅ Knowledge index memory-mapped for topic '{self.topic}': {count} chunks from {directory}"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load knowledge snapshot from {directory}: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query_embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Return the top_k chunks by cosine similarity, best first.
+
+        Args:
+            query_embedding: Query vector (same dimensionality as the index)
+            top_k: Number of results
+
+        Returns:
+            Result dicts with chunk_text, chunk_index, document_title,
+            document_keywords, relevance_score and document_id
+        """
+        # Snapshot references so a concurrent reload can't mix two versions
+        matrix, chunks, text, documents = self._matrix, self._chunks, self._text, self._documents
+        if not len(chunks) or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape != (matrix.shape[1],):
+            logger.warning(
+                f"Query embedding has {query.size} dims, index has {matrix.shape[1]} - skipping search"
+            )
+            return []
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+
+        scores = matrix @ (query / query_norm)
+        top_k = min(top_k, len(chunks))
+        if top_k < len(chunks):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(chunks))
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        results = []
+        for row in ranked:
+            chunk = chunks[row]
+            offset = int(chunk["text_offset"])
+            chunk_text = bytes(text[offset:offset + int(chunk["text_length"])]).decode("utf-8")
+            doc_info = documents[int(chunk["document"])]
+            results.append({
+                "chunk_text": chunk_text,
+                "chunk_index": int(chunk["chunk_index"]),
+                "document_title": doc_info.get("title"),
+                "document_keywords": doc_info.get("keywords", []),
+                "relevance_score": float(scores[row]),
+                "document_id": doc_info["id"],
+            })
+        return results
+
+
+_indexes: Dict[str, KnowledgeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_knowledge_index(topic: str) -> KnowledgeIndex:
+    """Get the process-wide knowledge index for a topic (created on first use)."""
+    index = _indexes.get(topic)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(topic, KnowledgeIndex(topic))
+    return index
+
+
+def export_knowledge_snapshots(
+    supabase_client: Any, snapshot_dir: str, topics: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Export one snapshot per topic from Supabase into snapshot_dir/<topic>.
+
+    Args:
+        supabase_client: Supabase client
+        snapshot_dir: Root snapshot directory (RAG_SNAPSHOT_DIR)
+        topics: Topics to export (defaults to every topic in the documents table)
+
+    Returns:
+        Topics that were exported
+    """
+    if topics is None:
+        response = supabase_client.table("documents").select("topic").execute()
+        topics = sorted({row["topic"] for row in response.data or [] if row.get("topic")})
+
+    exported = []
+    for topic in topics:
+        index = KnowledgeIndex(topic, snapshot_dir="")
+        if not index.load(supabase_client):
+            logger.error(f"❌ Could not load knowledge base for topic '{topic}', snapshot not written")
+            continue
+        index.export_snapshot(os.path.join(snapshot_dir, topic))
+        exported.append(topic)
+    return exported
@@ -14,6 +14,8 @@ import re
 from typing import List, Dict, Any, Optional, Tuple
 import openai
 from .base_agent import BaseAgent
+from .knowledge_index import get_knowledge_index
+from .embedding_cache import embedding_cache
 from logging_config import get_logger
 from settings import settings
 
@@ -65,6 +67,8 @@ class RAGTool:
                 self.embedding_model = embedding_model
         else:
             self.embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+        # Gemini is asked for 1536 dims (matches the stored vectors); OpenAI uses the model default
+        self.embedding_dimensions: Optional[int] = 1536 if self.use_gemini else None
         
         # Initialize embedding clients based on provider
         # Use settings (which reads from environment dynamically)
@@ -92,25 +96,39 @@ class RAGTool:
             self.gemini_client = None
     
     def generate_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding for text, served from the shared embedding cache when possible.
+
+        Repeated texts (the same query within a hybrid search, retries, identical
+        playbook lessons across users) don't cost another embedding round trip.
+        """
+        cached = embedding_cache.get(self.embedding_model, self.embedding_dimensions, text)
+        if cached is not None:
+            return cached
+        embedding = self._generate_embedding_remote(text)
+        embedding_cache.put(self.embedding_model, self.embedding_dimensions, text, embedding)
+        return embedding
+
+    def _generate_embedding_remote(self, text: str) -> List[float]:
         """Generate embedding for text using OpenAI or Gemini based on provider."""
         try:
             if self.use_gemini:
                 if self.gemini_client is None:
                     return []
-                # Use gemini-embedding-001 with 1536 dimensions
+                # Use gemini-embedding-001 with self.embedding_dimensions (1536) dimensions
                 try:
                     from google.genai import types
                     response = self.gemini_client.models.embed_content(
                         model=self.embedding_model,
                         contents=[{"role": "user", "parts": [{"text": text}]}],
-                        config=types.EmbedContentConfig(output_dimensionality=1536)
+                        config=types.EmbedContentConfig(output_dimensionality=self.embedding_dimensions)
                     )
                 except (AttributeError, TypeError, ImportError):
                     # Fallback to dict config
                     response = self.gemini_client.models.embed_content(
                         model=self.embedding_model,
                         contents=[{"role": "user", "parts": [{"text": text}]}],
-                        config={"output_dimensionality": 1536}
+                        config={"output_dimensionality": self.embedding_dimensions}
                     )
                 
                 # Extract embedding from response
@@ -168,105 +186,25 @@ class RAGTool:
 
             self.logger.debug(f"Query embedding generated: {len(query_embedding)} dimensions")
 
-            # Step 2: Get document embeddings
-            embeddings_query = self.base_agent.supabase.table("document_embeddings").select(
-                "id, chunk_text, chunk_index, embedding, document_id"
-            )
-
-            # Step 3: Get documents filtered by topic only
-            docs_query = (
-                self.base_agent.supabase.table("documents")
-                .select("id, title, content, topic, keywords")
-                .eq("topic", self.base_agent.topic)
-            )
-
-            # Execute documents query
-            docs_response = docs_query.execute()
-            if not docs_response.data:
+            # Step 2: Make sure the in-memory index for this topic is loaded/fresh
+            index = get_knowledge_index(self.base_agent.topic)
+            if not index.ensure_loaded(self.base_agent.supabase):
                 self.logger.warning(
-                    f"No documents found for topic '{self.base_agent.topic}' with filters: {metadata_filters}"
+                    f"Knowledge index unavailable for topic '{self.base_agent.topic}'"
                 )
                 return []
-
-            # Get document IDs that match our criteria
-            matching_doc_ids = [doc["id"] for doc in docs_response.data]
-
-            # Step 4: Get embeddings for matching documents
-            embeddings_response = embeddings_query.in_(
-                "document_id", matching_doc_ids
-            ).execute()
-            if not embeddings_response.data:
-                self.logger.warning("No embeddings found for matching documents")
+            if not len(index):
+                self.logger.warning(
+                    f"No documents found for topic '{self.base_agent.topic}' with filters: {metadata_filters}"
+                )
                 return []
 
-            # Step 5: Calculate similarity scores and rank results
-            results = []
-            self.logger.debug(f"Processing {len(embeddings_response.data)} embeddings...")
-
-            for embedding_data in embeddings_response.data:
-                if "embedding" in embedding_data and embedding_data["embedding"]:
-                    # Parse string embedding back to vector
-                    embedding = embedding_data["embedding"]
-                    if isinstance(embedding, str):
-                        try:
-                            import json
-                            embedding_vector = json.loads(embedding)
-                            if not isinstance(embedding_vector, list):
-                                self.logger.warning(
-                                    f"Parsed embedding is not a list: {type(embedding_vector)}"
-                                )
-                                continue
-                        except (json.JSONDecodeError, ValueError) as e:
-                            self.logger.warning(f"Failed to parse embedding string: {e}")
-                            continue
-                    else:
-                        embedding_vector = embedding
-
-                    # Debug: Check vector dimensions
-                    if len(embedding_vector) == 0:
-                        self.logger.warning(
-                            f"Empty embedding vector for document {embedding_data['document_id']}"
-                        )
-                        continue
-
-                    # Calculate cosine similarity
-                    similarity = self._cosine_similarity(
-                        query_embedding, embedding_vector
-                    )
-
-                    # Debug similarity calculation
-                    if similarity == 0.0:
-                        self.logger.debug(
-                            f"Zero similarity for document {embedding_data['document_id']} - query_dim: {len(query_embedding)}, doc_dim: {len(embedding_vector)}"
-                        )
-
-                    # Get document info
-                    doc_info = next(
-                        (
-                            doc
-                            for doc in docs_response.data
-                            if doc["id"] == embedding_data["document_id"]
-                        ),
-                        None,
-                    )
+            # Step 3: Rank chunks by cosine similarity (single matrix-vector product)
+            max_high_quality = max(max_results, 10)
+            results = index.search(query_embedding, max_high_quality)
+            self.logger.debug(f"Ranked {len(index)} embeddings, kept top {len(results)}")
 
-                    if doc_info:
-                        results.append(
-                            {
-                                "chunk_text": embedding_data["chunk_text"],
-                                "chunk_index": embedding_data["chunk_index"],
-                                "document_title": doc_info["title"],
-                                "document_keywords": doc_info.get(
-                                    "keywords", []
-                                ),
-                                "relevance_score": similarity,
-                                "document_id": embedding_data["document_id"],
-                            }
-                        )
-                else:
-                    self.logger.warning("Skipping embedding_data without valid embedding")
-
-            # Step 6: Apply cutoff score with smart fallback
+            # Step 4: Apply cutoff score with smart fallback
             CUTOFF_SCORE = 0.5  # Minimum acceptable similarity score
 
             # Filter by cutoff score
@@ -280,7 +218,6 @@ class RAGTool:
                     f"Found {len(high_quality_results)} high-quality results (≥{CUTOFF_SCORE})"
                 )
                 # Return all high-quality results (up to max_results or 10, whichever is higher)
-                max_high_quality = max(max_results, 10)
                 final_results = high_quality_results[:max_high_quality]
                 if len(high_quality_results) > max_results:
                     self.logger.debug(
@@ -315,39 +252,6 @@ class RAGTool:
                 self.logger.error(f"Error searching knowledge base: {error_msg}")
             return []
 
-    @staticmethod
-    def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors using scikit-learn."""
-        try:
-            from sklearn.metrics.pairwise import cosine_similarity
-            import numpy as np
-
-            # Convert to numpy arrays and reshape for sklearn
-            vec1_array = np.array(vec1).reshape(1, -1)
-            vec2_array = np.array(vec2).reshape(1, -1)
-
-            # Calculate cosine similarity
-            similarity = cosine_similarity(vec1_array, vec2_array)[0][0]
-            return float(similarity)
-
-        except ImportError:
-            # Fallback calculation if sklearn not available
-            if not vec1 or not vec2 or len(vec1) != len(vec2):
-                return 0.0
-
-            dot_product = sum(a * b for a, b in zip(vec1, vec2))
-            norm_a = sum(a * a for a in vec1) ** 0.5
-            norm_b = sum(b * b for b in vec2) ** 0.5
-
-            if norm_a == 0 or norm_b == 0:
-                return 0.0
-
-            return dot_product / (norm_a * norm_b)
-
-        except Exception as e:
-            # Silently handle errors to avoid cluttering debug output
-            return 0.0
-
     def extract_metadata_filters(self, user_query: str) -> Dict[str, Any]:
         """
         Extract metadata filters from user query using pattern matching.
@@ -165,7 +165,7 @@ class Reflector:
             """
 
             ai_start = time.time()
-            analyses_list, completion = self.llm.parse_structured(prompt, ReflectorAnalysisList, model_type="lightweight")
+            analyses_list, completion = await self.llm.aparse_structured(prompt, ReflectorAnalysisList, model_type="lightweight")
             ai_duration = time.time() - ai_start
             
             # Track latency
@@ -295,7 +295,7 @@ class Reflector:
             """
             
             ai_start = time.time()
-            analyses_list, completion = self.llm.parse_structured(prompt, ReflectorAnalysisList, model_type="lightweight")
+            analyses_list, completion = await self.llm.aparse_structured(prompt, ReflectorAnalysisList, model_type="lightweight")
             ai_duration = time.time() - ai_start
             
             # Track latency
@@ -608,16 +608,16 @@ class Reflector:
             """
 
             ai_start = time.time()
-            response = self.llm.chat_text([
+            response = (await self.llm.achat_text([
                 {
                     "role": "system",
                     "content": "You are an expert at analyzing training plans and identifying which constraints/preferences were applied.",
                 },
                 {"role": "user", "content": prompt},
-            ]).strip()
+            ])).strip()
             ai_duration = time.time() - ai_start
             
-            # Track latency (chat_text doesn't return completion object, so pass None)
+            # Track latency (achat_text doesn't return completion object, so pass None)
             await db_service.log_latency_event("reflector_identify_applied", ai_duration, None)
 
             if response.lower() == "none":
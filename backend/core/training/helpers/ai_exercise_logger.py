@@ -9,9 +9,10 @@ import os
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-from supabase import create_client, Client
+from supabase import Client
 from logging_config import get_logger
 from settings import settings
+from core.utils.supabase_pool import supabase_pool
 
 # Use centralized environment loader (respects test environment)
 try:
@@ -98,7 +99,9 @@ class AIExerciseLogger:
         
         # Only create client if we have both URL and key
         if self.supabase_url and self.supabase_key:
-            self.supabase = create_client(self.supabase_url, self.supabase_key)
+            self.supabase = supabase_pool.sync_client(
+                use_service_role=bool(settings.SUPABASE_SERVICE_ROLE_KEY)
+            )
         else:
             self.supabase = None
     
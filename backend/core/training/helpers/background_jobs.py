@@ -0,0 +1,204 @@
+"""
+Background Jobs for Training Plan Generation
+
+Durable follow-up work of /generate-plan, run by the job queue
+(core/utils/job_queue.py) instead of FastAPI BackgroundTasks:
+
+- build_initial_playbook: extract onboarding lessons, curate them and store the
+  user's initial playbook
+- build_plan_outline: generate the outline of the weeks after Week 1 and append
+  them to weekly_schedules
+
+Both are queued once the plan is saved and keyed per (user, plan, kind), so a
+re-onboarded or regenerated plan is never deduplicated into an earlier plan's
+job. Payloads are JSON (no JWT): the handlers write with the service role, because
+a retry may run long after the user's token expired. A handler raising an
+exception makes the queue retry the job with backoff.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Dict
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.job_queue import get_job_queue, job_handler
+from core.training.helpers.database_service import db_service
+from core.training.schemas.question_schemas import PersonalInfo
+from core.base.schemas.playbook_schemas import UserPlaybook
+
+logger = get_logger(__name__)
+
+INITIAL_PLAYBOOK_JOB = "build_initial_playbook"
+PLAN_OUTLINE_JOB = "build_plan_outline"
+
+# Future weeks outlined after Week 1
+OUTLINE_WEEKS = 12
+
+
+def _get_coach():
+    """Shared TrainingCoach of this process (imported lazily: training_api imports this module)."""
+    from core.training.training_api import get_training_coach
+
+    return get_training_coach()
+
+
+async def enqueue_initial_playbook(
+    user_id: str, plan_id: int, personal_info: PersonalInfo, formatted_initial_responses: str
+) -> Dict[str, Any]:
+    """Queue initial playbook generation (once per onboarding plan; a re-onboarded plan gets its own)."""
+    return await get_job_queue().enqueue(
+        INITIAL_PLAYBOOK_JOB,
+        {
+            "user_id": user_id,
+            "plan_id": plan_id,
+            "personal_info": personal_info.model_dump(mode="json"),
+            "formatted_initial_responses": formatted_initial_responses,
+        },
+        idempotency_key=f"{INITIAL_PLAYBOOK_JOB}:{user_id}:{plan_id}",
+    )
+
+
+async def enqueue_plan_outline(
+    user_id: str,
+    plan_id: int,
+    personal_info: PersonalInfo,
+    formatted_initial_responses: str,
+    training_plan_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Queue future week outline generation (once per plan)."""
+    return await get_job_queue().enqueue(
+        PLAN_OUTLINE_JOB,
+        {
+            "user_id": user_id,
+            "plan_id": plan_id,
+            "personal_info": personal_info.model_dump(mode="json"),
+            "formatted_initial_responses": formatted_initial_responses,
+            "training_plan_data": training_plan_data,
+        },
+        idempotency_key=f"{PLAN_OUTLINE_JOB}:{user_id}:{plan_id}",
+    )
+
+
+@job_handler(INITIAL_PLAYBOOK_JOB)
+async def build_initial_playbook(payload: Dict[str, Any]) -> None:
+    """Extract onboarding lessons, curate them and store the initial playbook."""
+    coach = _get_coach()
+    user_id = payload["user_id"]
+    personal_info = PersonalInfo(**payload["personal_info"])
+    formatted_initial_responses = payload["formatted_initial_responses"]
+
+    logger.info("📘 (job) START playbook generation")
+    # extract initial analyses (may be sync or async)
+    if inspect.iscoroutinefunction(coach.extract_initial_lessons_from_onboarding):
+        initial_analyses = await coach.extract_initial_lessons_from_onboarding(
+            personal_info=personal_info,
+            formatted_initial_responses=formatted_initial_responses,
+        )
+    else:
+        initial_analyses = await asyncio.to_thread(
+            coach.extract_initial_lessons_from_onboarding,
+            personal_info,
+            formatted_initial_responses,
+        )
+
+    if not initial_analyses:
+        logger.warning("⚠️ (job) No initial lessons extracted - skipping playbook creation")
+        return
+
+    empty_playbook = UserPlaybook(
+        user_id=user_id,
+        lessons=[],
+        total_lessons=0,
+    )
+
+    logger.info("📘 (job) Processing initial lessons through Curator...")
+    # process_batch_lessons may be sync or async (LLM wrappers sometimes sync)
+    if inspect.iscoroutinefunction(coach.curator.process_batch_lessons):
+        curated_playbook = await coach.curator.process_batch_lessons(
+            analyses=initial_analyses,
+            existing_playbook=empty_playbook,
+            source_plan_id="onboarding",
+        )
+    else:
+        curated_playbook = await asyncio.to_thread(
+            coach.curator.process_batch_lessons,
+            initial_analyses,
+            empty_playbook,
+            "onboarding",
+        )
+
+    initial_playbook = coach.curator.update_playbook_from_curated(
+        updated_playbook=curated_playbook,
+        user_id=user_id,
+    )
+
+    if settings.PLAYBOOK_CONTEXT_MATCHING_ENABLED:
+        logger.info("📘 (job) Enriching lessons with knowledge base context...")
+        if inspect.iscoroutinefunction(coach.curator.enrich_lessons_with_context):
+            initial_playbook = await coach.curator.enrich_lessons_with_context(
+                playbook=initial_playbook,
+                rag_service=coach.rag_service,
+            )
+        else:
+            initial_playbook = await asyncio.to_thread(
+                coach.curator.enrich_lessons_with_context,
+                initial_playbook,
+                coach.rag_service,
+            )
+    else:
+        logger.info("📘 (job) Playbook context enrichment disabled; skipping knowledge base matching.")
+
+    logger.info(f"📘 (job) Curated initial playbook: {len(initial_playbook.lessons)} lessons (deduplicated)")
+
+    result = await db_service.update_user_profile(
+        user_id=user_id,
+        data={"user_playbook": initial_playbook.model_dump(mode="json")},
+        use_service_role=True,
+    )
+    if not result.get("success"):
+        raise RuntimeError(f"Failed to store initial playbook: {result.get('error')}")
+    logger.info("✅ (job) Playbook stored successfully")
+
+
+@job_handler(PLAN_OUTLINE_JOB)
+async def build_plan_outline(payload: Dict[str, Any]) -> None:
+    """Generate future week outlines and append them to the weekly_schedules table."""
+    coach = _get_coach()
+    plan_id = payload["plan_id"]
+    personal_info = PersonalInfo(**payload["personal_info"])
+
+    logger.info("📘 (job) START outline generation")
+    # _generate_future_week_outlines may be async or sync
+    if inspect.iscoroutinefunction(coach._generate_future_week_outlines):
+        outline_payload = await coach._generate_future_week_outlines(
+            personal_info=personal_info,
+            formatted_initial_responses=payload["formatted_initial_responses"],
+            existing_plan=payload["training_plan_data"],
+            outline_weeks=OUTLINE_WEEKS,
+        )
+    else:
+        outline_payload = await asyncio.to_thread(
+            coach._generate_future_week_outlines,
+            personal_info,
+            payload["formatted_initial_responses"],
+            payload["training_plan_data"],
+            OUTLINE_WEEKS,
+        )
+
+    # Append outline weeks (2-13) to weekly_schedules table
+    future_weeks = outline_payload.get("weekly_schedules", [])
+    if not future_weeks:
+        logger.warning("⚠️ (job) Outline generation returned no weeks")
+        return
+    for week_data in future_weeks:
+        week_data["training_plan_id"] = plan_id
+        week_data["daily_trainings"] = []  # Outline only, no exercises
+
+    result = await db_service.append_weekly_schedules(
+        training_plan_id=plan_id,
+        weekly_schedules=future_weeks,
+    )
+    if not result.get("success"):
+        raise RuntimeError(f"Failed to append outlines: {result.get('error')}")
+    logger.info(f"✅ (job) Appended {len(future_weeks)} future week outlines to weekly_schedules")
@@ -2,9 +2,11 @@
 Database service for handling user profiles and training plans with Supabase.
 """
 
+import asyncio
 import os
 from typing import Optional, Dict, Any, List
-from supabase import create_client, Client
+from supabase import Client
+from postgrest import AsyncPostgrestClient
 from settings import settings
 import json
 from datetime import datetime, timezone, timedelta
@@ -12,6 +14,14 @@ from logging_config import get_logger
 import jwt
 from fastapi import HTTPException
 from core.utils.env_loader import is_test_environment
+from core.utils.supabase_pool import supabase_pool
+from core.utils.event_sink import event_sink
+from core.training.helpers.insights_metrics import insights_metrics
+from core.training.helpers.plan_summary_cache import plan_summaries
+
+# PostgREST/Postgres error codes of an RPC that was never executed (function missing from the
+# schema cache / undefined); only then is falling back to bulk inserts safe
+_RPC_NOT_EXECUTED_CODES = {"PGRST202", "42883"}
 
 
 def extract_user_id_from_jwt(jwt_token: str) -> str:
@@ -163,7 +173,7 @@ class DatabaseService:
                 
                 # Only create client if we have valid credentials
                 if supabase_url and supabase_key:
-                    self.supabase = create_client(supabase_url, supabase_key)
+                    self.supabase = supabase_pool.sync_client(use_service_role=False)
                     self.logger.debug("Supabase client initialized successfully")
                 else:
                     self.logger.warning("Supabase credentials missing - client not initialized")
@@ -196,15 +206,18 @@ class DatabaseService:
                 )
         return self.supabase
     
-    def _create_supabase_client(self, use_service_role: bool = False) -> Client:
+    def _create_supabase_client(self, use_service_role: bool = False) -> AsyncPostgrestClient:
         """
-        Create a Supabase client, handling test environments gracefully.
+        Get a pooled async Supabase (PostgREST) client, handling test environments gracefully.
+        
+        Clients are long-lived and share one keep-alive HTTP session, so queries
+        don't pay for a new connection per call. Queries must be awaited.
         
         Args:
             use_service_role: If True, use service role key; otherwise use anon key
             
         Returns:
-            Client instance
+            AsyncPostgrestClient instance
             
         Raises:
             ValueError: In test environments (tests should mock this method)
@@ -228,10 +241,16 @@ class DatabaseService:
                 f"Key={'service_role' if use_service_role else 'anon'}={bool(supabase_key)}"
             )
         
-        return create_client(supabase_url, supabase_key)
+        if use_service_role:
+            return supabase_pool.service_role_client()
+        return supabase_pool.anon_client()
 
-    def _get_authenticated_client(self, jwt_token: Optional[str] = None) -> Client:
-        """Create an authenticated Supabase client with service role key for server-side operations."""
+    def _get_anon_client(self) -> AsyncPostgrestClient:
+        """Get the pooled async client using the anon key."""
+        return self._create_supabase_client(use_service_role=False)
+
+    def _get_authenticated_client(self, jwt_token: Optional[str] = None) -> AsyncPostgrestClient:
+        """Get a pooled async Supabase client with service role key for server-side operations."""
         # In test environment, raise error - tests should mock this method
         is_test_env = is_test_environment()
         if is_test_env:
@@ -240,35 +259,24 @@ class DatabaseService:
                 "Mock DatabaseService methods instead."
             )
         
-        self.logger.debug("Creating authenticated client with service role key")
-
         # Use settings (which now reads from environment dynamically)
         # Use service role key for server-side operations (bypasses RLS)
         if settings.SUPABASE_SERVICE_ROLE_KEY:
-            client = create_client(
-                settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY
-            )
-            self.logger.debug("Using service role key for authentication")
-            # Ensure service role key is never logged or exposed
-            if not settings.SUPABASE_SERVICE_ROLE_KEY:
-                self.logger.error("Service role key is empty - this should not happen")
-        else:
-            # Fallback to anon key with JWT token
-            self.logger.warning(
-                "No service role key found, using anon key with JWT token"
-            )
-            if not jwt_token:
-                raise ValueError("JWT token required when service role key is not available")
-            client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
-            try:
-                client.postgrest.auth(jwt_token)
-                self.logger.debug("JWT token set successfully")
-            except Exception as e:
-                # Don't log the actual token or key in error messages
-                self.logger.error(f"Error setting JWT token: {type(e).__name__}")
-                raise
-
-        return client
+            self.logger.debug("Using pooled service role client for authentication")
+            return supabase_pool.service_role_client()
+        
+        # Fallback to anon key with JWT token
+        self.logger.warning(
+            "No service role key found, using anon key with JWT token"
+        )
+        if not jwt_token:
+            raise ValueError("JWT token required when service role key is not available")
+        try:
+            return supabase_pool.jwt_client(jwt_token)
+        except Exception as e:
+            # Don't log the actual token or key in error messages
+            self.logger.error(f"Error setting JWT token: {type(e).__name__}")
+            raise
 
     def _clean_for_json_serialization(self, data: Any) -> Any:
         """
@@ -305,10 +313,10 @@ class DatabaseService:
             if jwt_token:
                 supabase_client = self._get_authenticated_client(jwt_token)
             else:
-                supabase_client = self.supabase
+                supabase_client = self._get_anon_client()
 
             # Insert user profile
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .insert({"user_id": user_id, **profile_data})
                 .execute()
@@ -342,7 +350,11 @@ class DatabaseService:
             }
 
     async def update_user_profile(
-        self, user_id: str, data: Dict[str, Any], jwt_token: Optional[str] = None
+        self,
+        user_id: str,
+        data: Dict[str, Any],
+        jwt_token: Optional[str] = None,
+        use_service_role: bool = False,
     ) -> Dict[str, Any]:
         """
         Update user profile with any provided fields.
@@ -351,6 +363,8 @@ class DatabaseService:
             user_id: The user's UUID
             data: Dictionary of fields to update (only non-None values will be updated)
             jwt_token: Optional JWT token for authentication
+            use_service_role: Use the service role key when no JWT is given
+                              (background jobs, which outlive the user's token)
 
         Returns:
             Dict with success status and data/error information
@@ -359,8 +373,10 @@ class DatabaseService:
             # Use authenticated client if JWT token is provided
             if jwt_token:
                 supabase_client = self._get_authenticated_client(jwt_token)
+            elif use_service_role:
+                supabase_client = self._create_supabase_client(use_service_role=True)
             else:
-                supabase_client = self.supabase
+                supabase_client = self._get_anon_client()
 
             # Add updated_at timestamp
             update_data = {**data, "updated_at": datetime.utcnow().isoformat()}
@@ -377,7 +393,7 @@ class DatabaseService:
                 }
 
             # Update the user profile
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .update(update_data)
                 .eq("user_id", user_id)
@@ -387,7 +403,7 @@ class DatabaseService:
             if result.data and len(result.data) > 0:
                 updated = result.data[0]
             else:
-                fetch = (
+                fetch = await (
                     supabase_client.table("user_profiles")
                     .select("*")
                     .eq("user_id", user_id)
@@ -442,8 +458,8 @@ class DatabaseService:
             Dict containing success status and profile data or error
         """
         try:
-            result = (
-                self.supabase.table("user_profiles")
+            result = await (
+                self._get_anon_client().table("user_profiles")
                 .select("*")
                 .eq("user_id", user_id)
                 .execute()
@@ -475,7 +491,7 @@ class DatabaseService:
             if jwt_token:
                 supabase_client = self._get_authenticated_client(jwt_token)
             else:
-                supabase_client = self.supabase
+                supabase_client = self._get_anon_client()
 
             update_data = {
                 **data,
@@ -493,7 +509,7 @@ class DatabaseService:
                     "message": "No non-null fields provided for update",
                 }
 
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .update(update_data)
                 .eq("id", user_profile_id)
@@ -503,7 +519,7 @@ class DatabaseService:
             if result.data and len(result.data) > 0:
                 updated = result.data[0]
             else:
-                fetch = (
+                fetch = await (
                     supabase_client.table("user_profiles")
                     .select("*")
                     .eq("id", user_profile_id)
@@ -543,6 +559,305 @@ class DatabaseService:
                 "fields": list(data.keys()) if data else [],
             }
 
+    # ============================================================================
+    # PLAN WRITER HELPERS
+    # ============================================================================
+
+    def _build_week_rows(
+        self,
+        training_plan_id: int,
+        weekly_schedules: List[Dict[str, Any]],
+        drop_removed: bool = False,
+        include_scheduled_date: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the insert records for weeks -> days -> strength exercises / endurance sessions.
+
+        Strength exercises without exercise_id (and, with drop_removed, those marked
+        _remove_from_plan) are dropped, and each day's strength_exercises list is
+        replaced by the kept exercises so the returned plan matches what is stored.
+
+        Returns:
+            One entry per week: {"data", "record", "days": [{"data", "record", "strength", "endurance"}]}
+            where strength/endurance are lists of (source dict, insert record) pairs.
+        """
+        week_rows = []
+        for week_data in weekly_schedules:
+            week_rows.append({
+                "data": week_data,
+                "record": {
+                    "training_plan_id": training_plan_id,
+                    "week_number": week_data.get("week_number", 1),
+                    "focus_theme": week_data.get("focus_theme", ""),
+                    "primary_goal": week_data.get("primary_goal", ""),
+                    "progression_lever": week_data.get("progression_lever", ""),
+                    "created_at": datetime.utcnow().isoformat(),
+                    "updated_at": datetime.utcnow().isoformat(),
+                },
+                "days": [],
+            })
+
+            for daily_data in week_data.get("daily_trainings", []):
+                is_rest_day = daily_data.get("is_rest_day", False)
+                daily_training_record = {
+                    "day_of_week": daily_data.get("day_of_week", "Monday"),
+                    "is_rest_day": is_rest_day,
+                    "training_type": daily_data.get(
+                        "training_type", "rest" if is_rest_day else "strength"
+                    ),
+                    "justification": daily_data.get("justification", ""),
+                    "created_at": datetime.utcnow().isoformat(),
+                    "updated_at": datetime.utcnow().isoformat(),
+                }
+                # Add scheduled_date if it was mapped by date_mapper
+                if include_scheduled_date and "scheduled_date" in daily_data:
+                    daily_training_record["scheduled_date"] = daily_data["scheduled_date"]
+
+                strength_rows = []
+                endurance_rows = []
+                if not is_rest_day:
+                    dropped_exercises = []
+                    for exercise_data in daily_data.get("strength_exercises", []):
+                        if not exercise_data:
+                            continue
+                        exercise_id = exercise_data.get("exercise_id")
+                        exercise_name = exercise_data.get("exercise_name", "Unknown")
+                        if exercise_id is None:
+                            dropped_exercises.append(f"{exercise_name} (no exercise_id)")
+                            continue
+                        if drop_removed and exercise_data.get("_remove_from_plan", False):
+                            dropped_exercises.append(f"{exercise_name} (marked _remove_from_plan)")
+                            continue
+
+                        sets = exercise_data.get("sets", 3)
+                        strength_rows.append((exercise_data, {
+                            "exercise_id": exercise_id,
+                            "sets": sets,
+                            "reps": exercise_data.get("reps", [10, 10, 10]),
+                            "weight": exercise_data.get("weight", [0.0] * sets),
+                            "execution_order": exercise_data.get("execution_order", 0),
+                            "completed": False,
+                            "created_at": datetime.utcnow().isoformat(),
+                            "updated_at": datetime.utcnow().isoformat(),
+                        }))
+
+                    if dropped_exercises:
+                        self.logger.warning(
+                            f"🗑️ Week {week_rows[-1]['record']['week_number']} {daily_training_record['day_of_week']}: "
+                            f"Dropped {len(dropped_exercises)} exercise(s): {', '.join(dropped_exercises[:3])}"
+                            f"{'...' if len(dropped_exercises) > 3 else ''}"
+                        )
+
+                    # CRITICAL: Keep only exercises that are actually saved to DB
+                    daily_data["strength_exercises"] = [data for data, _ in strength_rows]
+
+                    for session_data in daily_data.get("endurance_sessions", []) or []:
+                        endurance_rows.append((session_data, {
+                            "name": session_data.get("name", "Endurance Session"),
+                            "description": session_data.get("description", ""),
+                            "sport_type": session_data.get("sport_type", "running"),
+                            "training_volume": session_data.get("training_volume", 30.0),
+                            "unit": session_data.get("unit", "minutes"),
+                            "heart_rate_zone": session_data.get("heart_rate_zone", 3),  # Default to Zone 3 if not provided
+                            "execution_order": session_data.get("execution_order", 0),
+                            "completed": False,
+                            "created_at": datetime.utcnow().isoformat(),
+                            "updated_at": datetime.utcnow().isoformat(),
+                        }))
+
+                week_rows[-1]["days"].append({
+                    "data": daily_data,
+                    "record": daily_training_record,
+                    "strength": strength_rows,
+                    "endurance": endurance_rows,
+                })
+        return week_rows
+
+    async def _insert_week_rows(self, supabase_client, week_rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert prepared week rows and write the generated IDs back into the source dicts.
+
+        Uses the transactional RPC when TRAINING_PLAN_WRITE_RPC is configured (one round
+        trip), falling back to level-by-level bulk inserts (one insert per table) only when
+        the function does not exist or cannot be called, i.e. nothing was written.
+
+        Raises:
+            ValueError: If a level did not return one row per inserted record
+        """
+        if not week_rows:
+            return
+
+        rpc_name = settings.TRAINING_PLAN_WRITE_RPC
+        if rpc_name:
+            try:
+                await self._insert_week_rows_rpc(supabase_client, rpc_name, week_rows)
+                return
+            except Exception as e:
+                # Anything else (timeouts, unexpected results) may have committed the weeks already;
+                # inserting them again would duplicate the plan
+                if getattr(e, "code", None) not in _RPC_NOT_EXECUTED_CODES:
+                    raise
+                self.logger.warning(f"⚠️ Plan write RPC '{rpc_name}' is not available, falling back to bulk inserts: {e}")
+
+        await self._insert_week_rows_bulk(supabase_client, week_rows)
+
+    async def _insert_week_rows_bulk(self, supabase_client, week_rows: List[Dict[str, Any]]) -> None:
+        """Insert weeks, then days, then exercises + sessions - one bulk insert per level."""
+
+        async def bulk_insert(table: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if not records:
+                return []
+            result = await supabase_client.table(table).insert(records).execute()
+            # Returned rows are in insert order, so IDs map back by position
+            if not result.data or len(result.data) != len(records):
+                raise ValueError(
+                    f"Bulk insert into {table} returned {len(result.data) if result.data else 0} records, "
+                    f"expected {len(records)}"
+                )
+            return result.data
+
+        # Level 1: weeks
+        inserted_weeks = await bulk_insert("weekly_schedules", [week["record"] for week in week_rows])
+        days = []
+        for week, inserted in zip(week_rows, inserted_weeks):
+            week["data"]["id"] = inserted["id"]
+            week["data"]["training_plan_id"] = week["record"]["training_plan_id"]
+            for day in week["days"]:
+                day["record"]["weekly_schedule_id"] = inserted["id"]
+                days.append(day)
+
+        # Level 2: days
+        inserted_days = await bulk_insert("daily_training", [day["record"] for day in days])
+        strength_rows = []
+        endurance_rows = []
+        for day, inserted in zip(days, inserted_days):
+            day["data"]["id"] = inserted["id"]
+            day["data"]["weekly_schedule_id"] = day["record"]["weekly_schedule_id"]
+            for row in day["strength"]:
+                row[1]["daily_training_id"] = inserted["id"]
+                strength_rows.append(row)
+            for row in day["endurance"]:
+                row[1]["daily_training_id"] = inserted["id"]
+                endurance_rows.append(row)
+
+        # Level 3: strength exercises and endurance sessions (independent tables)
+        inserted_strength, inserted_endurance = await asyncio.gather(
+            bulk_insert("strength_exercise", [record for _, record in strength_rows]),
+            bulk_insert("endurance_session", [record for _, record in endurance_rows]),
+        )
+        for (data, record), inserted in zip(strength_rows + endurance_rows, inserted_strength + inserted_endurance):
+            data["id"] = inserted["id"]
+            data["daily_training_id"] = record["daily_training_id"]
+
+    async def _insert_week_rows_rpc(self, supabase_client, rpc_name: str, week_rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert the whole week tree in one transactional RPC call.
+
+        The function (see scripts/sql/insert_training_weeks.sql) receives nested
+        records and returns the generated IDs in the same nested order.
+        """
+        payload = [
+            {
+                **week["record"],
+                "daily_training": [
+                    {
+                        **day["record"],
+                        "strength_exercise": [record for _, record in day["strength"]],
+                        "endurance_session": [record for _, record in day["endurance"]],
+                    }
+                    for day in week["days"]
+                ],
+            }
+            for week in week_rows
+        ]
+        result = await supabase_client.rpc(rpc_name, {"p_weeks": payload}).execute()
+        inserted_weeks = result.data or []
+        if len(inserted_weeks) != len(week_rows):
+            raise ValueError(f"RPC returned {len(inserted_weeks)} weeks, expected {len(week_rows)}")
+
+        for week, inserted_week in zip(week_rows, inserted_weeks):
+            week["data"]["id"] = inserted_week["id"]
+            week["data"]["training_plan_id"] = week["record"]["training_plan_id"]
+            for day, inserted_day in zip(week["days"], inserted_week["daily_training"]):
+                day["data"]["id"] = inserted_day["id"]
+                day["data"]["weekly_schedule_id"] = inserted_week["id"]
+                for (data, _), db_id in zip(day["strength"], inserted_day["strength_exercise"]):
+                    data["id"] = db_id
+                    data["daily_training_id"] = inserted_day["id"]
+                for (data, _), db_id in zip(day["endurance"], inserted_day["endurance_session"]):
+                    data["id"] = db_id
+                    data["daily_training_id"] = inserted_day["id"]
+
+    async def _enrich_strength_exercises(
+        self, supabase_client, weekly_schedules: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Attach exercise metadata to every strength exercise in the given weeks.
+
+        Metadata comes from the in-memory exercise catalog, with one bulk query for
+        any misses. Stores the row under "exercises" (plural, Supabase relational
+        format) and flattens name/muscles/equipment/target_area/force to top level.
+
+        Returns:
+            Number of enriched exercises
+        """
+        from core.training.helpers.exercise_catalog import exercise_catalog
+
+        strength_exercises = [
+            strength_exercise
+            for weekly_schedule in weekly_schedules
+            for daily_training in weekly_schedule.get("daily_trainings", [])
+            if not daily_training.get("is_rest_day", False)
+            for strength_exercise in daily_training.get("strength_exercises", [])
+        ]
+        all_exercise_ids = {se.get("exercise_id") for se in strength_exercises if se.get("exercise_id")}
+
+        exercise_metadata_map = {}
+        missing_ids = []
+        for exercise_id in all_exercise_ids:
+            exercise_metadata = exercise_catalog.get_by_id(exercise_id)
+            if exercise_metadata is not None:
+                exercise_metadata_map[exercise_id] = dict(exercise_metadata)
+            else:
+                missing_ids.append(exercise_id)
+
+        if missing_ids:
+            try:
+                metadata_result = await (
+                    supabase_client.table("exercises")
+                    .select("*")
+                    .in_("id", missing_ids)
+                    .execute()
+                )
+                for exercise_metadata in metadata_result.data or []:
+                    exercise_metadata_map[exercise_metadata.get("id")] = exercise_metadata
+            except Exception as e:
+                self.logger.warning(f"Error bulk-fetching exercise metadata: {e}")
+
+        enriched_count = 0
+        for strength_exercise in strength_exercises:
+            exercise_id = strength_exercise.get("exercise_id")
+            if not exercise_id:
+                continue
+            exercise_metadata = exercise_metadata_map.get(exercise_id)
+            if exercise_metadata:
+                # Store as "exercises" (plural) to match Supabase format (for frontend compatibility)
+                strength_exercise["exercises"] = exercise_metadata
+                # CRITICAL: Add exercise_name, main_muscle, equipment at top-level for Pydantic validation and frontend round-trip
+                strength_exercise["exercise_name"] = exercise_metadata.get("name")
+                # Extract main_muscle from main_muscles array (first item) - database has main_muscles, not main_muscle
+                main_muscles_array = exercise_metadata.get("primary_muscles") or exercise_metadata.get("main_muscles", [])
+                strength_exercise["main_muscle"] = main_muscles_array[0] if isinstance(main_muscles_array, list) and main_muscles_array else None
+                strength_exercise["equipment"] = exercise_metadata.get("equipment")
+                # Also flatten enriched fields to top-level for schema validation and prompt formatting
+                strength_exercise["target_area"] = exercise_metadata.get("target_area")
+                strength_exercise["main_muscles"] = main_muscles_array
+                strength_exercise["force"] = exercise_metadata.get("force")
+                enriched_count += 1
+            else:
+                strength_exercise["exercises"] = None
+        return enriched_count
+
     async def save_training_plan(
         self,
         user_profile_id: int,
@@ -567,10 +882,10 @@ class DatabaseService:
             if jwt_token:
                 supabase_client = self._get_authenticated_client(jwt_token)
             else:
-                supabase_client = self.supabase
+                supabase_client = self._get_anon_client()
 
             # First, check if a training plan already exists for this user
-            existing_plan_result = (
+            existing_plan_result = await (
                 supabase_client.table("training_plans")
                 .select("id")
                 .eq("user_profile_id", user_profile_id)
@@ -630,398 +945,60 @@ class DatabaseService:
                 "summary": plan_dict.get("summary", ""),
                 "justification": plan_dict.get("justification", ""),
                 "ai_message": plan_dict.get("ai_message"),  # Store AI completion message
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-
-            # Note: user_playbook is stored in user_profiles, not training_plans
-            # Plans reference the user's playbook via user_profile_id FK
-            if user_playbook:
-                self.logger.info(
-                    f"📘 User has playbook with {len(user_playbook.get('lessons', []))} lessons (stored in user_profiles)"
-                )
-
-            # Insert the training plan
-            self.logger.debug(
-                f"Saving training plan with justification: {plan_record.get('justification', 'No justification provided')[:100]}..."
-            )
-            plan_result = (
-                supabase_client.table("training_plans").insert(plan_record).execute()
-            )
-
-            if not plan_result.data:
-                self.logger.error("Failed to create training plan record")
-                return {
-                    "success": False,
-                    "error": f"Failed to create training plan record: {plan_result}",
-                }
-
-            training_plan_id = plan_result.data[0]["id"]
-            
-            # Enrich plan_dict with database IDs for returning complete structure
-            plan_dict["id"] = training_plan_id
-            plan_dict["user_profile_id"] = user_profile_id
-
-            # Save weekly schedules and their details
-            weekly_schedules = plan_dict.get("weekly_schedules", [])
-
-            self.logger.info(f"Recreating weekly_schedules: count={len(weekly_schedules)}")
-            for week_index, week_data in enumerate(weekly_schedules):
-                week_number = week_data.get("week_number", 1)
-
-                # Create weekly schedule record
-                weekly_schedule_record = {
-                    "training_plan_id": training_plan_id,
-                    "week_number": week_number,
-                    "focus_theme": week_data.get("focus_theme", ""),
-                    "primary_goal": week_data.get("primary_goal", ""),
-                    "progression_lever": week_data.get("progression_lever", ""),
-                    "created_at": datetime.utcnow().isoformat(),
-                    "updated_at": datetime.utcnow().isoformat(),
-                }
-
-                self.logger.debug(
-                    f"Saving weekly schedule {week_number} with focus_theme: {weekly_schedule_record.get('focus_theme', 'N/A')}"
-                )
-                weekly_result = (
-                    supabase_client.table("weekly_schedules")
-                    .insert(weekly_schedule_record)
-                    .execute()
-                )
-
-                if not weekly_result.data:
-                    continue
-
-                weekly_schedule_id = weekly_result.data[0]["id"]
-                
-                # Enrich week_data with database ID
-                week_data["id"] = weekly_schedule_id
-                week_data["training_plan_id"] = training_plan_id
-
-                # Save daily trainings
-                daily_trainings = week_data.get("daily_trainings", [])
-                self.logger.info(f"Week {week_index} (id={weekly_schedule_id}) daily_trainings: count={len(daily_trainings)}")
-
-                for daily_index, daily_data in enumerate(daily_trainings):
-                    day_of_week = daily_data.get("day_of_week", "Monday")
-                    is_rest_day = daily_data.get("is_rest_day", False)
-
-                    # Create daily training record
-                    daily_training_record = {
-                        "weekly_schedule_id": weekly_schedule_id,
-                        "day_of_week": day_of_week,
-                        "is_rest_day": is_rest_day,
-                        "training_type": daily_data.get(
-                            "training_type", "rest" if is_rest_day else "strength"
-                        ),
-                        "justification": daily_data.get("justification", ""),
-                        "created_at": datetime.utcnow().isoformat(),
-                        "updated_at": datetime.utcnow().isoformat(),
-                    }
-                    
-                    # Add scheduled_date if it was mapped by date_mapper
-                    if "scheduled_date" in daily_data:
-                        daily_training_record["scheduled_date"] = daily_data["scheduled_date"]
-
-                    self.logger.debug(
-                        f"Saving daily training {day_of_week} with justification: {daily_training_record.get('justification', 'No justification provided')[:100]}..."
-                    )
-                    daily_result = (
-                        supabase_client.table("daily_training")
-                        .insert(daily_training_record)
-                        .execute()
-                    )
-
-                    if not daily_result.data:
-                        continue
-
-                    daily_training_id = daily_result.data[0]["id"]
-                    
-                    # Enrich daily_data with database ID
-                    daily_data["id"] = daily_training_id
-                    daily_data["weekly_schedule_id"] = weekly_schedule_id
-
-                    # Save exercises and endurance sessions if not a rest day
-                    if not is_rest_day:
-                        # Save strength exercises (BULK INSERT for performance)
-                        raw_strength_exercises = daily_data.get("strength_exercises", [])
-                        
-                        # TRACE: Log before filtering
-                        self.logger.debug(
-                            f"🔍 [SAVE_PLAN] Week {week_index} Day {daily_index} ({day_of_week}): "
-                            f"Processing {len(raw_strength_exercises)} raw exercises"
-                        )
-                        
-                        # Filter out any exercises without exercise_id OR marked for removal (data hygiene)
-                        filtered_exercises_list = []
-                        dropped_exercises = []
-                        for ex in raw_strength_exercises:
-                            if not ex:
-                                continue
-                            exercise_id = ex.get("exercise_id")
-                            is_marked_remove = ex.get("_remove_from_plan", False)
-                            exercise_name = ex.get("exercise_name", "Unknown")
-                            
-                            if exercise_id is None:
-                                dropped_exercises.append(f"{exercise_name} (no exercise_id)")
-                            elif is_marked_remove:
-                                dropped_exercises.append(f"{exercise_name} (marked _remove_from_plan)")
-                            else:
-                                filtered_exercises_list.append(ex)
-                        
-                        strength_exercises = filtered_exercises_list
-                        dropped_count = len(raw_strength_exercises) - len(strength_exercises)
-                        
-                        if dropped_count > 0:
-                            self.logger.warning(
-                                f"🗑️ [SAVE_PLAN] Week {week_index} Day {daily_index} ({day_of_week}): "
-                                f"Dropped {dropped_count} exercise(s): {', '.join(dropped_exercises[:3])}"
-                                f"{'...' if len(dropped_exercises) > 3 else ''}"
-                            )
-                        self.logger.info(
-                            f"✅ [SAVE_PLAN] Week {week_index} Day {daily_index} ({day_of_week}): "
-                            f"kept={len(strength_exercises)}, dropped={dropped_count}"
-                        )
-
-                        if strength_exercises:
-                            # Prepare all strength exercise records for bulk insert
-                            strength_exercise_records = []
-                            for exercise_data in strength_exercises:
-                                exercise_id = exercise_data.get("exercise_id")
-                                sets = exercise_data.get("sets", 3)
-                                reps = exercise_data.get("reps", [10, 10, 10])
-                                weight = exercise_data.get("weight", [0.0] * sets)
-
-                                strength_exercise_records.append({
-                                    "daily_training_id": daily_training_id,
-                                    "exercise_id": exercise_id,
-                                    "sets": sets,
-                                    "reps": reps,
-                                    "weight": weight,
-                                    "execution_order": exercise_data.get("execution_order", 0),
-                                    "completed": False,
-                                    "created_at": datetime.utcnow().isoformat(),
-                                    "updated_at": datetime.utcnow().isoformat(),
-                                })
-
-                            # Bulk insert all strength exercises at once
-                            exercise_result = (
-                                supabase_client.table("strength_exercise")
-                                .insert(strength_exercise_records)
-                                .execute()
-                            )
-                            
-                            # Map returned IDs back to exercise_data objects (order is preserved by Supabase)
-                            if exercise_result.data and len(exercise_result.data) == len(strength_exercises):
-                                for i, exercise_data in enumerate(strength_exercises):
-                                    db_id = exercise_result.data[i]["id"]
-                                    exercise_data["id"] = db_id
-                                    exercise_data["daily_training_id"] = daily_training_id
-                                    self.logger.debug(
-                                        f"✅ [SAVE_PLAN] Enriched exercise '{exercise_data.get('exercise_name', 'Unknown')}' "
-                                        f"with DB ID: {db_id}, exercise_id: {exercise_data.get('exercise_id')}"
-                                    )
-                            else:
-                                # Fallback: if order doesn't match, log warning but continue
-                                self.logger.warning(
-                                    f"⚠️ [SAVE_PLAN] Bulk insert returned {len(exercise_result.data) if exercise_result.data else 0} records, "
-                                    f"expected {len(strength_exercises)}. IDs may not be enriched correctly."
-                                )
-                                # Still try to enrich if we have data
-                                if exercise_result.data:
-                                    for i, exercise_data in enumerate(strength_exercises):
-                                        if i < len(exercise_result.data):
-                                            db_id = exercise_result.data[i]["id"]
-                                            exercise_data["id"] = db_id
-                                            exercise_data["daily_training_id"] = daily_training_id
-                            
-                            # CRITICAL: Update daily_data with filtered and enriched exercises
-                            # This ensures plan_dict only contains exercises that were actually saved to DB
-                            daily_data["strength_exercises"] = strength_exercises
-                            self.logger.debug(
-                                f"✅ [SAVE_PLAN] Updated daily_data['strength_exercises'] with {len(strength_exercises)} "
-                                f"filtered and enriched exercises for {day_of_week}"
-                            )
-                        else:
-                            # No valid exercises - set to empty list to prevent invalid exercises from reaching frontend
-                            daily_data["strength_exercises"] = []
-
-                        # Save endurance sessions (BULK INSERT for performance)
-                        endurance_sessions = daily_data.get("endurance_sessions", [])
-
-                        if endurance_sessions:
-                            # Prepare all endurance session records for bulk insert
-                            endurance_session_records = []
-                            for session_data in endurance_sessions:
-                                name = session_data.get("name", "Endurance Session")
-                                description = session_data.get("description", "")
-                                sport_type = session_data.get("sport_type", "running")
-                                training_volume = session_data.get("training_volume", 30.0)
-                                unit = session_data.get("unit", "minutes")
-                                heart_rate_zone = session_data.get("heart_rate_zone", 3)  # Default to Zone 3 if not provided
-
-                                endurance_session_records.append({
-                                    "daily_training_id": daily_training_id,
-                                    "name": name,
-                                    "description": description,
-                                    "sport_type": sport_type,
-                                    "training_volume": training_volume,
-                                    "unit": unit,
-                                    "heart_rate_zone": heart_rate_zone,
-                                    "execution_order": session_data.get("execution_order", 0),
-                                    "completed": False,
-                                    "created_at": datetime.utcnow().isoformat(),
-                                    "updated_at": datetime.utcnow().isoformat(),
-                                })
-
-                            # Bulk insert all endurance sessions at once
-                            session_result = (
-                                supabase_client.table("endurance_session")
-                                .insert(endurance_session_records)
-                                .execute()
-                            )
-                            
-                            # Map returned IDs back to session_data objects (order is preserved by Supabase)
-                            if session_result.data and len(session_result.data) == len(endurance_sessions):
-                                for i, session_data in enumerate(endurance_sessions):
-                                    session_data["id"] = session_result.data[i]["id"]
-                                    session_data["daily_training_id"] = daily_training_id
-                            else:
-                                # Fallback: if order doesn't match, log warning but continue
-                                self.logger.warning(
-                                    f"Bulk insert returned {len(session_result.data) if session_result.data else 0} records, "
-                                    f"expected {len(endurance_sessions)}. IDs may not be enriched correctly."
-                                )
-                                # Still try to enrich if we have data
-                                if session_result.data:
-                                    for i, session_data in enumerate(endurance_sessions):
-                                        if i < len(session_result.data):
-                                            session_data["id"] = session_result.data[i]["id"]
-                                            session_data["daily_training_id"] = daily_training_id
-
-            self.logger.info(
-                f"Training plan saved successfully (ID: {training_plan_id})"
-            )
-
-            # Enrich plan_dict with exercise metadata (BULK QUERY for performance)
-            # This ensures enriched fields (target_area, main_muscles, force) are available
-            # Collect all unique exercise_ids first, then bulk-fetch metadata
-            self.logger.info("🔍 [SAVE_PLAN] Starting exercise metadata enrichment")
-            weekly_schedules = plan_dict.get("weekly_schedules", [])
-            all_exercise_ids = set()
-            
-            # First pass: collect all exercise_ids
-            exercises_found_for_enrichment = 0
-            exercises_with_remove_flag_during_enrichment = 0
-            for weekly_schedule in weekly_schedules:
-                daily_trainings = weekly_schedule.get("daily_trainings", [])
-                for daily_training in daily_trainings:
-                    if not daily_training.get("is_rest_day", False):
-                        strength_exercises = daily_training.get("strength_exercises", [])
-                        for strength_exercise in strength_exercises:
-                            exercises_found_for_enrichment += 1
-                            if strength_exercise.get("_remove_from_plan", False):
-                                exercises_with_remove_flag_during_enrichment += 1
-                                self.logger.error(
-                                    f"❌ [ENRICHMENT] CRITICAL: Found exercise '{strength_exercise.get('exercise_name', 'Unknown')}' "
-                                    f"with _remove_from_plan=True during enrichment! This should have been filtered earlier."
-                                )
-                            exercise_id = strength_exercise.get("exercise_id")
-                            if exercise_id:
-                                all_exercise_ids.add(exercise_id)
-            
-            self.logger.info(
-                f"📊 [ENRICHMENT] Found {exercises_found_for_enrichment} exercises for enrichment, "
-                f"{exercises_with_remove_flag_during_enrichment} with _remove_from_plan flag, "
-                f"{len(all_exercise_ids)} unique exercise_ids to fetch metadata for"
-            )
-            
-            # Bulk fetch all exercise metadata at once
-            exercise_metadata_map = {}
-            if all_exercise_ids:
-                try:
-                    exercise_ids_list = list(all_exercise_ids)
-                    if len(exercise_ids_list) == 1:
-                        # Single exercise - use .eq() for efficiency
-                        metadata_result = (
-                            supabase_client.table("exercises")
-                            .select("*")
-                            .eq("id", exercise_ids_list[0])
-                            .execute()
-                        )
-                        if metadata_result.data:
-                            exercise_metadata_map[exercise_ids_list[0]] = metadata_result.data[0]
-                    else:
-                        # Multiple exercises - use .in_() for bulk query
-                        metadata_result = (
-                            supabase_client.table("exercises")
-                            .select("*")
-                            .in_("id", exercise_ids_list)
-                            .execute()
-                        )
-                        if metadata_result.data:
-                            # Build lookup map: exercise_id -> metadata
-                            for exercise_metadata in metadata_result.data:
-                                exercise_metadata_map[exercise_metadata.get("id")] = exercise_metadata
-                except Exception as e:
-                    self.logger.warning(f"Error bulk-fetching exercise metadata: {e}. Falling back to sequential queries.")
-                    exercise_metadata_map = {}  # Will fall back to sequential if bulk fails
-            
-            # Second pass: enrich all exercises using the metadata map
-            enriched_count = 0
-            for week_idx, weekly_schedule in enumerate(weekly_schedules):
-                daily_trainings = weekly_schedule.get("daily_trainings", [])
-                for day_idx, daily_training in enumerate(daily_trainings):
-                    if not daily_training.get("is_rest_day", False):
-                        strength_exercises = daily_training.get("strength_exercises", [])
-                        # TRACE: Verify we're reading from the filtered list
-                        if strength_exercises:
-                            exercises_with_remove = [ex for ex in strength_exercises if ex.get("_remove_from_plan", False)]
-                            if exercises_with_remove:
-                                self.logger.error(
-                                    f"❌ [ENRICHMENT] CRITICAL: Week {week_idx} Day {day_idx}: Found {len(exercises_with_remove)} exercises with "
-                                    f"_remove_from_plan=True in strength_exercises list during enrichment! "
-                                    f"These should have been filtered during save. Exercise names: "
-                                    f"{', '.join([ex.get('exercise_name', 'Unknown') for ex in exercises_with_remove[:3]])}"
-                                )
-                        
-                        for strength_exercise in strength_exercises:
-                            exercise_id = strength_exercise.get("exercise_id")
-                            if exercise_id:
-                                exercise_metadata = exercise_metadata_map.get(exercise_id)
-                                
-                                # Fallback to sequential query if bulk fetch failed or missed this exercise
-                                if not exercise_metadata:
-                                    try:
-                                        exercise_metadata_result = (
-                                            supabase_client.table("exercises")
-                                            .select("*")
-                                            .eq("id", exercise_id)
-                                            .single()
-                                            .execute()
-                                        )
-                                        if exercise_metadata_result.data:
-                                            exercise_metadata = exercise_metadata_result.data
-                                            exercise_metadata_map[exercise_id] = exercise_metadata  # Cache for future use
-                                    except Exception as e:
-                                        self.logger.warning(f"Error fetching metadata for exercise {exercise_id}: {e}")
-                                
-                                if exercise_metadata:
-                                    # Store as "exercises" (plural) to match Supabase format (for frontend compatibility)
-                                    strength_exercise["exercises"] = exercise_metadata
-                                    # CRITICAL: Add exercise_name, main_muscle, equipment at top-level for Pydantic validation and frontend round-trip
-                                    strength_exercise["exercise_name"] = exercise_metadata.get("name")
-                                    # Extract main_muscle from main_muscles array (first item) - database has main_muscles, not main_muscle
-                                    main_muscles_array = exercise_metadata.get("primary_muscles") or exercise_metadata.get("main_muscles", [])
-                                    strength_exercise["main_muscle"] = main_muscles_array[0] if isinstance(main_muscles_array, list) and main_muscles_array else None
-                                    strength_exercise["equipment"] = exercise_metadata.get("equipment")
-                                    # Also flatten enriched fields to top-level for schema validation and prompt formatting
-                                    strength_exercise["target_area"] = exercise_metadata.get("target_area")
-                                    strength_exercise["main_muscles"] = main_muscles_array
-                                    strength_exercise["force"] = exercise_metadata.get("force")
-                                    enriched_count += 1
-                                else:
-                                    strength_exercise["exercises"] = None
+                "created_at": datetime.utcnow().isoformat(),
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+
+            # Note: user_playbook is stored in user_profiles, not training_plans
+            # Plans reference the user's playbook via user_profile_id FK
+            if user_playbook:
+                self.logger.info(
+                    f"📘 User has playbook with {len(user_playbook.get('lessons', []))} lessons (stored in user_profiles)"
+                )
+
+            # Insert the training plan
+            self.logger.debug(
+                f"Saving training plan with justification: {plan_record.get('justification', 'No justification provided')[:100]}..."
+            )
+            plan_result = (
+                await supabase_client.table("training_plans").insert(plan_record).execute()
+            )
+
+            if not plan_result.data:
+                self.logger.error("Failed to create training plan record")
+                return {
+                    "success": False,
+                    "error": f"Failed to create training plan record: {plan_result}",
+                }
+
+            training_plan_id = plan_result.data[0]["id"]
+            
+            # Enrich plan_dict with database IDs for returning complete structure
+            plan_dict["id"] = training_plan_id
+            plan_dict["user_profile_id"] = user_profile_id
+
+            # Save weekly schedules and their details level by level
+            # (all weeks, then all days, then all exercises/sessions)
+            weekly_schedules = plan_dict.get("weekly_schedules", [])
+
+            self.logger.info(f"Recreating weekly_schedules: count={len(weekly_schedules)}")
+            week_rows = self._build_week_rows(
+                training_plan_id,
+                weekly_schedules,
+                drop_removed=True,
+                include_scheduled_date=True,
+            )
+            await self._insert_week_rows(supabase_client, week_rows)
+
+            self.logger.info(
+                f"Training plan saved successfully (ID: {training_plan_id})"
+            )
+            await asyncio.to_thread(insights_metrics.record_weeks, training_plan_id, weekly_schedules)
+
+            # Enrich plan_dict with exercise metadata (BULK QUERY for performance)
+            # This ensures enriched fields (target_area, main_muscles, force) are available
+            self.logger.info("🔍 [SAVE_PLAN] Starting exercise metadata enrichment")
+            enriched_count = await self._enrich_strength_exercises(supabase_client, weekly_schedules)
             
             self.logger.info(f"✅ [ENRICHMENT] Enriched {enriched_count} exercises with metadata")
 
@@ -1198,7 +1175,7 @@ class DatabaseService:
 
             # Get user profile by user_id
             self.logger.debug(f"Querying user_profiles table for user_id: {user_id}")
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .select("*")
                 .eq("user_id", user_id)
@@ -1210,8 +1187,8 @@ class DatabaseService:
 
                 # Debug: List all user profiles to see what's in the database
                 try:
-                    all_profiles = (
-                        self.supabase.table("user_profiles")
+                    all_profiles = await (
+                        self._get_anon_client().table("user_profiles")
                         .select("id, user_id, username")
                         .execute()
                     )
@@ -1248,7 +1225,7 @@ class DatabaseService:
             supabase_client = self._get_authenticated_client(None)
             
             # Query for the specific user profile by id
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .select("*")
                 .eq("id", user_profile_id)
@@ -1283,8 +1260,8 @@ class DatabaseService:
         """
         try:
             # Get the main training plan
-            plan_result = (
-                self.supabase.table("training_plans")
+            plan_result = await (
+                self._get_anon_client().table("training_plans")
                 .select("*")
                 .eq("user_profile_id", user_profile_id)
                 .execute()
@@ -1297,8 +1274,8 @@ class DatabaseService:
             training_plan_id = training_plan["id"]
 
             # Get weekly schedules
-            weekly_result = (
-                self.supabase.table("weekly_schedules")
+            weekly_result = await (
+                self._get_anon_client().table("weekly_schedules")
                 .select("*")
                 .eq("training_plan_id", training_plan_id)
                 .execute()
@@ -1309,8 +1286,8 @@ class DatabaseService:
             for weekly_schedule in weekly_schedules:
                 weekly_schedule_id = weekly_schedule["id"]
 
-                daily_result = (
-                    self.supabase.table("daily_training")
+                daily_result = await (
+                    self._get_anon_client().table("daily_training")
                     .select("*")
                     .eq("weekly_schedule_id", weekly_schedule_id)
                     .execute()
@@ -1323,8 +1300,8 @@ class DatabaseService:
 
                     if not daily_training["is_rest_day"]:
                         # Get strength exercises
-                        exercise_result = (
-                            self.supabase.table("strength_exercise")
+                        exercise_result = await (
+                            self._get_anon_client().table("strength_exercise")
                             .select("*")
                             .eq("daily_training_id", daily_training_id)
                             .execute()
@@ -1338,8 +1315,8 @@ class DatabaseService:
                             exercise_id = strength_exercise.get("exercise_id")
                             if exercise_id:
                                 # Fetch exercise metadata from exercises table
-                                exercise_metadata_result = (
-                                    self.supabase.table("exercises")
+                                exercise_metadata_result = await (
+                                    self._get_anon_client().table("exercises")
                                     .select("*")
                                     .eq("id", exercise_id)
                                     .single()
@@ -1365,8 +1342,8 @@ class DatabaseService:
                         daily_training["strength_exercise"] = strength_exercises
 
                         # Get endurance sessions
-                        session_result = (
-                            self.supabase.table("endurance_session")
+                        session_result = await (
+                            self._get_anon_client().table("endurance_session")
                             .select("*")
                             .eq("daily_training_id", daily_training_id)
                             .execute()
@@ -1424,7 +1401,7 @@ class DatabaseService:
                 supabase_client = self._create_supabase_client(use_service_role=True)
 
             # Get user_playbook from user_profiles table
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .select("user_playbook")
                 .eq("id", user_profile_id)
@@ -1493,7 +1470,7 @@ class DatabaseService:
                 playbook_json = playbook_data
 
             # Update the user_profiles table with playbook
-            result = (
+            result = await (
                 supabase_client.table("user_profiles")
                 .update({"user_playbook": playbook_json})
                 .eq("id", user_profile_id)
@@ -1527,7 +1504,7 @@ class DatabaseService:
         try:
             supabase_client = self._get_authenticated_client()
             
-            result = (
+            result = await (
                 supabase_client.table("insights_summaries")
                 .select("summary, data_hash, created_at, expires_at")
                 .eq("user_profile_id", user_profile_id)
@@ -1647,7 +1624,7 @@ class DatabaseService:
             # Check if record exists (handle case where no record exists)
             record_exists = False
             try:
-                existing = (
+                existing = await (
                     supabase_client.table("insights_summaries")
                     .select("id")
                     .eq("user_profile_id", user_profile_id)
@@ -1673,7 +1650,7 @@ class DatabaseService:
             # Insert or update based on existence
             if record_exists:
                 # Update existing record
-                result = (
+                result = await (
                     supabase_client.table("insights_summaries")
                     .update(cache_data)
                     .eq("user_profile_id", user_profile_id)
@@ -1681,7 +1658,7 @@ class DatabaseService:
                 )
             else:
                 # Insert new record
-                result = (
+                result = await (
                     supabase_client.table("insights_summaries")
                     .insert(cache_data)
                     .execute()
@@ -1757,11 +1734,11 @@ class DatabaseService:
             }
 
             # Update the main training plan
-            supabase_client.table("training_plans").update(plan_record).eq("id", plan_id).execute()
+            await supabase_client.table("training_plans").update(plan_record).eq("id", plan_id).execute()
             
             # Delete existing weekly schedules and all related data (cascading)
             # This will also delete daily trainings, exercises, and endurance sessions
-            supabase_client.table("weekly_schedules").delete().eq("training_plan_id", plan_id).execute()
+            await supabase_client.table("weekly_schedules").delete().eq("training_plan_id", plan_id).execute()
             
             # Recreate weekly schedules and their details
             weekly_schedules = plan_dict.get("weekly_schedules", [])
@@ -1789,7 +1766,7 @@ class DatabaseService:
                     "updated_at": datetime.utcnow().isoformat(),
                 }
                 
-                weekly_result = (
+                weekly_result = await (
                     supabase_client.table("weekly_schedules")
                     .insert(weekly_schedule_record)
                     .execute()
@@ -1822,7 +1799,7 @@ class DatabaseService:
                         "updated_at": datetime.utcnow().isoformat(),
                     }
                     
-                    daily_result = (
+                    daily_result = await (
                         supabase_client.table("daily_training")
                         .insert(daily_training_record)
                         .execute()
@@ -1874,7 +1851,7 @@ class DatabaseService:
                         
                         # Bulk insert all strength exercises at once
                         if strength_exercise_records:
-                            se_result = (
+                            se_result = await (
                                 supabase_client.table("strength_exercise")
                                 .insert(strength_exercise_records)
                                 .execute()
@@ -1937,7 +1914,7 @@ class DatabaseService:
                                 })
                             
                             # Bulk insert all endurance sessions at once
-                            es_result = (
+                            es_result = await (
                                 supabase_client.table("endurance_session")
                                 .insert(endurance_session_records)
                                 .execute()
@@ -1984,7 +1961,7 @@ class DatabaseService:
                     exercise_ids_list = list(all_exercise_ids)
                     if len(exercise_ids_list) == 1:
                         # Single exercise - use .eq() for efficiency
-                        metadata_result = (
+                        metadata_result = await (
                             supabase_client.table("exercises")
                             .select("*")
                             .eq("id", exercise_ids_list[0])
@@ -1994,7 +1971,7 @@ class DatabaseService:
                             exercise_metadata_map[exercise_ids_list[0]] = metadata_result.data[0]
                     else:
                         # Multiple exercises - use .in_() for bulk query
-                        metadata_result = (
+                        metadata_result = await (
                             supabase_client.table("exercises")
                             .select("*")
                             .in_("id", exercise_ids_list)
@@ -2022,7 +1999,7 @@ class DatabaseService:
                                 # Fallback to sequential query if bulk fetch failed or missed this exercise
                                 if not exercise_metadata:
                                     try:
-                                        exercise_metadata_result = (
+                                        exercise_metadata_result = await (
                                             supabase_client.table("exercises")
                                             .select("*")
                                             .eq("id", exercise_id)
@@ -2070,6 +2047,7 @@ class DatabaseService:
                 )
             except Exception as e:
                 self.logger.warning(f"Failed to summarize enriched IDs: {e}")
+            plan_summaries.invalidate(plan_id)
             
             # Return enriched plan dict that now contains all generated IDs
             return plan_dict
@@ -2114,7 +2092,7 @@ class DatabaseService:
             week_data = self._clean_for_json_serialization(updated_week_data) if isinstance(updated_week_data, dict) else updated_week_data
             
             # Delete only the specific week (cascading deletes will handle daily_trainings, exercises, etc.)
-            delete_result = (
+            delete_result = await (
                 supabase_client.table("weekly_schedules")
                 .delete()
                 .eq("training_plan_id", plan_id)
@@ -2124,269 +2102,19 @@ class DatabaseService:
             
             self.logger.info(f"✅ Deleted week {week_number} (cascading deletes handled daily trainings, exercises, etc.)")
             
-            # Create weekly schedule record
-            weekly_schedule_record = {
-                "training_plan_id": plan_id,
-                "week_number": week_number,
-                "focus_theme": week_data.get("focus_theme", ""),
-                "primary_goal": week_data.get("primary_goal", ""),
-                "progression_lever": week_data.get("progression_lever", ""),
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-            
-            weekly_result = (
-                supabase_client.table("weekly_schedules")
-                .insert(weekly_schedule_record)
-                .execute()
-            )
-            
-            if not weekly_result.data:
-                self.logger.error(f"Failed to create weekly schedule for week {week_number}")
-                return None
-            
-            weekly_schedule_id = weekly_result.data[0]["id"]
-            week_data["id"] = weekly_schedule_id
-            
-            # Save daily trainings
-            daily_trainings = week_data.get("daily_trainings", [])
-            
-            for daily_index, daily_data in enumerate(daily_trainings):
-                day_of_week = daily_data.get("day_of_week", "Monday")
-                is_rest_day = daily_data.get("is_rest_day", False)
-                
-                # Create daily training record
-                daily_training_record = {
-                    "weekly_schedule_id": weekly_schedule_id,
-                    "day_of_week": day_of_week,
-                    "is_rest_day": is_rest_day,
-                    "training_type": daily_data.get(
-                        "training_type", "rest" if is_rest_day else "strength"
-                    ),
-                    "justification": daily_data.get("justification", ""),
-                    "created_at": datetime.utcnow().isoformat(),
-                    "updated_at": datetime.utcnow().isoformat(),
-                }
-                
-                daily_result = (
-                    supabase_client.table("daily_training")
-                    .insert(daily_training_record)
-                    .execute()
-                )
-                
-                if not daily_result.data:
-                    continue
-                
-                daily_training_id = daily_result.data[0]["id"]
-                daily_data["id"] = daily_training_id
-                
-                # Save exercises and endurance sessions if not a rest day
-                if not is_rest_day:
-                    # Save strength exercises (BULK INSERT for performance)
-                    strength_exercises = daily_data.get("strength_exercises", [])
-                    
-                    # Filter out exercises without exercise_id and prepare for bulk insert
-                    valid_strength_exercises = []
-                    strength_exercise_records = []
-                    for exercise_index, exercise_data in enumerate(strength_exercises):
-                        exercise_id = exercise_data.get("exercise_id")
-                        
-                        # CRITICAL: Validate exercise_id exists before saving
-                        if exercise_id is None:
-                            self.logger.warning(
-                                f"Skipping strength exercise with missing exercise_id "
-                                f"(daily_training_id: {daily_training_id}, exercise_index: {exercise_index}). "
-                                f"This usually indicates a failed exercise matching. Exercise data: {exercise_data}"
-                            )
-                            continue
-                        
-                        sets = exercise_data.get("sets", 3)
-                        reps = exercise_data.get("reps", [10, 10, 10])
-                        weight = exercise_data.get("weight", [0.0] * sets)
-                        
-                        strength_exercise_records.append({
-                            "daily_training_id": daily_training_id,
-                            "exercise_id": exercise_id,
-                            "sets": sets,
-                            "reps": reps,
-                            "weight": weight,
-                            "execution_order": exercise_data.get("execution_order", 0),
-                            "completed": False,
-                            "created_at": datetime.utcnow().isoformat(),
-                            "updated_at": datetime.utcnow().isoformat(),
-                        })
-                        valid_strength_exercises.append(exercise_data)
-                    
-                    # Bulk insert all strength exercises at once
-                    if strength_exercise_records:
-                        se_result = (
-                            supabase_client.table("strength_exercise")
-                            .insert(strength_exercise_records)
-                            .execute()
-                        )
-                        
-                        # Map returned IDs back to exercise_data objects (order is preserved by Supabase)
-                        if se_result.data and len(se_result.data) == len(valid_strength_exercises):
-                            for i, exercise_data in enumerate(valid_strength_exercises):
-                                exercise_data["id"] = se_result.data[i]["id"]
-                                exercise_data["daily_training_id"] = daily_training_id
-                        else:
-                            # Fallback: if order doesn't match, log warning but continue
-                            self.logger.warning(
-                                f"Bulk insert returned {len(se_result.data) if se_result.data else 0} records, "
-                                f"expected {len(valid_strength_exercises)}. IDs may not be enriched correctly."
-                            )
-                            # Still try to enrich if we have data
-                            if se_result.data:
-                                for i, exercise_data in enumerate(valid_strength_exercises):
-                                    if i < len(se_result.data):
-                                        exercise_data["id"] = se_result.data[i]["id"]
-                                        exercise_data["daily_training_id"] = daily_training_id
-                        
-                        # CRITICAL: Update daily_data with filtered and enriched exercises
-                        daily_data["strength_exercises"] = valid_strength_exercises
-                    else:
-                        # No valid exercises - set to empty list
-                        daily_data["strength_exercises"] = []
-                    
-                    # Save endurance sessions (BULK INSERT for performance)
-                    endurance_sessions = daily_data.get("endurance_sessions", [])
-                    
-                    if endurance_sessions:
-                        # Prepare all endurance session records for bulk insert
-                        endurance_session_records = []
-                        for session_data in endurance_sessions:
-                            name = session_data.get("name", "Endurance Session")
-                            description = session_data.get("description", "")
-                            sport_type = session_data.get("sport_type", "running")
-                            training_volume = session_data.get("training_volume", 30.0)
-                            unit = session_data.get("unit", "minutes")
-                            heart_rate_zone = session_data.get("heart_rate_zone", 3)
-                            
-                            endurance_session_records.append({
-                                "daily_training_id": daily_training_id,
-                                "name": name,
-                                "description": description,
-                                "sport_type": sport_type,
-                                "training_volume": training_volume,
-                                "unit": unit,
-                                "heart_rate_zone": heart_rate_zone,
-                                "execution_order": session_data.get("execution_order", 0),
-                                "completed": False,
-                                "created_at": datetime.utcnow().isoformat(),
-                                "updated_at": datetime.utcnow().isoformat(),
-                            })
-                        
-                        # Bulk insert all endurance sessions at once
-                        es_result = (
-                            supabase_client.table("endurance_session")
-                            .insert(endurance_session_records)
-                            .execute()
-                        )
-                        
-                        # Map returned IDs back to session_data objects (order is preserved by Supabase)
-                        if es_result.data and len(es_result.data) == len(endurance_sessions):
-                            for i, session_data in enumerate(endurance_sessions):
-                                session_data["id"] = es_result.data[i]["id"]
-                                session_data["daily_training_id"] = daily_training_id
-                        else:
-                            # Fallback: if order doesn't match, log warning but continue
-                            self.logger.warning(
-                                f"Bulk insert returned {len(es_result.data) if es_result.data else 0} records, "
-                                f"expected {len(endurance_sessions)}. IDs may not be enriched correctly."
-                            )
-                            # Still try to enrich if we have data
-                            if es_result.data:
-                                for i, session_data in enumerate(endurance_sessions):
-                                    if i < len(es_result.data):
-                                        session_data["id"] = es_result.data[i]["id"]
-                                        session_data["daily_training_id"] = daily_training_id
+            # Insert the week level by level (week, then all days, then exercises/sessions)
+            week_rows = self._build_week_rows(plan_id, [week_data])
+            week_rows[0]["record"]["week_number"] = week_number
+            await self._insert_week_rows(supabase_client, week_rows)
             
             # Enrich week_data with exercise metadata (BULK QUERY for performance)
-            # Collect all unique exercise_ids first, then bulk-fetch metadata
-            all_exercise_ids = set()
-            
-            # First pass: collect all exercise_ids
-            daily_trainings = week_data.get("daily_trainings", [])
-            for daily_training in daily_trainings:
-                if not daily_training.get("is_rest_day", False):
-                    strength_exercises = daily_training.get("strength_exercises", [])
-                    for strength_exercise in strength_exercises:
-                        exercise_id = strength_exercise.get("exercise_id")
-                        if exercise_id:
-                            all_exercise_ids.add(exercise_id)
-            
-            # Bulk fetch all exercise metadata at once
-            exercise_metadata_map = {}
-            if all_exercise_ids:
-                try:
-                    exercise_ids_list = list(all_exercise_ids)
-                    if len(exercise_ids_list) == 1:
-                        # Single exercise - use .eq() for efficiency
-                        metadata_result = (
-                            supabase_client.table("exercises")
-                            .select("*")
-                            .eq("id", exercise_ids_list[0])
-                            .execute()
-                        )
-                        if metadata_result.data:
-                            exercise_metadata_map[exercise_ids_list[0]] = metadata_result.data[0]
-                    else:
-                        # Multiple exercises - use .in_() for bulk query
-                        metadata_result = (
-                            supabase_client.table("exercises")
-                            .select("*")
-                            .in_("id", exercise_ids_list)
-                            .execute()
-                        )
-                        if metadata_result.data:
-                            for exercise_metadata in metadata_result.data:
-                                exercise_metadata_map[exercise_metadata["id"]] = exercise_metadata
-                except Exception as e:
-                    self.logger.warning(f"Error bulk fetching exercise metadata: {e}")
-            
-            # Second pass: enrich strength exercises with metadata
-            for daily_training in daily_trainings:
-                if not daily_training.get("is_rest_day", False):
-                    strength_exercises = daily_training.get("strength_exercises", [])
-                    for strength_exercise in strength_exercises:
-                        exercise_id = strength_exercise.get("exercise_id")
-                        if exercise_id:
-                            exercise_metadata = exercise_metadata_map.get(exercise_id)
-                            
-                            # Fallback to sequential query if bulk fetch failed or missed this exercise
-                            if not exercise_metadata:
-                                try:
-                                    exercise_metadata_result = (
-                                        supabase_client.table("exercises")
-                                        .select("*")
-                                        .eq("id", exercise_id)
-                                        .single()
-                                        .execute()
-                                    )
-                                    if exercise_metadata_result.data:
-                                        exercise_metadata = exercise_metadata_result.data
-                                        exercise_metadata_map[exercise_id] = exercise_metadata
-                                except Exception as e:
-                                    self.logger.warning(f"Error fetching metadata for exercise {exercise_id}: {e}")
-                            
-                            if exercise_metadata:
-                                # Store as "exercises" (plural) to match Supabase format
-                                strength_exercise["exercises"] = exercise_metadata
-                                # Add exercise_name, main_muscle, equipment at top-level
-                                strength_exercise["exercise_name"] = exercise_metadata.get("name")
-                                # Extract main_muscle from main_muscles array
-                                main_muscles_array = exercise_metadata.get("primary_muscles") or exercise_metadata.get("main_muscles", [])
-                                strength_exercise["main_muscle"] = main_muscles_array[0] if isinstance(main_muscles_array, list) and main_muscles_array else None
-                                strength_exercise["equipment"] = exercise_metadata.get("equipment")
-                                # Also flatten enriched fields to top-level
-                                strength_exercise["target_area"] = exercise_metadata.get("target_area")
-                                strength_exercise["main_muscles"] = main_muscles_array
-                                strength_exercise["force"] = exercise_metadata.get("force")
-                            else:
-                                strength_exercise["exercises"] = None
+            await self._enrich_strength_exercises(supabase_client, [week_data])
             
             self.logger.info(f"✅ Successfully updated week {week_number} in training plan {plan_id}")
+            plan_summaries.invalidate(plan_id, week_number)
+            await asyncio.to_thread(
+                insights_metrics.record_weeks, plan_id, [{**week_data, "week_number": week_number}]
+            )
             
             # Return enriched week data that now contains all generated IDs
             return week_data
@@ -2429,269 +2157,16 @@ class DatabaseService:
             # Clean the week data to ensure JSON serialization
             week_data = self._clean_for_json_serialization(new_week_data) if isinstance(new_week_data, dict) else new_week_data
             
-            # Create weekly schedule record (no deletion needed for new week)
-            weekly_schedule_record = {
-                "training_plan_id": plan_id,
-                "week_number": week_number,
-                "focus_theme": week_data.get("focus_theme", ""),
-                "primary_goal": week_data.get("primary_goal", ""),
-                "progression_lever": week_data.get("progression_lever", ""),
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-            
-            weekly_result = (
-                supabase_client.table("weekly_schedules")
-                .insert(weekly_schedule_record)
-                .execute()
-            )
-            
-            if not weekly_result.data:
-                self.logger.error(f"Failed to create weekly schedule for week {week_number}")
-                return None
-            
-            weekly_schedule_id = weekly_result.data[0]["id"]
-            week_data["id"] = weekly_schedule_id
-            
-            # Save daily trainings
-            daily_trainings = week_data.get("daily_trainings", [])
-            
-            for daily_index, daily_data in enumerate(daily_trainings):
-                day_of_week = daily_data.get("day_of_week", "Monday")
-                is_rest_day = daily_data.get("is_rest_day", False)
-                
-                # Create daily training record
-                daily_training_record = {
-                    "weekly_schedule_id": weekly_schedule_id,
-                    "day_of_week": day_of_week,
-                    "is_rest_day": is_rest_day,
-                    "training_type": daily_data.get(
-                        "training_type", "rest" if is_rest_day else "strength"
-                    ),
-                    "justification": daily_data.get("justification", ""),
-                    "created_at": datetime.utcnow().isoformat(),
-                    "updated_at": datetime.utcnow().isoformat(),
-                }
-                
-                daily_result = (
-                    supabase_client.table("daily_training")
-                    .insert(daily_training_record)
-                    .execute()
-                )
-                
-                if not daily_result.data:
-                    continue
-                
-                daily_training_id = daily_result.data[0]["id"]
-                daily_data["id"] = daily_training_id
-                
-                # Save exercises and endurance sessions if not a rest day
-                if not is_rest_day:
-                    # Save strength exercises (BULK INSERT for performance)
-                    strength_exercises = daily_data.get("strength_exercises", [])
-                    
-                    # Filter out exercises without exercise_id and prepare for bulk insert
-                    valid_strength_exercises = []
-                    strength_exercise_records = []
-                    for exercise_index, exercise_data in enumerate(strength_exercises):
-                        exercise_id = exercise_data.get("exercise_id")
-                        
-                        # CRITICAL: Validate exercise_id exists before saving
-                        if exercise_id is None:
-                            self.logger.warning(
-                                f"Skipping strength exercise with missing exercise_id "
-                                f"(daily_training_id: {daily_training_id}, exercise_index: {exercise_index}). "
-                                f"This usually indicates a failed exercise matching. Exercise data: {exercise_data}"
-                            )
-                            continue
-                        
-                        sets = exercise_data.get("sets", 3)
-                        reps = exercise_data.get("reps", [10, 10, 10])
-                        weight = exercise_data.get("weight", [0.0] * sets)
-                        
-                        strength_exercise_records.append({
-                            "daily_training_id": daily_training_id,
-                            "exercise_id": exercise_id,
-                            "sets": sets,
-                            "reps": reps,
-                            "weight": weight,
-                            "execution_order": exercise_data.get("execution_order", 0),
-                            "completed": False,
-                            "created_at": datetime.utcnow().isoformat(),
-                            "updated_at": datetime.utcnow().isoformat(),
-                        })
-                        valid_strength_exercises.append(exercise_data)
-                    
-                    # Bulk insert all strength exercises at once
-                    if strength_exercise_records:
-                        se_result = (
-                            supabase_client.table("strength_exercise")
-                            .insert(strength_exercise_records)
-                            .execute()
-                        )
-                        
-                        # Map returned IDs back to exercise_data objects (order is preserved by Supabase)
-                        if se_result.data and len(se_result.data) == len(valid_strength_exercises):
-                            for i, exercise_data in enumerate(valid_strength_exercises):
-                                exercise_data["id"] = se_result.data[i]["id"]
-                                exercise_data["daily_training_id"] = daily_training_id
-                        else:
-                            # Fallback: if order doesn't match, log warning but continue
-                            self.logger.warning(
-                                f"Bulk insert returned {len(se_result.data) if se_result.data else 0} records, "
-                                f"expected {len(valid_strength_exercises)}. IDs may not be enriched correctly."
-                            )
-                            # Still try to enrich if we have data
-                            if se_result.data:
-                                for i, exercise_data in enumerate(valid_strength_exercises):
-                                    if i < len(se_result.data):
-                                        exercise_data["id"] = se_result.data[i]["id"]
-                                        exercise_data["daily_training_id"] = daily_training_id
-                        
-                        # CRITICAL: Update daily_data with filtered and enriched exercises
-                        daily_data["strength_exercises"] = valid_strength_exercises
-                    else:
-                        # No valid exercises - set to empty list
-                        daily_data["strength_exercises"] = []
-                    
-                    # Save endurance sessions (BULK INSERT for performance)
-                    endurance_sessions = daily_data.get("endurance_sessions", [])
-                    
-                    if endurance_sessions:
-                        # Prepare all endurance session records for bulk insert
-                        endurance_session_records = []
-                        for session_data in endurance_sessions:
-                            name = session_data.get("name", "Endurance Session")
-                            description = session_data.get("description", "")
-                            sport_type = session_data.get("sport_type", "running")
-                            training_volume = session_data.get("training_volume", 30.0)
-                            unit = session_data.get("unit", "minutes")
-                            heart_rate_zone = session_data.get("heart_rate_zone", 3)
-                            
-                            endurance_session_records.append({
-                                "daily_training_id": daily_training_id,
-                                "name": name,
-                                "description": description,
-                                "sport_type": sport_type,
-                                "training_volume": training_volume,
-                                "unit": unit,
-                                "heart_rate_zone": heart_rate_zone,
-                                "execution_order": session_data.get("execution_order", 0),
-                                "completed": False,
-                                "created_at": datetime.utcnow().isoformat(),
-                                "updated_at": datetime.utcnow().isoformat(),
-                            })
-                        
-                        # Bulk insert all endurance sessions at once
-                        es_result = (
-                            supabase_client.table("endurance_session")
-                            .insert(endurance_session_records)
-                            .execute()
-                        )
-                        
-                        # Map returned IDs back to session_data objects (order is preserved by Supabase)
-                        if es_result.data and len(es_result.data) == len(endurance_sessions):
-                            for i, session_data in enumerate(endurance_sessions):
-                                session_data["id"] = es_result.data[i]["id"]
-                                session_data["daily_training_id"] = daily_training_id
-                        else:
-                            # Fallback: if order doesn't match, log warning but continue
-                            self.logger.warning(
-                                f"Bulk insert returned {len(es_result.data) if es_result.data else 0} records, "
-                                f"expected {len(endurance_sessions)}. IDs may not be enriched correctly."
-                            )
-                            # Still try to enrich if we have data
-                            if es_result.data:
-                                for i, session_data in enumerate(endurance_sessions):
-                                    if i < len(es_result.data):
-                                        session_data["id"] = es_result.data[i]["id"]
-                                        session_data["daily_training_id"] = daily_training_id
+            # Insert the week level by level (week, then all days, then exercises/sessions)
+            week_rows = self._build_week_rows(plan_id, [week_data])
+            await self._insert_week_rows(supabase_client, week_rows)
             
             # Enrich week_data with exercise metadata (BULK QUERY for performance)
-            # Collect all unique exercise_ids first, then bulk-fetch metadata
-            all_exercise_ids = set()
-            
-            # First pass: collect all exercise_ids
-            daily_trainings = week_data.get("daily_trainings", [])
-            for daily_training in daily_trainings:
-                if not daily_training.get("is_rest_day", False):
-                    strength_exercises = daily_training.get("strength_exercises", [])
-                    for strength_exercise in strength_exercises:
-                        exercise_id = strength_exercise.get("exercise_id")
-                        if exercise_id:
-                            all_exercise_ids.add(exercise_id)
-            
-            # Bulk fetch all exercise metadata at once
-            exercise_metadata_map = {}
-            if all_exercise_ids:
-                try:
-                    exercise_ids_list = list(all_exercise_ids)
-                    if len(exercise_ids_list) == 1:
-                        # Single exercise - use .eq() for efficiency
-                        metadata_result = (
-                            supabase_client.table("exercises")
-                            .select("*")
-                            .eq("id", exercise_ids_list[0])
-                            .execute()
-                        )
-                        if metadata_result.data:
-                            exercise_metadata_map[exercise_ids_list[0]] = metadata_result.data[0]
-                    else:
-                        # Multiple exercises - use .in_() for bulk query
-                        metadata_result = (
-                            supabase_client.table("exercises")
-                            .select("*")
-                            .in_("id", exercise_ids_list)
-                            .execute()
-                        )
-                        if metadata_result.data:
-                            for exercise_metadata in metadata_result.data:
-                                exercise_metadata_map[exercise_metadata["id"]] = exercise_metadata
-                except Exception as e:
-                    self.logger.warning(f"Error bulk fetching exercise metadata: {e}")
-            
-            # Second pass: enrich strength exercises with metadata
-            for daily_training in daily_trainings:
-                if not daily_training.get("is_rest_day", False):
-                    strength_exercises = daily_training.get("strength_exercises", [])
-                    for strength_exercise in strength_exercises:
-                        exercise_id = strength_exercise.get("exercise_id")
-                        if exercise_id:
-                            exercise_metadata = exercise_metadata_map.get(exercise_id)
-                            
-                            # Fallback to sequential query if bulk fetch failed or missed this exercise
-                            if not exercise_metadata:
-                                try:
-                                    exercise_metadata_result = (
-                                        supabase_client.table("exercises")
-                                        .select("*")
-                                        .eq("id", exercise_id)
-                                        .single()
-                                        .execute()
-                                    )
-                                    if exercise_metadata_result.data:
-                                        exercise_metadata = exercise_metadata_result.data
-                                        exercise_metadata_map[exercise_id] = exercise_metadata
-                                except Exception as e:
-                                    self.logger.warning(f"Error fetching metadata for exercise {exercise_id}: {e}")
-                            
-                            if exercise_metadata:
-                                # Store as "exercises" (plural) to match Supabase format
-                                strength_exercise["exercises"] = exercise_metadata
-                                # Add exercise_name, main_muscle, equipment at top-level
-                                strength_exercise["exercise_name"] = exercise_metadata.get("name")
-                                # Extract main_muscle from main_muscles array
-                                main_muscles_array = exercise_metadata.get("primary_muscles") or exercise_metadata.get("main_muscles", [])
-                                strength_exercise["main_muscle"] = main_muscles_array[0] if isinstance(main_muscles_array, list) and main_muscles_array else None
-                                strength_exercise["equipment"] = exercise_metadata.get("equipment")
-                                # Also flatten enriched fields to top-level
-                                strength_exercise["target_area"] = exercise_metadata.get("target_area")
-                                strength_exercise["main_muscles"] = main_muscles_array
-                                strength_exercise["force"] = exercise_metadata.get("force")
-                            else:
-                                strength_exercise["exercises"] = None
+            await self._enrich_strength_exercises(supabase_client, [week_data])
             
             self.logger.info(f"✅ Successfully created week {week_number} in training plan {plan_id}")
+            plan_summaries.invalidate(plan_id, week_number)
+            await asyncio.to_thread(insights_metrics.record_weeks, plan_id, [week_data])
             
             # Return enriched week data that now contains all generated IDs
             return week_data
@@ -2713,21 +2188,24 @@ class DatabaseService:
         """
         Log a latency event to the database with token usage for cost tracking.
         Simple event-based logging for AI operation durations and costs.
-        Uses service role key to bypass RLS.
+        The row is queued on the shared event sink and bulk-inserted in the
+        background (service role key, bypasses RLS), so this never waits on the database.
         
         Args:
             event: Type of event (initial_questions, playbook, initial_plan, feedback_plan, regenerate_plan)
             duration_seconds: Duration of the AI API call in seconds
-            completion: Optional OpenAI completion object (will extract tokens/model automatically)
+            completion: Optional OpenAI completion object (will extract tokens/model automatically,
+                        including prompt-cache reads as cached_input_tokens)
             
         Returns:
-            True if successful, False otherwise
+            True if the event was queued, False otherwise
         """
         try:
             # Extract token usage from completion object if provided
             input_tokens = None
             output_tokens = None
             total_tokens = None
+            cached_input_tokens = None
             model = None
             
             if completion is not None:
@@ -2737,14 +2215,18 @@ class DatabaseService:
                     input_tokens = getattr(usage, 'prompt_tokens', None)
                     output_tokens = getattr(usage, 'completion_tokens', None)
                     total_tokens = getattr(usage, 'total_tokens', None)
+                    # Input tokens served from the provider's prompt cache
+                    cached_input_tokens = getattr(usage, 'cached_tokens', None)
+                    if cached_input_tokens is None:
+                        details = getattr(usage, 'prompt_tokens_details', None)
+                        cached_input_tokens = getattr(details, 'cached_tokens', None) if details else None
+                    if not isinstance(cached_input_tokens, int):
+                        cached_input_tokens = None
                 
                 # Extract model name
                 if hasattr(completion, 'model'):
                     model = completion.model
             
-            # Use service role key to bypass RLS for internal metrics
-            supabase_client = self._create_supabase_client(use_service_role=True)
-            
             # Build insert data
             insert_data = {
                 "event": event,
@@ -2758,23 +2240,26 @@ class DatabaseService:
                 insert_data["output_tokens"] = output_tokens
             if total_tokens is not None:
                 insert_data["total_tokens"] = total_tokens
+            # Only when something was cached (OpenAI reports 0 for most calls)
+            if cached_input_tokens:
+                insert_data["cached_input_tokens"] = cached_input_tokens
             if model is not None:
                 insert_data["model"] = model
             
-            # Insert event
-            result = supabase_client.table("latency").insert(insert_data).execute()
-            
-            if result.data:
-                log_msg = f"Logged latency event: {event} = {duration_seconds:.3f}s"
+            # Queue event (written in batches by the background flusher)
+            if event_sink.emit("latency", insert_data):
+                log_msg = f"Queued latency event: {event} = {duration_seconds:.3f}s"
                 if total_tokens:
                     log_msg += f" ({total_tokens} tokens"
+                    if cached_input_tokens:
+                        log_msg += f", {cached_input_tokens} cached"
                     if model:
                         log_msg += f", {model}"
                     log_msg += ")"
                 self.logger.debug(log_msg)
                 return True
             else:
-                self.logger.warning(f"Failed to log latency event: {event}")
+                self.logger.warning(f"Failed to queue latency event: {event}")
                 return False
                 
         except Exception as e:
@@ -2819,7 +2304,7 @@ class DatabaseService:
                     "updated_at": datetime.utcnow().isoformat(),
                 }
                 
-                weekly_result = (
+                weekly_result = await (
                     supabase_client.table("weekly_schedules")
                     .insert(weekly_schedule_record)
                     .execute()
@@ -0,0 +1,353 @@
+"""
+Exercise Catalog for EvolveAI
+
+Process-wide, in-memory copy of the `exercises` table with indexed lookups.
+
+The exercise library is small (a few thousand rows) and changes rarely, but it is
+queried dozens of times per plan generation (candidate filtering, fallback matching,
+ID validation). Loading it once and answering from memory removes those network
+round trips. The catalog is refreshed when its TTL expires or when it is explicitly
+invalidated (e.g. after the exercise library is re-populated).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+# Supabase caps a single select at 1000 rows, so the table is loaded in pages
+_PAGE_SIZE = 1000
+
+# Minimum delay between two load attempts after a failed load (avoids retry storms)
+_RETRY_BACKOFF_SECONDS = 30.0
+
+
+def normalize_exercise_name(name: Optional[str]) -> str:
+    """Normalize an exercise name for exact lookups (strip + lowercase)."""
+    return (name or "").strip().lower()
+
+
+class ExerciseCatalog:
+    """In-memory exercise catalog indexed by id, metadata and normalized name."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        """
+        Initialize an empty catalog.
+
+        Args:
+            ttl_seconds: Seconds before a loaded catalog is considered stale
+                         (defaults to settings.EXERCISE_CATALOG_TTL_SECONDS)
+        """
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._last_failed_attempt: Optional[float] = None
+        self.version: int = 0
+
+        # Indexes (rebuilt atomically on every load)
+        self._exercises: List[Dict[str, Any]] = []
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_equipment_muscle: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._by_muscle: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_name: Dict[str, List[Dict[str, Any]]] = {}
+
+    # ------------------------------------------------------------------
+    # Loading / refresh
+    # ------------------------------------------------------------------
+
+    @property
+    def ttl_seconds(self) -> float:
+        """Effective TTL in seconds."""
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.EXERCISE_CATALOG_TTL_SECONDS
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the catalog currently holds data."""
+        return self._loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the loaded data has outlived its TTL."""
+        if self._loaded_at is None:
+            return True
+        return (time.monotonic() - self._loaded_at) > self.ttl_seconds
+
+    def __len__(self) -> int:
+        return len(self._exercises)
+
+    def ensure_loaded(self, supabase_client: Any) -> bool:
+        """
+        Make sure the catalog is loaded and fresh, loading it from Supabase if needed.
+
+        Never raises: on failure the previous snapshot (if any) keeps being served and
+        callers fall back to their direct database queries.
+
+        Args:
+            supabase_client: Supabase client used to (re)load the exercises table
+
+        Returns:
+            True if the catalog can answer queries, False otherwise
+        """
+        if self.is_loaded and not self.is_stale:
+            return True
+
+        # Tests populate the catalog explicitly via load_records(); never hit the DB
+        if supabase_client is None or is_test_environment():
+            return self.is_loaded
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self.is_loaded and not self.is_stale:
+                return True
+            if (
+                self._last_failed_attempt is not None
+                and time.monotonic() - self._last_failed_attempt < _RETRY_BACKOFF_SECONDS
+            ):
+                return self.is_loaded
+            return self.load(supabase_client)
+
+    def load(self, supabase_client: Any) -> bool:
+        """
+        Load the full exercises table from Supabase (paginated) and rebuild indexes.
+
+        Args:
+            supabase_client: Supabase client
+
+        Returns:
+            True if the load succeeded, False otherwise
+        """
+        start_time = time.time()
+        try:
+            records: List[Dict[str, Any]] = []
+            offset = 0
+            while True:
+                response = (
+                    supabase_client.table("exercises")
+                    .select("*")
+                    .order("id", desc=False)
+                    .range(offset, offset + _PAGE_SIZE - 1)
+                    .execute()
+                )
+                page = response.data
+                if not isinstance(page, list):
+                    raise ValueError(f"Unexpected response type for exercises page: {type(page).__name__}")
+                records.extend(page)
+                if len(page) < _PAGE_SIZE:
+                    break
+                offset += _PAGE_SIZE
+
+            if not records:
+                raise ValueError("Exercises table returned no rows")
+
+            self.load_records(records)
+            logger.info(
+                f"✅ Exercise catalog loaded: {len(records)} exercises "
+                f"in {time.time() - start_time:.2f}s (version {self.version})"
+            )
+            return True
+
+        except Exception as e:
+            self._last_failed_attempt = time.monotonic()
+            logger.warning(f"⚠️ Failed to load exercise catalog, falling back to database queries: {e}")
+            return self.is_loaded
+
+    def load_records(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the catalog content with the given exercise rows and rebuild indexes.
+
+        Args:
+            records: Exercise rows as returned by `select("*")` on the exercises table
+        """
+        exercises: List[Dict[str, Any]] = []
+        by_id: Dict[int, Dict[str, Any]] = {}
+        by_equipment_muscle: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        by_muscle: Dict[str, List[Dict[str, Any]]] = {}
+        by_name: Dict[str, List[Dict[str, Any]]] = {}
+
+        for exercise in records:
+            exercise_id = exercise.get("id")
+            if exercise_id is None:
+                continue
+            try:
+                by_id[int(exercise_id)] = exercise
+            except (ValueError, TypeError):
+                continue
+            exercises.append(exercise)
+
+            equipment = exercise.get("equipment") or ""
+            for muscle in self._main_muscles(exercise):
+                by_equipment_muscle.setdefault((equipment, muscle), []).append(exercise)
+                by_muscle.setdefault(muscle, []).append(exercise)
+
+            names = [exercise.get("name")]
+            alternative_names = exercise.get("alternative_names")
+            if isinstance(alternative_names, list):
+                names.extend(alt for alt in alternative_names if isinstance(alt, str))
+            for name in names:
+                normalized = normalize_exercise_name(name)
+                if normalized:
+                    bucket = by_name.setdefault(normalized, [])
+                    if not bucket or bucket[-1] is not exercise:
+                        bucket.append(exercise)
+
+        with self._lock:
+            self._exercises = exercises
+            self._by_id = by_id
+            self._by_equipment_muscle = by_equipment_muscle
+            self._by_muscle = by_muscle
+            self._by_name = by_name
+            self._loaded_at = time.monotonic()
+            self._last_failed_attempt = None
+            self.version += 1
+
+    def invalidate(self) -> None:
+        """Mark the catalog as stale so the next lookup triggers a reload."""
+        with self._lock:
+            if self._loaded_at is not None:
+                # Keep serving the current snapshot until the reload succeeds
+                self._loaded_at = time.monotonic() - self.ttl_seconds - 1
+            self._last_failed_attempt = None
+        logger.info("Exercise catalog invalidated")
+
+    def clear(self) -> None:
+        """Drop all data (used by tests)."""
+        with self._lock:
+            self._exercises = []
+            self._by_id = {}
+            self._by_equipment_muscle = {}
+            self._by_muscle = {}
+            self._by_name = {}
+            self._loaded_at = None
+            self._last_failed_attempt = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_by_id(self, exercise_id: Any) -> Optional[Dict[str, Any]]:
+        """Get an exercise row by id (int or numeric string)."""
+        try:
+            return self._by_id.get(int(exercise_id))
+        except (ValueError, TypeError):
+            return None
+
+    def has_id(self, exercise_id: Any) -> bool:
+        """Check whether an exercise id exists in the catalog."""
+        return self.get_by_id(exercise_id) is not None
+
+    def get_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Get exercises whose name or alternative name matches exactly (normalized)."""
+        return list(self._by_name.get(normalize_exercise_name(name), []))
+
+    def get_candidates(
+        self,
+        equipment: Optional[str] = None,
+        main_muscle: Optional[str] = None,
+        max_popularity: int = 2,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get exercises filtered by equipment, main muscle and popularity.
+
+        Mirrors the database filters used by the matcher: equipment `eq`, main_muscles
+        array `contains`, popularity_score `lte`. Any filter left empty is not applied.
+
+        Args:
+            equipment: Exact equipment value
+            main_muscle: Main muscle that must be present in main_muscles
+            max_popularity: Maximum popularity score to include
+
+        Returns:
+            List of matching exercise rows (shared references, do not mutate)
+        """
+        if equipment and main_muscle:
+            pool = self._by_equipment_muscle.get((equipment, main_muscle), [])
+        elif main_muscle:
+            pool = self._by_muscle.get(main_muscle, [])
+        elif equipment:
+            pool = [ex for ex in self._exercises if ex.get("equipment") == equipment]
+        else:
+            pool = self._exercises
+
+        return [ex for ex in pool if self._within_popularity(ex, max_popularity)]
+
+    def equipment_values(self) -> List[str]:
+        """Distinct equipment values present in the catalog."""
+        return sorted({equipment for equipment, _ in self._by_equipment_muscle if equipment})
+
+    def metadata_groups(self, equipment: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        """
+        Get the (equipment, main_muscle) pairs the catalog has exercises for.
+
+        Args:
+            equipment: Only return groups for these equipment values (None = all)
+
+        Returns:
+            List of (equipment, main_muscle) keys, largest groups first
+        """
+        allowed = set(equipment) if equipment is not None else None
+        groups = [
+            (key, len(pool)) for key, pool in self._by_equipment_muscle.items()
+            if allowed is None or key[0] in allowed
+        ]
+        groups.sort(key=lambda item: item[1], reverse=True)
+        return [key for key, _ in groups]
+
+    def filter_exercises(
+        self,
+        difficulties: Optional[List[str]] = None,
+        equipment: Optional[List[str]] = None,
+        max_popularity: int = 2,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get exercises filtered by difficulty and equipment lists, ordered by popularity.
+
+        Args:
+            difficulties: Allowed difficulty values (None = any)
+            equipment: Allowed equipment values (None/empty = any)
+            max_popularity: Maximum popularity score to include
+
+        Returns:
+            List of matching exercise rows ordered by popularity_score ascending
+        """
+        difficulty_set = set(difficulties) if difficulties is not None else None
+        equipment_set = set(equipment) if equipment else None
+
+        matches = [
+            ex for ex in self._exercises
+            if (difficulty_set is None or ex.get("difficulty") in difficulty_set)
+            and (equipment_set is None or ex.get("equipment") in equipment_set)
+            and self._within_popularity(ex, max_popularity)
+        ]
+        # Stable sort keeps id order within the same popularity score
+        matches.sort(key=lambda ex: ex.get("popularity_score"))
+        return matches
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _within_popularity(exercise: Dict[str, Any], max_popularity: int) -> bool:
+        popularity = exercise.get("popularity_score")
+        # NULL popularity never satisfies `lte` in the database either
+        return popularity is not None and popularity <= max_popularity
+
+    @staticmethod
+    def _main_muscles(exercise: Dict[str, Any]) -> List[str]:
+        main_muscles = exercise.get("main_muscles")
+        if isinstance(main_muscles, list):
+            return [m for m in main_muscles if isinstance(m, str) and m]
+        if isinstance(main_muscles, str) and main_muscles:
+            return [main_muscles]
+        return []
+
+
+# Global exercise catalog instance (shared across selectors, matchers and requests)
+exercise_catalog = ExerciseCatalog()
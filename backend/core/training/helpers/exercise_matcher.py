@@ -6,9 +6,12 @@ using fuzzy matching and metadata filtering.
 """
 
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
+from scipy import sparse
 from logging_config import get_logger
 from .exercise_selector import ExerciseSelector
+from .exercise_catalog import exercise_catalog
 import logging
 
 # Try to use RapidFuzz for fast fuzzy matching, fallback to difflib
@@ -23,6 +26,62 @@ logger = get_logger(__name__)
 # Keep INFO for step transitions, but reduce detailed logs
 # Individual exercise matching details will be DEBUG
 
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# Upper bound on prepared candidate sets kept per matcher (one per metadata filter)
+_MAX_PREPARED_CANDIDATE_SETS = 512
+
+
+class _PreparedCandidates:
+    """
+    Candidate exercises pre-processed for matrix scoring.
+    
+    Holds normalized names, alternative names (flattened with their owning candidate
+    index), first-occurrence lookups for exact matches, and a sparse binary
+    candidate x token matrix for vectorized Jaccard similarity.
+    """
+
+    def __init__(self, candidates: List[Dict[str, Any]]):
+        self.candidates = candidates
+        self.names: List[str] = []
+        self.name_first: Dict[str, int] = {}
+        self.alt_first: Dict[str, int] = {}
+        self.alt_names: List[str] = []
+        alt_owner: List[int] = []
+        self.vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        token_counts: List[int] = []
+
+        for index, candidate in enumerate(candidates):
+            name = (candidate.get('name') or '').strip().lower()
+            self.names.append(name)
+            self.name_first.setdefault(name, index)
+
+            alternative_names = candidate.get('alternative_names', [])
+            if alternative_names and isinstance(alternative_names, list):
+                for alt_name in alternative_names:
+                    if isinstance(alt_name, str):
+                        alt_normalized = alt_name.strip().lower()
+                        self.alt_first.setdefault(alt_normalized, index)
+                        if alt_normalized:
+                            self.alt_names.append(alt_normalized)
+                            alt_owner.append(index)
+
+            tokens = set(_TOKEN_PATTERN.findall(name.lower())) if name else set()
+            token_counts.append(len(tokens))
+            for token in tokens:
+                rows.append(index)
+                cols.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+
+        self.alt_owner = np.asarray(alt_owner, dtype=np.intp)
+        self.name_is_empty = np.asarray([not name for name in self.names], dtype=bool)
+        self.token_counts = np.asarray(token_counts, dtype=np.int64)
+        self.token_matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, cols)),
+            shape=(len(candidates), max(len(self.vocabulary), 1)),
+        )
+
 
 class ExerciseMatcher:
     """Matches AI-generated exercise suggestions to database exercises."""
@@ -30,6 +89,8 @@ class ExerciseMatcher:
     def __init__(self):
         """Initialize the exercise matcher."""
         self.exercise_selector = ExerciseSelector()
+        # Prepared (tokenized) candidate sets for batch matching, keyed by catalog version + filter
+        self._prepared_cache: Dict[Tuple[Any, ...], _PreparedCandidates] = {}
         logger.info("✅ Exercise Matcher initialized")
 
     def match_ai_exercise_to_database(
@@ -136,6 +197,178 @@ class ExerciseMatcher:
             logger.error(f"Error matching exercise: {e}")
             return None, 0.0, "no_match"
 
+    def match_ai_exercises_batch(
+        self,
+        ai_exercises: List[Dict[str, Any]],
+        max_popularity: int = 2
+    ) -> List[Tuple[Optional[Dict[str, Any]], float, str]]:
+        """
+        Match many AI-generated exercises to database exercises in one pass.
+        
+        Produces exactly the same results as calling match_ai_exercise_to_database for
+        each exercise, but:
+        - candidates are fetched once per (equipment, main_muscle) group
+        - all names in a group are scored against the candidates with a single
+          RapidFuzz cdist call and a sparse-matrix Jaccard token score
+        - candidate names are normalized and tokenized once and reused
+        
+        Args:
+            ai_exercises: List of dicts with keys exercise_name, main_muscle, equipment
+            max_popularity: Maximum popularity score (default: 2)
+        
+        Returns:
+            List of (matched_exercise, similarity_score, status) tuples, aligned with input
+        """
+        results: List[Tuple[Optional[Dict[str, Any]], float, str]] = [
+            (None, 0.0, "no_match") for _ in ai_exercises
+        ]
+        if not ai_exercises:
+            return results
+        
+        # Group by metadata so each candidate set is fetched and prepared once
+        groups: Dict[Tuple[Any, Any], List[int]] = {}
+        for index, ai_exercise in enumerate(ai_exercises):
+            if not isinstance(ai_exercise.get("exercise_name"), str):
+                continue
+            key = (ai_exercise.get("equipment"), ai_exercise.get("main_muscle"))
+            groups.setdefault(key, []).append(index)
+        
+        unmatched: List[int] = []
+        for (equipment, main_muscle), indices in groups.items():
+            try:
+                candidates = self._get_candidates_by_metadata(
+                    main_muscle=main_muscle,
+                    equipment=equipment,
+                    max_popularity=max_popularity
+                )
+                if not candidates:
+                    unmatched.extend(indices)
+                    continue
+                
+                prepared = self._prepare_candidates(
+                    candidates, ("metadata", equipment, main_muscle, max_popularity)
+                )
+                names = [ai_exercises[i].get("exercise_name") for i in indices]
+                for i, (best_match, score) in zip(indices, self._find_best_matches(names, prepared)):
+                    results[i] = (best_match, score, self._score_to_status(score))
+            except Exception as e:
+                logger.error(f"Error batch matching exercises (equipment: {equipment}, main_muscle: {main_muscle}): {e}")
+        
+        if unmatched:
+            self._batch_fallback_match(ai_exercises, unmatched, results, max_popularity)
+        
+        matched_count = sum(1 for match, _, _ in results if match)
+        logger.debug(f"Batch matched {matched_count}/{len(ai_exercises)} exercises")
+        return results
+
+    def warm_up(self, equipment: Optional[Iterable[str]] = None, max_popularity: int = 2) -> int:
+        """
+        Prepare candidate sets ahead of match_ai_exercises_batch (e.g. while the plan LLM call runs).
+        
+        Uses the same cache keys as batch matching, so the later match only scores names.
+        Does nothing when the exercise catalog is not loaded.
+        
+        Args:
+            equipment: Equipment values the plan will likely use (None = every group)
+            max_popularity: Maximum popularity score (must match the later match call)
+        
+        Returns:
+            Number of candidate sets prepared
+        """
+        if not exercise_catalog.is_loaded:
+            return 0
+        
+        # Leave room for the fallback sets so warming never triggers a cache reset
+        budget = _MAX_PREPARED_CANDIDATE_SETS // 2
+        prepared = 0
+        for group_equipment, main_muscle in exercise_catalog.metadata_groups(equipment)[:budget]:
+            candidates = exercise_catalog.get_candidates(
+                equipment=group_equipment,
+                main_muscle=main_muscle,
+                max_popularity=max_popularity
+            )
+            if candidates:
+                self._prepare_candidates(
+                    candidates, ("metadata", group_equipment, main_muscle, max_popularity)
+                )
+                prepared += 1
+        
+        # Name-only fallback pool (used for every unmatched exercise)
+        candidates = exercise_catalog.get_candidates(max_popularity=max_popularity)
+        if candidates:
+            self._prepare_candidates(candidates, ("all", max_popularity))
+            prepared += 1
+        return prepared
+
+    def _batch_fallback_match(
+        self,
+        ai_exercises: List[Dict[str, Any]],
+        indices: List[int],
+        results: List[Tuple[Optional[Dict[str, Any]], float, str]],
+        max_popularity: int
+    ) -> None:
+        """
+        Apply both fallback strategies (main_muscle only, then name only) to a batch.
+        
+        Mirrors _fallback_match_main_muscle_only (min 0.85) followed by
+        _fallback_match_name_only (min 0.80); results are written in place.
+        """
+        # FALLBACK 1: main_muscle + fuzzy name with high threshold
+        by_muscle: Dict[Any, List[int]] = {}
+        for index in indices:
+            by_muscle.setdefault(ai_exercises[index].get("main_muscle"), []).append(index)
+        
+        remaining: List[int] = []
+        for main_muscle, muscle_indices in by_muscle.items():
+            try:
+                candidates = self._get_fallback_candidates(
+                    main_muscle=main_muscle,
+                    max_popularity=max_popularity
+                )
+                if not candidates:
+                    remaining.extend(muscle_indices)
+                    continue
+                prepared = self._prepare_candidates(
+                    candidates, ("muscle", main_muscle, max_popularity)
+                )
+                names = [ai_exercises[i].get("exercise_name") for i in muscle_indices]
+                for i, (best_match, score) in zip(muscle_indices, self._find_best_matches(names, prepared)):
+                    if best_match and score >= 0.85:
+                        results[i] = (best_match, score, self._score_to_status(score))
+                    else:
+                        remaining.append(i)
+            except Exception as e:
+                logger.error(f"Error in batch fallback matching (main_muscle: {main_muscle}): {e}")
+                remaining.extend(muscle_indices)
+        
+        if not remaining:
+            return
+        
+        # FALLBACK 2: name only with high accuracy threshold
+        try:
+            candidates = self._get_fallback_candidates(
+                main_muscle=None,
+                max_popularity=max_popularity
+            )
+            if not candidates:
+                return
+            prepared = self._prepare_candidates(candidates, ("all", max_popularity))
+            names = [ai_exercises[i].get("exercise_name") for i in remaining]
+            for i, (best_match, score) in zip(remaining, self._find_best_matches(names, prepared)):
+                if best_match and score >= 0.80:
+                    results[i] = (best_match, score, self._score_to_status(score))
+        except Exception as e:
+            logger.error(f"Error in batch name-only fallback matching: {e}")
+
+    @staticmethod
+    def _score_to_status(score: float) -> str:
+        """Map a similarity score to a database status value."""
+        if score >= 0.85:
+            return "matched"
+        if score >= 0.70:
+            return "low_confidence"
+        return "pending_review"
+
     def _get_candidates_by_metadata(
         self,
         main_muscle: str,
@@ -159,6 +392,19 @@ class ExerciseMatcher:
             List of candidate exercises
         """
         try:
+            # Fast path: answer from the in-memory exercise catalog (no round trip)
+            if exercise_catalog.ensure_loaded(self.exercise_selector.supabase):
+                candidates = exercise_catalog.get_candidates(
+                    equipment=equipment,
+                    main_muscle=main_muscle,
+                    max_popularity=max_popularity
+                )
+                logger.debug(
+                    f"Found {len(candidates)} candidates in catalog "
+                    f"(equipment: {equipment}, main_muscle: {main_muscle})"
+                )
+                return candidates
+
             # OPTIMIZATION #3: Filter by equipment, main_muscle, and popularity at database level
             # This uses database indexes and reduces data transfer by filtering before fetching
             query = self.exercise_selector.supabase.table("exercises").select("*")
@@ -200,6 +446,42 @@ class ExerciseMatcher:
                 logger.error(f"Error getting candidates by metadata: {error_msg}")
             return []
     
+    def _get_fallback_candidates(
+        self,
+        main_muscle: Optional[str],
+        max_popularity: int = 2
+    ) -> List[Dict[str, Any]]:
+        """
+        Get fallback candidates filtered only by main_muscle (if given) and popularity.
+        
+        Unlike _get_candidates_by_metadata, errors are propagated so each fallback
+        strategy can report them with its own context.
+        
+        Args:
+            main_muscle: Main muscle filter (None = no muscle filtering)
+            max_popularity: Maximum popularity score
+        
+        Returns:
+            List of candidate exercises
+        """
+        if exercise_catalog.ensure_loaded(self.exercise_selector.supabase):
+            return exercise_catalog.get_candidates(
+                main_muscle=main_muscle,
+                max_popularity=max_popularity
+            )
+        
+        query = self.exercise_selector.supabase.table("exercises").select("*")
+        
+        # Filter by main_muscle (array column)
+        if main_muscle:
+            query = query.contains("main_muscles", [main_muscle])
+        
+        # Filter by popularity
+        query = query.lte("popularity_score", max_popularity)
+        
+        response = query.execute()
+        return response.data if response.data else []
+
     def _fallback_match_main_muscle_only(
         self,
         ai_exercise_name: str,
@@ -224,17 +506,10 @@ class ExerciseMatcher:
         """
         try:
             # Query exercises filtered only by main_muscle and popularity
-            query = self.exercise_selector.supabase.table("exercises").select("*")
-            
-            # Filter by main_muscle (array column)
-            if main_muscle:
-                query = query.contains("main_muscles", [main_muscle])
-            
-            # Filter by popularity
-            query = query.lte("popularity_score", max_popularity)
-            
-            response = query.execute()
-            candidates = response.data if response.data else []
+            candidates = self._get_fallback_candidates(
+                main_muscle=main_muscle,
+                max_popularity=max_popularity
+            )
             
             if not candidates:
                 logger.warning(f"Fallback: No candidates found for main_muscle: {main_muscle}")
@@ -306,13 +581,10 @@ class ExerciseMatcher:
         """
         try:
             # Query all exercises filtered only by popularity (no metadata filtering)
-            query = self.exercise_selector.supabase.table("exercises").select("*")
-            
-            # Filter by popularity only
-            query = query.lte("popularity_score", max_popularity)
-            
-            response = query.execute()
-            candidates = response.data if response.data else []
+            candidates = self._get_fallback_candidates(
+                main_muscle=None,
+                max_popularity=max_popularity
+            )
             
             if not candidates:
                 logger.warning(f"Name-only fallback: No candidates found (popularity <= {max_popularity})")
@@ -427,6 +699,133 @@ class ExerciseMatcher:
         
         return best_match, best_score
 
+    def _prepare_candidates(
+        self,
+        candidates: List[Dict[str, Any]],
+        cache_key: Tuple[Any, ...]
+    ) -> _PreparedCandidates:
+        """
+        Prepare (normalize + tokenize) a candidate set, reusing it while the catalog is unchanged.
+        
+        Args:
+            candidates: Candidate exercises
+            cache_key: Filter that produced the candidates
+        
+        Returns:
+            Prepared candidates for matrix scoring
+        """
+        if not exercise_catalog.is_loaded:
+            return _PreparedCandidates(candidates)
+        
+        key = (exercise_catalog.version,) + cache_key
+        prepared = self._prepared_cache.get(key)
+        is_same_set = (
+            prepared is not None
+            and len(prepared.candidates) == len(candidates)
+            and all(a is b for a, b in zip(prepared.candidates, candidates))
+        )
+        if not is_same_set:
+            if len(self._prepared_cache) >= _MAX_PREPARED_CANDIDATE_SETS:
+                self._prepared_cache.clear()
+            prepared = _PreparedCandidates(candidates)
+            self._prepared_cache[key] = prepared
+        return prepared
+
+    def _find_best_matches(
+        self,
+        ai_exercise_names: List[str],
+        prepared: _PreparedCandidates
+    ) -> List[Tuple[Optional[Dict[str, Any]], float]]:
+        """
+        Vectorized equivalent of _find_best_match for many names against one candidate set.
+        
+        Scores are identical to _find_best_match: exact name (1.0) and exact alternative
+        name (0.95) short-circuit in candidate order; otherwise
+        0.7 * max(name_ratio, 0.95 * best_alt_ratio) + 0.3 * token_jaccard, first
+        best candidate wins ties, and candidates[0] with 0.5 is the fallback.
+        
+        Args:
+            ai_exercise_names: Names from AI
+            prepared: Prepared candidate set
+        
+        Returns:
+            List of (best_match_exercise, similarity_score) aligned with ai_exercise_names
+        """
+        candidates = prepared.candidates
+        if not candidates:
+            return [(None, 0.0) for _ in ai_exercise_names]
+        if not HAS_RAPIDFUZZ:
+            return [self._find_best_match(name, candidates) for name in ai_exercise_names]
+        
+        queries = [name.strip().lower() for name in ai_exercise_names]
+        query_is_empty = np.asarray([not query for query in queries], dtype=bool)
+        num_candidates = len(candidates)
+        
+        # Strategy 3: fuzzy ratio on main names (0.0 when either side is empty)
+        name_scores = process.cdist(
+            queries, prepared.names, scorer=fuzz.ratio, dtype=np.float64
+        ) / 100.0
+        name_scores[query_is_empty, :] = 0.0
+        name_scores[:, prepared.name_is_empty] = 0.0
+        
+        # Best fuzzy ratio over each candidate's alternative names
+        alt_scores_by_candidate = np.zeros((num_candidates, len(queries)), dtype=np.float64)
+        if prepared.alt_names:
+            alt_scores = process.cdist(
+                queries, prepared.alt_names, scorer=fuzz.ratio, dtype=np.float64
+            ) / 100.0
+            alt_scores[query_is_empty, :] = 0.0
+            np.maximum.at(alt_scores_by_candidate, prepared.alt_owner, alt_scores.T)
+        name_scores = np.maximum(name_scores, alt_scores_by_candidate.T * 0.95)
+        
+        # Strategy 4: Jaccard similarity on word tokens via sparse intersection counts
+        query_rows: List[int] = []
+        query_cols: List[int] = []
+        query_token_counts: List[int] = []
+        for row, query in enumerate(queries):
+            tokens = set(_TOKEN_PATTERN.findall(query.lower())) if query else set()
+            query_token_counts.append(len(tokens))
+            for token in tokens:
+                col = prepared.vocabulary.get(token)
+                if col is not None:
+                    query_rows.append(row)
+                    query_cols.append(col)
+        query_matrix = sparse.csr_matrix(
+            (np.ones(len(query_rows), dtype=np.int64), (query_rows, query_cols)),
+            shape=(len(queries), prepared.token_matrix.shape[1]),
+        )
+        intersection = np.asarray((query_matrix @ prepared.token_matrix.T).todense())
+        union = (
+            np.asarray(query_token_counts, dtype=np.int64)[:, None]
+            + prepared.token_counts[None, :]
+            - intersection
+        )
+        token_scores = np.zeros(intersection.shape, dtype=np.float64)
+        np.divide(intersection, union, out=token_scores, where=union > 0)
+        
+        combined_scores = (name_scores * 0.7) + (token_scores * 0.3)
+        
+        results: List[Tuple[Optional[Dict[str, Any]], float]] = []
+        for row, query in enumerate(queries):
+            # Strategies 1 & 2: first candidate (in order) with an exact name or alternative name
+            name_index = prepared.name_first.get(query)
+            alt_index = prepared.alt_first.get(query)
+            exact_indices = [index for index in (name_index, alt_index) if index is not None]
+            if exact_indices:
+                first_index = min(exact_indices)
+                results.append((candidates[first_index], 1.0 if name_index == first_index else 0.95))
+                continue
+            
+            best_index = int(np.argmax(combined_scores[row]))
+            best_score = float(combined_scores[row, best_index])
+            if best_score > 0.0:
+                results.append((candidates[best_index], best_score))
+            else:
+                # Metadata filtering already ensures the first candidate is relevant
+                results.append((candidates[0], 0.5))
+        
+        return results
+
     def _calculate_fuzzy_score(self, str1: str, str2: str) -> float:
         """
         Calculate fuzzy similarity score using RapidFuzz or SequenceMatcher.
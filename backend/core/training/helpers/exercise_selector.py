@@ -8,10 +8,12 @@ token usage and ensuring exercise authenticity.
 
 from typing import List, Dict, Any, Optional, Tuple
 import os
-from supabase import create_client, Client
+from supabase import Client
 from logging_config import get_logger
 from settings import settings
 from core.utils.env_loader import is_test_environment
+from core.utils.supabase_pool import supabase_pool
+from .exercise_catalog import exercise_catalog
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -65,7 +67,7 @@ class ExerciseSelector:
         # Use settings (which reads from environment dynamically)
         self.supabase_url = settings.SUPABASE_URL
         self.supabase_key = settings.SUPABASE_ANON_KEY
-        self.supabase = create_client(self.supabase_url, self.supabase_key)
+        self.supabase = supabase_pool.sync_client(use_service_role=False)
 
     def get_exercise_candidates(
         self, difficulty: str, equipment: Optional[List[str]] = None
@@ -121,6 +123,14 @@ class ExerciseSelector:
     def get_exercise_by_id(self, exercise_id: str) -> Optional[Dict[str, Any]]:
         """Get full exercise details by ID."""
         try:
+            # Fast path: answer from the in-memory catalog
+            if exercise_catalog.ensure_loaded(self.supabase):
+                exercise = exercise_catalog.get_by_id(exercise_id)
+                if exercise is None:
+                    logger.warning(f"Exercise with ID {exercise_id} not found")
+                    return None
+                return dict(exercise)
+
             response = (
                 self.supabase.table("exercises")
                 .select("*")
@@ -156,6 +166,17 @@ class ExerciseSelector:
             return [], []
         
         try:
+            # Fast path: validate against the in-memory catalog (no round trip)
+            if exercise_catalog.ensure_loaded(self.supabase):
+                exercise_ids_normalized = [str(eid) for eid in exercise_ids]
+                valid_ids = [eid for eid in exercise_ids_normalized if exercise_catalog.has_id(eid)]
+                invalid_ids = [eid for eid in exercise_ids_normalized if not exercise_catalog.has_id(eid)]
+                logger.debug(
+                    f"Catalog validated {len(exercise_ids)} IDs: "
+                    f"{len(valid_ids)} valid, {len(invalid_ids)} invalid"
+                )
+                return valid_ids, invalid_ids
+
             # Batch query: Fetch all exercise IDs in a single query instead of N queries
             # This reduces database round trips from N to 1
             
@@ -250,20 +271,34 @@ class ExerciseSelector:
                 f"Retrieving exercises - difficulty: {difficulty}, equipment: {equipment}, max_popularity: {max_popularity}"
             )
 
-            # Build query with filters
-            query = self.supabase.table("exercises").select("*")
-
-            # Apply difficulty filter (progressive inclusion)
+            # Difficulty filter (progressive inclusion)
             if difficulty.lower() in ["novice", "beginner"]:
-                query = query.eq("difficulty", "Beginner")
+                difficulties = ["Beginner"]
             elif difficulty.lower() == "intermediate":
-                query = query.in_("difficulty", ["Beginner", "Intermediate"])
+                difficulties = ["Beginner", "Intermediate"]
             elif difficulty.lower() == "advanced":
-                query = query.in_(
-                    "difficulty", ["Beginner", "Intermediate", "Advanced"]
+                difficulties = ["Beginner", "Intermediate", "Advanced"]
+            else:
+                difficulties = [difficulty]
+
+            # Fast path: filter the in-memory catalog
+            if exercise_catalog.ensure_loaded(self.supabase):
+                exercises = exercise_catalog.filter_exercises(
+                    difficulties=difficulties,
+                    equipment=equipment,
+                    max_popularity=max_popularity,
                 )
+                logger.info(f"Retrieved {len(exercises)} exercises from catalog")
+                return self._clean_exercise_data(exercises)
+
+            # Build query with filters
+            query = self.supabase.table("exercises").select("*")
+
+            # Apply difficulty filter
+            if len(difficulties) == 1:
+                query = query.eq("difficulty", difficulties[0])
             else:
-                query = query.eq("difficulty", difficulty)
+                query = query.in_("difficulty", difficulties)
 
             # Apply equipment filter if specified
             if equipment and len(equipment) > 0:
@@ -9,6 +9,7 @@ import re
 from typing import List, Dict, Any, Optional, Tuple
 from .exercise_selector import ExerciseSelector
 from .exercise_matcher import ExerciseMatcher
+from .exercise_catalog import exercise_catalog
 from .ai_exercise_logger import ai_exercise_logger
 import logging
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -618,6 +619,69 @@ class ExerciseValidator:
             logger.error(f"Error validating training structure: {e}")
             return [f"Structure validation error: {e}"]
 
+    def _batch_match_plan_exercises(
+        self,
+        weekly_schedules: List[Dict[str, Any]]
+    ) -> Dict[int, Tuple[Optional[Dict[str, Any]], float, str]]:
+        """
+        Batch-match all strength exercises in a plan that will need matching.
+        
+        Exercises with a valid exercise_id or incomplete metadata are skipped, exactly
+        like the per-exercise loop in post_process_strength_exercises.
+        
+        Args:
+            weekly_schedules: Weekly schedules of the plan
+        
+        Returns:
+            Dict mapping id(exercise dict) -> (matched_exercise, similarity_score, status).
+            Empty on error, in which case exercises are matched one at a time.
+        """
+        try:
+            exercises = []
+            for week in weekly_schedules:
+                for daily_training in week.get("daily_trainings", []):
+                    if daily_training.get("is_rest_day", False):
+                        continue
+                    exercises.extend(daily_training.get("strength_exercises", []))
+            
+            existing_ids = [str(ex["exercise_id"]) for ex in exercises if ex.get("exercise_id") is not None]
+            valid_ids = set()
+            if existing_ids:
+                valid_ids = set(self.exercise_selector.validate_exercise_ids(existing_ids)[0])
+            
+            exercises_to_match = []
+            for exercise in exercises:
+                exercise_id = exercise.get("exercise_id")
+                if exercise_id is not None and str(exercise_id) in valid_ids:
+                    continue
+                exercise_name = exercise.get("exercise_name", "Unknown")
+                main_muscle = exercise.get("main_muscle")
+                equipment = exercise.get("equipment")
+                if not all([exercise_name, main_muscle, equipment]):
+                    continue
+                exercises_to_match.append((exercise, {
+                    "exercise_name": exercise_name,
+                    "main_muscle": main_muscle,
+                    "equipment": equipment,
+                }))
+            
+            if not exercises_to_match:
+                return {}
+            
+            results = self.exercise_matcher.match_ai_exercises_batch(
+                [query for _, query in exercises_to_match],
+                max_popularity=2
+            )
+            logger.info(f"Batch matched {len(exercises_to_match)} strength exercises")
+            return {
+                id(exercise): result
+                for (exercise, _), result in zip(exercises_to_match, results)
+            }
+        
+        except Exception as e:
+            logger.warning(f"Batch exercise matching failed, falling back to per-exercise matching: {e}")
+            return {}
+
     def post_process_strength_exercises(
         self,
         training_plan_dict: Dict[str, Any]
@@ -657,6 +721,9 @@ class ExerciseValidator:
             # Iterate through weekly_schedules -> daily_trainings -> strength_exercises
             weekly_schedules = plan_dict.get("weekly_schedules", [])
             
+            # Score every exercise that needs matching across the whole plan in one pass
+            precomputed_matches = self._batch_match_plan_exercises(weekly_schedules)
+            
             for week in weekly_schedules:
                 daily_trainings = week.get("daily_trainings", [])
                 
@@ -702,10 +769,17 @@ class ExerciseValidator:
                     existing_exercise_names = []
                     if existing_exercise_ids:
                         try:
-                            # Get exercise details for existing IDs using existing selector
-                            exercises_data = self.exercise_selector.supabase.table("exercises").select("id, name").in_("id", existing_exercise_ids).execute()
-                            if exercises_data.data:
-                                existing_exercise_names = [ex.get("name", "") for ex in exercises_data.data if ex.get("name")]
+                            if exercise_catalog.ensure_loaded(self.exercise_selector.supabase):
+                                # Resolve names from the in-memory catalog
+                                for existing_id in existing_exercise_ids:
+                                    catalog_exercise = exercise_catalog.get_by_id(existing_id)
+                                    if catalog_exercise and catalog_exercise.get("name"):
+                                        existing_exercise_names.append(catalog_exercise["name"])
+                            else:
+                                # Get exercise details for existing IDs using existing selector
+                                exercises_data = self.exercise_selector.supabase.table("exercises").select("id, name").in_("id", existing_exercise_ids).execute()
+                                if exercises_data.data:
+                                    existing_exercise_names = [ex.get("name", "") for ex in exercises_data.data if ex.get("name")]
                         except Exception as e:
                             logger.warning(f"Could not fetch existing exercise names: {e}")
                     
@@ -748,15 +822,19 @@ class ExerciseValidator:
                         
                         stats["exercises_processed"] += 1
                         
-                        # Match to database
-                        matched_exercise, similarity_score, status = (
-                            self.exercise_matcher.match_ai_exercise_to_database(
-                                ai_exercise_name=exercise_name,
-                                main_muscle=main_muscle,
-                                equipment=equipment,
-                                max_popularity=2
+                        # Match to database (use the batch result when available)
+                        precomputed_match = precomputed_matches.get(id(exercise))
+                        if precomputed_match is not None:
+                            matched_exercise, similarity_score, status = precomputed_match
+                        else:
+                            matched_exercise, similarity_score, status = (
+                                self.exercise_matcher.match_ai_exercise_to_database(
+                                    ai_exercise_name=exercise_name,
+                                    main_muscle=main_muscle,
+                                    equipment=equipment,
+                                    max_popularity=2
+                                )
                             )
-                        )
                         
                         # Set exercise_id if matched
                         matched_exercise_id = matched_exercise.get("id") if matched_exercise else None
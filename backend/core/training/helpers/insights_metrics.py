@@ -0,0 +1,264 @@
+"""
+Insights Metrics Store for EvolveAI
+
+Per-week aggregates of a training plan (volume, average RPE, sessions
+completed/planned, top set per exercise - see `InsightsService.summarize_week`),
+kept per training plan so /insights-summary reads O(weeks) precomputed numbers
+instead of re-walking every day, exercise and set of the nested plan.
+
+- Weeks saved by the backend (plan creation, week updates, new weeks) are
+  recorded as they are written.
+- `sync_plan` reconciles a full plan (shipped by the client or fetched). When the
+  plan comes with its snapshot version (see plan_snapshots) and the aggregates were
+  synced from that version, nothing is summarized; a delta request on top of the
+  synced version only summarizes its week updates. Without a known version every
+  week is summarized (cheaper than hashing it) and only weeks whose aggregates
+  changed are written.
+
+Each plan has a version counter that is bumped whenever an aggregate actually
+changes; the insights summary cache uses it instead of hashing the metrics.
+A plan's aggregates are one `TieredCache` entry: with INSIGHTS_METRICS_PATH set
+they live in SQLite (shared by workers and restarts, and re-read on every sync);
+otherwise each worker keeps the INSIGHTS_METRICS_MAX_ENTRIES most recently used
+plans in memory and re-summarizes evicted ones on their next sync.
+"""
+
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+from core.training.helpers.insights_service import InsightsService
+from core.utils.tiered_cache import TieredCache
+
+logger = get_logger(__name__)
+
+
+def _summarize(weeks: Iterable[Dict[str, Any]]) -> Dict[int, str]:
+    """Encoded aggregates per week number (weeks without a number are skipped)."""
+    return {
+        week["week_number"]: json.dumps(InsightsService.summarize_week(week), sort_keys=True)
+        for week in weeks
+        if week.get("week_number") is not None
+    }
+
+
+def _encode_record(record: Dict[str, Any]) -> str:
+    return json.dumps(record)
+
+
+def _decode_record(value: str) -> Dict[str, Any]:
+    record = json.loads(value)
+    # JSON object keys are strings
+    record["weeks"] = {int(week_number): metrics for week_number, metrics in record["weeks"].items()}
+    return record
+
+
+class InsightsMetricsStore:
+    """Thread-safe store of per-week insights aggregates with a version counter per plan."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Initialize the store (the database is opened on first use).
+
+        Args:
+            path: SQLite file (defaults to settings.INSIGHTS_METRICS_PATH; empty keeps the
+                  aggregates in memory for this worker; never a file in tests)
+            max_entries: Plans kept in memory (defaults to settings.INSIGHTS_METRICS_MAX_ENTRIES)
+        """
+        self._path = path
+        self._max_entries = max_entries
+        self._records = TieredCache(
+            "insights_metrics",
+            max_entries=lambda: self.max_entries,
+            path=lambda: self.path,
+            encode=_encode_record,
+            decode=_decode_record,
+        )
+        self._lock = threading.Lock()
+        self.summarized = 0
+        self.reused = 0
+        self.written = 0
+
+    @property
+    def path(self) -> str:
+        if self._path is not None:
+            return self._path
+        if is_test_environment():
+            return ""
+        return settings.INSIGHTS_METRICS_PATH
+
+    @property
+    def max_entries(self) -> int:
+        """Effective in-memory capacity (plans)."""
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.INSIGHTS_METRICS_MAX_ENTRIES
+
+    def sync_plan(
+        self,
+        training_plan: Dict[str, Any],
+        plan_version: Optional[str] = None,
+        base_version: Optional[str] = None,
+        week_updates: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Bring the plan's aggregates up to date and return them.
+
+        Weeks that are no longer in the plan are dropped.
+
+        Args:
+            training_plan: Full plan dict with "id", "created_at" and "weekly_schedules"
+            plan_version: Snapshot version of training_plan, if known
+            base_version: Snapshot version that week_updates were applied to
+            week_updates: The only weeks that differ from base_version
+
+        Returns:
+            Snapshot dict with plan_id, version, created_at and weeks (ordered by
+            week_number); plan_id and version are None when the plan has no id or
+            the store failed (the weeks are then summarized without being stored)
+        """
+        plan_id = training_plan.get("id")
+        if plan_id is not None:
+            try:
+                return self._sync(int(plan_id), training_plan, plan_version, base_version, week_updates)
+            except Exception as e:
+                logger.warning(f"⚠️ Insights metrics store unavailable for plan {plan_id}, summarizing all weeks: {e}")
+
+        weeks = [InsightsService.summarize_week(week) for week in training_plan.get("weekly_schedules") or []]
+        weeks.sort(key=lambda week: week["week_number"] if week["week_number"] is not None else 0)
+        return {"plan_id": None, "version": None, "created_at": training_plan.get("created_at"), "weeks": weeks}
+
+    def _sync(
+        self,
+        plan_id: int,
+        training_plan: Dict[str, Any],
+        plan_version: Optional[str],
+        base_version: Optional[str],
+        week_updates: Optional[List[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        weekly_schedules = training_plan.get("weekly_schedules") or []
+        created_at = training_plan.get("created_at")
+
+        if plan_version is not None:
+            with self._lock:
+                record = self._record(plan_id)
+                synced_version = record["plan_version"] if record else None
+                if synced_version == plan_version:
+                    self.reused += len(weekly_schedules)
+                    return self._snapshot(plan_id, record)
+            if base_version is not None and synced_version == base_version:
+                # Delta on top of the synced version: only the updated weeks can differ
+                updated = _summarize(week_updates or [])
+                with self._lock:
+                    record = self._record(plan_id)
+                    if record and record["plan_version"] == base_version:
+                        self.summarized += len(updated)
+                        self.reused += max(len(weekly_schedules) - len(updated), 0)
+                        return self._apply(plan_id, record, updated, None, created_at, plan_version)
+
+        # Unknown version: summarizing every week is cheaper than fingerprinting it
+        summaries = _summarize(weekly_schedules)
+        with self._lock:
+            self.summarized += len(summaries)
+            return self._apply(plan_id, self._record(plan_id), summaries, set(summaries), created_at, plan_version)
+
+    def record_weeks(self, plan_id: int, weeks: Iterable[Dict[str, Any]]) -> None:
+        """Summarize weeks the backend just saved (never raises)."""
+        try:
+            summaries = _summarize(weeks)
+            with self._lock:
+                self.summarized += len(summaries)
+                # The stored aggregates no longer match a known plan snapshot
+                self._apply(int(plan_id), self._record(int(plan_id)), summaries, None, None, None)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to record insights metrics for plan {plan_id}: {e}")
+
+    def get(self, plan_id: int) -> Optional[Dict[str, Any]]:
+        """Stored snapshot of a plan, or None if nothing was recorded for it (or it was evicted)."""
+        with self._lock:
+            record = self._record(int(plan_id))
+            return self._snapshot(int(plan_id), record) if record else None
+
+    def stats(self) -> Dict[str, int]:
+        """Weeks summarized vs. served from stored aggregates, and aggregates that changed."""
+        return {"summarized": self.summarized, "reused": self.reused, "written": self.written}
+
+    def close(self) -> None:
+        """Close the SQLite connection, if open."""
+        self._records.close()
+
+    # ------------------------------------------------------------------
+    # Internals (all called with the lock held)
+    # ------------------------------------------------------------------
+
+    def _record(self, plan_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Stored aggregates of a plan: {"version", "created_at", "plan_version", "weeks"}
+        (encoded metrics per week number). The file is the source of truth when there is
+        one, since other workers write it too.
+        """
+        if self._records.persistent:
+            return self._records.load(plan_id)
+        return self._records.get(plan_id)
+
+    def _apply(
+        self,
+        plan_id: int,
+        record: Optional[Dict[str, Any]],
+        summaries: Dict[int, str],
+        week_numbers: Optional[Set[int]],
+        created_at: Optional[str],
+        plan_version: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Merge the aggregates into the plan's record and save it when something changed.
+
+        The version is created at 1 and incremented when an aggregate or the plan date
+        changed; the record also remembers the snapshot version it was synced from.
+
+        Args:
+            summaries: Encoded aggregates per week number
+            week_numbers: All weeks of the plan (other stored weeks are dropped); None keeps them
+            created_at: Plan creation date, if known
+            plan_version: Snapshot version the aggregates now reflect (None: unknown)
+        """
+        stored = record["weeks"] if record else {}
+        weeks = dict(stored)
+        changed = [week_number for week_number, metrics in summaries.items() if stored.get(week_number) != metrics]
+        for week_number in changed:
+            weeks[week_number] = summaries[week_number]
+        removed = [] if week_numbers is None else [n for n in stored if n not in week_numbers]
+        for week_number in removed:
+            del weeks[week_number]
+        self.written += len(changed)
+
+        if record is None:
+            record = {"version": 1, "created_at": created_at, "plan_version": plan_version, "weeks": weeks}
+        else:
+            modified = bool(changed or removed)
+            if created_at is not None and created_at != record["created_at"]:
+                modified = True
+            else:
+                created_at = record["created_at"]
+            if not modified and plan_version == record["plan_version"]:
+                return self._snapshot(plan_id, record)
+            record = {
+                "version": record["version"] + int(modified),
+                "created_at": created_at,
+                "plan_version": plan_version,
+                "weeks": weeks,
+            }
+        self._records.remember(plan_id, record)
+        self._records.store(plan_id, record)
+        return self._snapshot(plan_id, record)
+
+    def _snapshot(self, plan_id: int, record: Dict[str, Any]) -> Dict[str, Any]:
+        weeks = [json.loads(record["weeks"][week_number]) for week_number in sorted(record["weeks"])]
+        return {"plan_id": plan_id, "version": record["version"], "created_at": record["created_at"], "weeks": weeks}
+
+
+# Shared by every endpoint in the process
+insights_metrics = InsightsMetricsStore()
@@ -5,8 +5,10 @@ Service for extracting simple insights metrics from training data.
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta, date
 from logging_config import get_logger
+from core.training.helpers.date_mapper import map_daily_training_dates
 import hashlib
 import json
+import numpy as np
 
 logger = get_logger(__name__)
 
@@ -24,70 +26,67 @@ class InsightsService:
         try:
             weekly_schedules = training_plan.get("weekly_schedules", [])
             
-            # Get all completed weeks
-            completed_weeks = [
-                w for w in weekly_schedules 
-                if w.get("completed", False) or any(
-                    dt.get("completed", False) 
-                    for dt in w.get("daily_trainings", [])
-                )
-            ]
-            
-            if len(completed_weeks) < 2:
-                return "Establishing baseline - need at least 2 completed weeks"
-            
-            # Calculate volume for all completed weeks
-            volumes = []
-            for week in completed_weeks:
-                week_volume = InsightsService._calculate_week_volume(week)
-                volumes.append(week_volume)
-            
-            if len(volumes) < 2:
-                return "Establishing baseline"
-            
-            current_volume = volumes[-1]
-            last_week_volume = volumes[-2] if len(volumes) >= 2 else current_volume
-            avg_volume = sum(volumes) / len(volumes)
-            
-            # Week-over-week change
-            if last_week_volume == 0:
-                week_change_pct = 0
-            else:
-                week_change_pct = ((current_volume - last_week_volume) / last_week_volume) * 100
-            
-            # Long-term trend (last 4 weeks vs previous 4 weeks, or all available)
-            long_term_trend = ""
-            if len(volumes) >= 8:
-                recent_4_avg = sum(volumes[-4:]) / 4
-                previous_4_avg = sum(volumes[-8:-4]) / 4
-                if previous_4_avg > 0:
-                    long_term_change = ((recent_4_avg - previous_4_avg) / previous_4_avg) * 100
-                    if long_term_change > 10:
-                        long_term_trend = f" (up {long_term_change:.0f}% vs previous month)"
-                    elif long_term_change < -10:
-                        long_term_trend = f" (down {abs(long_term_change):.0f}% vs previous month)"
-            elif len(volumes) >= 4:
-                recent_avg = sum(volumes[-2:]) / 2
-                earlier_avg = sum(volumes[:2]) / 2
-                if earlier_avg > 0:
-                    long_term_change = ((recent_avg - earlier_avg) / earlier_avg) * 100
-                    if long_term_change > 10:
-                        long_term_trend = f" (trending up {long_term_change:.0f}% overall)"
-                    elif long_term_change < -10:
-                        long_term_trend = f" (trending down {abs(long_term_change):.0f}% overall)"
-            
-            # Build description
-            if week_change_pct > 5:
-                return f"Lifted {current_volume:.0f}kg this week, up {week_change_pct:.0f}% from last week (increase){long_term_trend}. Average: {avg_volume:.0f}kg/week over {len(volumes)} weeks"
-            elif week_change_pct < -5:
-                return f"Lifted {current_volume:.0f}kg this week, down {abs(week_change_pct):.0f}% from last week (decrease){long_term_trend}. Average: {avg_volume:.0f}kg/week over {len(volumes)} weeks"
-            else:
-                return f"Lifted {current_volume:.0f}kg this week, stable vs last week{long_term_trend}. Average: {avg_volume:.0f}kg/week over {len(volumes)} weeks"
+            completed_weeks = [w for w in weekly_schedules if InsightsService._is_week_completed(w)]
+            volumes = [InsightsService._calculate_week_volume(week) for week in completed_weeks]
+            return InsightsService._describe_volume(volumes)
                 
         except Exception as e:
             logger.error(f"Error extracting volume progress: {e}")
             return "Unable to calculate volume progress"
     
+    @staticmethod
+    def _describe_volume(volumes: List[float]) -> str:
+        """Describe volume progress from the volumes of the completed weeks (oldest first)."""
+        if len(volumes) < 2:
+            return "Establishing baseline - need at least 2 completed weeks"
+        
+        current_volume = volumes[-1]
+        last_week_volume = volumes[-2]
+        avg_volume = sum(volumes) / len(volumes)
+        
+        # Week-over-week change
+        if last_week_volume == 0:
+            week_change_pct = 0
+        else:
+            week_change_pct = ((current_volume - last_week_volume) / last_week_volume) * 100
+        
+        # Long-term trend (last 4 weeks vs previous 4 weeks, or all available)
+        long_term_trend = ""
+        if len(volumes) >= 8:
+            recent_4_avg = sum(volumes[-4:]) / 4
+            previous_4_avg = sum(volumes[-8:-4]) / 4
+            if previous_4_avg > 0:
+                long_term_change = ((recent_4_avg - previous_4_avg) / previous_4_avg) * 100
+                if long_term_change > 10:
+                    long_term_trend = f" (up {long_term_change:.0f}% vs previous month)"
+                elif long_term_change < -10:
+                    long_term_trend = f" (down {abs(long_term_change):.0f}% vs previous month)"
+        elif len(volumes) >= 4:
+            recent_avg = sum(volumes[-2:]) / 2
+            earlier_avg = sum(volumes[:2]) / 2
+            if earlier_avg > 0:
+                long_term_change = ((recent_avg - earlier_avg) / earlier_avg) * 100
+                if long_term_change > 10:
+                    long_term_trend = f" (trending up {long_term_change:.0f}% overall)"
+                elif long_term_change < -10:
+                    long_term_trend = f" (trending down {abs(long_term_change):.0f}% overall)"
+        
+        # Build description
+        if week_change_pct > 5:
+            return f"Lifted {current_volume:.0f}kg this week, up {week_change_pct:.0f}% from last week (increase){long_term_trend}. Average: {avg_volume:.0f}kg/week over {len(volumes)} weeks"
+        elif week_change_pct < -5:
+            return f"Lifted {current_volume:.0f}kg this week, down {abs(week_change_pct):.0f}% from last week (decrease){long_term_trend}. Average: {avg_volume:.0f}kg/week over {len(volumes)} weeks"
+        else:
+            return f"Lifted {current_volume:.0f}kg this week, stable vs last week{long_term_trend}. Average: {avg_volume:.0f}kg/week over {len(volumes)} weeks"
+    
+    @staticmethod
+    def _is_week_completed(week: Dict[str, Any]) -> bool:
+        """A week counts once it is marked completed or any of its days is."""
+        return week.get("completed", False) or any(
+            dt.get("completed", False)
+            for dt in week.get("daily_trainings", [])
+        )
+    
     @staticmethod
     def _calculate_week_volume(week: Dict[str, Any]) -> float:
         """Calculate total volume (kg × reps × sets) for a week."""
@@ -211,13 +210,7 @@ class InsightsService:
                 return "No training scheduled this week"
             
             # Get all completed weeks
-            completed_weeks = [
-                w for w in weekly_schedules 
-                if w.get("completed", False) or any(
-                    dt.get("completed", False) 
-                    for dt in w.get("daily_trainings", [])
-                )
-            ]
+            completed_weeks = [w for w in weekly_schedules if InsightsService._is_week_completed(w)]
             
             if not completed_weeks:
                 return "No completed training weeks yet"
@@ -269,27 +262,38 @@ class InsightsService:
                     weekly_completion_rates.append(week_completed / week_total_past * 100)
             
             avg_completion_rate = sum(weekly_completion_rates) / len(weekly_completion_rates) if weekly_completion_rates else 0
-            
-            # Build description
-            current_status = "on track" if completed_days >= total_days_past else "below goal"
-            consistency_desc = ""
-            # Show consistency if we have at least 2 weeks (not just 4)
-            if len(weekly_completion_rates) >= 2:
-                if avg_completion_rate >= 90:
-                    consistency_desc = f" (excellent {avg_completion_rate:.0f}% consistency over {len(completed_weeks)} weeks)"
-                elif avg_completion_rate >= 75:
-                    consistency_desc = f" (good {avg_completion_rate:.0f}% consistency over {len(completed_weeks)} weeks)"
-                elif avg_completion_rate >= 60:
-                    consistency_desc = f" (moderate {avg_completion_rate:.0f}% consistency over {len(completed_weeks)} weeks)"
-                else:
-                    consistency_desc = f" (needs improvement: {avg_completion_rate:.0f}% consistency over {len(completed_weeks)} weeks)"
-            
-            return f"Trained {completed_days}/{total_days_past} days this week ({current_status}){consistency_desc}"
+            return InsightsService._describe_frequency(
+                completed_days, total_days_past, avg_completion_rate, len(weekly_completion_rates), len(completed_weeks)
+            )
                 
         except Exception as e:
             logger.error(f"Error extracting training frequency: {e}")
             return "Unable to calculate training frequency"
     
+    @staticmethod
+    def _describe_frequency(
+        completed_days: int,
+        total_days_past: int,
+        avg_completion_rate: float,
+        rated_weeks: int,
+        completed_week_count: int
+    ) -> str:
+        """Describe frequency from the most recent completed week's past sessions and the completion rate over the completed weeks."""
+        current_status = "on track" if completed_days >= total_days_past else "below goal"
+        consistency_desc = ""
+        # Show consistency if we have at least 2 weeks (not just 4)
+        if rated_weeks >= 2:
+            if avg_completion_rate >= 90:
+                consistency_desc = f" (excellent {avg_completion_rate:.0f}% consistency over {completed_week_count} weeks)"
+            elif avg_completion_rate >= 75:
+                consistency_desc = f" (good {avg_completion_rate:.0f}% consistency over {completed_week_count} weeks)"
+            elif avg_completion_rate >= 60:
+                consistency_desc = f" (moderate {avg_completion_rate:.0f}% consistency over {completed_week_count} weeks)"
+            else:
+                consistency_desc = f" (needs improvement: {avg_completion_rate:.0f}% consistency over {completed_week_count} weeks)"
+        
+        return f"Trained {completed_days}/{total_days_past} days this week ({current_status}){consistency_desc}"
+    
     @staticmethod
     def extract_training_intensity(training_plan: Dict[str, Any]) -> Tuple[str, str]:
         """
@@ -305,82 +309,75 @@ class InsightsService:
                 return "No RPE data available", "stable"
             
             # Get all completed weeks
-            completed_weeks = [
-                w for w in weekly_schedules 
-                if w.get("completed", False) or any(
-                    dt.get("completed", False) 
-                    for dt in w.get("daily_trainings", [])
-                )
-            ]
+            completed_weeks = [w for w in weekly_schedules if InsightsService._is_week_completed(w)]
             
             if len(completed_weeks) < 1:
                 return "No RPE data available", "stable"
             
             # Calculate average RPE for all completed weeks
-            rpe_values = []
-            for week in completed_weeks:
-                week_rpe = InsightsService._calculate_week_rpe(week)
-                if week_rpe is not None:
-                    rpe_values.append(week_rpe)
-            
-            if not rpe_values:
-                return "No RPE data recorded", "stable"
-            
-            current_rpe = rpe_values[-1]
-            avg_rpe = sum(rpe_values) / len(rpe_values)
-            min_rpe = min(rpe_values)
-            max_rpe = max(rpe_values)
-            
-            # Determine short-term trend (last 2 weeks)
-            if len(rpe_values) >= 2:
-                if rpe_values[-1] < rpe_values[-2] - 0.3:  # RPE decreased (workouts feeling easier)
-                    trend = "improving"
-                elif rpe_values[-1] > rpe_values[-2] + 0.3:  # RPE increased (workouts feeling harder)
-                    trend = "declining"
-                else:
-                    trend = "stable"
-            else:
-                trend = "stable"
-            
-            # Determine long-term trend (last 4 weeks vs previous 4)
-            long_term_trend_desc = ""
-            if len(rpe_values) >= 8:
-                recent_4_avg = sum(rpe_values[-4:]) / 4
-                previous_4_avg = sum(rpe_values[-8:-4]) / 4
-                if recent_4_avg < previous_4_avg - 0.3:
-                    long_term_trend_desc = " (intensity decreasing over past month)"
-                elif recent_4_avg > previous_4_avg + 0.3:
-                    long_term_trend_desc = " (intensity increasing over past month)"
-            
-            # Generate description with context
-            rpe_scale = "1-5"  # Assuming 1-5 scale based on frontend
-            if current_rpe <= 2.5:
-                description = f"Average RPE: {current_rpe:.1f}/5 this week (very easy)"
-            elif current_rpe <= 3.5:
-                description = f"Average RPE: {current_rpe:.1f}/5 this week (manageable)"
-            elif current_rpe <= 4.5:
-                description = f"Average RPE: {current_rpe:.1f}/5 this week (moderate)"
-            else:
-                description = f"Average RPE: {current_rpe:.1f}/5 this week (hard)"
-            
-            # Add trend and context
-            if trend == "improving":
-                description += f" - RPE decreasing (workouts feeling easier){long_term_trend_desc}"
-            elif trend == "declining":
-                description += f" - RPE increasing (workouts feeling harder){long_term_trend_desc}"
-            else:
-                description += f" - RPE stable{long_term_trend_desc}"
-            
-            # Add overall context
-            if len(rpe_values) >= 4:
-                description += f". Average over {len(rpe_values)} weeks: {avg_rpe:.1f}/5 (range: {min_rpe:.1f}-{max_rpe:.1f})"
-            
-            return description, trend
+            rpe_values = [InsightsService._calculate_week_rpe(week) for week in completed_weeks]
+            return InsightsService._describe_intensity([rpe for rpe in rpe_values if rpe is not None])
                 
         except Exception as e:
             logger.error(f"Error extracting training intensity: {e}")
             return "Unable to calculate training intensity", "stable"
     
+    @staticmethod
+    def _describe_intensity(rpe_values: List[float]) -> Tuple[str, str]:
+        """Describe intensity from the average RPE of the completed weeks that recorded one (oldest first)."""
+        if not rpe_values:
+            return "No RPE data recorded", "stable"
+        
+        current_rpe = rpe_values[-1]
+        avg_rpe = sum(rpe_values) / len(rpe_values)
+        min_rpe = min(rpe_values)
+        max_rpe = max(rpe_values)
+        
+        # Determine short-term trend (last 2 weeks)
+        if len(rpe_values) >= 2:
+            if rpe_values[-1] < rpe_values[-2] - 0.3:  # RPE decreased (workouts feeling easier)
+                trend = "improving"
+            elif rpe_values[-1] > rpe_values[-2] + 0.3:  # RPE increased (workouts feeling harder)
+                trend = "declining"
+            else:
+                trend = "stable"
+        else:
+            trend = "stable"
+        
+        # Determine long-term trend (last 4 weeks vs previous 4)
+        long_term_trend_desc = ""
+        if len(rpe_values) >= 8:
+            recent_4_avg = sum(rpe_values[-4:]) / 4
+            previous_4_avg = sum(rpe_values[-8:-4]) / 4
+            if recent_4_avg < previous_4_avg - 0.3:
+                long_term_trend_desc = " (intensity decreasing over past month)"
+            elif recent_4_avg > previous_4_avg + 0.3:
+                long_term_trend_desc = " (intensity increasing over past month)"
+        
+        # Generate description with context (1-5 scale, as in the frontend)
+        if current_rpe <= 2.5:
+            description = f"Average RPE: {current_rpe:.1f}/5 this week (very easy)"
+        elif current_rpe <= 3.5:
+            description = f"Average RPE: {current_rpe:.1f}/5 this week (manageable)"
+        elif current_rpe <= 4.5:
+            description = f"Average RPE: {current_rpe:.1f}/5 this week (moderate)"
+        else:
+            description = f"Average RPE: {current_rpe:.1f}/5 this week (hard)"
+        
+        # Add trend and context
+        if trend == "improving":
+            description += f" - RPE decreasing (workouts feeling easier){long_term_trend_desc}"
+        elif trend == "declining":
+            description += f" - RPE increasing (workouts feeling harder){long_term_trend_desc}"
+        else:
+            description += f" - RPE stable{long_term_trend_desc}"
+        
+        # Add overall context
+        if len(rpe_values) >= 4:
+            description += f". Average over {len(rpe_values)} weeks: {avg_rpe:.1f}/5 (range: {min_rpe:.1f}-{max_rpe:.1f})"
+        
+        return description, trend
+    
     @staticmethod
     def _calculate_week_rpe(week: Dict[str, Any]) -> Optional[float]:
         """Calculate average RPE for a week."""
@@ -399,6 +396,336 @@ class InsightsService:
         
         return sum(rpe_values) / len(rpe_values)
     
+    @staticmethod
+    def _calculate_week_top_sets(week: Dict[str, Any]) -> Dict[str, float]:
+        """Heaviest completed set per exercise (name, or exercise id when unnamed) for a week."""
+        top_sets: Dict[str, float] = {}
+        
+        for daily in week.get("daily_trainings", []):
+            if daily.get("is_rest_day", False) or not daily.get("completed", False):
+                continue
+            
+            for exercise in daily.get("strength_exercise", []):
+                if not exercise.get("completed", False):
+                    continue
+                
+                name = exercise.get("exercise_name") or str(exercise.get("exercise_id") or "")
+                weights = exercise.get("weights", [])
+                reps = exercise.get("reps", [])
+                sets = exercise.get("sets", 0)
+                lifted = [weights[i] for i in range(min(len(weights), len(reps), sets)) if weights[i] and reps[i]]
+                if name and lifted:
+                    top_sets[name] = max(top_sets.get(name, 0.0), float(max(lifted)))
+        
+        return top_sets
+    
+    # ------------------------------------------------------------------
+    # Per-week aggregates (precomputed by the insights metrics store)
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def summarize_week(week: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reduce a week to the numbers the insights metrics need.
+        
+        Returns:
+            Dict with week_number, completed, volume, rpe, sessions_planned,
+            sessions_completed, top_sets and a day skeleton (day_of_week,
+            is_rest_day, completed) used to date sessions for the frequency metric
+        """
+        days = week.get("daily_trainings", [])
+        sessions = [dt for dt in days if not dt.get("is_rest_day", False)]
+        return {
+            "week_number": week.get("week_number"),
+            "completed": bool(InsightsService._is_week_completed(week)),
+            "volume": InsightsService._calculate_week_volume(week),
+            "rpe": InsightsService._calculate_week_rpe(week),
+            "sessions_planned": len(sessions),
+            "sessions_completed": sum(1 for dt in sessions if dt.get("completed", False)),
+            "top_sets": InsightsService._calculate_week_top_sets(week),
+            "days": [
+                {key: dt[key] for key in ("day_of_week", "is_rest_day", "completed") if key in dt}
+                for dt in days
+            ],
+        }
+    
+    @staticmethod
+    def volume_progress_from_weeks(weeks: List[Dict[str, Any]]) -> str:
+        """extract_volume_progress computed from summarize_week aggregates."""
+        try:
+            return InsightsService._describe_volume([w["volume"] for w in weeks if w["completed"]])
+        except Exception as e:
+            logger.error(f"Error extracting volume progress: {e}")
+            return "Unable to calculate volume progress"
+    
+    @staticmethod
+    def training_frequency_from_weeks(
+        weeks: List[Dict[str, Any]],
+        plan_created_at: Optional[str] = None
+    ) -> str:
+        """extract_training_frequency computed from summarize_week aggregates (dates mapped as for the plan)."""
+        skeleton = {
+            "created_at": plan_created_at,
+            "weekly_schedules": [
+                {"completed": w["completed"], "daily_trainings": [dict(day) for day in w["days"]]}
+                for w in weeks
+            ],
+        }
+        return InsightsService.extract_training_frequency(map_daily_training_dates(skeleton))
+    
+    @staticmethod
+    def training_intensity_from_weeks(weeks: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """extract_training_intensity computed from summarize_week aggregates."""
+        try:
+            completed_weeks = [w for w in weeks if w["completed"]]
+            if not completed_weeks:
+                return "No RPE data available", "stable"
+            return InsightsService._describe_intensity(
+                [w["rpe"] for w in completed_weeks if w["rpe"] is not None]
+            )
+        except Exception as e:
+            logger.error(f"Error extracting training intensity: {e}")
+            return "Unable to calculate training intensity", "stable"
+    
+    # ------------------------------------------------------------------
+    # Batch mode (many users' plans at once, e.g. nightly precomputation)
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _date_ordinal(value: Any) -> int:
+        """Day ordinal of an ISO date/timestamp string, or -1 when missing or unparseable."""
+        if not value:
+            return -1
+        try:
+            return date.fromisoformat(value.split('T')[0]).toordinal()
+        except (ValueError, AttributeError):
+            return -1
+    
+    @staticmethod
+    def flatten_plans(training_plans: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Flatten plans into columns with one row per week, per day and per strength set.
+        
+        Weeks, days and sets are numbered globally in plan order, so a plan's weeks
+        are a contiguous, ordered range of week rows.
+        
+        Returns:
+            Dict of NumPy arrays:
+            - plan_created: per plan, created_at day ordinal (-1 if unknown)
+            - week_plan, week_completed: per week, plan row and explicit completed flag
+            - day_plan, day_week, day_rest, day_completed, day_rpe (NaN if unrecorded),
+              day_scheduled (day ordinal, -1 if unscheduled): per day
+            - set_day, set_week, set_completed (exercise completed), set_weight, set_reps:
+              per set (sets beyond the shortest of weights, reps and sets are dropped;
+              missing values are 0)
+        """
+        plan_created: List[int] = []
+        week_plan: List[int] = []
+        week_completed: List[bool] = []
+        day_plan: List[int] = []
+        day_week: List[int] = []
+        day_rest: List[bool] = []
+        day_completed: List[bool] = []
+        day_rpe: List[float] = []
+        day_scheduled: List[int] = []
+        set_day: List[int] = []
+        set_completed: List[bool] = []
+        set_weight: List[float] = []
+        set_reps: List[float] = []
+        
+        for plan_index, plan in enumerate(training_plans):
+            plan_created.append(InsightsService._date_ordinal(plan.get("created_at")))
+            for week in plan.get("weekly_schedules") or []:
+                week_index = len(week_plan)
+                week_plan.append(plan_index)
+                week_completed.append(bool(week.get("completed", False)))
+                for daily in week.get("daily_trainings") or []:
+                    day_index = len(day_plan)
+                    day_plan.append(plan_index)
+                    day_week.append(week_index)
+                    day_rest.append(bool(daily.get("is_rest_day", False)))
+                    day_completed.append(bool(daily.get("completed", False)))
+                    session_rpe = daily.get("session_rpe")
+                    day_rpe.append(float(session_rpe) if session_rpe is not None else np.nan)
+                    day_scheduled.append(InsightsService._date_ordinal(daily.get("scheduled_date")))
+                    for exercise in daily.get("strength_exercise") or []:
+                        weights = exercise.get("weights") or []
+                        reps = exercise.get("reps") or []
+                        count = min(len(weights), len(reps), exercise.get("sets") or 0)
+                        if count <= 0:
+                            continue
+                        set_day.extend([day_index] * count)
+                        set_completed.extend([bool(exercise.get("completed", False))] * count)
+                        set_weight.extend([weight or 0 for weight in weights[:count]])
+                        set_reps.extend([rep or 0 for rep in reps[:count]])
+        
+        day_week_array = np.array(day_week, dtype=np.int64)
+        set_day_array = np.array(set_day, dtype=np.int64)
+        return {
+            "plan_created": np.array(plan_created, dtype=np.int64),
+            "week_plan": np.array(week_plan, dtype=np.int64),
+            "week_completed": np.array(week_completed, dtype=bool),
+            "day_plan": np.array(day_plan, dtype=np.int64),
+            "day_week": day_week_array,
+            "day_rest": np.array(day_rest, dtype=bool),
+            "day_completed": np.array(day_completed, dtype=bool),
+            "day_rpe": np.array(day_rpe, dtype=np.float64),
+            "day_scheduled": np.array(day_scheduled, dtype=np.int64),
+            "set_day": set_day_array,
+            "set_week": day_week_array[set_day_array],
+            "set_completed": np.array(set_completed, dtype=bool),
+            "set_weight": np.array(set_weight, dtype=np.float64),
+            "set_reps": np.array(set_reps, dtype=np.float64),
+        }
+    
+    @staticmethod
+    def extract_metrics_batch(
+        training_plans: Dict[Any, Dict[str, Any]],
+        today: Optional[date] = None
+    ) -> Dict[Any, Dict[str, str]]:
+        """
+        Volume progress, training frequency and intensity for many plans at once.
+        
+        Same results as the per-plan extractors, but the per-week volume, RPE and
+        session counts are grouped reductions over flattened columns instead of
+        nested loops over each plan's dicts. Plans must carry scheduled dates (as
+        stored) for the frequency metric.
+        
+        Args:
+            training_plans: Plans keyed by caller id (e.g. user_profile_id)
+            today: Reference date for past sessions (defaults to date.today())
+        
+        Returns:
+            Dict with the same keys, each mapping to volume_progress,
+            training_frequency, training_intensity and intensity_trend
+        """
+        keys = list(training_plans)
+        columns = InsightsService.flatten_plans([training_plans[key] for key in keys])
+        n_plans = len(keys)
+        n_weeks = len(columns["week_plan"])
+        today_ordinal = (today or date.today()).toordinal()
+        
+        def per_week(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+            return np.bincount(values, weights=weights, minlength=n_weeks)
+        
+        def per_plan(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+            return np.bincount(values, weights=weights, minlength=n_plans)
+        
+        day_week = columns["day_week"]
+        day_plan = columns["day_plan"]
+        day_completed = columns["day_completed"]
+        session = ~columns["day_rest"]
+        done = session & day_completed
+        
+        # Volume of completed sessions' completed exercises
+        set_day = columns["set_day"]
+        lifted = done[set_day] & columns["set_completed"] & (columns["set_weight"] != 0) & (columns["set_reps"] != 0)
+        week_volume = per_week(
+            columns["set_week"][lifted], (columns["set_weight"] * columns["set_reps"])[lifted]
+        )
+        
+        # Average session RPE of completed sessions
+        rated = done & ~np.isnan(columns["day_rpe"])
+        week_rpe_count = per_week(day_week[rated], None)
+        week_rpe_sum = per_week(day_week[rated], columns["day_rpe"][rated])
+        
+        # Sessions that should have happened: scheduled today or earlier, after the plan was created
+        scheduled = columns["day_scheduled"]
+        created = columns["plan_created"][day_plan]
+        past_session = session & (scheduled >= 0) & (scheduled <= today_ordinal) & ((created < 0) | (scheduled >= created))
+        week_past = per_week(day_week[past_session], None)
+        week_past_done = per_week(day_week[past_session & day_completed], None)
+        week_sessions = per_week(day_week[session], None)
+        plan_sessions = per_plan(day_plan[session], None)
+        plan_past = per_plan(day_plan[past_session], None)
+        
+        week_plan = columns["week_plan"]
+        week_completed = columns["week_completed"] | (per_week(day_week[day_completed], None) > 0)
+        completed_rows = np.flatnonzero(week_completed)
+        rated_rows = completed_rows[week_past[completed_rows] > 0]
+        rate_count = per_plan(week_plan[rated_rows], None)
+        rate_sum = per_plan(week_plan[rated_rows], week_past_done[rated_rows] / week_past[rated_rows] * 100)
+        
+        # Completed week rows of each plan (week rows are grouped by plan, in order)
+        plan_weeks = per_plan(week_plan, None)
+        bounds = np.searchsorted(week_plan[completed_rows], np.arange(n_plans + 1))
+        
+        results: Dict[Any, Dict[str, str]] = {}
+        for plan_index, key in enumerate(keys):
+            rows = completed_rows[bounds[plan_index]:bounds[plan_index + 1]]
+            
+            volume_progress = InsightsService._describe_volume(week_volume[rows].tolist())
+            
+            if plan_weeks[plan_index] == 0 or len(rows) == 0:
+                training_intensity, intensity_trend = "No RPE data available", "stable"
+            else:
+                rpe_rows = rows[week_rpe_count[rows] > 0]
+                training_intensity, intensity_trend = InsightsService._describe_intensity(
+                    (week_rpe_sum[rpe_rows] / week_rpe_count[rpe_rows]).tolist()
+                )
+            
+            if plan_weeks[plan_index] == 0:
+                training_frequency = "No training data available"
+            elif plan_past[plan_index] == 0:
+                training_frequency = (
+                    "No past trainings to evaluate yet" if plan_sessions[plan_index] > 0
+                    else "No training scheduled this week"
+                )
+            elif len(rows) == 0:
+                training_frequency = "No completed training weeks yet"
+            elif week_past[rows[-1]] == 0:
+                training_frequency = (
+                    "No past trainings to evaluate yet" if week_sessions[rows[-1]] > 0
+                    else "No training scheduled this week"
+                )
+            else:
+                rated_weeks = int(rate_count[plan_index])
+                training_frequency = InsightsService._describe_frequency(
+                    int(week_past_done[rows[-1]]),
+                    int(week_past[rows[-1]]),
+                    rate_sum[plan_index] / rated_weeks if rated_weeks else 0,
+                    rated_weeks,
+                    len(rows),
+                )
+            
+            results[key] = {
+                "volume_progress": volume_progress,
+                "training_frequency": training_frequency,
+                "training_intensity": training_intensity,
+                "intensity_trend": intensity_trend,
+            }
+        
+        logger.info(f"📊 Computed insights metrics for {n_plans} plans ({n_weeks} weeks, {len(set_day)} sets)")
+        return results
+    
+    @staticmethod
+    def calculate_version_hash(
+        plan_id: int,
+        version: int,
+        metrics_dict: Dict[str, Any],
+        today: date = None
+    ) -> str:
+        """
+        Cheap replacement for calculate_data_hash when plan metrics come from the metrics store.
+        
+        Args:
+            plan_id: Training plan ID
+            version: Metrics store version of the plan (bumped whenever a week's aggregates change)
+            metrics_dict: Dict with the client-provided weak_points and top_exercises
+            today: Today's date (frequency only counts past sessions, so it changes daily)
+        
+        Returns:
+            SHA256 hash string
+        """
+        stable_dict = {
+            "plan_id": plan_id,
+            "version": version,
+            "date": (today or date.today()).isoformat(),
+            **InsightsService._stable_client_metrics(metrics_dict),
+        }
+        json_str = json.dumps(stable_dict, sort_keys=True)
+        return hashlib.sha256(json_str.encode()).hexdigest()
+    
     @staticmethod
     def calculate_data_hash(metrics_dict: Dict[str, Any]) -> str:
         """
@@ -417,6 +744,17 @@ class InsightsService:
             "volume_progress": metrics_dict.get("volume_progress", ""),
             "training_frequency": metrics_dict.get("training_frequency", ""),
             "training_intensity": metrics_dict.get("training_intensity", ""),
+            **InsightsService._stable_client_metrics(metrics_dict),
+        }
+        
+        # Convert to JSON string and hash
+        json_str = json.dumps(stable_dict, sort_keys=True)
+        return hashlib.sha256(json_str.encode()).hexdigest()
+    
+    @staticmethod
+    def _stable_client_metrics(metrics_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """weak_points and top_exercises in a stable order for hashing."""
+        return {
             "weak_points": sorted(
                 [
                     {
@@ -440,9 +778,3 @@ class InsightsService:
                 key=lambda x: x.get("name", "")
             )
         }
-        
-        # Convert to JSON string and hash
-        json_str = json.dumps(stable_dict, sort_keys=True)
-        return hashlib.sha256(json_str.encode()).hexdigest()
-    
-
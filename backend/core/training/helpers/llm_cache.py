@@ -0,0 +1,196 @@
+"""
+LLM Response Cache for EvolveAI
+
+Content-addressed cache for structured LLM responses, used by
+`LLMClient.parse_structured` / `aparse_structured` when a call site passes
+`cache_ttl`.
+
+Several prompts are pure functions of their input - athlete type classification
+of a goal description, modality selection, the insights summary of a metrics
+snapshot - and common onboarding goals ("lose weight", "run a marathon") repeat
+across users, so identical prompts used to pay a full LLM round trip each time.
+
+Entries are keyed by (model, temperature, schema name, schema hash, prompt hash)
+and hold the validated JSON of the parsed object; a schema change therefore never
+serves stale shapes. Each call site sets its own TTL. Entries live in an
+in-memory LRU and, when LLM_CACHE_PATH is set, in a small SQLite file shared by
+restarts and other workers on the host (see `TieredCache`); async callers use
+`aget`/`aput`, which read and write the file in a worker thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple, Type
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.tiered_cache import TieredCache
+
+logger = get_logger(__name__)
+
+_schema_hashes: Dict[Type[Any], str] = {}
+
+
+def schema_fingerprint(schema: Type[Any]) -> str:
+    """Name plus hash of the schema's JSON schema (changes whenever the fields change)."""
+    digest = _schema_hashes.get(schema)
+    if digest is None:
+        try:
+            definition = json.dumps(schema.model_json_schema(), sort_keys=True)
+        except Exception:
+            definition = repr(schema)
+        digest = hashlib.sha256(definition.encode("utf-8")).hexdigest()[:16]
+        _schema_hashes[schema] = digest
+    return f"{schema.__name__}:{digest}"
+
+
+def response_cache_key(model: str, temperature: float, schema: Type[Any], prompt: str) -> str:
+    """Stable cache key for (model, temperature, schema, prompt)."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = f"{model}\x00{temperature}\x00{schema_fingerprint(schema)}\x00{prompt_hash}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Thread-safe LRU of validated JSON responses with TTLs, hit/miss counters and an optional SQLite tier."""
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: In-memory capacity (defaults to settings.LLM_CACHE_MAX_ENTRIES; 0 disables caching)
+            path: SQLite file for persistence (defaults to settings.LLM_CACHE_PATH;
+                  empty disables persistence)
+        """
+        self._max_entries = max_entries
+        self._path = path
+        self._entries = TieredCache(
+            "llm_responses", max_entries=lambda: self.max_entries, path=lambda: self.path
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._by_schema: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    @property
+    def max_entries(self) -> int:
+        """Effective in-memory capacity."""
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.LLM_CACHE_MAX_ENTRIES
+
+    @property
+    def path(self) -> str:
+        """Effective SQLite path ('' when persistence is disabled)."""
+        if self._path is not None:
+            return self._path
+        return settings.LLM_CACHE_PATH
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, schema: Type[Any]) -> Optional[Any]:
+        """
+        Look up a response, checking memory first and then the disk tier.
+
+        Returns:
+            The cached object validated into `schema`, or None on a miss/expired entry
+        """
+        parsed = self._parse(key, self._entries.get(key), schema)
+        if parsed is None and self._entries.persistent:
+            parsed = self._parse(key, self._entries.load(key), schema, from_disk=True)
+        return self._count(schema, parsed)
+
+    async def aget(self, key: str, schema: Type[Any]) -> Optional[Any]:
+        """`get` for async callers: the disk tier is read in a worker thread."""
+        parsed = self._parse(key, self._entries.get(key), schema)
+        if parsed is None and self._entries.persistent:
+            value = await asyncio.to_thread(self._entries.load, key)
+            parsed = self._parse(key, value, schema, from_disk=True)
+        return self._count(schema, parsed)
+
+    def put(self, key: str, parsed: Any, ttl_seconds: float) -> None:
+        """Store a validated response for `ttl_seconds`."""
+        entry = self._entry(key, parsed, ttl_seconds)
+        if entry is not None:
+            self._entries.store(key, *entry)
+
+    async def aput(self, key: str, parsed: Any, ttl_seconds: float) -> None:
+        """`put` for async callers: the disk tier is written in a worker thread."""
+        entry = self._entry(key, parsed, ttl_seconds)
+        if entry is not None and self._entries.persistent:
+            await asyncio.to_thread(self._entries.store, key, *entry)
+
+    def _entry(self, key: str, parsed: Any, ttl_seconds: float) -> Optional[Tuple[str, float]]:
+        """Remember a response in memory; returns the (value, expires_at) to write to disk."""
+        if not self.enabled or ttl_seconds <= 0:
+            return None
+        try:
+            value = parsed.model_dump_json()
+        except Exception as e:
+            logger.warning(f"⚠️ LLM response not cacheable: {e}")
+            return None
+        expires_at = time.time() + ttl_seconds
+        self._entries.remember(key, value, expires_at)
+        return value, expires_at
+
+    def _parse(self, key: str, value: Optional[str], schema: Type[Any], from_disk: bool = False) -> Optional[Any]:
+        """Validate a cached JSON response into `schema` (entries that no longer validate are dropped)."""
+        if value is None:
+            return None
+        try:
+            parsed = schema.model_validate_json(value)
+        except Exception:
+            self._entries.forget(key)
+            return None
+        if from_disk:
+            with self._lock:
+                self.disk_hits += 1
+        return parsed
+
+    def _count(self, schema: Type[Any], parsed: Optional[Any]) -> Optional[Any]:
+        outcome = "misses" if parsed is None else "hits"
+        with self._lock:
+            if parsed is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._by_schema[schema.__name__][outcome] += 1
+        return parsed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters (overall and per schema) for logging and monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "by_schema": {name: dict(counts) for name, counts in self._by_schema.items()},
+        }
+
+    def clear(self) -> None:
+        """Drop in-memory entries and reset counters (the disk tier is kept)."""
+        self._entries.clear()
+        with self._lock:
+            self._by_schema.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self) -> None:
+        """Close the SQLite connection, if open."""
+        self._entries.close()
+
+
+# Shared by every LLMClient in the process
+llm_response_cache = LLMResponseCache()
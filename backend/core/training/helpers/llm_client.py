@@ -3,15 +3,60 @@ Unified LLM client using Instructor for multi-provider structured output support
 
 Supports OpenAI, Gemini, Claude, and other providers through Instructor.
 Provides complex and lightweight model instances for different use cases.
+
+Every call is available in a blocking form (chat_text / chat_parse) and a native
+async form (achat_text / achat_parse). Coroutines must use the async form so the
+event loop keeps serving other requests during the LLM round trip.
+
+Prompts built as a SegmentedPrompt (static instructions first) get provider prompt
+caching: OpenAI and Gemini cache identical prefixes automatically (OpenAI calls get a
+prompt_cache_key derived from the prefix), Anthropic gets a cache_control breakpoint
+after the prefix. Cache-read input tokens are reported as usage.cached_tokens.
 """
 
+import hashlib
+import json
 import os
-from typing import Any, Dict, List, Optional, Type
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 import instructor
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from google import genai  # type: ignore
-from anthropic import Anthropic  # type: ignore
+from anthropic import Anthropic, AsyncAnthropic  # type: ignore
 from settings import settings
+from core.training.helpers.llm_cache import llm_response_cache, response_cache_key
+from core.training.helpers.prompt_budget import SegmentedPrompt
+
+
+# Async SDK clients shared process-wide, keyed by (provider, api_key).
+# Every LLMClient instance reuses the same client and therefore the same HTTP
+# connection pool, instead of opening new connections per request.
+_shared_async_clients: Dict[Tuple[str, str], Any] = {}
+_shared_async_clients_lock = threading.Lock()
+
+
+def _get_shared_async_client(provider: str, api_key: str) -> Any:
+    """Get (or lazily create) the process-wide async SDK client for a provider."""
+    key = (provider, api_key)
+    client = _shared_async_clients.get(key)
+    if client is not None:
+        return client
+
+    with _shared_async_clients_lock:
+        client = _shared_async_clients.get(key)
+        if client is None:
+            if provider == "openai":
+                client = AsyncOpenAI(api_key=api_key)
+            elif provider == "gemini":
+                # genai.Client exposes its async surface under `.aio`
+                client = genai.Client(api_key=api_key).aio
+            elif provider == "anthropic":
+                client = AsyncAnthropic(api_key=api_key)
+            else:
+                raise ValueError(f"Unsupported provider: {provider}")
+            _shared_async_clients[key] = client
+    return client
+
 
 class LLMClient:
     """
@@ -72,6 +117,35 @@ class LLMClient:
                 self._anthropic_client = Anthropic(api_key=anthropic_key)
             except Exception:
                 self._anthropic_client = None
+        
+        # Async clients (shared connection pools) are created lazily on first async call
+        self._async_models: Dict[str, Any] = {}
+
+    def _get_async_client(self, provider: str) -> Any:
+        """Get the shared async SDK client for a provider."""
+        if provider == "anthropic":
+            return _get_shared_async_client(provider, os.getenv("ANTHROPIC_API_KEY", self.api_key))
+        return _get_shared_async_client(provider, self.api_key)
+
+    def _get_async_instructor_model(self, model_name: str):
+        """Get Instructor-wrapped async model for the given model name (cached per instance)."""
+        model = self._async_models.get(model_name)
+        if model is not None:
+            return model
+        
+        provider = self._get_provider(model_name)
+        if provider == "openai":
+            model = instructor.from_openai(self._get_async_client(provider), mode=instructor.Mode.JSON)
+        elif provider == "gemini":
+            # Gemini structured output is used natively (no Instructor wrapper)
+            model = self._get_async_client(provider)
+        elif provider == "anthropic":
+            model = instructor.from_anthropic(self._get_async_client(provider), mode=instructor.Mode.ANTHROPIC_JSON)
+        else:
+            raise ValueError(f"Unsupported provider for model: {model_name}")
+        
+        self._async_models[model_name] = model
+        return model
 
     def _get_provider(self, model_name: str) -> str:
         """Detect provider from model name."""
@@ -99,7 +173,7 @@ class LLMClient:
             if not self._anthropic_client:
                 raise ValueError("Anthropic client not initialized. Check LLM_API_KEY or model name.")
             # Use instructor.from_anthropic for Anthropic
-            return instructor.from_anthropic(self._anthropic_client, mode=instructor.Mode.JSON)
+            return instructor.from_anthropic(self._anthropic_client, mode=instructor.Mode.ANTHROPIC_JSON)
         else:
             raise ValueError(f"Unsupported provider for model: {model_name}")
 
@@ -126,48 +200,128 @@ class LLMClient:
             )
             return response.choices[0].message.content or ""
         elif provider == "gemini":
-            # Join messages into single prompt for Gemini
-            prompt = "\n".join([f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in messages])
             resp = self._gemini_client.models.generate_content(
                 model=model_name,
-                contents=prompt,
+                contents=self._messages_to_gemini_prompt(messages),
             )
             return getattr(resp, "text", "") or ""
         elif provider == "anthropic":
             # Convert messages format for Anthropic
             if not self._anthropic_client:
                 raise ValueError("Anthropic client not initialized. Check LLM_API_KEY or model name.")
-            system_msg = None
-            user_msgs = []
-            for msg in messages:
-                if msg.get("role") == "system":
-                    system_msg = msg.get("content", "")
-                else:
-                    user_msgs.append(msg.get("content", ""))
+            system_msg, user_content = self._messages_to_anthropic(messages)
             
             response = self._anthropic_client.messages.create(
                 model=model_name,
                 max_tokens=4096,
                 temperature=self.temperature,
-                system=system_msg or "",
-                messages=[{"role": "user", "content": "\n".join(user_msgs)}],
+                system=system_msg,
+                messages=[{"role": "user", "content": user_content}],
             )
             return response.content[0].text if response.content else ""
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
+    async def achat_text(self, messages: List[Dict[str, str]], model_type: str = "lightweight") -> str:
+        """
+        Async variant of chat_text using the shared async SDK clients.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model_type: "complex" or "lightweight"
+        
+        Returns:
+            Generated text response
+        """
+        model_name = self.complex_model_name if model_type == "complex" else self.lightweight_model_name
+        provider = self._get_provider(model_name)
+        client = self._get_async_client(provider)
+        
+        if provider == "openai":
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=self.temperature,
+            )
+            return response.choices[0].message.content or ""
+        elif provider == "gemini":
+            resp = await client.models.generate_content(
+                model=model_name,
+                contents=self._messages_to_gemini_prompt(messages),
+            )
+            return getattr(resp, "text", "") or ""
+        elif provider == "anthropic":
+            system_msg, user_content = self._messages_to_anthropic(messages)
+            response = await client.messages.create(
+                model=model_name,
+                max_tokens=4096,
+                temperature=self.temperature,
+                system=system_msg,
+                messages=[{"role": "user", "content": user_content}],
+            )
+            return response.content[0].text if response.content else ""
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+
+    @staticmethod
+    def _messages_to_gemini_prompt(messages: List[Dict[str, str]]) -> str:
+        """Join chat messages into a single prompt for Gemini."""
+        return "\n".join([f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in messages])
+
+    @staticmethod
+    def _messages_to_anthropic(messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """Split chat messages into (system prompt, joined user content) for Anthropic."""
+        system_msg = None
+        user_msgs = []
+        for msg in messages:
+            if msg.get("role") == "system":
+                system_msg = msg.get("content", "")
+            else:
+                user_msgs.append(msg.get("content", ""))
+        return system_msg or "", "\n".join(user_msgs)
+
     class _Usage:
-        """Usage information wrapper."""
-        def __init__(self, prompt_tokens: Optional[int], completion_tokens: Optional[int], total_tokens: Optional[int]):
+        """Usage information wrapper (cached_tokens: input tokens read from the provider's prompt cache)."""
+        def __init__(self, prompt_tokens: Optional[int], completion_tokens: Optional[int], total_tokens: Optional[int], cached_tokens: Optional[int] = None):
             self.prompt_tokens = prompt_tokens
             self.completion_tokens = completion_tokens
             self.total_tokens = total_tokens
+            self.cached_tokens = cached_tokens
 
     class _CompletionLike:
         """Completion-like object for compatibility."""
-        def __init__(self, model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int], total_tokens: Optional[int]):
+        def __init__(self, model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int], total_tokens: Optional[int], cached: bool = False, cached_tokens: Optional[int] = None):
             self.model = model
-            self.usage = LLMClient._Usage(prompt_tokens, completion_tokens, total_tokens)
+            self.usage = LLMClient._Usage(prompt_tokens, completion_tokens, total_tokens, cached_tokens)
+            self.cached = cached
+
+    @staticmethod
+    def _stable_prefix(prompt: str) -> str:
+        return prompt.stable_prefix if isinstance(prompt, SegmentedPrompt) else ""
+
+    @staticmethod
+    def _openai_cache_kwargs(prompt: str) -> Dict[str, Any]:
+        """Route requests sharing a stable prefix to the same OpenAI prompt cache."""
+        prefix = LLMClient._stable_prefix(prompt)
+        if not prefix:
+            return {}
+        return {"prompt_cache_key": hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]}
+
+    @staticmethod
+    def _anthropic_content(prompt: str) -> Any:
+        """User message content for Anthropic, with a cache breakpoint after the stable prefix."""
+        prefix = LLMClient._stable_prefix(prompt)
+        if not prefix:
+            return prompt
+        blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+        if prompt.volatile_suffix:
+            blocks.append({"type": "text", "text": prompt.volatile_suffix})
+        return blocks
+
+    @staticmethod
+    def _openai_cached_tokens(usage: Any) -> Optional[int]:
+        details = getattr(usage, "prompt_tokens_details", None)
+        return getattr(details, "cached_tokens", None) if details else None
 
     def chat_parse(self, prompt: str, schema: Type[Any], model_type: str = "lightweight"):
         """
@@ -190,9 +344,10 @@ class LLMClient:
             # Instructor patched OpenAI client
             response = model.chat.completions.create(
                 model=model_name,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": str(prompt)}],
                 response_model=schema,
                 temperature=self.temperature,
+                **self._openai_cache_kwargs(prompt),
             )
             parsed_obj = response.parsed
             usage = response.usage
@@ -200,7 +355,8 @@ class LLMClient:
                 model_name,
                 usage.prompt_tokens,
                 usage.completion_tokens,
-                usage.total_tokens
+                usage.total_tokens,
+                cached_tokens=self._openai_cached_tokens(usage),
             )
             return parsed_obj, completion_like
             
@@ -209,51 +365,255 @@ class LLMClient:
             from google.genai import types
             resp = self._gemini_client.models.generate_content(
                 model=model_name,
-                contents=prompt,
+                contents=str(prompt),
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json",
                     response_schema=schema,
                 ),
             )
-            # Parse response
-            if hasattr(resp, "parsed") and resp.parsed is not None:
-                parsed_obj = schema.model_validate(resp.parsed)
-            else:
-                text = getattr(resp, "text", None) or "{}"
-                parsed_obj = schema.model_validate_json(text)
-            
-            # Extract usage
-            usage_md = getattr(resp, "usage_metadata", None)
-            prompt_tokens = getattr(usage_md, "prompt_token_count", None) if usage_md else None
-            completion_tokens = getattr(usage_md, "candidates_token_count", None) if usage_md else None
-            total_tokens = getattr(usage_md, "total_token_count", None) if usage_md else None
-            
-            completion_like = LLMClient._CompletionLike(model_name, prompt_tokens, completion_tokens, total_tokens)
-            return parsed_obj, completion_like
+            return self._parse_gemini_response(resp, schema, model_name)
             
         elif provider == "anthropic":
             # Instructor patched Anthropic client (lazy initialization already handled in _get_instructor_model)
             response = model.messages.create(
                 model=model_name,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": self._anthropic_content(prompt)}],
                 response_model=schema,
                 temperature=self.temperature,
                 max_tokens=4096,
             )
             parsed_obj = response.parsed
-            # Anthropic usage
-            usage = getattr(response, "usage", None)
-            prompt_tokens = getattr(usage, "input_tokens", None) if usage else None
-            completion_tokens = getattr(usage, "output_tokens", None) if usage else None
-            total_tokens = (prompt_tokens or 0) + (completion_tokens or 0) if prompt_tokens or completion_tokens else None
+            return parsed_obj, self._anthropic_completion_like(response, model_name)
             
-            completion_like = LLMClient._CompletionLike(model_name, prompt_tokens, completion_tokens, total_tokens)
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+
+    async def achat_parse(self, prompt: str, schema: Type[Any], model_type: str = "lightweight"):
+        """
+        Async variant of chat_parse using the shared async SDK clients.
+        
+        Args:
+            prompt: The prompt text
+            schema: Pydantic model class
+            model_type: "complex" or "lightweight"
+        
+        Returns:
+            Tuple of (parsed_obj, completion_like)
+        """
+        model_name = self.complex_model_name if model_type == "complex" else self.lightweight_model_name
+        provider = self._get_provider(model_name)
+        model = self._get_async_instructor_model(model_name)
+        
+        if provider == "openai":
+            parsed_obj, completion = await model.chat.completions.create_with_completion(
+                model=model_name,
+                messages=[{"role": "user", "content": str(prompt)}],
+                response_model=schema,
+                temperature=self.temperature,
+                **self._openai_cache_kwargs(prompt),
+            )
+            usage = getattr(completion, "usage", None)
+            completion_like = LLMClient._CompletionLike(
+                model_name,
+                getattr(usage, "prompt_tokens", None),
+                getattr(usage, "completion_tokens", None),
+                getattr(usage, "total_tokens", None),
+                cached_tokens=self._openai_cached_tokens(usage),
+            )
             return parsed_obj, completion_like
             
+        elif provider == "gemini":
+            from google.genai import types
+            resp = await model.models.generate_content(
+                model=model_name,
+                contents=str(prompt),
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=schema,
+                ),
+            )
+            return self._parse_gemini_response(resp, schema, model_name)
+            
+        elif provider == "anthropic":
+            parsed_obj, completion = await model.messages.create_with_completion(
+                model=model_name,
+                messages=[{"role": "user", "content": self._anthropic_content(prompt)}],
+                response_model=schema,
+                temperature=self.temperature,
+                max_tokens=4096,
+            )
+            return parsed_obj, self._anthropic_completion_like(completion, model_name)
+            
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+
+    @staticmethod
+    def _json_schema_instruction(schema: Type[Any]) -> str:
+        """System instruction asking for a JSON instance of the schema (raw streaming calls)."""
+        return (
+            "Respond with a single JSON object (no markdown, no extra text) that is an instance "
+            "of the following JSON schema. Emit the properties in the order they are listed.\n\n"
+            f"{json.dumps(schema.model_json_schema())}"
+        )
+
+    @staticmethod
+    def _extract_json_text(text: str) -> str:
+        """Strip anything around the outermost JSON object (e.g. markdown fences)."""
+        start, end = text.find("{"), text.rfind("}")
+        return text[start:end + 1] if start != -1 and end > start else text
+
+    async def astream_parse(
+        self,
+        prompt: str,
+        schema: Type[Any],
+        model_type: str = "lightweight",
+        on_text: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Structured parsing with provider streaming.
+        
+        The raw JSON text is passed to `on_text` chunk by chunk while it is generated
+        (see stream_utils.JsonStringFieldStream to pull a field out of it); the full
+        text is validated against the schema at the end.
+        
+        Args:
+            prompt: The prompt text
+            schema: Pydantic model class
+            model_type: "complex" or "lightweight"
+            on_text: Callback receiving each raw JSON text chunk
+        
+        Returns:
+            Tuple of (parsed_obj, completion_like)
+        """
+        model_name = self.complex_model_name if model_type == "complex" else self.lightweight_model_name
+        provider = self._get_provider(model_name)
+        client = self._get_async_client(provider)
+        chunks: List[str] = []
+        prompt_tokens = completion_tokens = total_tokens = cached_tokens = None
+
+        def emit(text: Optional[str]) -> None:
+            if text:
+                chunks.append(text)
+                if on_text is not None:
+                    on_text(text)
+
+        if provider == "openai":
+            stream = await client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": self._json_schema_instruction(schema)},
+                    {"role": "user", "content": str(prompt)},
+                ],
+                response_format={"type": "json_object"},
+                temperature=self.temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+                **self._openai_cache_kwargs(prompt),
+            )
+            async for chunk in stream:
+                if chunk.choices:
+                    emit(chunk.choices[0].delta.content)
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    prompt_tokens = usage.prompt_tokens
+                    completion_tokens = usage.completion_tokens
+                    total_tokens = usage.total_tokens
+                    cached_tokens = self._openai_cached_tokens(usage)
+
+        elif provider == "gemini":
+            from google.genai import types
+            stream = await client.models.generate_content_stream(
+                model=model_name,
+                contents=str(prompt),
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=schema,
+                ),
+            )
+            async for chunk in stream:
+                emit(getattr(chunk, "text", None))
+                usage_md = getattr(chunk, "usage_metadata", None)
+                if usage_md:
+                    prompt_tokens = getattr(usage_md, "prompt_token_count", None) or prompt_tokens
+                    completion_tokens = getattr(usage_md, "candidates_token_count", None) or completion_tokens
+                    total_tokens = getattr(usage_md, "total_token_count", None) or total_tokens
+                    cached_tokens = getattr(usage_md, "cached_content_token_count", None) or cached_tokens
+
+        elif provider == "anthropic":
+            async with client.messages.stream(
+                model=model_name,
+                system=self._json_schema_instruction(schema),
+                messages=[{"role": "user", "content": self._anthropic_content(prompt)}],
+                temperature=self.temperature,
+                max_tokens=4096,
+            ) as stream:
+                async for text in stream.text_stream:
+                    emit(text)
+                final_message = await stream.get_final_message()
+            completion_like = self._anthropic_completion_like(final_message, model_name)
+            prompt_tokens = completion_like.usage.prompt_tokens
+            completion_tokens = completion_like.usage.completion_tokens
+            total_tokens = completion_like.usage.total_tokens
+            cached_tokens = completion_like.usage.cached_tokens
+
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
-    def parse_structured(self, prompt: str, schema: Type[Any], model_type: str = "lightweight"):
+        parsed_obj = schema.model_validate_json(self._extract_json_text("".join(chunks)))
+        return parsed_obj, LLMClient._CompletionLike(
+            model_name, prompt_tokens, completion_tokens, total_tokens, cached_tokens=cached_tokens
+        )
+
+    @staticmethod
+    def _parse_gemini_response(resp: Any, schema: Type[Any], model_name: str):
+        """Parse a Gemini structured-output response into (parsed_obj, completion_like)."""
+        if hasattr(resp, "parsed") and resp.parsed is not None:
+            parsed_obj = schema.model_validate(resp.parsed)
+        else:
+            text = getattr(resp, "text", None) or "{}"
+            parsed_obj = schema.model_validate_json(text)
+        
+        # Extract usage
+        usage_md = getattr(resp, "usage_metadata", None)
+        prompt_tokens = getattr(usage_md, "prompt_token_count", None) if usage_md else None
+        completion_tokens = getattr(usage_md, "candidates_token_count", None) if usage_md else None
+        total_tokens = getattr(usage_md, "total_token_count", None) if usage_md else None
+        cached_tokens = getattr(usage_md, "cached_content_token_count", None) if usage_md else None
+        
+        completion_like = LLMClient._CompletionLike(
+            model_name, prompt_tokens, completion_tokens, total_tokens, cached_tokens=cached_tokens
+        )
+        return parsed_obj, completion_like
+
+    @staticmethod
+    def _anthropic_completion_like(response: Any, model_name: str) -> "LLMClient._CompletionLike":
+        """Build a completion-like object from an Anthropic response's usage."""
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "input_tokens", None) if usage else None
+        completion_tokens = getattr(usage, "output_tokens", None) if usage else None
+        # input_tokens excludes prompt-cache reads and writes; count them as input too
+        cached_tokens = getattr(usage, "cache_read_input_tokens", None) if usage else None
+        cache_write_tokens = getattr(usage, "cache_creation_input_tokens", None) if usage else None
+        if prompt_tokens is not None and (cached_tokens or cache_write_tokens):
+            prompt_tokens += (cached_tokens or 0) + (cache_write_tokens or 0)
+        total_tokens = (prompt_tokens or 0) + (completion_tokens or 0) if prompt_tokens or completion_tokens else None
+        return LLMClient._CompletionLike(
+            model_name, prompt_tokens, completion_tokens, total_tokens, cached_tokens=cached_tokens
+        )
+
+    def _model_name(self, model_type: str) -> str:
+        return self.complex_model_name if model_type == "complex" else self.lightweight_model_name
+
+    def _cache_key(self, prompt: str, schema: Type[Any], model_type: str) -> str:
+        return response_cache_key(self._model_name(model_type), self.temperature, schema, prompt)
+
+    def _cache_hit(self, parsed_obj: Any, model_type: str):
+        """(parsed_obj, completion_like) for a cached response; no tokens were spent on it."""
+        return parsed_obj, LLMClient._CompletionLike(self._model_name(model_type), 0, 0, 0, cached=True)
+
+    def parse_structured(
+        self, prompt: str, schema: Type[Any], model_type: str = "lightweight", cache_ttl: Optional[float] = None
+    ):
         """
         Unified structured parsing (alias for chat_parse for backward compatibility).
         
@@ -261,8 +621,44 @@ class LLMClient:
             prompt: The prompt text
             schema: Pydantic model class
             model_type: "complex" or "lightweight"
+            cache_ttl: Seconds to cache the response for identical prompts (None: no caching).
+                Only for prompts whose answer is a deterministic function of the prompt.
+        
+        Returns:
+            Tuple of (parsed_obj, completion_like)
+        """
+        if not cache_ttl or not llm_response_cache.enabled:
+            return self.chat_parse(prompt, schema, model_type)
+        key = self._cache_key(prompt, schema, model_type)
+        cached = llm_response_cache.get(key, schema)
+        if cached is not None:
+            return self._cache_hit(cached, model_type)
+        parsed_obj, completion = self.chat_parse(prompt, schema, model_type)
+        llm_response_cache.put(key, parsed_obj, cache_ttl)
+        return parsed_obj, completion
+
+    async def aparse_structured(
+        self, prompt: str, schema: Type[Any], model_type: str = "lightweight", cache_ttl: Optional[float] = None
+    ):
+        """
+        Async unified structured parsing (alias for achat_parse).
+        
+        Args:
+            prompt: The prompt text
+            schema: Pydantic model class
+            model_type: "complex" or "lightweight"
+            cache_ttl: Seconds to cache the response for identical prompts (None: no caching).
+                Only for prompts whose answer is a deterministic function of the prompt.
         
         Returns:
             Tuple of (parsed_obj, completion_like)
         """
-        return self.chat_parse(prompt, schema, model_type)
+        if not cache_ttl or not llm_response_cache.enabled:
+            return await self.achat_parse(prompt, schema, model_type)
+        key = self._cache_key(prompt, schema, model_type)
+        cached = await llm_response_cache.aget(key, schema)
+        if cached is not None:
+            return self._cache_hit(cached, model_type)
+        parsed_obj, completion = await self.achat_parse(prompt, schema, model_type)
+        await llm_response_cache.aput(key, parsed_obj, cache_ttl)
+        return parsed_obj, completion
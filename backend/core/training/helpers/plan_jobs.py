@@ -0,0 +1,435 @@
+"""
+Plan Generation Jobs for EvolveAI
+
+Registry for plan generation running in job mode.
+
+/generate-plan holds one HTTP request open for the whole pipeline (modality
+selection, the complex-model plan parse, exercise matching, validation, date
+mapping, save), often 30-60 s. In job mode the endpoint returns a job id right
+away. The pipeline runs as a task here and records stage events (modalities
+decided, week drafted, exercises matched, saved), which clients follow over SSE
+or by polling. Each stage's duration (time since the previous stage) is written
+to the latency table as `plan_stage_<stage>`.
+
+- The worker that starts a job runs it and keeps it in memory. Every change is
+  also written to a SQLite table (PLAN_JOBS_PATH), so polls and SSE streams that
+  land on another worker read the job from there. With PLAN_JOBS_PATH empty, jobs
+  are per worker and the load balancer must route a client's job requests to the
+  worker that started them (sticky sessions).
+- Starting a job for a key that already has a running job (e.g. a client retry)
+  returns that job, so duplicates follow the same stage events.
+- A job whose worker has not written for SINGLE_FLIGHT_LEASE_SECONDS is reported
+  as failed (the worker died or was redeployed).
+
+Finished jobs expire JOB_TTL_SECONDS after they finish.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from logging_config import get_logger
+from settings import settings
+from core.training.helpers.database_service import db_service
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+JOB_TTL_SECONDS = 3600.0
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_INTERRUPTED = {"status_code": 500, "detail": "Plan generation was interrupted, please try again"}
+
+
+class PlanJob:
+    """State of one plan generation job."""
+
+    def __init__(self, user_id: str, key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.key = key
+        self.status = PENDING
+        self.stages: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.updated_at = self.created_at
+        self.revision = 0
+        # False for jobs read from the shared table that another worker runs
+        self.local = True
+        self._last_stage_at = time.monotonic()
+        self._started_at = self._last_stage_at
+        self._changed = asyncio.Event()
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "PlanJob":
+        """Read-only copy of a job from the shared table."""
+        job = cls(row["user_id"], row["job_key"])
+        job.id = row["id"]
+        job.status = row["status"]
+        job.stages = json.loads(row["stages"])
+        job.result = json.loads(row["result"]) if row["result"] else None
+        job.error = json.loads(row["error"]) if row["error"] else None
+        job.created_at = row["created_at"]
+        job.finished_at = row["finished_at"]
+        job.updated_at = row["updated_at"]
+        job.revision = row["revision"]
+        job.local = False
+        return job
+
+    def to_row(self) -> Dict[str, Any]:
+        """Row for the shared table."""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "job_key": self.key,
+            "status": self.status,
+            "stages": json.dumps(jsonable_encoder(self.stages)),
+            "result": json.dumps(jsonable_encoder(self.result)) if self.result is not None else None,
+            "error": json.dumps(jsonable_encoder(self.error)) if self.error is not None else None,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "updated_at": self.updated_at,
+            "revision": self.revision,
+        }
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view for the polling endpoint."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stages": list(self.stages),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Wait until the job changes (new stage or finished); False on timeout."""
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _notify(self) -> None:
+        self.updated_at = time.time()
+        self.revision += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class SQLitePlanJobStore:
+    """Jobs table shared by the workers on one host; one row per job."""
+
+    _COLUMNS = (
+        "id", "user_id", "job_key", "status", "stages", "result", "error",
+        "created_at", "finished_at", "updated_at", "revision",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plan_jobs (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                job_key TEXT,
+                status TEXT NOT NULL,
+                stages TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                updated_at REAL NOT NULL,
+                revision INTEGER NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS plan_jobs_key ON plan_jobs (job_key, status)")
+
+    def claim(self, row: Dict[str, Any], active_after: float) -> Optional[Dict[str, Any]]:
+        """
+        Insert a new job unless a job with the same key is still running.
+
+        Args:
+            row: The new job's row
+            active_after: Running jobs not updated since then are ignored (their worker is gone)
+
+        Returns:
+            None if the job was inserted, otherwise the running job's row
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if row["job_key"] is not None:
+                    existing = self._db.execute(
+                        """
+                        SELECT * FROM plan_jobs
+                        WHERE job_key = ? AND status IN (?, ?) AND updated_at >= ?
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                        """,
+                        (row["job_key"], PENDING, RUNNING, active_after),
+                    ).fetchone()
+                    if existing is not None:
+                        self._db.execute("COMMIT")
+                        return dict(existing)
+                self._insert(row)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return None
+
+    def put(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._insert(row)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM plan_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM plan_jobs WHERE COALESCE(finished_at, updated_at) < ?", (finished_before,)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _insert(self, row: Dict[str, Any]) -> None:
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        self._db.execute(
+            f"INSERT OR REPLACE INTO plan_jobs ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+            tuple(row[column] for column in self._COLUMNS),
+        )
+
+
+class PlanJobRegistry:
+    """Creates, runs and looks up plan generation jobs (shared across workers via SQLite)."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = JOB_TTL_SECONDS,
+        path: Optional[str] = None,
+        stale_seconds: Optional[float] = None,
+        poll_seconds: float = 1.0,
+    ):
+        """
+        Initialize the registry (the jobs table is opened on first use).
+
+        Args:
+            ttl_seconds: How long finished jobs can be read
+            path: SQLite jobs table shared by workers (settings.PLAN_JOBS_PATH; empty keeps
+                  jobs in this worker; never used in tests)
+            stale_seconds: Running jobs without an update for this long are reported as failed
+                           (settings.SINGLE_FLIGHT_LEASE_SECONDS)
+            poll_seconds: Interval at which jobs run by another worker are re-read
+        """
+        self.ttl_seconds = ttl_seconds
+        self._path = path
+        self.stale_seconds = stale_seconds if stale_seconds is not None else settings.SINGLE_FLIGHT_LEASE_SECONDS
+        self.poll_seconds = poll_seconds
+        self._jobs: Dict[str, PlanJob] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._store: Optional[SQLitePlanJobStore] = None
+        self._store_failed = False
+        self._store_lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        if self._path is not None:
+            return self._path
+        if is_test_environment():
+            return ""
+        return settings.PLAN_JOBS_PATH
+
+    async def get(self, job_id: str) -> Optional[PlanJob]:
+        """Job started by this worker, or the shared table's copy of a job run by another worker."""
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        store = self._get_store()
+        if store is None:
+            return None
+        try:
+            row = await asyncio.to_thread(store.get, job_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to read plan job {job_id}: {e}")
+            return None
+        if row is None or (row["finished_at"] or time.time()) < time.time() - self.ttl_seconds:
+            return None
+        return self._from_row(row)
+
+    async def start(
+        self,
+        user_id: str,
+        run: Callable[[Callable[[str, Dict[str, Any]], Awaitable[None]]], Awaitable[Dict[str, Any]]],
+        error_handler: Callable[[Exception], Dict[str, Any]],
+        key: Optional[str] = None,
+    ) -> PlanJob:
+        """
+        Create a job and run `run(on_stage)` in the background.
+
+        Args:
+            user_id: Owner of the job (checked by the read endpoints)
+            run: Coroutine function producing the final result; receives the stage callback
+            error_handler: Maps an exception to the job's error payload
+            key: Identity of the work (user + operation); a running job with the same key
+                 is returned instead of starting another one
+
+        Returns:
+            The new or already running job
+        """
+        self._prune()
+        if key is not None:
+            for running in self._jobs.values():
+                if running.key == key and not running.finished:
+                    logger.info(f"🔗 Joined running plan generation job {running.id}")
+                    return running
+
+        job = PlanJob(user_id, key)
+        store = self._get_store()
+        if store is not None:
+            try:
+                existing = await asyncio.to_thread(store.claim, job.to_row(), time.time() - self.stale_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Plan job table unavailable, job {job.id} is only visible to this worker: {e}")
+                existing = None
+            if existing is not None:
+                logger.info(f"🔗 Joined plan generation job {existing['id']} running on another worker")
+                return self._from_row(existing)
+        self._jobs[job.id] = job
+
+        async def runner():
+            job.status = RUNNING
+            job._notify()
+            await self._save(job)
+            try:
+                result = await run(lambda stage, data=None: self.record_stage(job, stage, data))
+                job.result = result
+                job.status = COMPLETED
+            except Exception as e:
+                job.error = error_handler(e)
+                job.status = FAILED
+                logger.error(f"❌ Plan generation job {job.id} failed: {job.error}")
+            job.finished_at = time.time()
+            await db_service.log_latency_event("plan_job_total", time.monotonic() - job._started_at)
+            job._notify()
+            await self._save(job)
+
+        task = asyncio.create_task(runner())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"🚀 Started plan generation job {job.id}")
+        return job
+
+    async def record_stage(self, job: PlanJob, stage: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Append a stage event and log how long the stage took."""
+        now = time.monotonic()
+        duration = now - job._last_stage_at
+        job._last_stage_at = now
+        job.stages.append({
+            "stage": stage,
+            "at": time.time(),
+            "duration_seconds": round(duration, 3),
+            "data": data or {},
+        })
+        job._notify()
+        await self._save(job)
+        await db_service.log_latency_event(f"plan_stage_{stage}", duration)
+        logger.info(f"📍 Plan job {job.id}: {stage} ({duration:.2f}s)")
+
+    async def wait_for_change(self, job: PlanJob, timeout: float) -> Optional[PlanJob]:
+        """
+        Wait until the job changes (new stage or finished).
+
+        Returns:
+            The current state of the job, or None on timeout
+        """
+        if job.local:
+            return job if await job.wait_for_change(timeout) else None
+        store = self._get_store()
+        deadline = time.monotonic() + timeout
+        while store is not None and time.monotonic() < deadline:
+            await asyncio.sleep(min(self.poll_seconds, max(deadline - time.monotonic(), 0)))
+            try:
+                row = await asyncio.to_thread(store.get, job.id)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to read plan job {job.id}: {e}")
+                continue
+            if row is None:
+                continue
+            current = self._from_row(row)
+            if current.revision != job.revision or current.status != job.status:
+                return current
+        return None
+
+    def _from_row(self, row: Dict[str, Any]) -> PlanJob:
+        job = PlanJob.from_row(row)
+        if not job.finished and job.updated_at < time.time() - self.stale_seconds:
+            job.status = FAILED
+            job.error = dict(_INTERRUPTED)
+            job.finished_at = job.updated_at
+        return job
+
+    async def _save(self, job: PlanJob) -> None:
+        store = self._get_store()
+        if store is None:
+            return
+        try:
+            await asyncio.to_thread(store.put, job.to_row())
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to share plan job {job.id} with other workers: {e}")
+
+    def _get_store(self) -> Optional[SQLitePlanJobStore]:
+        if self._store is not None or self._store_failed or not self.path:
+            return self._store
+        with self._store_lock:
+            if self._store is None and not self._store_failed:
+                try:
+                    self._store = SQLitePlanJobStore(self.path)
+                    self._store.purge(time.time() - self.ttl_seconds)
+                except Exception as e:
+                    self._store_failed = True
+                    logger.warning(f"⚠️ Plan jobs are only visible to the worker that started them ({self.path}): {e}")
+        return self._store
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+plan_jobs = PlanJobRegistry()
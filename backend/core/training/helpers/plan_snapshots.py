@@ -0,0 +1,225 @@
+"""
+Plan Snapshot Store for EvolveAI
+
+Server-side, versioned copies of each user's training plan (and playbook), so
+/chat and /create-week requests can send a version token and the weeks that
+changed instead of the full plan on every call.
+
+- Every full request (and every week the backend writes) saves a new snapshot
+  and returns its version token to the client.
+- A delta request names the plan, its version token and optional week updates;
+  the snapshot is resolved only when the token is the plan's current version and
+  the caller owns the plan. Otherwise the client resends the full plan.
+
+Version tokens are unique per save ("<counter>-<random>"), so a token always
+identifies the same content. Snapshots are kept parsed in an in-memory LRU per
+worker; with PLAN_SNAPSHOT_PATH set they are also written to SQLite so other
+workers and restarts can resolve them; async callers use `asave`/`aresolve`,
+which do the disk I/O (and JSON encoding) in a worker thread. A plan's snapshot
+is only ever replaced by its owner.
+"""
+
+import asyncio
+import json
+import secrets
+import threading
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+from core.utils.tiered_cache import TieredCache
+
+logger = get_logger(__name__)
+
+
+class PlanSnapshot(NamedTuple):
+    """One saved version of a plan. Treat training_plan as read-only (see `detach_plan`)."""
+
+    plan_id: int
+    version: str
+    owner: str
+    training_plan: Dict[str, Any]
+    playbook: Optional[Dict[str, Any]]
+
+
+def merge_weeks(training_plan: Dict[str, Any], weeks: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    New plan dict with `weeks` replacing the weeks of the same week_number (or added).
+
+    The input plan is not modified; weeks that are not replaced are shared.
+    """
+    replaced = {week.get("week_number"): week for week in weeks}
+    weekly_schedules = [
+        replaced.pop(week.get("week_number"), week) for week in training_plan.get("weekly_schedules") or []
+    ]
+    weekly_schedules.extend(replaced.values())
+    weekly_schedules.sort(key=lambda week: week.get("week_number") or 0)
+    return {**training_plan, "weekly_schedules": weekly_schedules}
+
+
+def detach_plan(training_plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a snapshot plan that request handlers may modify at the week and day
+    level (e.g. map_daily_training_dates); exercises are still shared.
+    """
+    return {
+        **training_plan,
+        "weekly_schedules": [
+            {**week, "daily_trainings": [dict(day) for day in week.get("daily_trainings") or []]}
+            for week in training_plan.get("weekly_schedules") or []
+        ],
+    }
+
+
+def _encode_snapshot(snapshot: PlanSnapshot) -> str:
+    return json.dumps(snapshot._asdict(), default=str)
+
+
+def _decode_snapshot(value: str) -> PlanSnapshot:
+    return PlanSnapshot(**json.loads(value))
+
+
+class PlanSnapshotStore:
+    """Thread-safe store of the latest plan snapshot per plan, with an optional SQLite tier."""
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[str] = None):
+        """
+        Initialize the store (the database is opened on first use).
+
+        Args:
+            max_entries: Snapshots kept in memory (defaults to settings.PLAN_SNAPSHOT_MAX_ENTRIES;
+                         0 disables delta requests)
+            path: SQLite file (defaults to settings.PLAN_SNAPSHOT_PATH; empty keeps snapshots
+                  in memory for this worker; never a file in tests)
+        """
+        self._max_entries = max_entries
+        self._path = path
+        self._entries = TieredCache(
+            "plan_snapshot_entries",
+            max_entries=lambda: self.max_entries,
+            path=lambda: self.path,
+            encode=_encode_snapshot,
+            decode=_decode_snapshot,
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        """Effective in-memory capacity."""
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.PLAN_SNAPSHOT_MAX_ENTRIES
+
+    @property
+    def path(self) -> str:
+        """Effective SQLite path ('' when snapshots stay in memory)."""
+        if self._path is not None:
+            return self._path
+        if is_test_environment():
+            return ""
+        return settings.PLAN_SNAPSHOT_PATH
+
+    def save(
+        self,
+        plan_id: int,
+        owner: str,
+        training_plan: Dict[str, Any],
+        playbook: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """
+        Save a new version of the plan (never raises).
+
+        The plan is stored by reference; callers must not modify it afterwards.
+
+        Args:
+            plan_id: Training plan ID
+            owner: User ID the plan belongs to (from the JWT)
+            training_plan: Full plan dict
+            playbook: User playbook dict (None keeps the previous snapshot's playbook)
+
+        Returns:
+            The new version token, or None when snapshots are disabled, the plan's snapshot
+            belongs to another user or the save failed
+        """
+        if self.max_entries <= 0 or not owner:
+            return None
+        try:
+            with self._lock:
+                previous = self._entries.get(int(plan_id)) or self._entries.load(int(plan_id))
+                counter = 1
+                if previous is not None:
+                    if previous.owner != str(owner):
+                        # Saving would rotate the owner's version and fail their next delta request
+                        logger.warning(f"⚠️ Refused to save plan {plan_id} snapshot for a user who does not own it")
+                        return None
+                    counter = int(previous.version.split("-", 1)[0]) + 1
+                    if playbook is None:
+                        playbook = previous.playbook
+                snapshot = PlanSnapshot(
+                    int(plan_id), f"{counter}-{secrets.token_hex(6)}", str(owner), training_plan, playbook
+                )
+                self._entries.remember(snapshot.plan_id, snapshot)
+                self._entries.store(snapshot.plan_id, snapshot)
+                return snapshot.version
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to save plan snapshot for plan {plan_id}: {e}")
+            return None
+
+    def resolve(self, plan_id: int, owner: str, version: str) -> Optional[PlanSnapshot]:
+        """
+        Current snapshot of the plan, if `version` is its current version and `owner` owns it.
+
+        Returns:
+            The snapshot, or None when the version is unknown, outdated or owned by someone else
+        """
+        if self.max_entries <= 0 or not version:
+            return None
+        snapshot = self._entries.get(int(plan_id))
+        if snapshot is None or snapshot.version != version:
+            # Another worker may have saved a newer version
+            snapshot = self._entries.load(int(plan_id)) or snapshot
+        with self._lock:
+            if snapshot is None or snapshot.version != version or snapshot.owner != str(owner):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return snapshot
+
+    async def asave(self, *args: Any, **kwargs: Any) -> Optional[str]:
+        """`save` for async callers: runs in a worker thread when snapshots are written to disk."""
+        if self._entries.persistent:
+            return await asyncio.to_thread(self.save, *args, **kwargs)
+        return self.save(*args, **kwargs)
+
+    async def aresolve(self, plan_id: int, owner: str, version: str) -> Optional[PlanSnapshot]:
+        """`resolve` for async callers: runs in a worker thread when snapshots are read from disk."""
+        if self._entries.persistent:
+            return await asyncio.to_thread(self.resolve, plan_id, owner, version)
+        return self.resolve(plan_id, owner, version)
+
+    def stats(self) -> Dict[str, Any]:
+        """Resolved vs. rejected delta requests."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop in-memory snapshots and reset counters (the disk tier is kept)."""
+        self._entries.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def close(self) -> None:
+        """Close the SQLite connection, if open."""
+        self._entries.close()
+
+
+# Shared by every endpoint in the process
+plan_snapshots = PlanSnapshotStore()
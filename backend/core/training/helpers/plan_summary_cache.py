@@ -0,0 +1,155 @@
+"""
+Plan Summary Cache for EvolveAI
+
+Process-wide LRU of encoded week summaries (the Matrix Schema JSON built by
+`PromptGenerator.format_current_plan_summary`).
+
+Every chat message sends the whole training plan into the intent classification
+prompt, so an unchanged week used to be re-encoded on every turn. Entries are
+keyed by (plan id, week number, plan snapshot version): a snapshot version (see
+plan_snapshots) always identifies the same plan content, so the key costs nothing
+to compute, and any change to the plan saves a new version. Only delta chat
+requests pass a version (full requests mint a new one every turn, so their
+entries would never be read again); other plans are encoded directly (hashing a
+week costs more than encoding it). `update_single_week`/`create_single_week`
+drop the entries of the plan's week they rewrite (entries are indexed by plan)
+so superseded summaries do not linger until eviction.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from logging_config import get_logger
+from settings import settings
+
+logger = get_logger(__name__)
+
+SummaryKey = Tuple[Optional[int], Optional[int], str]
+
+
+class PlanSummaryCache:
+    """Thread-safe LRU of encoded week summaries with hit/miss counters."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Capacity (defaults to settings.PLAN_SUMMARY_CACHE_MAX_ENTRIES; 0 disables the cache)
+        """
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[SummaryKey, str]" = OrderedDict()
+        self._by_plan: Dict[int, Set[SummaryKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        """Effective capacity."""
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.PLAN_SUMMARY_CACHE_MAX_ENTRIES
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_encode(
+        self,
+        plan_id: Optional[int],
+        week: Dict[str, Any],
+        encode: Callable[[Dict[str, Any]], str],
+        plan_version: Optional[str] = None,
+    ) -> str:
+        """
+        Return the week's encoded summary, encoding it only when it is not cached.
+
+        Args:
+            plan_id: Training plan ID (None for plans that are not saved yet)
+            week: Week dict (WeeklySchedule format)
+            encode: Builds the summary text of the week
+            plan_version: Snapshot version of the plan the week belongs to (None: not cached)
+
+        Returns:
+            The summary text
+        """
+        plan_id = _as_int(plan_id)
+        if self.max_entries <= 0 or plan_id is None or not plan_version:
+            return encode(week)
+
+        key = (plan_id, _as_int(week.get("week_number")), plan_version)
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return summary
+            self.misses += 1
+
+        summary = encode(week)
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            self._by_plan.setdefault(plan_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+        return summary
+
+    def invalidate(self, plan_id: int, week_number: Optional[int] = None) -> int:
+        """
+        Drop the cached summaries of a plan's week (all weeks when week_number is None).
+
+        Returns:
+            Number of entries dropped
+        """
+        plan_id, week_number = _as_int(plan_id), _as_int(week_number)
+        with self._lock:
+            stale = [
+                key for key in self._by_plan.get(plan_id, ())
+                if week_number is None or key[1] == week_number
+            ]
+            for key in stale:
+                del self._entries[key]
+                self._unindex(key)
+        if stale:
+            logger.debug(f"🗑️ Dropped {len(stale)} cached summaries for plan {plan_id} week {week_number}")
+        return len(stale)
+
+    def _unindex(self, key: SummaryKey) -> None:
+        """Remove a dropped entry from the per-plan index (lock held)."""
+        keys = self._by_plan.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_plan[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for logging and monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._by_plan.clear()
+            self.hits = self.misses = 0
+
+
+def _as_int(value: Any) -> Optional[int]:
+    """Normalize IDs and week numbers (ints or numeric strings) for cache keys."""
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Shared by every prompt builder in the process
+plan_summaries = PlanSummaryCache()
@@ -0,0 +1,166 @@
+"""
+Speculative plan updates for EvolveAI chat
+
+In /chat the intent classification has to finish before update_weekly_schedule
+starts, although messages that ask for a concrete change ("swap squats", "fewer
+days") almost always end up needing a plan update. With SPECULATIVE_PLAN_UPDATES
+enabled, the update starts alongside the classification when
+`looks_like_plan_change` matches the message. It is kept when the classifier
+asks for a plan update and cancelled otherwise.
+
+`plan_update_speculation` counts kept and discarded speculations and the tokens
+spent on discarded ones (provider counts for the modality decision and, when it
+finished, the update call; the local prompt estimate when it was cancelled
+mid-call).
+
+While a speculation is unresolved (`call_info["speculative"]`), the update's own
+latency events are held back with `defer_event`: a kept speculation logs them
+when it is kept, a discarded one is logged as a single row.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Concrete change requests; questions about the plan ("why squats on Monday?") don't match
+_CHANGE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"\b(swap|replace|switch|change|remove|drop|add|move|reschedule|skip|substitute|shorten|lengthen)\b",
+        r"\b(increase|decrease|reduce|lower|raise)\b",
+        r"\b(fewer|less|more|extra)\s+(training\s+)?"
+        r"(days?|sessions?|workouts?|sets?|reps?|volume|weight|cardio|running|runs?|rest|exercises?|time)\b",
+        r"\b(easier|harder|lighter|heavier|shorter|longer)\b",
+        r"\btoo\s+(hard|easy|heavy|light|much|long|short|intense)\b",
+        r"\b(instead\s+of|rather\s+than)\b",
+        r"\b(can'?t|cannot|don'?t\s+have|no\s+longer)\s+(do|have|access|train|make)\b",
+    )
+]
+
+
+def looks_like_plan_change(feedback_message: str) -> bool:
+    """Cheap check whether a chat message asks for a concrete plan change."""
+    message = feedback_message or ""
+    return any(pattern.search(message) for pattern in _CHANGE_PATTERNS)
+
+
+class PlanUpdateSpeculationStats:
+    """Thread-safe counters for speculative plan updates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.launched = 0
+        self.kept = 0
+        self.discarded = 0
+        self.wasted_tokens = 0
+
+    def record_launch(self) -> None:
+        with self._lock:
+            self.launched += 1
+
+    def record_kept(self) -> None:
+        with self._lock:
+            self.kept += 1
+
+    def record_discarded(self, call_info: Dict[str, Any]) -> int:
+        """
+        Count a discarded speculation.
+
+        Args:
+            call_info: Filled by update_weekly_schedule (modality_completion, prompt_tokens
+                       estimate, completion when finished)
+
+        Returns:
+            Tokens spent on the discarded update
+        """
+        tokens = _completion_tokens(discarded_completion(call_info)) or 0
+        with self._lock:
+            self.discarded += 1
+            self.wasted_tokens += tokens
+        return tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and wasted tokens for logging and monitoring."""
+        resolved = self.kept + self.discarded
+        return {
+            "launched": self.launched,
+            "kept": self.kept,
+            "discarded": self.discarded,
+            "hit_rate": round(self.kept / resolved, 4) if resolved else 0.0,
+            "wasted_tokens": self.wasted_tokens,
+        }
+
+    def reset(self) -> None:
+        """Reset all counters."""
+        with self._lock:
+            self.launched = self.kept = self.discarded = self.wasted_tokens = 0
+
+
+class _EstimatedUsage(NamedTuple):
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class _EstimatedCompletion(NamedTuple):
+    usage: _EstimatedUsage
+
+
+def defer_event(call_info: Optional[Dict[str, Any]], event: str, duration: float, completion: Any) -> bool:
+    """
+    Hold back a latency event of an unresolved speculation.
+
+    Returns:
+        True when the event was deferred (the caller must not log it)
+    """
+    if not call_info or not call_info.get("speculative"):
+        return False
+    call_info.setdefault("deferred_events", []).append((event, duration, completion))
+    return True
+
+
+def keep_speculation(call_info: Dict[str, Any]) -> List[Tuple[str, float, Any]]:
+    """Resolve a speculation as kept: later events log directly; returns the ones deferred so far."""
+    call_info["speculative"] = False
+    return call_info.pop("deferred_events", [])
+
+
+def discarded_completion(call_info: Dict[str, Any]) -> Optional[Any]:
+    """
+    Completion to log for a discarded speculation: the usage of the modality decision plus
+    the update call's (its prompt estimate when it was cancelled mid-call); None if no LLM
+    call started.
+    """
+    usages = [_usage(call_info.get("modality_completion"))]
+    if call_info.get("completion") is not None:
+        usages.append(_usage(call_info["completion"]))
+    elif call_info.get("prompt_tokens"):
+        usages.append(_EstimatedUsage(call_info["prompt_tokens"], 0, call_info["prompt_tokens"]))
+    usages = [usage for usage in usages if usage is not None]
+    if not usages:
+        return None
+    return _EstimatedCompletion(_EstimatedUsage(*(sum(column) for column in zip(*usages))))
+
+
+def _usage(completion: Optional[Any]) -> Optional[_EstimatedUsage]:
+    """Token counts reported by the provider, if the completion carries usage."""
+    usage = getattr(completion, "usage", None)
+    if not usage:
+        return None
+    counts = [getattr(usage, name, None) for name in _EstimatedUsage._fields]
+    counts = [count if isinstance(count, int) else 0 for count in counts]
+    return _EstimatedUsage(*counts) if any(counts) else None
+
+
+def _completion_tokens(completion: Optional[Any]) -> Optional[int]:
+    """Total tokens of a completion, if it carries usage."""
+    usage = _usage(completion)
+    return usage.total_tokens if usage else None
+
+
+# Shared by every chat request in the process
+plan_update_speculation = PlanUpdateSpeculationStats()
@@ -0,0 +1,212 @@
+"""
+Prompt budgeting for EvolveAI
+
+Helpers used by PromptGenerator to keep input tokens in check:
+
+- `static_section` builds a prompt section that does not depend on the request
+  once and returns the same interned string afterwards.
+- `SegmentedPrompt` is a prompt string that remembers its stable prefix (static
+  instructions shared by every user) so LLMClient can let providers cache it.
+- `count_tokens` counts tokens with a local tokenizer (tiktoken; a
+  characters-per-token estimate when the encoding cannot be loaded, or while
+  it is still loading on an event loop). `preload_tokenizer` loads it at
+  startup, off the event loop.
+- `fit_to_budget` renders a prompt and, when it exceeds the call site's token
+  budget (settings.PROMPT_TOKEN_BUDGETS), drops the lowest-priority items of
+  its dynamic parts (older conversation turns, low-confidence playbook lessons)
+  until it fits.
+"""
+
+import asyncio
+import functools
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from logging_config import get_logger
+from settings import settings
+
+logger = get_logger(__name__)
+
+# Rough average for English prompt text, used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+_encoding: Any = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+_loader: Optional[threading.Thread] = None
+_loader_lock = threading.Lock()
+
+# Static sections built so far: qualified builder name -> interned text
+_static_sections: Dict[str, str] = {}
+
+
+class SegmentedPrompt(str):
+    """
+    Prompt text made of stable segments followed by volatile (per-request) segments.
+
+    Behaves as the full prompt string everywhere; `stable_prefix` is what providers
+    can serve from their prompt cache when the same instructions are sent again.
+    """
+
+    stable_prefix: str
+
+    def __new__(cls, stable: Sequence[str] = (), volatile: Sequence[str] = ()) -> "SegmentedPrompt":
+        stable_prefix = "".join(stable)
+        prompt = super().__new__(cls, stable_prefix + "".join(volatile))
+        prompt.stable_prefix = stable_prefix
+        return prompt
+
+    @property
+    def volatile_suffix(self) -> str:
+        return str(self)[len(self.stable_prefix):]
+
+    def __getnewargs__(self) -> Tuple[Tuple[str], Tuple[str]]:
+        return (self.stable_prefix,), (self.volatile_suffix,)
+
+
+def static_section(builder: Callable[[], str]) -> Callable[[], str]:
+    """Decorator for argument-free section builders: built once, then served interned."""
+    name = builder.__qualname__
+
+    @functools.wraps(builder)
+    def cached() -> str:
+        text = _static_sections.get(name)
+        if text is None:
+            text = sys.intern(builder())
+            _static_sections[name] = text
+        return text
+
+    return cached
+
+
+def static_section_tokens() -> Dict[str, int]:
+    """Token count of every static section built so far."""
+    return {name: _count_static(text) for name, text in _static_sections.items()}
+
+
+def preload_tokenizer() -> bool:
+    """
+    Load the tokenizer encoding (blocking: tiktoken downloads it on first use unless
+    TIKTOKEN_CACHE_DIR holds it). Call it off the event loop, e.g. via asyncio.to_thread
+    at startup.
+
+    Returns:
+        True when the encoding is available, False when tokens are estimated from length
+    """
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding is not None
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding(settings.PROMPT_TOKENIZER_ENCODING)
+            except Exception as e:
+                logger.warning(f"⚠️ Tokenizer unavailable, estimating prompt tokens from length: {e}")
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding is not None
+
+
+def _get_encoding() -> Any:
+    """The tokenizer, or None when it is unavailable or still loading on an event loop."""
+    global _loader
+    if _encoding_loaded:
+        return _encoding
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        preload_tokenizer()
+        return _encoding
+    # Never block the event loop on loading (or downloading) the encoding: estimate
+    # until a background load finishes
+    with _loader_lock:
+        if _loader is None:
+            _loader = threading.Thread(target=preload_tokenizer, name="tokenizer-preload", daemon=True)
+            _loader.start()
+    return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text` according to the local tokenizer."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@functools.lru_cache(maxsize=256)
+def _count_static(text: str) -> int:
+    return count_tokens(text)
+
+
+def fit_to_budget(
+    call_site: str,
+    render: Callable[..., str],
+    **parts: Sequence[Any]
+) -> str:
+    """
+    Render a prompt within the token budget of its call site.
+
+    Each keyword argument is a trimmable part: a list of items ordered from
+    lowest to highest priority, passed to `render` under the same name. When the
+    rendered prompt is over budget, leading items are dropped, one part at a time
+    in argument order; the last item of a part is always kept.
+
+    Args:
+        call_site: Key in settings.PROMPT_TOKEN_BUDGETS (no budget = no trimming)
+        render: Builds the prompt from the (possibly trimmed) parts
+        **parts: Trimmable parts, lowest priority item first
+
+    Returns:
+        The rendered prompt
+    """
+    budget = settings.PROMPT_TOKEN_BUDGETS.get(call_site, 0)
+    kept: Dict[str, List[Any]] = {name: list(items) for name, items in parts.items()}
+    prompt = render(**kept)
+    if budget <= 0:
+        return prompt
+    tokens = count_tokens(prompt)
+    if tokens <= budget:
+        return prompt
+
+    original_tokens = tokens
+    dropped: Dict[str, int] = {}
+    for name, items in parts.items():
+        items = list(items)
+        # Smallest number of leading items to drop so the prompt fits (binary search, keeping one item)
+        low, high = 0, max(len(items) - 1, 0)
+        best: Optional[tuple] = None
+        while low < high:
+            middle = (low + high) // 2
+            candidate = render(**{**kept, name: items[middle:]})
+            candidate_tokens = count_tokens(candidate)
+            if candidate_tokens <= budget:
+                high = middle
+                best = (middle, candidate, candidate_tokens)
+            else:
+                low = middle + 1
+        if best is not None and best[0] == low:
+            drop, prompt, tokens = best
+        else:
+            drop = low
+            prompt = render(**{**kept, name: items[drop:]})
+            tokens = count_tokens(prompt)
+        kept[name] = items[drop:]
+        if drop:
+            dropped[name] = drop
+        if tokens <= budget:
+            break
+
+    trimmed = ", ".join(f"{count} {name}" for name, count in dropped.items()) or "nothing to trim"
+    if tokens > budget:
+        logger.warning(
+            f"⚠️ Prompt for {call_site} is {tokens} tokens, over its {budget} budget after trimming ({trimmed})"
+        )
+    else:
+        logger.info(f"✂️ Trimmed prompt for {call_site} from {original_tokens} to {tokens} tokens ({trimmed})")
+    return prompt
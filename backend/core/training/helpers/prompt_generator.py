@@ -8,8 +8,10 @@ questions, training plan outlines, and training plans.
 import json
 import os
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from core.training.schemas.question_schemas import PersonalInfo, AIQuestion
+from core.training.helpers.prompt_budget import SegmentedPrompt, fit_to_budget, static_section
+from core.training.helpers.plan_summary_cache import plan_summaries
 
 SAVE_PROMPTS = False
 
@@ -154,15 +156,22 @@ class PromptGenerator:
         - include_endurance: true/false
         - rationale: Short justification explaining the chosen modalities and explicitly referencing the user's goal, limiter, and equipment/evironment constraints taken from the context above.
 
-        Decision rules:
+        {PromptGenerator._get_modality_decision_rules()}
+        """
+
+    @staticmethod
+    @static_section
+    def _get_modality_decision_rules() -> str:
+        """Rules for choosing modalities (shared by the modality selection and fused plan prompts)."""
+        return """Decision rules:
         • include_equipment_strength → true only when the goal or limiter needs loaded strength work AND the context explicitly confirms access to barbells/dumbbells/machines.
         • include_bodyweight_strength → true when strength work is still beneficial but only bodyweight/minimal tools are confirmed (or when no equipment information exists but strength is still helpful).
         • You may set both strength flags to true if the user benefits from loaded work and also uses bodyweight sessions for variety.
         • include_endurance → true when aerobic work directly advances the primary goal or mitigates a limiter highlighted in the context.
-        • If unsure about a modality, default to false and describe the uncertainty in the rationale.
-        """
+        • If unsure about a modality, default to false and describe the uncertainty in the rationale."""
 
     @staticmethod
+    @static_section
     def get_question_generation_context() -> str:
         """Get the context section (ROLE, CONTEXT, TASK) for question generation prompts."""
         return """
@@ -182,6 +191,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def get_question_generation_guidelines() -> str:
         """Get the key principle section for question generation prompts."""
         return """
@@ -191,6 +201,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def _get_general_themes_to_collect() -> str:
         """Get the general themes to collect information on."""
         return """
@@ -203,6 +214,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def _get_question_presentation_context() -> str:
         """Get the shared explanation of how questions are presented to users."""
         return """
@@ -215,6 +227,7 @@ class PromptGenerator:
         """
         
     @staticmethod
+    @static_section
     def _get_themes_to_avoid() -> str:
         """Get the themes to avoid collecting information on."""
         return """
@@ -255,6 +268,7 @@ class PromptGenerator:
         return "\n".join(lines) if lines else "  - No athlete-specific intents available."
 
     @staticmethod
+    @static_section
     def _get_app_scope_section() -> str:
         """Shared app scope description used across prompts."""
         return """
@@ -281,6 +295,20 @@ class PromptGenerator:
             • Rationale: {rationale}
         """
 
+    @staticmethod
+    @static_section
+    def _render_fused_modality_decision() -> str:
+        """Render the modality section when the plan call also decides the modalities."""
+        return f"""
+            **MODALITY DECISION (DECIDE FIRST, RETURN IN modality_decision):**
+            Before designing the week, decide which modalities it includes and fill modality_decision:
+            - include_bodyweight_strength, include_equipment_strength, include_endurance: true/false
+            - rationale: Short justification referencing the user's goal, limiter, and equipment/environment constraints from the onboarding responses.
+            Only schedule sessions for modalities you set to true; ignore the modality-specific instructions for modalities you set to false.
+
+            {PromptGenerator._get_modality_decision_rules()}
+        """
+
     @staticmethod
     def generate_question_content_prompt_initial(
         personal_info: PersonalInfo,
@@ -666,6 +694,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def _get_common_output_format() -> str:
         """Get common output format section for question generation prompts."""
         return """
@@ -678,6 +707,7 @@ class PromptGenerator:
         """
 
     @staticmethod
+    @static_section
     def _get_initial_output_format() -> str:
         """Get output format for initial question generation with intent planning."""
         return """
@@ -694,6 +724,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def _get_common_validation_base() -> str:
         """Get base validation checklist items that are common to both initial and follow-up prompts."""
         return """
@@ -852,6 +883,31 @@ class PromptGenerator:
 
         return header + content + footer
 
+    @staticmethod
+    def _get_playbook_lessons(playbook) -> List[Any]:
+        """Lessons of a UserPlaybook object or list of lesson dicts."""
+        if hasattr(playbook, "lessons"):
+            return list(playbook.lessons or [])
+        if isinstance(playbook, list):
+            return list(playbook)
+        return []
+
+    @staticmethod
+    def _lessons_by_confidence(lessons: List[Any]) -> List[Any]:
+        """Lessons from lowest to highest confidence (the order they are trimmed in)."""
+        return sorted(
+            lessons,
+            key=lambda l: l.confidence if hasattr(l, "confidence") else l.get("confidence", 0.5),
+        )
+
+    @staticmethod
+    def _format_kept_lessons(all_lessons: List[Any], kept: List[Any], personal_info: PersonalInfo) -> str:
+        """format_playbook_lessons for the lessons that survived trimming, in their original order."""
+        kept_ids = {id(lesson) for lesson in kept}
+        return PromptGenerator.format_playbook_lessons(
+            [lesson for lesson in all_lessons if id(lesson) in kept_ids], personal_info, context="training"
+        )
+
     @staticmethod
     def format_onboarding_responses(formatted_responses: Optional[str]) -> str:
         """Format onboarding Q&A responses for inclusion in prompts."""
@@ -872,6 +928,7 @@ class PromptGenerator:
         include_equipment_strength: bool = False,
         include_endurance: bool = True,
         modality_rationale: Optional[str] = None,
+        decide_modalities: bool = False,
     ) -> str:
         """
         Generate prompt for creating the FIRST week (Week 1) during onboarding.
@@ -886,42 +943,34 @@ class PromptGenerator:
         Args:
             personal_info: User's personal information and goals
             user_playbook: User's playbook with learned lessons from onboarding (instead of raw responses)
+            decide_modalities: Let the model choose the modalities itself (TrainingPlanWithModalities);
+                               the include_* flags then only select which instructions are shown
+
+        Returns:
+            SegmentedPrompt whose stable prefix holds the coaching instructions shared by all users
         """
         
-        prompt = f"""
-            **YOUR ROLE:**
-            You are an Expert Training Coach who just completed a personalized assessment with {personal_info.username}.
-            You gathered information in two phases and now need to create their Week 1 training plan.
-            Remember: This is Week 1 only. We re-assess and adjust weekly based on their progress.
-            
-
-            {PromptGenerator._get_app_scope_section()}
-             
-             {PromptGenerator._render_modality_decision_summary(
-                 include_bodyweight_strength,
-                 include_equipment_strength,
-                 include_endurance,
-                 modality_rationale or "LLM decision unavailable—defaulting to balanced coverage."
-             )}
+        if decide_modalities:
+            modality_section = PromptGenerator._render_fused_modality_decision()
+        else:
+            modality_section = PromptGenerator._render_modality_decision_summary(
+                include_bodyweight_strength,
+                include_equipment_strength,
+                include_endurance,
+                modality_rationale or "LLM decision unavailable—defaulting to balanced coverage."
+            )
 
+        # Static coaching instructions first (shared by every user, served from the provider's
+        # prompt cache), then modality-specific instructions, then this user's context
+        instructions = PromptGenerator._get_initial_training_plan_instructions()
+        modality_specific = f"""
             {PromptGenerator._get_exercise_metadata_requirements(include_bodyweight_strength or include_equipment_strength, personal_info)}
-
-            {PromptGenerator._get_one_week_enforcement()}
              
             {PromptGenerator._get_modality_instructions(include_bodyweight_strength, include_equipment_strength, include_endurance, personal_info)}
              
-            {PromptGenerator._get_justification_requirements()}
-
-            {PromptGenerator._get_training_principles()}
-
-            {PromptGenerator._get_supplemental_training_scheduling()}
-
-            **OUTPUT FORMAT & GUIDANCE:**
-            • Schema enforces: title (required), summary (required), justification (required), weekly_schedules (exactly 1 with week_number: 1, exactly 7 daily_trainings), ai_message (optional)
-            • All field types, required fields, and enum values are enforced by the schema.
-            • ai_message: Warm message celebrating plan completion, explaining week-by-week approach (2-3 sentences, 2-3 emojis)
-              Example: "🎉 Amazing! I've created your personalized Week 1 plan! We work week-by-week so we can track your progress and adapt as you grow stronger. Take a look — excited to hear your thoughts! 💪✨"
-            
+            {modality_section}
+"""
+        user_context = f"""
             ═══════════════════════════════════════════════════════════════════════════════
             USER-SPECIFIC CONTEXT (CRITICAL - APPLY THESE CONSTRAINTS)
             ═══════════════════════════════════════════════════════════════════════════════
@@ -936,18 +985,47 @@ class PromptGenerator:
             YOUR TASK
             ═══════════════════════════════════════════════════════════════════════════════
             
-            Design Week 1 training schedule using the user context above:
+            Design Week 1 training schedule for {personal_info.username} using the user context above:
             • Constraints and preferences from the user playbook (equipment, time, injuries, preferences, etc.)
             • Goal: "{personal_info.goal_description}"
             • Experience: {personal_info.experience_level}
             • Your coaching expertise (structure, volume, intensity, exercise selection)
          """
+        prompt = SegmentedPrompt(stable=[instructions], volatile=[modality_specific, user_context])
         
         # TODO: REMOVE THIS - Prompt saving for review only
         _save_prompt_to_file("generate_initial_training_plan_prompt", prompt)
         
         return prompt
     
+    @staticmethod
+    @static_section
+    def _get_initial_training_plan_instructions() -> str:
+        """Coaching instructions for the Week 1 plan that do not depend on the user."""
+        return f"""
+            **YOUR ROLE:**
+            You are an Expert Training Coach who just completed a personalized assessment with a new user (see the client profile below).
+            You gathered information in two phases and now need to create their Week 1 training plan.
+            Remember: This is Week 1 only. We re-assess and adjust weekly based on their progress.
+            
+
+            {PromptGenerator._get_app_scope_section()}
+
+            {PromptGenerator._get_one_week_enforcement()}
+             
+            {PromptGenerator._get_justification_requirements()}
+
+            {PromptGenerator._get_training_principles()}
+
+            {PromptGenerator._get_supplemental_training_scheduling()}
+
+            **OUTPUT FORMAT & GUIDANCE:**
+            • Schema enforces: title (required), summary (required), justification (required), weekly_schedules (exactly 1 with week_number: 1, exactly 7 daily_trainings), ai_message (optional)
+            • All field types, required fields, and enum values are enforced by the schema.
+            • ai_message: Warm message celebrating plan completion, explaining week-by-week approach (2-3 sentences, 2-3 emojis)
+              Example: "🎉 Amazing! I've created your personalized Week 1 plan! We work week-by-week so we can track your progress and adapt as you grow stronger. Take a look — excited to hear your thoughts! 💪✨"
+"""
+    
     @staticmethod
     def update_weekly_schedule_prompt(
         personal_info: PersonalInfo,
@@ -959,7 +1037,7 @@ class PromptGenerator:
         include_equipment_strength: bool = False,
         include_endurance: bool = True,
         modality_rationale: Optional[str] = None,
-        conversation_history: str = None,
+        conversation_history: Optional[Union[str, List[str]]] = None,
     ) -> str:
         """
         Generate prompt for updating an existing week based on user feedback.
@@ -976,7 +1054,10 @@ class PromptGenerator:
             week_number: Week number to update
             current_week_summary: Summary of current week structure
             user_playbook: User's playbook with learned lessons (instead of onboarding responses)
-            conversation_history: Optional conversation history for context
+            conversation_history: Optional conversation turns, oldest first, or one preformatted block
+
+        Over the "week_update" token budget, older conversation turns are dropped first,
+        then the lowest-confidence playbook lessons.
         """
 
         current_week_section = ""
@@ -986,14 +1067,21 @@ class PromptGenerator:
             {current_week_summary}
             """
 
-        conversation_section = ""
-        if conversation_history:
-            conversation_section = f"""
+        all_lessons = PromptGenerator._get_playbook_lessons(user_playbook)
+        if isinstance(conversation_history, str):
+            conversation_history = [conversation_history]
+
+        def render(conversation_turns: List[str], lessons: List[Any]) -> str:
+            conversation_section = ""
+            if conversation_turns:
+                conversation_text = "\n".join(conversation_turns)
+                conversation_section = f"""
             **CONVERSATION HISTORY:**
-            {conversation_history}
+            {conversation_text}
             """
+            playbook_context = PromptGenerator._format_kept_lessons(all_lessons, lessons, personal_info)
 
-        prompt = f"""
+            return f"""
             **YOUR ROLE:**
             You are an Expert Training Coach who previously created {personal_info.username}'s Week {week_number} training plan.
             You completed a two-phase assessment and designed their plan based on your findings.
@@ -1059,7 +1147,7 @@ class PromptGenerator:
             {PromptGenerator.format_client_information(personal_info)}
             
             **USER PLAYBOOK (LEARNED LESSONS - CRITICAL CONSTRAINTS):**
-            {PromptGenerator.format_playbook_lessons(user_playbook, personal_info, context="training")}
+            {playbook_context}
             
             {conversation_section}
             
@@ -1077,6 +1165,13 @@ class PromptGenerator:
             
             **IMPORTANT:** The user's feedback takes priority. If their feedback conflicts with constraints from the user playbook, prioritize the user's explicit request and adjust accordingly.
             """
+
+        prompt = fit_to_budget(
+            "week_update",
+            render,
+            conversation_turns=conversation_history or [],
+            lessons=PromptGenerator._lessons_by_confidence(all_lessons),
+        )
         
         # TODO: REMOVE THIS - Prompt saving for review only
         _save_prompt_to_file("update_weekly_schedule_prompt", prompt)
@@ -1106,10 +1201,10 @@ class PromptGenerator:
         
         Equipment and main_muscle constraints are enforced via Pydantic Enum validation
         in the schema (MainMuscleEnum and EquipmentEnum), not in the prompt.
+        
+        Over the "week_create" token budget, the lowest-confidence playbook lessons are dropped.
         """
-        playbook_context = PromptGenerator.format_playbook_lessons(
-            playbook_lessons, personal_info, context="training"
-        )
+        all_lessons = PromptGenerator._get_playbook_lessons(playbook_lessons)
         
         progress_context_section = f"""
         **COMPLETED WEEKS CONTEXT:**
@@ -1134,7 +1229,10 @@ class PromptGenerator:
               - Example: "📈 Great work completing Week 1! Here's Week 2 with slightly increased volume and some exercise variations to keep you progressing. Keep up the excellent work! 💪✨"
             """
 
-        prompt = f"""
+        def render(lessons: List[Any]) -> str:
+            playbook_context = PromptGenerator._format_kept_lessons(all_lessons, lessons, personal_info)
+
+            return f"""
             Create the NEXT week training schedule for {personal_info.username} after they completed previous week(s).
 
             **CRITICAL - APP SCOPE:**
@@ -1203,6 +1301,8 @@ class PromptGenerator:
             • Respect all constraints and preferences established in previous weeks
          """
 
+        prompt = fit_to_budget("week_create", render, lessons=PromptGenerator._lessons_by_confidence(all_lessons))
+
         # TODO: REMOVE THIS - Prompt saving for review only
         _save_prompt_to_file("create_new_weekly_schedule_prompt", prompt)
 
@@ -1278,6 +1378,7 @@ class PromptGenerator:
         )
 
     @staticmethod
+    @static_section
     def _get_one_week_enforcement() -> str:
         """Shared section enforcing exactly 1-week output."""
         return """
@@ -1404,6 +1505,7 @@ class PromptGenerator:
         return "\n".join(section.strip("\n") for section in sections if section)
     
     @staticmethod
+    @static_section
     def _get_justification_requirements() -> str:
         """Shared section with all justification length requirements."""
         return """
@@ -1429,6 +1531,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def _get_training_principles() -> str:
         """Shared section with core training principles."""
         return """
@@ -1483,6 +1586,7 @@ class PromptGenerator:
         """
     
     @staticmethod
+    @static_section
     def _get_supplemental_training_scheduling() -> str:
         """Shared section for scheduling around existing sport commitments."""
         return """
@@ -1497,7 +1601,11 @@ class PromptGenerator:
         """
 
     @staticmethod
-    def format_current_plan_summary(current_plan: Dict[str, Any]) -> str:
+    def format_current_plan_summary(
+        current_plan: Dict[str, Any],
+        plan_id: Optional[int] = None,
+        plan_version: Optional[str] = None,
+    ) -> str:
         """
         Create a token-optimized summary using Matrix Schema pattern for context in prompts.
         
@@ -1506,8 +1614,13 @@ class PromptGenerator:
         - Data stored as arrays matching schema order
         - Eliminates repeated field names
         
+        Encoded weeks are cached per (plan id, week number, plan snapshot version), so
+        chat turns on an unchanged plan version reuse the same summary.
+        
         Args:
             current_plan: Current training plan dictionary
+            plan_id: Training plan ID (defaults to the plan's or week's own ID)
+            plan_version: Snapshot version of current_plan (None: encoded without caching)
             
         Returns:
             JSON string with Matrix Schema format
@@ -1524,158 +1637,167 @@ class PromptGenerator:
             if not daily_trainings:
                 return json.dumps({"error": "Plan structure exists but no daily trainings found."})
             
-            # Define schema once (reused for all exercises)
-            exercise_schema = ["order", "id", "name", "equipment", "sets", "weights", "target", "muscles", "movement_pattern"]
+            if plan_id is None:
+                plan_id = current_plan.get("id") or week.get("training_plan_id")
+            return plan_summaries.get_or_encode(plan_id, week, PromptGenerator._encode_week_summary, plan_version)
             
-            plan_data = {
-                "schema": exercise_schema,
-                "days": {}
-            }
+        except Exception as e:
+            return json.dumps({"error": f"Error summarizing plan: {str(e)}"})
+    
+    @staticmethod
+    def _encode_week_summary(week: Dict[str, Any]) -> str:
+        """Encode one week (with daily trainings) in the Matrix Schema format."""
+        daily_trainings = week.get("daily_trainings", [])
+        
+        # Define schema once (reused for all exercises)
+        exercise_schema = ["order", "id", "name", "equipment", "sets", "weights", "target", "muscles", "movement_pattern"]
+        
+        plan_data = {
+            "schema": exercise_schema,
+            "days": {}
+        }
+        
+        for day in daily_trainings:
+            day_name = day.get("day_of_week", "Unknown")
+            training_type = day.get("training_type", "unknown").lower()
+            is_rest = day.get("is_rest_day", False)
             
-            for day in daily_trainings:
-                day_name = day.get("day_of_week", "Unknown")
-                training_type = day.get("training_type", "unknown").lower()
-                is_rest = day.get("is_rest_day", False)
-                
-                if is_rest or training_type == "rest":
-                    plan_data["days"][day_name] = {"type": "REST", "exercises": []}
-                    continue
-                
-                # Strength exercises
-                strength_exercises = day.get("strength_exercises", [])
-                exercises = []
-                
-                if strength_exercises:
-                    for ex in strength_exercises:
-                        # Get exercise data
-                        ex_name = ex.get("exercise_name", "Unknown Exercise")
-                        equipment = ex.get("equipment", "Unknown")
-                        target_area = ex.get("target_area", "")
-                        main_muscles = ex.get("main_muscles", [])
-                        if not main_muscles:
-                            # Fallback to main_muscle if main_muscles not available
-                            main_muscle = ex.get("main_muscle", "")
-                            main_muscles = [main_muscle] if main_muscle else []
-                        pattern = ex.get("force", "")  # "force" field from DB represents movement pattern (Push/Pull/Push & Pull)
-                        
-                        # Exercise details
-                        exercise_id = ex.get("exercise_id")
-                        if exercise_id:
-                            try:
-                                exercise_id = int(exercise_id)
-                            except (ValueError, TypeError):
-                                exercise_id = None
-                        else:
-                            exercise_id = None
-                        
-                        execution_order = ex.get("execution_order", 0)
-                        try:
-                            execution_order = int(execution_order)
-                        except (ValueError, TypeError):
-                            execution_order = 0
-                        
-                        # Get sets (reps) and weights (backend format: sets is int, reps/weight are arrays)
-                        sets_data = ex.get("sets", 0)
-                        reps = ex.get("reps", [])
-                        weight = ex.get("weight", [])
-                        
-                        # Format sets: reps array (matches user's example where "sets" = reps array)
-                        if isinstance(reps, list) and len(reps) > 0:
-                            sets_array = reps
-                        elif sets_data:
-                            # If sets is an int but no reps, duplicate it to match expected format
-                            sets_array = [sets_data] if isinstance(sets_data, int) else []
-                        else:
-                            sets_array = []
-                        
-                        # Format weights: weight array (ensure all weights are numbers)
-                        weights_array = []
-                        if isinstance(weight, list) and len(weight) > 0:
-                            weights_array = [float(w) if w and w > 0 else None for w in weight]
-                            weights_array = [w for w in weights_array if w is not None]  # Remove None values
-                        elif weight and weight > 0:
-                            # Single weight value
-                            weights_array = [float(weight)]
-                        
-                        # Build exercise array matching schema order:
-                        # ["order", "id", "name", "equipment", "sets", "weights", "target", "muscles", "pattern"]
-                        # Only include fields that have values (omit None to save tokens)
-                        exercise_row = []
-                        exercise_row.append(execution_order if execution_order > 0 else None)
-                        exercise_row.append(exercise_id)
-                        exercise_row.append(ex_name)
-                        exercise_row.append(equipment)
-                        exercise_row.append(sets_array if sets_array else None)
-                        exercise_row.append(weights_array if weights_array else None)
-                        exercise_row.append(target_area if target_area else None)
-                        exercise_row.append(main_muscles if main_muscles else None)
-                        exercise_row.append(pattern if pattern else None)
-                        
-                        exercises.append(exercise_row)
-                
-                # Endurance sessions (append to exercises array with extended schema if needed)
-                endurance_sessions = day.get("endurance_sessions", [])
-                if endurance_sessions:
-                    for session in endurance_sessions:
-                        session_name = session.get("name", "Endurance Session")
-                        sport_type = session.get("sport_type", "")
-                        training_volume = session.get("training_volume")
-                        unit = session.get("unit", "")
-                        heart_rate_zone = session.get("heart_rate_zone")
-                        execution_order = session.get("execution_order", 0)
+            if is_rest or training_type == "rest":
+                plan_data["days"][day_name] = {"type": "REST", "exercises": []}
+                continue
+            
+            # Strength exercises
+            strength_exercises = day.get("strength_exercises", [])
+            exercises = []
+            
+            if strength_exercises:
+                for ex in strength_exercises:
+                    # Get exercise data
+                    ex_name = ex.get("exercise_name", "Unknown Exercise")
+                    equipment = ex.get("equipment", "Unknown")
+                    target_area = ex.get("target_area", "")
+                    main_muscles = ex.get("main_muscles", [])
+                    if not main_muscles:
+                        # Fallback to main_muscle if main_muscles not available
+                        main_muscle = ex.get("main_muscle", "")
+                        main_muscles = [main_muscle] if main_muscle else []
+                    pattern = ex.get("force", "")  # "force" field from DB represents movement pattern (Push/Pull/Push & Pull)
+                    
+                    # Exercise details
+                    exercise_id = ex.get("exercise_id")
+                    if exercise_id:
                         try:
-                            execution_order = int(execution_order)
+                            exercise_id = int(exercise_id)
                         except (ValueError, TypeError):
-                            execution_order = 0
-                        
-                        # Format volume
-                        volume_str = f"{training_volume}{unit}" if training_volume and unit else None
-                        
-                        # Endurance session as exercise row (using same schema, adapting fields)
-                        # For endurance: sets=volume, weights=HR zone, target=sport_type
-                        endurance_row = [
-                            execution_order if execution_order > 0 else None,
-                            None,  # No exercise ID for endurance
-                            session_name,
-                            sport_type if sport_type else None,
-                            [volume_str] if volume_str else None,  # Volume in sets position
-                            [heart_rate_zone] if heart_rate_zone else None,  # HR zone in weights position
-                            None,
-                            None,
-                            "Endurance"
-                        ]
-                        exercises.append(endurance_row)
-                
-                plan_data["days"][day_name] = {
-                    "type": training_type.upper(),
-                    "exercises": exercises
-                }
-            
-            # Use simple approach: convert to matrix format, then format with JSON
-            # The plan_data already has the correct structure, just need proper formatting
-            json_str = json.dumps(plan_data, indent=2, separators=(',', ':'), ensure_ascii=False)
+                            exercise_id = None
+                    else:
+                        exercise_id = None
+                    
+                    execution_order = ex.get("execution_order", 0)
+                    try:
+                        execution_order = int(execution_order)
+                    except (ValueError, TypeError):
+                        execution_order = 0
+                    
+                    # Get sets (reps) and weights (backend format: sets is int, reps/weight are arrays)
+                    sets_data = ex.get("sets", 0)
+                    reps = ex.get("reps", [])
+                    weight = ex.get("weight", [])
+                    
+                    # Format sets: reps array (matches user's example where "sets" = reps array)
+                    if isinstance(reps, list) and len(reps) > 0:
+                        sets_array = reps
+                    elif sets_data:
+                        # If sets is an int but no reps, duplicate it to match expected format
+                        sets_array = [sets_data] if isinstance(sets_data, int) else []
+                    else:
+                        sets_array = []
+                    
+                    # Format weights: weight array (ensure all weights are numbers)
+                    weights_array = []
+                    if isinstance(weight, list) and len(weight) > 0:
+                        weights_array = [float(w) if w and w > 0 else None for w in weight]
+                        weights_array = [w for w in weights_array if w is not None]  # Remove None values
+                    elif weight and weight > 0:
+                        # Single weight value
+                        weights_array = [float(weight)]
+                    
+                    # Build exercise array matching schema order:
+                    # ["order", "id", "name", "equipment", "sets", "weights", "target", "muscles", "pattern"]
+                    # Only include fields that have values (omit None to save tokens)
+                    exercise_row = []
+                    exercise_row.append(execution_order if execution_order > 0 else None)
+                    exercise_row.append(exercise_id)
+                    exercise_row.append(ex_name)
+                    exercise_row.append(equipment)
+                    exercise_row.append(sets_array if sets_array else None)
+                    exercise_row.append(weights_array if weights_array else None)
+                    exercise_row.append(target_area if target_area else None)
+                    exercise_row.append(main_muscles if main_muscles else None)
+                    exercise_row.append(pattern if pattern else None)
+                    
+                    exercises.append(exercise_row)
             
-            # Post-process to match exact format:
-            # 1. Remove indentation from root-level keys ("schema" and "days")
-            # 2. Keep all other indentation as-is (indent=2 handles it correctly)
-            lines = json_str.split('\n')
-            formatted_lines = []
+            # Endurance sessions (append to exercises array with extended schema if needed)
+            endurance_sessions = day.get("endurance_sessions", [])
+            if endurance_sessions:
+                for session in endurance_sessions:
+                    session_name = session.get("name", "Endurance Session")
+                    sport_type = session.get("sport_type", "")
+                    training_volume = session.get("training_volume")
+                    unit = session.get("unit", "")
+                    heart_rate_zone = session.get("heart_rate_zone")
+                    execution_order = session.get("execution_order", 0)
+                    try:
+                        execution_order = int(execution_order)
+                    except (ValueError, TypeError):
+                        execution_order = 0
+                    
+                    # Format volume
+                    volume_str = f"{training_volume}{unit}" if training_volume and unit else None
+                    
+                    # Endurance session as exercise row (using same schema, adapting fields)
+                    # For endurance: sets=volume, weights=HR zone, target=sport_type
+                    endurance_row = [
+                        execution_order if execution_order > 0 else None,
+                        None,  # No exercise ID for endurance
+                        session_name,
+                        sport_type if sport_type else None,
+                        [volume_str] if volume_str else None,  # Volume in sets position
+                        [heart_rate_zone] if heart_rate_zone else None,  # HR zone in weights position
+                        None,
+                        None,
+                        "Endurance"
+                    ]
+                    exercises.append(endurance_row)
             
-            for line in lines:
-                stripped = line.strip()
-                # Remove 2-space indentation from root-level keys
-                if stripped.startswith('"schema"') or stripped.startswith('"days"'):
-                    if line.startswith('  '):
-                        formatted_lines.append(line[2:])
-                    else:
-                        formatted_lines.append(line)
+            plan_data["days"][day_name] = {
+                "type": training_type.upper(),
+                "exercises": exercises
+            }
+        
+        # Use simple approach: convert to matrix format, then format with JSON
+        # The plan_data already has the correct structure, just need proper formatting
+        json_str = json.dumps(plan_data, indent=2, separators=(',', ':'), ensure_ascii=False)
+        
+        # Post-process to match exact format:
+        # 1. Remove indentation from root-level keys ("schema" and "days")
+        # 2. Keep all other indentation as-is (indent=2 handles it correctly)
+        lines = json_str.split('\n')
+        formatted_lines = []
+        
+        for line in lines:
+            stripped = line.strip()
+            # Remove 2-space indentation from root-level keys
+            if stripped.startswith('"schema"') or stripped.startswith('"days"'):
+                if line.startswith('  '):
+                    formatted_lines.append(line[2:])
                 else:
                     formatted_lines.append(line)
-            
-            return '\n'.join(formatted_lines)
-            
-        except Exception as e:
-            return json.dumps({"error": f"Error summarizing plan: {str(e)}"})
+            else:
+                formatted_lines.append(line)
+        
+        return '\n'.join(formatted_lines)
     
     @staticmethod
     def _format_exercise_info(exercises: List[Dict]) -> str:
@@ -1694,31 +1816,10 @@ class PromptGenerator:
         return "\n".join(formatted_exercises)
 
     @staticmethod
-    def generate_lightweight_intent_classification_prompt(
-        feedback_message: str,
-        conversation_context: str,
-        training_plan: Dict[str, Any] = None
-    ) -> str:
-        """
-        Generate lightweight prompt for STAGE 1: Intent classification only (no operations).
-        
-        Fast and efficient - uses feedback, conversation history, and current training plan.
-        Includes plan summary so AI can answer questions about the plan.
-        """
-        # Format training plan summary if provided
-        plan_summary = ""
-        if training_plan:
-            plan_summary = PromptGenerator.format_current_plan_summary(training_plan)
-        
-        plan_section = ""
-        if plan_summary:
-            plan_section = f"""
-        **CURRENT TRAINING PLAN (for context):**
-        {plan_summary}
-        
-        """
-        
-        return f"""
+    @static_section
+    def _get_intent_classification_role() -> str:
+        """Role and scene for intent classification."""
+        return """
         **YOUR ROLE:**
         You are an Expert Training Coach and a helpful, supportive assistant who has just created a personalized training plan for your user. 
         Your primary goal is to be genuinely helpful—understanding what they need, answering their questions, making adjustments when requested, and guiding them confidently toward their fitness goals. 
@@ -1728,11 +1829,13 @@ class PromptGenerator:
         You recently created their training plan based on an in-depth assessment (initial questions about their goals, experience, and preferences, followed by targeted follow-up questions). 
         The plan is now ready for their review, and they're sharing their thoughts, questions, or feedback.
         
-        {plan_section}**CONVERSATION HISTORY:**
-        {conversation_context}
-        
-        **USER'S CURRENT FEEDBACK:**
-        "{feedback_message}"
+        """
+
+    @staticmethod
+    @static_section
+    def _get_intent_classification_instructions() -> str:
+        """Intent definitions and ai_message rules for intent classification."""
+        return """
         
         ═══════════════════════════════════════════════════════════════════════════════
         CLASSIFY THEIR INTENT - UNDERSTAND WHAT THEY REALLY NEED
@@ -1855,6 +1958,67 @@ class PromptGenerator:
         7. **Show enthusiasm**: When they're ready or satisfied, match their energy! Celebrate their commitment.
         """
 
+    @staticmethod
+    def generate_lightweight_intent_classification_prompt(
+        feedback_message: str,
+        conversation_context: Union[str, List[str]],
+        training_plan: Dict[str, Any] = None,
+        plan_version: Optional[str] = None
+    ) -> str:
+        """
+        Generate lightweight prompt for STAGE 1: Intent classification only (no operations).
+        
+        Fast and efficient - uses feedback, conversation history, and current training plan.
+        Includes plan summary so AI can answer questions about the plan.
+        
+        Args:
+            feedback_message: User's current message
+            conversation_context: Conversation turns, oldest first (older turns are dropped
+                                  first when the prompt exceeds its token budget), or one preformatted block
+            training_plan: Current training plan (optional)
+            plan_version: Snapshot version of training_plan (reuses the cached plan summary)
+        """
+        # Format training plan summary if provided
+        plan_summary = ""
+        if training_plan:
+            plan_summary = PromptGenerator.format_current_plan_summary(training_plan, plan_version=plan_version)
+        
+        plan_section = ""
+        if plan_summary:
+            plan_section = f"""
+        **CURRENT TRAINING PLAN (for context):**
+        {plan_summary}
+        
+        """
+        
+        if isinstance(conversation_context, str):
+            conversation_context = [conversation_context]
+
+        def render(conversation_turns: List[str]) -> str:
+            conversation_text = "\n".join(conversation_turns) or "No previous conversation."
+            # Static role and intent instructions first so providers can cache them across users
+            return SegmentedPrompt(
+                stable=[
+                    PromptGenerator._get_intent_classification_role(),
+                    PromptGenerator._get_intent_classification_instructions(),
+                ],
+                volatile=[
+                    f"""
+        ═══════════════════════════════════════════════════════════════════════════════
+        THE CONVERSATION
+        ═══════════════════════════════════════════════════════════════════════════════
+        
+        {plan_section}**CONVERSATION HISTORY:**
+        {conversation_text}
+        
+        **USER'S CURRENT FEEDBACK:**
+        "{feedback_message}"
+        """
+                ],
+            )
+
+        prompt = fit_to_budget("intent_classification", render, conversation_turns=conversation_context)
+
         # TODO: REMOVE THIS - Prompt saving for review only
         _save_prompt_to_file("generate_lightweight_intent_classification_prompt", prompt)
         
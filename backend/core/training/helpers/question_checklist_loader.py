@@ -7,6 +7,7 @@ based on athlete type classification.
 
 import os
 import json
+import re
 from typing import List, Dict, Any, Optional
 from logging_config import get_logger
 from core.training.schemas.question_schemas import PersonalInfo
@@ -43,6 +44,59 @@ _CARDIO_KEYWORDS = [
     "fat loss",
 ]
 
+# Goal keywords per athlete type for the local (speculative) classifier
+_ATHLETE_TYPE_KEYWORDS: Dict[str, List[str]] = {
+    "strength": [
+        "strength", "stronger", "strong", "muscle", "muscular", "bulk", "hypertrophy",
+        "powerlifting", "bodybuilding", "lift", "lifting", "bench", "squat", "deadlift",
+    ],
+    "endurance": [
+        "marathon", "half marathon", "5k", "10k", "run", "running", "runner", "cycling",
+        "bike", "triathlon", "ironman", "swim", "swimming", "ultra", "trail", "endurance",
+    ],
+    "sport_specific": [
+        "soccer", "football", "basketball", "tennis", "padel", "hockey", "rugby", "volleyball",
+        "baseball", "golf", "boxing", "mma", "martial arts", "climbing", "ski", "skiing",
+        "sport", "season", "team",
+    ],
+    "functional_fitness": [
+        "weight loss", "lose weight", "fat loss", "tone", "toned", "general fitness", "fit",
+        "fitter", "healthy", "health", "mobility", "crossfit", "hiit", "conditioning", "functional",
+    ],
+}
+_ATHLETE_TYPE_PATTERNS = {
+    athlete_type: [re.compile(r"\b%s\b" % re.escape(keyword)) for keyword in keywords]
+    for athlete_type, keywords in _ATHLETE_TYPE_KEYWORDS.items()
+}
+
+
+def guess_athlete_type(goal_description: str) -> Optional[Dict[str, Any]]:
+    """
+    Cheap keyword classification of a goal description.
+
+    Used to start question generation speculatively while the LLM classification
+    runs; the LLM result stays authoritative.
+
+    Args:
+        goal_description: User's goal in free text
+
+    Returns:
+        Dict with primary_type and secondary_types, or None if no type clearly wins
+    """
+    goal_lower = (goal_description or "").lower()
+    scores = {
+        athlete_type: sum(1 for pattern in patterns if pattern.search(goal_lower))
+        for athlete_type, patterns in _ATHLETE_TYPE_PATTERNS.items()
+    }
+    ranked = sorted((score, athlete_type) for athlete_type, score in scores.items() if score)
+    if not ranked or (len(ranked) > 1 and ranked[-1][0] == ranked[-2][0]):
+        return None
+    primary_type = ranked[-1][1]
+    return {
+        "primary_type": primary_type,
+        "secondary_types": [athlete_type for _, athlete_type in reversed(ranked[:-1])],
+    }
+
 
 def load_question_checklist(checklist_type: str) -> Dict[str, Any]:
     """
@@ -0,0 +1,114 @@
+"""
+Streaming helpers for EvolveAI
+
+- JsonStringFieldStream: pulls one string field (e.g. `ai_message`) out of a
+  structured-output JSON response while it is still being generated, so the text
+  can be shown to the user before the whole object is complete.
+- format_sse: Server-Sent-Events framing for streaming endpoints.
+"""
+
+import json
+import re
+from typing import Any, Dict, Optional
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event (JSON payload)."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class JsonStringFieldStream:
+    """
+    Incrementally decode a top-level string field from streamed JSON text.
+
+    Feed raw JSON chunks in arrival order; each call returns the newly decoded part
+    of the field value (possibly empty). Escape sequences are only decoded once
+    complete, so a chunk boundary never splits a character.
+
+    `require` gates streaming on boolean fields that must already have been
+    generated with the given value before the target field starts (e.g.
+    {"needs_plan_update": False}). If a required field is missing or has another
+    value at that point, nothing is streamed and the caller relies on the final
+    parsed object instead.
+    """
+
+    def __init__(self, field: str, require: Optional[Dict[str, bool]] = None):
+        self.field = field
+        self._field_pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._require = {
+            re.compile(r'"%s"\s*:\s*(true|false)' % re.escape(name)): value
+            for name, value in (require or {}).items()
+        }
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self.done = False
+        self.text = ""
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of JSON text; return the newly decoded field text."""
+        self._buffer += chunk
+        if self.done:
+            return ""
+
+        if self._pos is None:
+            match = self._field_pattern.search(self._buffer)
+            if not match:
+                return ""
+            if not self._requirements_met(self._buffer[:match.start()]):
+                self.done = True
+                return ""
+            self._pos = match.end()
+
+        raw = self._buffer
+        i = safe = self._pos
+        end = len(raw)
+        closed = False
+        while i < end:
+            char = raw[i]
+            if char == '"':
+                closed = True
+                break
+            if char == "\\":
+                if i + 1 >= end:
+                    break
+                if raw[i + 1] == "u":
+                    if i + 6 > end:
+                        break
+                    try:
+                        code = int(raw[i + 2:i + 6], 16)
+                    except ValueError:
+                        self.done = True
+                        return ""
+                    # Keep UTF-16 surrogate pairs (emoji) together
+                    if 0xD800 <= code <= 0xDBFF:
+                        if i + 12 > end:
+                            break
+                        i += 12
+                    else:
+                        i += 6
+                else:
+                    i += 2
+            else:
+                i += 1
+            safe = i
+
+        segment = raw[self._pos:safe]
+        self._pos = safe
+        if closed:
+            self.done = True
+        if not segment:
+            return ""
+        try:
+            decoded = json.loads(f'"{segment}"')
+        except (json.JSONDecodeError, ValueError):
+            self.done = True
+            return ""
+        self.text += decoded
+        return decoded
+
+    def _requirements_met(self, preceding: str) -> bool:
+        for pattern, expected in self._require.items():
+            match = pattern.search(preceding)
+            if not match or (match.group(1) == "true") != expected:
+                return False
+        return True
@@ -5,12 +5,13 @@ Handles training_plans, daily_training, strength_exercise, and endurance_session
 
 import os
 from typing import Optional, Dict, Any, List
-from supabase import create_client, Client
+from supabase import Client
 from settings import settings
 import json
 from datetime import datetime
 from logging_config import get_logger
 from core.utils.env_loader import is_test_environment
+from core.utils.supabase_pool import supabase_pool
 from core.training.schemas.training_schemas import (
     TrainingPlan,
     DailyTraining,
@@ -43,7 +44,7 @@ class TrainingDatabaseService:
                 
                 # Only create client if we have valid credentials
                 if supabase_url and supabase_key:
-                    self.supabase = create_client(supabase_url, supabase_key)
+                    self.supabase = supabase_pool.sync_client(use_service_role=False)
                     self.logger.debug("TrainingDatabaseService Supabase client initialized successfully")
                 else:
                     self.logger.warning("Supabase credentials missing - client not initialized")
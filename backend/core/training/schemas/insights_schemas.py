@@ -3,7 +3,7 @@ Pydantic schemas for simplified insights API.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 
 
 class TopExercise(BaseModel):
@@ -31,6 +31,15 @@ class InsightsSummaryRequest(BaseModel):
         None, 
         description="Optional training plan data (if provided, uses this instead of fetching from database)"
     )
+    plan_id: Optional[int] = Field(None, description="Training plan ID (required with plan_version)")
+    plan_version: Optional[str] = Field(
+        None,
+        description="Version token of the server plan snapshot (from /chat or /create-week) - used when training_plan is omitted"
+    )
+    week_updates: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="Weeks changed on the client since plan_version (e.g. newly completed sessions)"
+    )
     # Optional: Frontend can pass pre-calculated metrics to avoid duplication
     weak_points: Optional[List[WeakPoint]] = Field(
         None,
@@ -67,5 +76,9 @@ class InsightsSummaryResponse(BaseModel):
     success: bool = Field(..., description="Whether the request was successful")
     summary: Optional[AIInsightsSummary] = Field(None, description="AI-generated insights summary")
     metrics: Optional[InsightsMetrics] = Field(None, description="Simple metrics for display")
+    plan_version: Optional[str] = Field(
+        None,
+        description="Version token of the server plan snapshot after this request (send it instead of training_plan next time)"
+    )
     error: Optional[str] = Field(None, description="Error message if request failed")
 
@@ -200,14 +200,25 @@ class PlanFeedbackRequest(BaseModel):
     user_profile_id: Union[int, str] = Field(..., description="User profile ID")
     plan_id: Union[int, str] = Field(..., description="Training plan ID")
     feedback_message: str = Field(..., description="User feedback message")
-    training_plan: Dict[str, Any] = Field(..., description="Full training plan data (sent from frontend)")
+    training_plan: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Full training plan data (sent from frontend) - omit and send plan_version to use the server snapshot"
+    )
+    plan_version: Optional[str] = Field(
+        default=None,
+        description="Version token of the server plan snapshot (from the previous response) - used when training_plan is omitted"
+    )
+    week_updates: Optional[List[Dict[str, Any]]] = Field(
+        default=None,
+        description="Weeks changed on the client since plan_version (replace the snapshot's weeks with the same week_number)"
+    )
     week_number: int = Field(
         ...,
         description="Week number to update (required - should be the current week from frontend)"
     )
     playbook: Optional[Dict[str, Any]] = Field(
         default=None,
-        description="User playbook from frontend (userProfile.playbook)"
+        description="User playbook from frontend (userProfile.playbook) - optional with plan_version (the snapshot's playbook is used)"
     )
     personal_info: Optional[PersonalInfo] = Field(
         default=None,
@@ -228,7 +239,7 @@ class PlanFeedbackResponse(BaseModel):
     plan_updated: bool = Field(..., description="Whether the plan was modified")
     updated_plan: Optional[Dict[str, Any]] = Field(
         None, 
-        description="Updated plan data if changes were made"
+        description="Updated plan data if changes were made (not echoed for unchanged plans on plan_version requests)"
     )
     updated_playbook: Optional[Dict[str, Any]] = Field(
         None,
@@ -238,6 +249,10 @@ class PlanFeedbackResponse(BaseModel):
         default=False, 
         description="If true, frontend should navigate to the main application"
     )
+    plan_version: Optional[str] = Field(
+        None,
+        description="Version token of the server plan snapshot after this request (send it instead of training_plan next time)"
+    )
     error: Optional[str] = Field(None, description="Error message if processing failed")
 
 
@@ -402,7 +417,18 @@ class FeedbackClassification(BaseModel):
 class CreateWeekRequest(BaseModel):
     """Request for creating a new week in the training plan."""
     
-    training_plan: Dict[str, Any] = Field(..., description="Full training plan data")
+    training_plan: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Full training plan data - omit and send plan_id + plan_version to use the server snapshot"
+    )
+    plan_version: Optional[str] = Field(
+        default=None,
+        description="Version token of the server plan snapshot (from the previous response) - used when training_plan is omitted"
+    )
+    week_updates: Optional[List[Dict[str, Any]]] = Field(
+        default=None,
+        description="Weeks changed on the client since plan_version (e.g. completed sessions of the finished week)"
+    )
     user_profile_id: int = Field(..., description="User profile ID")
     personal_info: PersonalInfo = Field(..., description="User personal information")
     plan_id: Optional[int] = Field(default=None, description="Training plan ID (optional, derived from training_plan if not provided)")
@@ -522,6 +522,15 @@ class ModalityDecision(BaseModel):
     )
 
 
+class TrainingPlanWithModalities(TrainingPlan):
+    """Initial training plan that also carries the modality decision (fused plan generation)."""
+
+    modality_decision: Optional[ModalityDecision] = Field(
+        default=None,
+        description="Modalities chosen for this plan; only schedule sessions for modalities set to true.",
+    )
+
+
 
 
 class WeeklyScheduleResponse(BaseModel):
@@ -8,14 +8,17 @@ Handles the complete training workflow with a clean, unified interface:
 """
 
 import asyncio
-from fastapi import APIRouter, HTTPException, Depends, Header, BackgroundTasks
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import StreamingResponse
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set
 from datetime import datetime
 import logging
 import os
 import jwt
 import copy
-import inspect
+import hashlib
+import threading
+import time
 
 from core.training.schemas.question_schemas import (
     InitialQuestionsRequest,
@@ -42,12 +45,27 @@ from core.training.helpers.date_mapper import map_daily_training_dates
 # Format responses
 from core.training.helpers.response_formatter import ResponseFormatter
 from core.training.helpers.insights_service import InsightsService
+from core.training.helpers.insights_metrics import insights_metrics
+from core.training.helpers.plan_update_speculation import (
+    discarded_completion,
+    keep_speculation,
+    looks_like_plan_change,
+    plan_update_speculation,
+)
+from core.training.helpers.plan_snapshots import PlanSnapshot, detach_plan, merge_weeks, plan_snapshots
 from core.training.helpers.prompt_generator import PromptGenerator
+from core.training.helpers.stream_utils import format_sse
+from core.training.helpers.plan_jobs import PlanJob, plan_jobs
+from core.training.helpers.background_jobs import enqueue_initial_playbook, enqueue_plan_outline
+from core.utils.single_flight import single_flight
 from core.base.schemas.playbook_schemas import UserPlaybook
 from settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Identical metrics snapshots (same data hash) get the same summary
+INSIGHTS_SUMMARY_CACHE_TTL_SECONDS = 24 * 3600
+
 
 def validate_plan_generation_request(request: PlanGenerationRequest) -> None:
     """
@@ -115,11 +133,79 @@ def validate_plan_generation_request(request: PlanGenerationRequest) -> None:
             )
 
 
+# Max ids per `in_()` filter - keeps PostgREST request URLs well below proxy limits
+_IN_FILTER_CHUNK_SIZE = 200
+
+# Rows per request; PostgREST caps each response at 1000 rows (the max-rows setting)
+_PAGE_SIZE = 1000
+
+
+async def _fetch_rows_in(client, table: str, column: str, values: List[Any]) -> List[Dict[str, Any]]:
+    """Fetch all rows of `table` whose `column` is in `values`, ordered by id (chunked, paginated `in_()` queries)."""
+    if not values:
+        return []
+    chunks = [
+        values[i:i + _IN_FILTER_CHUNK_SIZE]
+        for i in range(0, len(values), _IN_FILTER_CHUNK_SIZE)
+    ]
+
+    async def fetch_chunk(chunk: List[Any]) -> List[Dict[str, Any]]:
+        # One chunk of parent ids can match more rows than fit in a response (e.g. sets of many days)
+        chunk_rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            response = await (
+                client.table(table)
+                .select("*")
+                .in_(column, chunk)
+                .order("id")
+                .range(offset, offset + _PAGE_SIZE - 1)
+                .execute()
+            )
+            page = response.data or []
+            chunk_rows.extend(page)
+            if len(page) < _PAGE_SIZE:
+                return chunk_rows
+            offset += _PAGE_SIZE
+
+    pages = await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunks])
+    rows: List[Dict[str, Any]] = [row for page in pages for row in page]
+    if len(chunks) > 1:
+        rows.sort(key=lambda row: row["id"])
+    return rows
+
+
+async def _fetch_exercises_by_id(client, exercise_ids) -> Dict[Any, Dict[str, Any]]:
+    """Resolve exercise rows by id from the in-memory catalog, querying only the misses."""
+    from core.training.helpers.exercise_catalog import exercise_catalog
+
+    exercises_by_id: Dict[Any, Dict[str, Any]] = {}
+    missing_ids = []
+    for exercise_id in exercise_ids:
+        exercise = exercise_catalog.get_by_id(exercise_id)
+        if exercise is not None:
+            exercises_by_id[exercise_id] = exercise
+        else:
+            missing_ids.append(exercise_id)
+
+    for exercise in await _fetch_rows_in(client, "exercises", "id", sorted(missing_ids)):
+        exercises_by_id[exercise["id"]] = exercise
+    return exercises_by_id
+
+
+def _group_rows(rows: List[Dict[str, Any]], parent_column: str) -> Dict[Any, List[Dict[str, Any]]]:
+    """Group rows by their parent foreign key, preserving row order."""
+    grouped: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in rows:
+        grouped.setdefault(row[parent_column], []).append(row)
+    return grouped
+
+
 async def _fetch_complete_training_plan(user_profile_id: int) -> Dict[str, Any]:
     """Fetch complete training plan with real IDs from database - exact same as frontend."""
     try:
-        from supabase import create_client
         from core.utils.env_loader import is_test_environment
+        from core.utils.supabase_pool import supabase_pool
 
         # Check if we're in a test environment
         is_test_env = is_test_environment()
@@ -140,15 +226,17 @@ async def _fetch_complete_training_plan(user_profile_id: int) -> Dict[str, Any]:
             logger.error("❌ Missing Supabase environment variables")
             return None
 
-        supabase = create_client(url, key)
+        supabase = supabase_pool.service_role_client()
 
         logger.info(f"🔍 Fetching training plan for user_profile_id: {user_profile_id}")
 
-        # Manual table-by-table approach since relational queries aren't working
-        logger.info("🔍 Fetching training plan manually table by table...")
+        # Fetch level by level with batched `in_()` filters (relational embeds aren't
+        # reliable here), so the whole tree costs a constant number of round-trips
+        # instead of one query per week/day/exercise
+        logger.info("🔍 Fetching training plan level by level...")
 
         # 1. Get training plan
-        training_plan_response = (
+        training_plan_response = await (
             supabase.table("training_plans")
             .select("*")
             .eq("user_profile_id", user_profile_id)
@@ -165,72 +253,55 @@ async def _fetch_complete_training_plan(user_profile_id: int) -> Dict[str, Any]:
         logger.info(f"✅ Found training plan: {training_plan['id']}")
 
         # 2. Get weekly schedules
-        weekly_schedules_response = (
-            supabase.table("weekly_schedules")
-            .select("*")
-            .eq("training_plan_id", training_plan["id"])
-            .execute()
+        weekly_schedules = await _fetch_rows_in(
+            supabase, "weekly_schedules", "training_plan_id", [training_plan["id"]]
         )
-        weekly_schedules = weekly_schedules_response.data or []
 
-        # 3. Get daily trainings for each week
-        for weekly_schedule in weekly_schedules:
-            daily_trainings_response = (
-                supabase.table("daily_training")
-                .select("*")
-                .eq("weekly_schedule_id", weekly_schedule["id"])
-                .execute()
-            )
-            daily_trainings = daily_trainings_response.data or []
-
-            # 4. Get strength exercises and endurance sessions for each daily training
-            for daily_training in daily_trainings:
-                if not daily_training["is_rest_day"]:
-                    # Get strength exercises (without exercise details first)
-                    strength_exercises_response = (
-                        supabase.table("strength_exercise")
-                        .select("*")
-                        .eq("daily_training_id", daily_training["id"])
-                        .execute()
-                    )
-                    strength_exercises = strength_exercises_response.data or []
-
-                    # Get exercise details for each strength exercise
-                    # Store as "exercises" (plural) to match Supabase relational query format
-                    # Frontend TrainingService expects se.exercises from Supabase queries
-                    for strength_exercise in strength_exercises:
-                        exercise_response = (
-                            supabase.table("exercises")
-                            .select("*")
-                            .eq("id", strength_exercise["exercise_id"])
-                            .single()
-                            .execute()
-                        )
-                        if exercise_response.data:
-                            strength_exercise["exercises"] = exercise_response.data  # Plural to match Supabase format
-                        else:
-                            strength_exercise["exercises"] = None
-
-                    # Store as strength_exercise (singular) to match Supabase relational query format
-                    # Frontend TrainingService expects this format from Supabase queries
-                    daily_training["strength_exercise"] = strength_exercises
-
-                    # Get endurance sessions
-                    endurance_sessions_response = (
-                        supabase.table("endurance_session")
-                        .select("*")
-                        .eq("daily_training_id", daily_training["id"])
-                        .execute()
-                    )
-                    # Store as endurance_session (singular) to match Supabase relational query format
-                    daily_training["endurance_session"] = (
-                        endurance_sessions_response.data or []
-                    )
-                else:
-                    daily_training["strength_exercise"] = []
-                    daily_training["endurance_session"] = []
+        # 3. Get daily trainings for all weeks at once
+        daily_trainings = await _fetch_rows_in(
+            supabase, "daily_training", "weekly_schedule_id",
+            [weekly_schedule["id"] for weekly_schedule in weekly_schedules],
+        )
+        active_day_ids = [
+            daily_training["id"]
+            for daily_training in daily_trainings
+            if not daily_training["is_rest_day"]
+        ]
+
+        # 4. Get strength exercises and endurance sessions for all training days at once
+        strength_exercises, endurance_sessions = await asyncio.gather(
+            _fetch_rows_in(supabase, "strength_exercise", "daily_training_id", active_day_ids),
+            _fetch_rows_in(supabase, "endurance_session", "daily_training_id", active_day_ids),
+        )
+
+        # 5. Get exercise details (in-memory catalog first, one batched query for the rest)
+        exercises_by_id = await _fetch_exercises_by_id(
+            supabase,
+            {se["exercise_id"] for se in strength_exercises if se.get("exercise_id") is not None},
+        )
+
+        # Assemble the tree in memory
+        # Store as "exercises" (plural) to match Supabase relational query format
+        # Frontend TrainingService expects se.exercises from Supabase queries
+        for strength_exercise in strength_exercises:
+            exercise = exercises_by_id.get(strength_exercise.get("exercise_id"))
+            strength_exercise["exercises"] = dict(exercise) if exercise else None  # Plural to match Supabase format
+
+        strength_by_day = _group_rows(strength_exercises, "daily_training_id")
+        endurance_by_day = _group_rows(endurance_sessions, "daily_training_id")
+        for daily_training in daily_trainings:
+            if not daily_training["is_rest_day"]:
+                # Store as strength_exercise / endurance_session (singular) to match Supabase
+                # relational query format - frontend TrainingService expects this format
+                daily_training["strength_exercise"] = strength_by_day.get(daily_training["id"], [])
+                daily_training["endurance_session"] = endurance_by_day.get(daily_training["id"], [])
+            else:
+                daily_training["strength_exercise"] = []
+                daily_training["endurance_session"] = []
 
-            weekly_schedule["daily_training"] = daily_trainings
+        daily_by_week = _group_rows(daily_trainings, "weekly_schedule_id")
+        for weekly_schedule in weekly_schedules:
+            weekly_schedule["daily_training"] = daily_by_week.get(weekly_schedule["id"], [])
 
         # Build complete response
         training_plan["weekly_schedules"] = weekly_schedules
@@ -250,9 +321,25 @@ router = APIRouter(prefix="/api/training", tags=["training"])
 # ============================================================================
 
 
+_training_coach: Optional[TrainingCoach] = None
+_training_coach_lock = threading.Lock()
+
+# In-flight /chat/stream handlers (kept referenced until they finish)
+_chat_stream_tasks: Set[asyncio.Task] = set()
+
 def get_training_coach() -> TrainingCoach:
-    """Get TrainingCoach instance with all capabilities."""
-    return TrainingCoach()
+    """
+    Get the shared TrainingCoach instance with all capabilities.
+
+    Built once per worker, so its components (RAG tool, exercise selector/validator,
+    reflector, curator, LLM clients) keep their connection pools and caches across requests.
+    """
+    global _training_coach
+    if _training_coach is None:
+        with _training_coach_lock:
+            if _training_coach is None:
+                _training_coach = TrainingCoach()
+    return _training_coach
 
 
 
@@ -286,12 +373,37 @@ async def safe_db_update(
         return {"success": False, "error": str(e)}
 
 
+async def _enqueue_follow_up(operation_name: str, enqueue_func, *args) -> None:
+    """Queue a non-critical background job; a queue failure is logged, not raised."""
+    try:
+        await enqueue_func(*args)
+        logger.info(f"✅ {operation_name}")
+    except Exception as e:
+        logger.error(f"❌ {operation_name} error: {str(e)}")
+
+
+def _flight_key(operation: str, user_id: str, request: Any) -> str:
+    """Single-flight key: operation + user + digest of the request body (JWT excluded)."""
+    body = request.model_dump_json(exclude={"jwt_token"})
+    return f"{operation}:{user_id}:{hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]}"
+
+
 @router.post("/initial-questions")
 async def get_initial_questions(
     request: InitialQuestionsRequest,
     coach: TrainingCoach = Depends(get_training_coach)
 ):
     """Generate initial personalized questions based on personal info and goal."""
+    # Concurrent retries of the same request share one generation
+    user_id = extract_user_id_from_jwt(request.jwt_token)
+    return await single_flight.do(
+        _flight_key("initial-questions", user_id, request),
+        lambda: _generate_initial_questions(request, coach),
+    )
+
+
+async def _generate_initial_questions(request: InitialQuestionsRequest, coach: TrainingCoach) -> Dict[str, Any]:
+    """Create the user profile, generate initial questions and store them."""
     try:
         logger.info(f"🚀 Generating initial questions for: {request.personal_info.goal_description}")
         
@@ -390,13 +502,17 @@ async def get_initial_questions(
  
 
 
-@router.post("/generate-plan")
-async def generate_training_plan(
+async def _run_plan_generation(
     request: PlanGenerationRequest,
-    background_tasks: BackgroundTasks,
-    coach: TrainingCoach = Depends(get_training_coach)
-):
-    """Generate the final training plan using initial questions and exercises."""
+    coach: TrainingCoach,
+    on_stage: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Shared implementation of /generate-plan and its job mode.
+    
+    Follow-up work (playbook, outline) is queued as durable background jobs;
+    on_stage(stage, data) receives progress events (job mode only).
+    """
     try:
         # === INPUT VALIDATION ===
         validate_plan_generation_request(request)
@@ -477,103 +593,6 @@ async def generate_training_plan(
             update={"user_id": user_id}
         )
         
-        async def build_initial_playbook_inner():
-            """Inner playbook generation logic with timeout protection."""
-            # extract initial analyses (may be sync or async)
-            if inspect.iscoroutinefunction(coach.extract_initial_lessons_from_onboarding):
-                initial_analyses = await coach.extract_initial_lessons_from_onboarding(
-                    personal_info=personal_info_with_user_id,
-                    formatted_initial_responses=formatted_initial_responses,
-                )
-            else:
-                initial_analyses = await asyncio.to_thread(
-                    coach.extract_initial_lessons_from_onboarding,
-                    personal_info_with_user_id,
-                    formatted_initial_responses,
-                )
-
-            if not initial_analyses or len(initial_analyses) == 0:
-                logger.warning("⚠️ (async) No initial lessons extracted - skipping playbook creation")
-                return
-
-            from core.base.schemas.playbook_schemas import UserPlaybook
-
-            empty_playbook = UserPlaybook(
-                user_id=user_id,
-                lessons=[],
-                total_lessons=0,
-            )
-
-            logger.info("📘 (async) Processing initial lessons through Curator...")
-            # process_batch_lessons may be sync or async (LLM wrappers sometimes sync)
-            if inspect.iscoroutinefunction(coach.curator.process_batch_lessons):
-                curated_playbook = await coach.curator.process_batch_lessons(
-                    analyses=initial_analyses,
-                    existing_playbook=empty_playbook,
-                    source_plan_id="onboarding",
-                )
-            else:
-                curated_playbook = await asyncio.to_thread(
-                    coach.curator.process_batch_lessons,
-                    initial_analyses,
-                    empty_playbook,
-                    "onboarding",
-                )
-
-            initial_playbook = coach.curator.update_playbook_from_curated(
-                updated_playbook=curated_playbook,
-                user_id=user_id,
-            )
-
-            if settings.PLAYBOOK_CONTEXT_MATCHING_ENABLED:
-                logger.info("📘 (async) Enriching lessons with knowledge base context...")
-                if inspect.iscoroutinefunction(coach.curator.enrich_lessons_with_context):
-                    initial_playbook = await coach.curator.enrich_lessons_with_context(
-                        playbook=initial_playbook,
-                        rag_service=coach.rag_service,
-                    )
-                else:
-                    initial_playbook = await asyncio.to_thread(
-                        coach.curator.enrich_lessons_with_context,
-                        initial_playbook,
-                        coach.rag_service,
-                    )
-            else:
-                logger.info("📘 (async) Playbook context enrichment disabled; skipping knowledge base matching.")
-
-            logger.info(
-                f"📘 (async) Curated initial playbook: {len(empty_playbook.lessons)} → {len(initial_playbook.lessons)} lessons (deduplicated)"
-            )
-
-            await safe_db_update(
-                "Store initial playbook",
-                db_service.update_user_profile,
-                user_id=user_id,
-                data={"user_playbook": initial_playbook.model_dump()},
-                jwt_token=request.jwt_token
-            )
-            logger.info("✅ (async) Playbook stored successfully")
-
-        async def build_initial_playbook_async():
-            """Run the playbook extraction/curation pipeline without blocking plan generation."""
-            try:
-                logger.info("📘 (async) START playbook generation")
-                
-                # Add timeout for playbook generation (5 minutes max)
-                try:
-                    await asyncio.wait_for(
-                        build_initial_playbook_inner(),
-                        timeout=300.0  # 5 minutes
-                    )
-                except asyncio.TimeoutError:
-                    logger.error("❌ (async) Playbook generation timed out after 5 minutes")
-                    return
-            except Exception as async_error:
-                logger.error(f"❌ (async) Playbook generation failed: {str(async_error)}", exc_info=True)
-        
-        # Register playbook generation as a background task (runs after response is sent)
-        background_tasks.add_task(build_initial_playbook_async)
-
         # === PHASE 1: Generate Week 1 (SYNCHRONOUS) ===
         try:
             result = await coach.generate_initial_training_plan(
@@ -581,6 +600,7 @@ async def generate_training_plan(
                 formatted_initial_responses=formatted_initial_responses,
                 user_profile_id=user_profile_id,
                 jwt_token=request.jwt_token,
+                on_stage=on_stage,
             )
         except Exception as gen_error:
             logger.error(f"❌ Training plan generation exception: {str(gen_error)}", exc_info=True)
@@ -640,6 +660,8 @@ async def generate_training_plan(
         training_plan_id = save_result.get("data", {}).get("training_plan_id")
         enriched_plan = save_result.get("data", {}).get("training_plan")
         logger.info(f"✅ Training plan saved (ID: {training_plan_id})")
+        if on_stage:
+            await on_stage("saved", {"training_plan_id": training_plan_id})
         
         # Set plan_accepted=False
         await safe_db_update(
@@ -651,54 +673,25 @@ async def generate_training_plan(
         )
         logger.info("✅ Set plan_accepted=False for new training plan")
         
-        # === PHASE 2: Background Tasks (ASYNCHRONOUS, PARALLEL) ===
-        async def build_plan_outline_async(plan_id: int):
-            """Generate future week outlines and append to weekly_schedules table."""
-            try:
-                logger.info("📘 (async) START outline generation")
-                
-                # _generate_future_week_outlines may be async or sync
-                if inspect.iscoroutinefunction(coach._generate_future_week_outlines):
-                    outline_payload = await coach._generate_future_week_outlines(
-                        personal_info=personal_info_with_user_id,
-                        formatted_initial_responses=formatted_initial_responses,
-                        existing_plan=training_plan_data,
-                        outline_weeks=12,
-                    )
-                else:
-                    outline_payload = await asyncio.to_thread(
-                        coach._generate_future_week_outlines,
-                        personal_info_with_user_id,
-                        formatted_initial_responses,
-                        training_plan_data,
-                        12,
-                    )
-                
-                # Append outline weeks (2-13) to weekly_schedules table
-                future_weeks = outline_payload.get("weekly_schedules", [])
-                if future_weeks:
-                    for week_data in future_weeks:
-                        week_data["training_plan_id"] = plan_id
-                        week_data["daily_trainings"] = []  # Outline only, no exercises
-                    
-                    result = await db_service.append_weekly_schedules(
-                        training_plan_id=plan_id,
-                        weekly_schedules=future_weeks,
-                        jwt_token=request.jwt_token,
-                    )
-                    
-                    if result.get("success"):
-                        logger.info(
-                            "✅ (async) Appended %s future week outlines to weekly_schedules",
-                            len(future_weeks),
-                        )
-                    else:
-                        logger.error(f"❌ (async) Failed to append outlines: {result.get('error')}")
-            except Exception as async_error:
-                logger.error(f"❌ (async) Plan outline generation failed: {async_error}", exc_info=True)
-        
-        # Register outline generation as a background task (runs after response is sent)
-        background_tasks.add_task(build_plan_outline_async, training_plan_id)
+        # === PHASE 2: Background Jobs (ASYNCHRONOUS, DURABLE) ===
+        # Keyed per plan, so a re-onboarded or regenerated plan gets its own playbook job
+        await _enqueue_follow_up(
+            "Queue initial playbook generation",
+            enqueue_initial_playbook,
+            user_id,
+            training_plan_id,
+            personal_info_with_user_id,
+            formatted_initial_responses,
+        )
+        await _enqueue_follow_up(
+            "Queue future week outline generation",
+            enqueue_plan_outline,
+            user_id,
+            training_plan_id,
+            personal_info_with_user_id,
+            formatted_initial_responses,
+            training_plan_data,
+        )
         
         # Get completion message from result (generated during plan creation)
         completion_message = result.get("completion_message")
@@ -748,6 +741,136 @@ async def generate_training_plan(
         raise HTTPException(status_code=500, detail=f"Failed to generate training plan: {str(e)}")
 
 
+
+
+
+def _authorize_plan_request(request: PlanGenerationRequest) -> str:
+    """Validate a plan generation request up front; returns the user_id from the JWT."""
+    validate_plan_generation_request(request)
+    if not request.user_profile_id:
+        raise HTTPException(status_code=400, detail="Missing user_profile_id in request")
+    try:
+        return extract_user_id_from_jwt(request.jwt_token)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired authentication token")
+
+
+def _plan_flight_key(user_id: str, request: PlanGenerationRequest) -> str:
+    """Single-flight key for plan generation (one plan per user profile, sync and job mode alike)."""
+    return f"generate-plan:{user_id}:{request.user_profile_id}"
+
+
+def _bearer_token(authorization: Optional[str]) -> str:
+    """JWT from an `Authorization: Bearer <token>` header."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+    return token.strip()
+
+
+async def _get_owned_plan_job(job_id: str, authorization: Optional[str]) -> PlanJob:
+    """Look up a plan job and check it belongs to the caller."""
+    user_id = extract_user_id_from_jwt(_bearer_token(authorization))
+    job = await plan_jobs.get(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Plan generation job not found")
+    return job
+
+
+@router.post("/generate-plan")
+async def generate_training_plan(
+    request: PlanGenerationRequest,
+    coach: TrainingCoach = Depends(get_training_coach)
+):
+    """Generate the final training plan using initial questions and exercises."""
+    user_id = _authorize_plan_request(request)
+    return await single_flight.do(
+        _plan_flight_key(user_id, request),
+        lambda: _run_plan_generation(request, coach),
+    )
+
+
+@router.post("/generate-plan/jobs", status_code=202)
+async def start_plan_generation_job(
+    request: PlanGenerationRequest,
+    coach: TrainingCoach = Depends(get_training_coach)
+):
+    """
+    Job mode of /generate-plan: returns a job id immediately and generates in the background.
+    
+    Follow progress via GET /generate-plan/jobs/{job_id} (polling) or
+    GET /generate-plan/jobs/{job_id}/events (Server-Sent Events). The final result has the
+    same shape as the /generate-plan response.
+    """
+    user_id = _authorize_plan_request(request)
+
+    def to_error(e: Exception) -> Dict[str, Any]:
+        if isinstance(e, HTTPException):
+            return {"status_code": e.status_code, "detail": e.detail}
+        return {"status_code": 500, "detail": f"Failed to generate training plan: {str(e)}"}
+
+    flight_key = _plan_flight_key(user_id, request)
+    job = await plan_jobs.start(
+        user_id,
+        lambda on_stage: single_flight.do(
+            flight_key,
+            lambda: _run_plan_generation(request, coach, on_stage=on_stage),
+        ),
+        to_error,
+        key=flight_key,
+    )
+    return {
+        "success": True,
+        "data": {"job_id": job.id, "status": job.status},
+        "message": "Training plan generation started",
+    }
+
+
+@router.get("/generate-plan/jobs/{job_id}")
+async def get_plan_generation_job(job_id: str, authorization: Optional[str] = Header(None)):
+    """Poll a plan generation job (status, stage events, and the result once completed)."""
+    job = await _get_owned_plan_job(job_id, authorization)
+    return {"success": True, "data": job.snapshot()}
+
+
+@router.get("/generate-plan/jobs/{job_id}/events")
+async def stream_plan_generation_job(job_id: str, authorization: Optional[str] = Header(None)):
+    """
+    Server-Sent Events for a plan generation job.
+    
+    Sends one `stage` event per stage (already reached stages are replayed), then
+    `completed` (result) or `failed` (error). Keep-alive comments are sent while waiting.
+    """
+    job = await _get_owned_plan_job(job_id, authorization)
+
+    async def events():
+        current = job
+        sent = 0
+        while True:
+            for stage in current.stages[sent:]:
+                yield format_sse("stage", stage)
+            sent = len(current.stages)
+            if current.finished:
+                if current.status == "completed":
+                    yield format_sse("completed", current.result)
+                else:
+                    yield format_sse("failed", current.error)
+                return
+            changed = await plan_jobs.wait_for_change(current, timeout=15.0)
+            if changed is None:
+                yield ": keep-alive\n\n"
+            else:
+                current = changed
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/playbook/{user_id_param}")
 async def get_user_playbook(
     user_id_param: str,
@@ -862,8 +985,16 @@ async def get_playbook_stats(
         }
 
 
-def _create_plan_response(training_plan: Any, ai_message: str, context: str = "") -> Dict[str, Any]:
-    """Helper to create plan_response with ai_message for various intents."""
+def _create_plan_response(
+    training_plan: Any, ai_message: str, context: str = "", include_plan: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Helper to create plan_response with ai_message for various intents.
+    
+    include_plan=False (plan_version requests: the client already has the plan) returns None.
+    """
+    if not include_plan:
+        return None
     logger.info(f"🔄 [{context}] Creating plan_response from training_plan (type: {type(training_plan)})")
     plan_response = copy.deepcopy(training_plan) if isinstance(training_plan, dict) else dict(training_plan or {})
     if isinstance(plan_response, dict) and ai_message:
@@ -871,6 +1002,138 @@ def _create_plan_response(training_plan: Any, ai_message: str, context: str = ""
     return plan_response
 
 
+def _plan_owner(jwt_token: Optional[str]) -> Optional[str]:
+    """User ID to save plan snapshots under; None when the token cannot be verified (no snapshot is saved)."""
+    try:
+        return extract_user_id_from_jwt(jwt_token) if jwt_token else None
+    except Exception:
+        return None
+
+
+async def _resolve_plan_snapshot(
+    plan_id: Optional[int],
+    plan_version: Optional[str],
+    week_updates: Optional[List[Dict[str, Any]]],
+    playbook: Optional[Dict[str, Any]],
+    jwt_token: str,
+) -> PlanSnapshot:
+    """
+    Resolve the plan of a request that sent plan_version instead of training_plan.
+    
+    Week updates (and a playbook, if sent) are applied on top of the snapshot and
+    saved as a new version.
+    
+    Returns:
+        PlanSnapshot whose training_plan is a copy the request may modify, with the
+        version the client should send next
+    
+    Raises:
+        HTTPException 400 without plan_id/plan_version, 401 for an invalid token,
+        409 when plan_version is not the plan's current version (resend the full plan)
+    """
+    if plan_id is None or not plan_version:
+        raise HTTPException(status_code=400, detail="Send training_plan, or plan_id and plan_version")
+    owner = extract_user_id_from_jwt(jwt_token)
+    snapshot = await plan_snapshots.aresolve(plan_id, owner, plan_version)
+    if snapshot is None:
+        logger.info(f"📸 Plan version {plan_version} is not current for plan {plan_id} - client must resend the plan")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Plan version {plan_version} is not current for plan {plan_id}; resend the full training_plan",
+        )
+    training_plan, version = snapshot.training_plan, snapshot.version
+    if week_updates or playbook is not None:
+        training_plan = merge_weeks(training_plan, week_updates or [])
+        version = await plan_snapshots.asave(plan_id, owner, training_plan, playbook) or version
+    logger.info(f"📸 Resolved plan {plan_id} from snapshot {plan_version} ({len(week_updates or [])} week updates)")
+    return PlanSnapshot(
+        plan_id, version, owner, detach_plan(training_plan), playbook if playbook is not None else snapshot.playbook
+    )
+
+
+def _start_speculative_update(
+    request: PlanFeedbackRequest,
+    coach: TrainingCoach,
+    week_number: int,
+    current_week: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Start Stage 2 (update_weekly_schedule) alongside the intent classification (opt-in).
+    
+    Only for messages that look like concrete change requests and requests that
+    carry everything the update needs; the classification decides whether the
+    result is kept.
+    
+    Returns:
+        Dict with the "task", its "call_info" (token accounting) and "started_at", or None
+    """
+    if not settings.SPECULATIVE_PLAN_UPDATES or not looks_like_plan_change(request.feedback_message):
+        return None
+    try:
+        user_profile_id = int(request.user_profile_id)
+        user_playbook = UserPlaybook(**request.playbook) if request.playbook else None
+    except Exception:
+        return None
+    if user_playbook is None or request.personal_info is None:
+        return None
+
+    # Its latency events are held back until the classification resolves it
+    call_info: Dict[str, Any] = {"speculative": True}
+    task = asyncio.create_task(coach.update_weekly_schedule(
+        personal_info=request.personal_info,
+        feedback_message=request.feedback_message,
+        week_number=week_number,
+        current_week=current_week,
+        user_profile_id=user_profile_id,
+        user_playbook=user_playbook,
+        jwt_token=request.jwt_token,
+        conversation_history=request.conversation_history or [],
+        call_info=call_info,
+    ))
+    speculation = {"task": task, "call_info": call_info, "started_at": time.time(), "finished_at": None}
+
+    def finished(t: asyncio.Task) -> None:
+        speculation["finished_at"] = time.time()
+        # Don't warn about the exception of a discarded speculation
+        t.cancelled() or t.exception()
+
+    task.add_done_callback(finished)
+    plan_update_speculation.record_launch()
+    logger.info(f"🔮 Speculatively updating Week {week_number} while classifying intent")
+    return speculation
+
+
+async def _keep_speculative_update(speculation: Dict[str, Any], classified_at: float) -> Dict[str, Any]:
+    """Keep a speculative update the classification asked for and return its result."""
+    for event, duration, completion in keep_speculation(speculation["call_info"]):
+        await db_service.log_latency_event(event, duration, completion)
+    plan_update_speculation.record_kept()
+    # Time saved over running the update after the classification: how long both ran concurrently
+    overlap_end = min(classified_at, speculation["finished_at"] or classified_at)
+    await db_service.log_latency_event(
+        "plan_update_speculation_kept", max(overlap_end - speculation["started_at"], 0.0)
+    )
+    logger.info(f"🔮 Keeping speculative week update (stats: {plan_update_speculation.stats()})")
+    return await speculation["task"]
+
+
+async def _discard_speculative_update(speculation: Dict[str, Any]) -> None:
+    """Cancel a speculative update the classification did not ask for and record the waste."""
+    task = speculation["task"]
+    task.cancel()
+    call_info = speculation["call_info"]
+    wasted_tokens = plan_update_speculation.record_discarded(call_info)
+    logger.info(
+        f"🔮 Discarded speculative week update ({wasted_tokens} tokens wasted; "
+        f"stats: {plan_update_speculation.stats()})"
+    )
+    await db_service.log_latency_event(
+        "plan_update_speculation_discarded",
+        time.time() - speculation["started_at"],
+        discarded_completion(call_info),
+    )
+
+
 async def _handle_playbook_extraction_for_satisfied(
     user_id: str,
     request: PlanFeedbackRequest,
@@ -973,35 +1236,21 @@ async def _handle_playbook_extraction_for_satisfied(
     return updated_playbook
 
 
-@router.post("/chat", response_model=PlanFeedbackResponse)
-async def chat(
+async def _handle_chat(
     request: PlanFeedbackRequest,
-    coach: TrainingCoach = Depends(get_training_coach)
-):
+    coach: TrainingCoach,
+    on_message_delta: Optional[Callable[[str], None]] = None
+) -> PlanFeedbackResponse:
     """
-    Multi-purpose training chat endpoint that handles various user intents.
-    
-    This endpoint intelligently classifies user intent and responds accordingly:
-    - **Questions/Clarity**: Returns AI response without plan updates
-    - **Plan Updates**: Updates the latest week based on feedback and returns updated plan
-    - **Satisfaction**: Marks plan as accepted and navigates to main app
-    - **Unclear**: Asks for clarification
-    
-    The endpoint automatically determines the appropriate action based on the user's message
-    and conversation history. It can update ONLY the latest week (highest week_number) when needed,
-    but always returns the full TrainingPlan structure.
+    Shared implementation of /chat and /chat/stream.
     
-    Request includes:
-    - feedback_message: User message/feedback (required)
-    - training_plan: Full training plan data (required)
-    - plan_id: Training plan ID (required)
-    - conversation_history: Previous conversation messages for context (optional, default: [])
-    - user_profile_id: User profile ID (optional, can be resolved from JWT)
-    - jwt_token: JWT token for authentication (required)
+    on_message_delta receives ai_message text while the intent classification is
+    still being generated (respond_only / unclear / satisfied replies only).
     
-    Uses user_playbook instead of initial/follow-up questions/responses.
-    week_number is automatically derived from training_plan (latest week = max week_number).
+    With SPECULATIVE_PLAN_UPDATES, Stage 2 may already run during Stage 1; it is
+    cancelled on every path that does not update the plan.
     """
+    speculation = None
     try:
         # Initialize updated_playbook to track playbook updates
         updated_playbook = None
@@ -1010,9 +1259,6 @@ async def chat(
         if not request.jwt_token:
             raise HTTPException(status_code=401, detail="Missing JWT token")
 
-        # Get training plan
-        training_plan = request.training_plan
-        
         # Get plan_id from request (required)
         try:
             plan_id = int(request.plan_id) if request.plan_id is not None else None
@@ -1021,6 +1267,19 @@ async def chat(
         
         if plan_id is None:
             raise HTTPException(status_code=400, detail="Missing or invalid plan_id in request")
+
+        # Get training plan: sent in full, or resolved from the server snapshot (plan_version + week_updates)
+        from_snapshot = request.training_plan is None
+        if from_snapshot:
+            snapshot = await _resolve_plan_snapshot(
+                plan_id, request.plan_version, request.week_updates, request.playbook, request.jwt_token
+            )
+            request = request.model_copy(update={"training_plan": snapshot.training_plan, "playbook": snapshot.playbook})
+            plan_owner, plan_version = snapshot.owner, snapshot.version
+        else:
+            plan_owner = _plan_owner(request.jwt_token)
+            plan_version = await plan_snapshots.asave(plan_id, plan_owner, request.training_plan, request.playbook)
+        training_plan = request.training_plan
         
         # Get week_number from request (required - should be the current week from frontend)
         week_number = request.week_number
@@ -1048,14 +1307,20 @@ async def chat(
         feedback_message = request.feedback_message
         conversation_history = request.conversation_history or []
 
+        speculation = _start_speculative_update(request, coach, week_number, current_week)
+
         # STAGE 1: Lightweight intent classification (FAST: 2-3s)
         # Include training plan so AI can answer questions about it
         logger.info("🔍 Stage 1: Classifying feedback intent (lightweight)...")
         classification_result = await coach.classify_feedback_intent_lightweight(
             feedback_message=feedback_message,
             conversation_history=conversation_history,
-            training_plan=training_plan  # Include plan for answering questions
+            training_plan=training_plan,  # Include plan for answering questions
+            on_message_delta=on_message_delta,
+            # Full requests mint a new version every turn: only a resolved one can hit the summary cache
+            plan_version=plan_version if from_snapshot else None,
         )
+        classified_at = time.time()
         
         intent = classification_result.get("intent")
         action = classification_result.get("action")
@@ -1093,9 +1358,12 @@ async def chat(
                 user_id, request, training_plan, conversation_history, coach
             )
             
+            if updated_playbook:
+                plan_version = await plan_snapshots.asave(plan_id, plan_owner, training_plan, updated_playbook) or plan_version
+            
             # Return response with navigate_to_main_app=True
             ai_message = ai_message or "Amazing! You're all set. I'll take you to your main dashboard now. 🚀"
-            plan_response = _create_plan_response(training_plan, ai_message, "satisfied")
+            plan_response = _create_plan_response(training_plan, ai_message, "satisfied", not from_snapshot)
             
             return PlanFeedbackResponse(
                 success=True,
@@ -1103,7 +1371,8 @@ async def chat(
                 plan_updated=False,
                 updated_plan=plan_response,
                 updated_playbook=updated_playbook,
-                navigate_to_main_app=True
+                navigate_to_main_app=True,
+                plan_version=plan_version
             )
         
         # INTENT 2: Respond only (no plan update, just return AI message)
@@ -1111,42 +1380,45 @@ async def chat(
         if is_respond_only:
             logger.info(f"💬 INTENT: Respond only (no plan update)")
             ai_message = ai_message or "Got it! Let me know if you'd like to make any changes. 💪"
-            plan_response = _create_plan_response(training_plan, ai_message, "respond_only")
+            plan_response = _create_plan_response(training_plan, ai_message, "respond_only", not from_snapshot)
             return PlanFeedbackResponse(
                 success=True,
                 ai_response=ai_message,
                 plan_updated=False,
                 updated_plan=plan_response,
                 updated_playbook=None,
-                navigate_to_main_app=False
+                navigate_to_main_app=False,
+                plan_version=plan_version
             )
         
         # INTENT 3: Unclear (ask for clarification)
         if intent == "unclear":
             logger.info(f"❓ INTENT: Unclear (asking for clarification)")
             ai_message = ai_message or "I'm having trouble understanding your feedback. Could you please be more specific about what you'd like to change or know? 😊"
-            plan_response = _create_plan_response(training_plan, ai_message, "unclear")
+            plan_response = _create_plan_response(training_plan, ai_message, "unclear", not from_snapshot)
             return PlanFeedbackResponse(
                 success=True,
                 ai_response=ai_message,
                 plan_updated=False,
                 updated_plan=plan_response,
                 updated_playbook=None,
-                navigate_to_main_app=False
+                navigate_to_main_app=False,
+                plan_version=plan_version
             )
         
         # INTENT 4: Fallback (no plan update needed but reached here)
         if not needs_plan_update:
             logger.info("⚠️ INTENT: Fallback (no plan update needed)")
             ai_message = ai_message or "Got it! Let me know if you'd like to make any changes. 💪"
-            plan_response = _create_plan_response(training_plan, ai_message, "fallback")
+            plan_response = _create_plan_response(training_plan, ai_message, "fallback", not from_snapshot)
             return PlanFeedbackResponse(
                 success=True,
                 ai_response=ai_message,
                 plan_updated=False,
                 updated_plan=plan_response,
                 updated_playbook=None,
-                navigate_to_main_app=False
+                navigate_to_main_app=False,
+                plan_version=plan_version
             )
         
         # INTENT 5: Update plan (needs_plan_update=True)
@@ -1195,16 +1467,21 @@ async def chat(
 
         # Update the week using the new method (uses user_playbook instead of onboarding responses)
         # Only the current week is processed and returned
-        result = await coach.update_weekly_schedule(
-            personal_info=personal_info,
-            feedback_message=feedback_message,
-            week_number=week_number,
-            current_week=current_week,
-            user_profile_id=user_profile_id,
-            user_playbook=user_playbook,
-            jwt_token=request.jwt_token,
-            conversation_history=conversation_history,
-        )
+        if speculation is not None:
+            # Started during classification with the same inputs: keep it
+            kept, speculation = speculation, None
+            result = await _keep_speculative_update(kept, classified_at)
+        else:
+            result = await coach.update_weekly_schedule(
+                personal_info=personal_info,
+                feedback_message=feedback_message,
+                week_number=week_number,
+                current_week=current_week,
+                user_profile_id=user_profile_id,
+                user_playbook=user_playbook,
+                jwt_token=request.jwt_token,
+                conversation_history=conversation_history,
+            )
 
         if not result.get("success"):
             logger.error(f"Week update failed: {result.get('error')}")
@@ -1247,6 +1524,9 @@ async def chat(
             raise Exception("Failed to update week in database")
         
         logger.info(f"✅ Week {week_number} updated in database successfully")
+        plan_version = await plan_snapshots.asave(
+            plan_id, user_id or plan_owner, merge_weeks(training_plan, [enriched_week])
+        ) or plan_version
         
         # Return only the enriched week (frontend will merge it back into the full plan)
         # Include plan id for consistency and fallback path compatibility
@@ -1270,7 +1550,8 @@ async def chat(
             plan_updated=True,
             updated_plan=enriched_plan,  # Contains only the updated week
             updated_playbook=updated_playbook,
-            navigate_to_main_app=False
+            navigate_to_main_app=False,
+            plan_version=plan_version
         )
         
     except HTTPException:
@@ -1285,6 +1566,91 @@ async def chat(
             updated_playbook=None,
             error=str(e)
         )
+    finally:
+        if speculation is not None:
+            await _discard_speculative_update(speculation)
+
+
+@router.post("/chat", response_model=PlanFeedbackResponse)
+async def chat(
+    request: PlanFeedbackRequest,
+    coach: TrainingCoach = Depends(get_training_coach)
+):
+    """
+    Multi-purpose training chat endpoint that handles various user intents.
+    
+    This endpoint intelligently classifies user intent and responds accordingly:
+    - **Questions/Clarity**: Returns AI response without plan updates
+    - **Plan Updates**: Updates the latest week based on feedback and returns updated plan
+    - **Satisfaction**: Marks plan as accepted and navigates to main app
+    - **Unclear**: Asks for clarification
+    
+    The endpoint automatically determines the appropriate action based on the user's message
+    and conversation history. It can update ONLY the latest week (highest week_number) when needed,
+    but always returns the full TrainingPlan structure.
+    
+    Request includes:
+    - feedback_message: User message/feedback (required)
+    - training_plan: Full training plan data (required unless plan_version is sent)
+    - plan_version: Version token from the previous response; replaces training_plan (and playbook),
+      with week_updates carrying the weeks changed since. 409 when the version is not current.
+    - plan_id: Training plan ID (required)
+    - conversation_history: Previous conversation messages for context (optional, default: [])
+    - user_profile_id: User profile ID (optional, can be resolved from JWT)
+    - jwt_token: JWT token for authentication (required)
+    
+    Uses user_playbook instead of initial/follow-up questions/responses.
+    week_number is automatically derived from training_plan (latest week = max week_number).
+    """
+    return await _handle_chat(request, coach)
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: PlanFeedbackRequest,
+    coach: TrainingCoach = Depends(get_training_coach)
+):
+    """
+    Server-Sent-Events variant of /chat (opt-in, same request body).
+    
+    Events:
+    - message_delta: {"text": ...} - ai_message text as it is generated, sent only
+      for replies that don't update the plan (respond_only, unclear, satisfied)
+    - result: the PlanFeedbackResponse (authoritative; ai_response is the full message)
+    - error: {"status_code": ..., "detail": ...} for request errors (HTTP 4xx/5xx in /chat)
+    """
+    deltas: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_handle_chat(request, coach, on_message_delta=deltas.put_nowait))
+    # Keep a reference so a client disconnect doesn't let the task be garbage collected
+    _chat_stream_tasks.add(task)
+    task.add_done_callback(_chat_stream_tasks.discard)
+
+    async def events():
+        while True:
+            next_delta = asyncio.ensure_future(deltas.get())
+            done, _ = await asyncio.wait({next_delta, task}, return_when=asyncio.FIRST_COMPLETED)
+            if next_delta in done:
+                yield format_sse("message_delta", {"text": next_delta.result()})
+                continue
+            next_delta.cancel()
+            break
+        while not deltas.empty():
+            yield format_sse("message_delta", {"text": deltas.get_nowait()})
+
+        try:
+            response = task.result()
+            yield format_sse("result", response.model_dump())
+        except HTTPException as e:
+            yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Error in streamed chat: {e}")
+            yield format_sse("error", {"status_code": 500, "detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/create-week")
@@ -1299,7 +1665,8 @@ async def create_week(
     with the new week added to the existing plan.
     
     Request should include:
-    - training_plan: Full training plan data (required)
+    - training_plan: Full training plan data (required unless plan_id + plan_version are sent)
+    - plan_version / week_updates: Server snapshot version and the weeks changed since (409 when not current)
     - user_profile_id: User profile ID (required, from frontend)
     - personal_info: User personal information (required, from frontend)
     - plan_id: Training plan ID (optional, derived from training_plan if not provided)
@@ -1316,6 +1683,14 @@ async def create_week(
         
         logger.info(f"📥 Creating new week for user {user_profile_id}, plan {request.plan_id}")
         
+        # Resolve the plan from the server snapshot when only its version was sent
+        plan_owner = None
+        if training_plan is None:
+            snapshot = await _resolve_plan_snapshot(
+                request.plan_id, request.plan_version, request.week_updates, None, jwt_token
+            )
+            training_plan, plan_owner = snapshot.training_plan, snapshot.owner
+        
         # Get plan_id from request or derive from training_plan
         plan_id = request.plan_id
         if plan_id is None:
@@ -1415,11 +1790,16 @@ async def create_week(
             
             logger.info("✅ Using enriched training plan with new week (IDs present)")
 
+            # The previous week was just completed: refresh its insights aggregates
+            plan_version = await plan_snapshots.asave(plan_id, plan_owner or _plan_owner(jwt_token), enriched_plan)
+            await asyncio.to_thread(insights_metrics.sync_plan, {**enriched_plan, "id": plan_id}, plan_version)
+
             return {
                 "success": True,
                 "data": enriched_plan,
                 "message": f"Week {next_week_number} created successfully",
                 "metadata": result.get("metadata", {}),
+                "plan_version": plan_version,
             }
         else:
             # Return the plan even if DB update fails (shouldn't happen)
@@ -1445,18 +1825,43 @@ async def get_insights_summary(
     """
     Generate simplified, actionable insights summary with AI enhancement.
     
+    The plan is sent in full, or as plan_id + plan_version (+ week_updates) on top of
+    the server snapshot; the response's plan_version is the one to send next time.
+    
     Returns:
     - AI-generated summary (2-3 sentences)
     - Findings (2-3 observations from training data)
     - Recommendations (2-3 actionable next steps)
     - Simple metrics (volume progress, recovery, weak points, top exercises)
     """
+    # Concurrent retries of the same request share one summary
+    user_id = extract_user_id_from_jwt(request.jwt_token)
+    return await single_flight.do(
+        _flight_key("insights-summary", user_id, request),
+        lambda: _generate_insights_summary(request, coach),
+        decode=InsightsSummaryResponse.model_validate,
+    )
+
+
+async def _generate_insights_summary(
+    request: InsightsSummaryRequest, coach: TrainingCoach
+) -> InsightsSummaryResponse:
+    """Compute insights metrics and the (cached) AI summary for a training plan."""
     try:
         # Extract and validate JWT token
         user_id = extract_user_id_from_jwt(request.jwt_token)
         
-        # Get training plan (use provided or fetch from database)
+        # Get training plan (provided, resolved from its server snapshot, or fetched from database)
         training_plan = request.training_plan
+        plan_version = base_version = None
+        if not training_plan and request.plan_version:
+            snapshot = await _resolve_plan_snapshot(
+                request.plan_id, request.plan_version, request.week_updates, None, request.jwt_token
+            )
+            training_plan = {**snapshot.training_plan, "id": snapshot.plan_id}
+            plan_version, base_version = snapshot.version, request.plan_version
+        elif training_plan and training_plan.get("id") is not None:
+            plan_version = await plan_snapshots.asave(training_plan["id"], user_id, training_plan)
         if not training_plan:
             # Fetch from database
             training_plan = await _fetch_complete_training_plan(request.user_profile_id)
@@ -1466,13 +1871,16 @@ async def get_insights_summary(
                     error="No training plan found"
                 )
         
-        # Map scheduled dates to daily trainings (needed for accurate frequency calculation)
-        training_plan = map_daily_training_dates(training_plan)
+        # Per-week aggregates; nothing is summarized again when the plan version was already synced
+        plan_metrics = await asyncio.to_thread(
+            insights_metrics.sync_plan, training_plan, plan_version, base_version, request.week_updates
+        )
+        weeks = plan_metrics["weeks"]
         
         # Extract simple metrics (volume, frequency, training intensity)
-        volume_progress = InsightsService.extract_volume_progress(training_plan)
-        training_frequency = InsightsService.extract_training_frequency(training_plan)
-        training_intensity, intensity_trend = InsightsService.extract_training_intensity(training_plan)
+        volume_progress = InsightsService.volume_progress_from_weeks(weeks)
+        training_frequency = InsightsService.training_frequency_from_weeks(weeks, plan_metrics["created_at"])
+        training_intensity, intensity_trend = InsightsService.training_intensity_from_weeks(weeks)
         
         # Use provided weak_points/top_exercises from frontend (frontend calculates these)
         # If not provided, use empty lists (AI can still generate good summary with volume/frequency/intensity)
@@ -1492,8 +1900,13 @@ async def get_insights_summary(
             "top_exercises": top_exercises_dict
         }
         
-        # Calculate data hash for cache invalidation
-        current_data_hash = InsightsService.calculate_data_hash(metrics_dict)
+        # Calculate data hash for cache invalidation (the plan's metrics version when it is stored)
+        if plan_metrics["version"] is not None:
+            current_data_hash = InsightsService.calculate_version_hash(
+                plan_metrics["plan_id"], plan_metrics["version"], metrics_dict
+            )
+        else:
+            current_data_hash = InsightsService.calculate_data_hash(metrics_dict)
         
         # Check cache first
         cached_summary = await db_service.get_insights_summary_cache(request.user_profile_id)
@@ -1522,10 +1935,11 @@ async def get_insights_summary(
                 prompt = PromptGenerator.generate_insights_summary_prompt(metrics_dict)
                 
                 # Use lightweight model for fast response
-                ai_summary, completion = coach.llm.chat_parse(
+                ai_summary, completion = await coach.llm.aparse_structured(
                     prompt,
                     AIInsightsSummary,
-                    model_type="lightweight"
+                    model_type="lightweight",
+                    cache_ttl=INSIGHTS_SUMMARY_CACHE_TTL_SECONDS,
                 )
                 
                 logger.info(f"✅ Generated new insights summary (tokens: {completion.usage.total_tokens if hasattr(completion, 'usage') else 'N/A'})")
@@ -1591,7 +2005,8 @@ async def get_insights_summary(
         return InsightsSummaryResponse(
             success=True,
             summary=ai_summary,
-            metrics=metrics
+            metrics=metrics,
+            plan_version=plan_version
         )
         
     except HTTPException:
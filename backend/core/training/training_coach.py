@@ -3,11 +3,13 @@ Enhanced training Coach Agent with AI Question Generation and Training Plan Crea
 Includes ACE (Adaptive Context Engine) pattern for personalized learning
 """
 
+import asyncio
 import os
 import json
 import openai
 import time
-from typing import List, Dict, Any, Optional, Tuple
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from core.base.base_agent import BaseAgent
@@ -29,9 +31,11 @@ from core.training.schemas.training_schemas import (
     MainMuscleEnum,
     EquipmentEnum,
     ModalityDecision,
+    TrainingPlanWithModalities,
 )
 from core.training.helpers.exercise_selector import ExerciseSelector
 from core.training.helpers.exercise_validator import ExerciseValidator
+from core.training.helpers.exercise_catalog import exercise_catalog
 from core.training.helpers.database_service import db_service
 from core.training.helpers.models import (
     GenerateTrainingRequest,
@@ -49,7 +53,10 @@ from core.training.schemas.question_schemas import (
 )
 from core.training.helpers.response_formatter import ResponseFormatter
 from core.training.helpers.prompt_generator import PromptGenerator
-from core.training.helpers.question_checklist_loader import merge_question_checklists
+from core.training.helpers.prompt_budget import count_tokens
+from core.training.helpers.plan_update_speculation import defer_event
+from core.training.helpers.question_checklist_loader import guess_athlete_type, merge_question_checklists
+from core.training.helpers.stream_utils import JsonStringFieldStream
 from core.training.helpers.mock_data import (
     create_mock_initial_questions,
     create_mock_training_plan,
@@ -69,11 +76,26 @@ from core.base.reflector import Reflector, ReflectorAnalysisList
 from core.base.curator import Curator
 from core.training.helpers.llm_client import LLMClient
 
+# Modality rationale of the current request. The coach is shared across concurrent
+# requests, so this must not live on the instance.
+_modality_rationale: ContextVar[Optional[str]] = ContextVar("modality_rationale", default=None)
+
+# LLM response cache TTLs for prompts that are pure functions of their input
+# (common onboarding goals repeat across users)
+ATHLETE_TYPE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+MODALITY_SELECTION_CACHE_TTL_SECONDS = 24 * 3600
+
+# Equipment values (lowercase, without spaces) that a bodyweight-only session can use
+_BODYWEIGHT_EQUIPMENT = {"bodyweight", "isometric", "plyometric", "self-assisted"}
+
 
 class TrainingCoach(BaseAgent):
     """
     Enhanced training Coach that provides AI-generated questions and training plans.
     Includes ACE (Adaptive Context Engine) for personalized learning from feedback.
+
+    One instance is shared per worker (see training_api.get_training_coach), so
+    per-request state must not be stored on the instance.
     """
 
     def __init__(self):
@@ -86,8 +108,6 @@ class TrainingCoach(BaseAgent):
             topic="training",  # This automatically filters documents by topic
         )
 
-        self.last_modality_rationale: Optional[str] = None
-
         # Initialize RAG tool for training-specific knowledge retrieval
         self.rag_service = RAGTool(self)
 
@@ -102,6 +122,15 @@ class TrainingCoach(BaseAgent):
         # Unified LLM client (supports OpenAI, Gemini, Claude, etc. via Instructor)
         self.llm = LLMClient()
 
+    @property
+    def last_modality_rationale(self) -> Optional[str]:
+        """Rationale of the most recent modality decision in the current request."""
+        return _modality_rationale.get()
+
+    @last_modality_rationale.setter
+    def last_modality_rationale(self, value: Optional[str]) -> None:
+        _modality_rationale.set(value)
+
     def _get_capabilities(self) -> List[str]:
         """Get the agent's capabilities."""
         return [
@@ -262,10 +291,13 @@ class TrainingCoach(BaseAgent):
         personal_info: PersonalInfo,
         user_playbook=None,
         formatted_initial_responses: Optional[str] = None,
+        call_info: Optional[Dict[str, Any]] = None,
     ) -> Tuple[bool, bool, bool]:
         """
         Lightweight LLM call to decide whether to include bodyweight strength, equipment strength, and endurance modalities.
         Falls back to bodyweight strength + endurance on failure.
+
+        call_info (see update_weekly_schedule) receives the "modality_completion".
         """
         self.last_modality_rationale = None
         prompt = PromptGenerator.generate_modality_selection_prompt(
@@ -276,13 +308,17 @@ class TrainingCoach(BaseAgent):
 
         try:
             ai_start = time.time()
-            decision, completion = self.llm.parse_structured(
+            decision, completion = await self.llm.aparse_structured(
                 prompt,
                 ModalityDecision,
                 model_type="lightweight",
+                cache_ttl=MODALITY_SELECTION_CACHE_TTL_SECONDS,
             )
             duration = time.time() - ai_start
-            await db_service.log_latency_event("modality_selection", duration, completion)
+            if call_info is not None:
+                call_info["modality_completion"] = completion
+            if not defer_event(call_info, "modality_selection", duration, completion):
+                await db_service.log_latency_event("modality_selection", duration, completion)
 
             rationale = (decision.rationale or "").strip()
             if not rationale:
@@ -317,6 +353,92 @@ class TrainingCoach(BaseAgent):
             self.last_modality_rationale = "Fallback: include bodyweight strength + endurance due to decision error"
             return True, False, True
 
+    def _likely_equipment(self, formatted_initial_responses: Optional[str]) -> Optional[List[str]]:
+        """
+        Guess which catalog equipment values the plan will use from the onboarding answers.
+
+        Returns None (every equipment group) when a gym is mentioned or nothing specific is found.
+        """
+        text = (formatted_initial_responses or "").lower().replace(" ", "")
+        if not text or "gym" in text:
+            return None
+        equipment = [
+            value for value in exercise_catalog.equipment_values()
+            if value.lower().replace(" ", "") in text
+        ]
+        return equipment or None
+
+    def _apply_modality_decision(
+        self,
+        training_dict: Dict[str, Any],
+        include_bodyweight_strength: bool,
+        include_equipment_strength: bool,
+        include_endurance: bool,
+    ) -> int:
+        """
+        Drop the sessions of modalities the fused plan call decided against (in place).
+
+        Endurance sessions go when endurance is excluded; strength exercises when both
+        strength modalities are, and loaded ones when only bodyweight strength is
+        included. Days left without sessions become rest days.
+
+        Returns:
+            Number of exercises and sessions removed
+        """
+        include_strength = include_bodyweight_strength or include_equipment_strength
+        removed = 0
+        for week in training_dict.get("weekly_schedules") or []:
+            for day in week.get("daily_trainings") or []:
+                if day.get("is_rest_day"):
+                    continue
+                strength = day.get("strength_exercises") or []
+                endurance = day.get("endurance_sessions") or []
+                kept_strength = [
+                    exercise for exercise in strength
+                    if include_strength and (
+                        include_equipment_strength
+                        or str(exercise.get("equipment") or "").lower().replace(" ", "") in _BODYWEIGHT_EQUIPMENT
+                    )
+                ]
+                kept_endurance = endurance if include_endurance else []
+                if len(kept_strength) == len(strength) and len(kept_endurance) == len(endurance):
+                    continue
+                removed += len(strength) - len(kept_strength) + len(endurance) - len(kept_endurance)
+                day["strength_exercises"] = kept_strength
+                day["endurance_sessions"] = kept_endurance
+                if kept_strength and kept_endurance:
+                    day["training_type"] = "mixed"
+                elif kept_strength:
+                    day["training_type"] = "strength"
+                elif kept_endurance:
+                    day["training_type"] = "endurance"
+                else:
+                    day["training_type"] = "rest"
+                    day["is_rest_day"] = True
+        if removed:
+            self.logger.warning(f"⚠️ Removed {removed} exercises/sessions outside the decided modalities")
+        return removed
+
+    async def _warm_exercise_matching(self, formatted_initial_responses: Optional[str]) -> None:
+        """Load the exercise catalog and prepare the matcher's candidate sets (never raises)."""
+        try:
+            start = time.time()
+            loaded = await asyncio.to_thread(
+                exercise_catalog.ensure_loaded, self.exercise_selector.supabase
+            )
+            if not loaded:
+                return
+            equipment = self._likely_equipment(formatted_initial_responses)
+            prepared = await asyncio.to_thread(
+                self.exercise_validator.exercise_matcher.warm_up, equipment
+            )
+            self.logger.info(
+                f"🔥 Prepared {prepared} exercise candidate sets in {time.time() - start:.2f}s "
+                f"(equipment: {', '.join(equipment) if equipment else 'all'})"
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Exercise matching warm-up failed: {e}")
+
     async def _generate_future_week_outlines(
         self,
         personal_info: PersonalInfo,
@@ -355,7 +477,7 @@ class TrainingCoach(BaseAgent):
             )
 
             ai_start = time.time()
-            outline_plan, completion = self.llm.parse_structured(
+            outline_plan, completion = await self.llm.aparse_structured(
                 prompt, WeeklyOutlinePlan, model_type="lightweight"
             )
             latency = time.time() - ai_start
@@ -406,6 +528,47 @@ class TrainingCoach(BaseAgent):
             )
             return self._generate_error_response(user_request)
 
+    async def _classify_athlete_type(
+        self, personal_info: PersonalInfo
+    ) -> Tuple[AthleteTypeClassification, Any, float]:
+        """Classify the athlete type of a goal (LLM); returns (classification, completion, duration)."""
+        classification_prompt = PromptGenerator.generate_athlete_type_classification_prompt(
+            personal_info.goal_description
+        )
+        ai_start = time.time()
+        classification, completion = await self.llm.aparse_structured(
+            classification_prompt,
+            AthleteTypeClassification,
+            model_type="lightweight",
+            cache_ttl=ATHLETE_TYPE_CACHE_TTL_SECONDS,
+        )
+        return classification, completion, time.time() - ai_start
+
+    async def _generate_question_content(
+        self, personal_info: PersonalInfo, athlete_type: Dict[str, Any]
+    ) -> Tuple[QuestionContent, Any, float]:
+        """Merge the question themes for an athlete type and generate question content."""
+        self.logger.info("Step 2: Loading and merging question themes...")
+        unified_checklist = merge_question_checklists(
+            primary_type=athlete_type["primary_type"],
+            secondary_types=athlete_type["secondary_types"],
+            confidence=athlete_type["confidence"] if athlete_type["confidence"] is not None else 1.0,
+            personal_info=personal_info,
+        )
+        self.logger.info(f"Merged themes have {len(unified_checklist)} items")
+
+        self.logger.info("Step 3: Generating question content...")
+        content_prompt = PromptGenerator.generate_question_content_prompt_initial(
+            personal_info=personal_info,
+            unified_checklist=unified_checklist,
+            athlete_type=athlete_type,
+        )
+        ai_start = time.time()
+        question_content, completion = await self.llm.aparse_structured(
+            content_prompt, QuestionContent, model_type="lightweight"
+        )
+        return question_content, completion, time.time() - ai_start
+
     async def generate_initial_questions(
         self, personal_info: PersonalInfo, user_profile_id: Optional[int] = None
     ) -> AIQuestionResponse:
@@ -423,23 +586,38 @@ class TrainingCoach(BaseAgent):
                 return initial_questions
 
             # ===== STEP 1: Athlete Type Classification =====
+            # Steps 2-3 depend on the athlete type. In speculative mode they start right
+            # away with a keyword-guessed type and are kept only if the LLM agrees.
             self.logger.info("Step 1: Classifying athlete type...")
-            classification_prompt = PromptGenerator.generate_athlete_type_classification_prompt(
-                personal_info.goal_description
-            )
-            
-            ai_start = time.time()
-            classification, completion = self.llm.parse_structured(
-                classification_prompt,
-                AthleteTypeClassification,
-                model_type="lightweight",
-            )
-            classification_duration = time.time() - ai_start
-            
-            await db_service.log_latency_event(
-                "athlete_type_classification", classification_duration, completion
+            classification_task = asyncio.create_task(self._classify_athlete_type(personal_info))
+            speculative_type = (
+                guess_athlete_type(personal_info.goal_description)
+                if settings.SPECULATIVE_INITIAL_QUESTIONS
+                else None
             )
-            
+            speculative_task = None
+            if speculative_type:
+                speculative_task = asyncio.create_task(
+                    self._generate_question_content(
+                        personal_info,
+                        {
+                            **speculative_type,
+                            "confidence": None,
+                            "reasoning": "Matched on keywords in the goal description",
+                        },
+                    )
+                )
+                # Don't warn about the exception of a discarded speculation
+                speculative_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+            try:
+                classification, classification_completion, classification_duration = await classification_task
+            except BaseException:
+                if speculative_task is not None:
+                    speculative_task.cancel()
+                raise
+            latency_events = [("athlete_type_classification", classification_duration, classification_completion)]
+
             athlete_type_dict = {
                 "primary_type": classification.primary_type,
                 "secondary_types": list(classification.secondary_types),
@@ -453,36 +631,34 @@ class TrainingCoach(BaseAgent):
                 f"Reasoning: {classification.reasoning}"
             )
 
-            # ===== STEP 2: Load & Merge Question Themes =====
-            self.logger.info("Step 2: Loading and merging question themes...")
-            unified_checklist = merge_question_checklists(
-                primary_type=athlete_type_dict["primary_type"],
-                secondary_types=athlete_type_dict["secondary_types"],
-                confidence=classification.confidence,
-                personal_info=personal_info,
-            )
-            self.logger.info(f"Merged themes have {len(unified_checklist)} items")
+            # ===== STEPS 2-3: Load & Merge Question Themes, Generate Question Content =====
+            question_content = None
+            if speculative_task is not None:
+                # Same types load the same themes, so the speculative content is valid
+                if (
+                    speculative_type["primary_type"] == athlete_type_dict["primary_type"]
+                    and set(speculative_type["secondary_types"]) == set(athlete_type_dict["secondary_types"])
+                ):
+                    try:
+                        question_content, content_completion, content_duration = await speculative_task
+                        self.logger.info("Speculative question content matches the classified athlete type")
+                        latency_events.append(("initial_question_generation", content_duration, content_completion))
+                    except Exception as e:
+                        self.logger.warning(f"Speculative question content failed, regenerating: {e}")
+                else:
+                    speculative_task.cancel()
+                    self.logger.info(
+                        f"Discarding speculative question content "
+                        f"(guessed {speculative_type['primary_type']}, classified {athlete_type_dict['primary_type']})"
+                    )
+                    latency_events.append(("initial_question_speculation_discarded", classification_duration, None))
 
-            # ===== STEP 3: Generate Question Content =====
-            self.logger.info("Step 3: Generating question content...")
-            content_prompt = PromptGenerator.generate_question_content_prompt_initial(
-                personal_info=personal_info,
-                unified_checklist=unified_checklist,
-                athlete_type=athlete_type_dict,
-            )
-            
-            ai_start = time.time()
-            question_content, completion = self.llm.parse_structured(
-                content_prompt, QuestionContent, model_type="lightweight"
-            )
-            content_duration = time.time() - ai_start
-            
-            await db_service.log_latency_event(
-                "initial_question_generation", content_duration, completion
-            )
-            
+            if question_content is None:
+                question_content, content_completion, content_duration = await self._generate_question_content(
+                    personal_info, athlete_type_dict
+                )
+                latency_events.append(("initial_question_generation", content_duration, content_completion))
 
-            
             self.logger.info(f"Generated {len(question_content.questions_content)} question content items")
 
             # ===== STEP 4: Format Questions =====
@@ -504,14 +680,15 @@ class TrainingCoach(BaseAgent):
             )
             
             ai_start = time.time()
-            questions_response, completion = self.llm.parse_structured(
+            questions_response, completion = await self.llm.aparse_structured(
                 formatting_prompt, AIQuestionResponse, model_type="lightweight"
             )
             formatting_duration = time.time() - ai_start
-            
-            await db_service.log_latency_event(
-                "initial_question_formatting", formatting_duration, completion
-            )
+            latency_events.append(("initial_question_formatting", formatting_duration, completion))
+            # Recorded after all LLM steps; log_latency_event only queues the rows on the
+            # event sink (its background flusher inserts them), so no database write is awaited
+            for event, duration, event_completion in latency_events:
+                await db_service.log_latency_event(event, duration, event_completion)
             
             # Filter out invalid questions
             valid_questions = self._filter_valid_questions(questions_response.questions)
@@ -589,6 +766,7 @@ class TrainingCoach(BaseAgent):
         formatted_initial_responses: str,
         user_profile_id: int,
         jwt_token: str = None,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
         """
         Generate the initial training plan (Week 1) during onboarding.
@@ -604,6 +782,8 @@ class TrainingCoach(BaseAgent):
             formatted_initial_responses: Formatted string of user responses
             user_profile_id: Database ID of the user profile (also used for latency tracking)
             jwt_token: JWT token for database authentication
+            on_stage: Optional async callback(stage, data) for progress events
+                      (modalities_decided, week_drafted, exercises_matched)
             
         Returns:
             Dict with "success" (bool), "training_plan" (dict), and optional "error" (str)
@@ -624,19 +804,39 @@ class TrainingCoach(BaseAgent):
                     },
                 }
             
-            # Determine modalities to include
-            (
-                include_bodyweight_strength,
-                include_equipment_strength,
-                include_endurance,
-            ) = await self._decide_modalities(
-                personal_info,
-                formatted_initial_responses=formatted_initial_responses,
-            )
+            strategy = settings.PLAN_GENERATION_STRATEGY
+            pipeline_start = time.time()
+            warm_up = None
+            if strategy != "sequential":
+                # Prefetch the exercise pool and prepare the matcher while the LLM calls run
+                warm_up = asyncio.create_task(self._warm_exercise_matching(formatted_initial_responses))
+
+            if strategy == "fused":
+                # The plan call decides the modalities itself, so it sees every modality's instructions
+                include_bodyweight_strength = include_equipment_strength = include_endurance = True
+                self.last_modality_rationale = None
+            else:
+                # Determine modalities to include
+                (
+                    include_bodyweight_strength,
+                    include_equipment_strength,
+                    include_endurance,
+                ) = await self._decide_modalities(
+                    personal_info,
+                    formatted_initial_responses=formatted_initial_responses,
+                )
+                if on_stage:
+                    await on_stage("modalities_decided", {
+                        "include_bodyweight_strength": include_bodyweight_strength,
+                        "include_equipment_strength": include_equipment_strength,
+                        "include_endurance": include_endurance,
+                        "rationale": self.last_modality_rationale,
+                    })
 
             # Step 2: Generate prompt for initial Week 1
             self.logger.info(
-                "📝 Generating training plan prompt (bodyweight_strength=%s equipment_strength=%s endurance=%s)...",
+                "📝 Generating training plan prompt (strategy=%s bodyweight_strength=%s equipment_strength=%s endurance=%s)...",
+                strategy,
                 include_bodyweight_strength,
                 include_equipment_strength,
                 include_endurance,
@@ -649,6 +849,7 @@ class TrainingCoach(BaseAgent):
                 include_equipment_strength=include_equipment_strength,
                 include_endurance=include_endurance,
                 modality_rationale=rationale,
+                decide_modalities=strategy == "fused",
             )
             
             # Step 4: Generate full TrainingPlan with AI (but only Week 1 in weekly_schedules)
@@ -656,11 +857,42 @@ class TrainingCoach(BaseAgent):
             self.logger.info(f"🤖 Generating training plan with AI ({model_name})...")
             
             ai_start = time.time()
-            training_plan, completion = self.llm.parse_structured(
-                prompt, TrainingPlan, model_type="complex"
-            )
+            try:
+                training_plan, completion = await self.llm.aparse_structured(
+                    prompt,
+                    TrainingPlanWithModalities if strategy == "fused" else TrainingPlan,
+                    model_type="complex",
+                )
+            except BaseException:
+                if warm_up is not None:
+                    warm_up.cancel()
+                raise
             ai_duration = time.time() - ai_start
             training_dict = training_plan.model_dump()
+            training_dict.pop("modality_decision", None)
+            
+            if strategy == "fused":
+                decision = training_plan.modality_decision
+                if decision is not None:
+                    self.last_modality_rationale = (
+                        (decision.rationale or "").strip()
+                        or "Model returned modalities without an explicit rationale."
+                    )
+                    include_bodyweight_strength = decision.include_bodyweight_strength
+                    include_equipment_strength = decision.include_equipment_strength
+                    include_endurance = decision.include_endurance
+                    self._apply_modality_decision(
+                        training_dict, include_bodyweight_strength, include_equipment_strength, include_endurance
+                    )
+                else:
+                    self.last_modality_rationale = "Plan returned without a modality decision; all modalities were allowed."
+                if on_stage:
+                    await on_stage("modalities_decided", {
+                        "include_bodyweight_strength": include_bodyweight_strength,
+                        "include_equipment_strength": include_equipment_strength,
+                        "include_endurance": include_endurance,
+                        "rationale": self.last_modality_rationale,
+                    })
             
             # Post-process LLM response: Fix reps/weight arrays to match sets count and sort (high->low)
             training_dict = self.exercise_validator.normalize_reps_weight_arrays(training_dict)
@@ -679,8 +911,15 @@ class TrainingCoach(BaseAgent):
             # Ensure Week 1 has week_number = 1
             if training_dict.get("weekly_schedules"):
                 training_dict["weekly_schedules"][0]["week_number"] = 1
+            if on_stage:
+                await on_stage("week_drafted", {
+                    "title": training_dict.get("title"),
+                    "days": len((training_dict.get("weekly_schedules") or [{}])[0].get("daily_trainings", [])),
+                })
             
             # Step 5: Post-process and validate exercises
+            if warm_up is not None:
+                await warm_up
             self.logger.info("🔍 Matching AI exercises to database...")
             validated_plan = self.exercise_validator.post_process_strength_exercises(training_dict)
             
@@ -691,9 +930,14 @@ class TrainingCoach(BaseAgent):
             
             # Ensure user_profile_id is set
             validated_plan["user_profile_id"] = user_profile_id
+            if on_stage:
+                await on_stage("exercises_matched", {"validation_messages": len(validation_messages)})
             
-            # Step 6: Track latency
-            await db_service.log_latency_event("initial_week", ai_duration, completion)
+            # Step 6: Track latency (the per-strategy end-to-end event is what the A/B compares)
+            await asyncio.gather(
+                db_service.log_latency_event("initial_week", ai_duration, completion),
+                db_service.log_latency_event(f"initial_plan_{strategy}", time.time() - pipeline_start),
+            )
             
             return {
                 "success": True,
@@ -702,6 +946,7 @@ class TrainingCoach(BaseAgent):
                 "metadata": {
                     "validation_messages": validation_messages,
                     "generation_method": "AI + Metadata-Based Exercise Matching",
+                    "plan_generation_strategy": strategy,
                 },
             }
             
@@ -721,7 +966,8 @@ class TrainingCoach(BaseAgent):
         user_profile_id: int,
         user_playbook,
         jwt_token: str = None,
-        conversation_history: Optional[List[Dict[str, Any]]] = None
+        conversation_history: Optional[List[Dict[str, Any]]] = None,
+        call_info: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Update an existing week based on user feedback.
@@ -739,6 +985,9 @@ class TrainingCoach(BaseAgent):
             user_playbook: User's playbook with learned lessons (instead of onboarding responses)
             jwt_token: JWT token for database authentication
             conversation_history: Optional conversation history for context-aware updates
+            call_info: Optional dict filled with "modality_completion", "prompt_tokens" (local
+                       estimate) before the LLM call and "completion" after it (accounts for
+                       speculative updates; latency events are deferred while "speculative" is set)
             
         Returns:
             Dict with "success", "training_plan" (containing only the updated week in weekly_schedules),
@@ -750,24 +999,20 @@ class TrainingCoach(BaseAgent):
                 {"weekly_schedules": [current_week]}
             )
             
-            # Format conversation history for prompt
-            conversation_history_str = None
-            if conversation_history and len(conversation_history) > 0:
-                conversation_lines = []
-                for msg in conversation_history[-10:]:  # Last 10 messages for context
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    if content:
-                        conversation_lines.append(f"{role.capitalize()}: {content}")
-                if conversation_lines:
-                    conversation_history_str = "\n".join(conversation_lines)
+            # Format conversation history for prompt (one line per turn; trimmed to the prompt's token budget)
+            conversation_lines = []
+            for msg in (conversation_history or [])[-10:]:  # Last 10 messages for context
+                role = msg.get("role", "user")
+                content = msg.get("content", "")
+                if content:
+                    conversation_lines.append(f"{role.capitalize()}: {content}")
 
             (
                 include_bodyweight_strength,
                 include_equipment_strength,
                 include_endurance,
             ) = await self._decide_modalities(
-                personal_info, user_playbook
+                personal_info, user_playbook, call_info=call_info
             )
 
             # Step 2: Generate prompt for updating week (uses user_playbook instead of onboarding responses)
@@ -789,7 +1034,7 @@ class TrainingCoach(BaseAgent):
                 include_equipment_strength=include_equipment_strength,
                 include_endurance=include_endurance,
                 modality_rationale=rationale,
-                conversation_history=conversation_history_str,
+                conversation_history=conversation_lines,
             )
             
             # Step 4: Generate updated WeeklySchedule with AI (using response schema that includes ai_message)
@@ -797,12 +1042,16 @@ class TrainingCoach(BaseAgent):
             self.logger.info(f"🤖 Updating Week {week_number} with AI ({model_name})...")
             
             ai_start = time.time()
+            if call_info is not None:
+                call_info["prompt_tokens"] = count_tokens(prompt)
             
             # Extract ai_message from response, then convert to WeeklySchedule (without ai_message)
-            ws_response, completion = self.llm.parse_structured(
+            ws_response, completion = await self.llm.aparse_structured(
                 prompt, WeeklyScheduleResponse, model_type="complex"
             )
             ai_duration = time.time() - ai_start
+            if call_info is not None:
+                call_info["completion"] = completion
             
             # Extract ai_message before converting to WeeklySchedule
             ai_message = ws_response.ai_message
@@ -828,7 +1077,8 @@ class TrainingCoach(BaseAgent):
             updated_week = validated_plan.get("weekly_schedules", [validated_week])[0]
             
             # Step 6: Track latency
-            await db_service.log_latency_event("update_week", ai_duration, completion)
+            if not defer_event(call_info, "update_week", ai_duration, completion):
+                await db_service.log_latency_event("update_week", ai_duration, completion)
             
             # Return only the updated week (frontend will merge it back into the full plan)
             return {
@@ -971,7 +1221,7 @@ class TrainingCoach(BaseAgent):
             self.logger.info(f"🤖 Creating Week {next_week_number} with AI ({model_name})...")
             
             ai_start = time.time()
-            weekly_schedule, completion = self.llm.parse_structured(
+            weekly_schedule, completion = await self.llm.aparse_structured(
                 prompt, WeeklySchedule, model_type="complex"
             )
             ai_duration = time.time() - ai_start
@@ -1207,7 +1457,9 @@ class TrainingCoach(BaseAgent):
         self,
         feedback_message: str,
         conversation_history: List[Dict[str, str]],
-        training_plan: Dict[str, Any] = None
+        training_plan: Dict[str, Any] = None,
+        on_message_delta: Optional[Callable[[str], None]] = None,
+        plan_version: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         STAGE 1: Lightweight intent classification (no operations parsing).
@@ -1219,26 +1471,43 @@ class TrainingCoach(BaseAgent):
             feedback_message: User's feedback message
             conversation_history: Conversation context
             training_plan: Current training plan (optional, for answering questions)
+            on_message_delta: Optional callback receiving ai_message text as it is generated
+                              (only when the model already decided no plan update is needed)
+            plan_version: Snapshot version of training_plan (reuses the cached plan summary)
         
         Returns:
             Classification result with intent, action, ai_message (no operations)
         """
         try:
-            # Build conversation context
-            context = self._build_conversation_context(conversation_history)
+            # Build conversation context (one turn per line, oldest first)
+            context = self._build_conversation_turns(conversation_history)
             
             # Get lightweight prompt (includes plan for answering questions)
             prompt = PromptGenerator.generate_lightweight_intent_classification_prompt(
                 feedback_message=feedback_message,
                 conversation_context=context,
-                training_plan=training_plan
+                training_plan=training_plan,
+                plan_version=plan_version
             )
             
             # Use structured parsing with Pydantic model - TRACK AI CALL
             ai_start = time.time()
-            parsed_obj, completion = self.llm.parse_structured(
-                prompt, FeedbackIntentClassification, model_type="lightweight"
-            )
+            if on_message_delta is not None:
+                # Stream ai_message for replies that don't touch the plan (respond_only/unclear/satisfied)
+                message_stream = JsonStringFieldStream("ai_message", require={"needs_plan_update": False})
+
+                def forward_text(chunk: str) -> None:
+                    delta = message_stream.feed(chunk)
+                    if delta:
+                        on_message_delta(delta)
+
+                parsed_obj, completion = await self.llm.astream_parse(
+                    prompt, FeedbackIntentClassification, model_type="lightweight", on_text=forward_text
+                )
+            else:
+                parsed_obj, completion = await self.llm.aparse_structured(
+                    prompt, FeedbackIntentClassification, model_type="lightweight"
+                )
             duration = time.time() - ai_start
             result = parsed_obj.model_dump() if hasattr(parsed_obj, 'model_dump') else parsed_obj
             result['_classify_duration'] = duration
@@ -1269,10 +1538,10 @@ class TrainingCoach(BaseAgent):
                 "ai_message": "I'm having trouble understanding your feedback. Could you please be more specific about what you'd like to change or know? 😊"
             }
 
-    def _build_conversation_context(self, conversation_history: List[Dict[str, str]]) -> str:
-        """Build conversation context from history."""
+    def _build_conversation_turns(self, conversation_history: List[Dict[str, str]]) -> List[str]:
+        """Build conversation context lines from history (empty when there is none)."""
         if not conversation_history:
-            return "No previous conversation."
+            return []
         
         context_lines = []
         for msg in conversation_history[-5:]:  # Last 5 messages for context
@@ -1280,4 +1549,4 @@ class TrainingCoach(BaseAgent):
             content = msg.get("content", "")
             context_lines.append(f"{role.upper()}: {content}")
         
-        return "\n".join(context_lines)
\ No newline at end of file
+        return context_lines
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+Event Sink for EvolveAI
+
+Process-wide, batched writer for metrics rows (`latency`, `telemetry_events`).
+
+Latency and ACE telemetry events used to be written with one single-row insert
+each, inline after every LLM call, so metrics writes sat on the user-facing path.
+Callers now `emit()` a row into an in-memory queue and return immediately; a
+background thread bulk-inserts the queue per table whenever EVENT_SINK_BATCH_SIZE
+rows are waiting or every EVENT_SINK_FLUSH_SECONDS.
+
+Backpressure: when the queue holds EVENT_SINK_MAX_QUEUE rows (e.g. Supabase is
+down), new rows - and batches that failed to insert - are appended to
+EVENT_SINK_SPILL_PATH (JSON lines) if configured, otherwise dropped and counted.
+A spill file is re-queued once when the flusher starts. `close()` flushes what is
+left on shutdown.
+
+Optional columns that the table does not have yet (PostgREST PGRST204, e.g. a
+migration that was not applied) are stripped and the batch is retried once; the
+column is then left out of later batches for that table instead of failing them.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+# "Could not find the 'cached_input_tokens' column of 'latency' in the schema cache"
+_MISSING_COLUMN = re.compile(r"Could not find the '([^']+)' column")
+
+
+def _missing_column(error: Exception) -> Optional[str]:
+    """Column named by a PostgREST unknown-column error (PGRST204), if that is what failed."""
+    if getattr(error, "code", None) != "PGRST204" and "PGRST204" not in str(error):
+        return None
+    match = _MISSING_COLUMN.search(getattr(error, "message", None) or str(error))
+    return match.group(1) if match else None
+
+
+def _default_client() -> Any:
+    """Service-role client for metrics tables (anon key if no service role key is configured)."""
+    from core.utils.supabase_pool import supabase_pool
+
+    return supabase_pool.sync_client(use_service_role=bool(settings.SUPABASE_SERVICE_ROLE_KEY))
+
+
+class EventSink:
+    """Thread-safe in-process queue of table rows with a batching background flusher."""
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable[[], Any]] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        start_thread: Optional[bool] = None,
+    ):
+        """
+        Initialize the sink (the flusher thread starts on the first emit).
+
+        Args:
+            client_factory: Returns the Supabase client used for inserts
+            batch_size: Rows that trigger an early flush (settings.EVENT_SINK_BATCH_SIZE)
+            flush_seconds: Maximum delay before queued rows are written (settings.EVENT_SINK_FLUSH_SECONDS)
+            max_queue: Queue capacity before rows are spilled/dropped (settings.EVENT_SINK_MAX_QUEUE)
+            spill_path: JSON-lines overflow file, '' to drop instead (settings.EVENT_SINK_SPILL_PATH)
+            start_thread: Whether to run the background flusher (default: not in tests)
+        """
+        self._client_factory = client_factory or _default_client
+        self.batch_size = batch_size if batch_size is not None else settings.EVENT_SINK_BATCH_SIZE
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.EVENT_SINK_FLUSH_SECONDS
+        self.max_queue = max_queue if max_queue is not None else settings.EVENT_SINK_MAX_QUEUE
+        self.spill_path = spill_path if spill_path is not None else settings.EVENT_SINK_SPILL_PATH
+        self._start_thread = start_thread
+
+        self._queue: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._missing_columns: Dict[str, set] = defaultdict(set)
+
+        self.written = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def emit(self, table: str, record: Dict[str, Any]) -> bool:
+        """
+        Queue a row for `table` without blocking.
+
+        Returns:
+            True if queued, False if the row was spilled or dropped (queue full)
+        """
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                queued = False
+            else:
+                self._queue.append((table, record))
+                queued = True
+                size = len(self._queue)
+        if not queued:
+            self._overflow([(table, record)])
+            return False
+
+        self._ensure_thread()
+        if size >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write everything currently queued, one bulk insert per table.
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = list(self._queue)
+                self._queue.clear()
+            if not pending:
+                return 0
+
+            by_table: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for table, record in pending:
+                by_table[table].append(record)
+
+            written = 0
+            try:
+                client = self._client_factory()
+            except Exception as e:
+                logger.warning(f"⚠️ Event sink has no database client: {e}")
+                self._overflow(pending)
+                return 0
+
+            for table, records in by_table.items():
+                for start in range(0, len(records), self.batch_size):
+                    batch = records[start:start + self.batch_size]
+                    try:
+                        self._insert(client, table, batch)
+                        written += len(batch)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Failed to write {len(batch)} '{table}' events: {e}")
+                        self._overflow([(table, record) for record in batch])
+
+            self.written += written
+            if written:
+                logger.debug(f"Flushed {written} metrics events")
+            return written
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        self._stopped.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        if self._flusher_enabled():
+            self.flush()
+        if self.dropped or self.spilled:
+            logger.info(f"Event sink closed: {self.spilled} events spilled, {self.dropped} dropped")
+
+    def stats(self) -> Dict[str, int]:
+        """Queue and delivery counters."""
+        return {
+            "queued": len(self._queue),
+            "written": self.written,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+        }
+
+    # ------------------------------------------------------------------
+    # Background flusher and overflow handling
+    # ------------------------------------------------------------------
+
+    def _insert(self, client: Any, table: str, batch: List[Dict[str, Any]]) -> None:
+        """Bulk insert, leaving out columns the table is known not to have (retried once on a new one)."""
+        try:
+            client.table(table).insert(self._strip(table, batch)).execute()
+        except Exception as e:
+            column = _missing_column(e)
+            if column is None or column in self._missing_columns[table]:
+                raise
+            logger.warning(f"⚠️ '{table}' has no '{column}' column - writing events without it")
+            self._missing_columns[table].add(column)
+            client.table(table).insert(self._strip(table, batch)).execute()
+
+    def _strip(self, table: str, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        missing = self._missing_columns.get(table)
+        if not missing:
+            return batch
+        return [{key: value for key, value in record.items() if key not in missing} for record in batch]
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stopped.is_set() or not self._flusher_enabled():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+                self._thread.start()
+
+    def _flusher_enabled(self) -> bool:
+        """Tests flush explicitly; they never get a background thread writing to the database."""
+        if self._start_thread is not None:
+            return self._start_thread
+        return not is_test_environment()
+
+    def _run(self) -> None:
+        self._replay_spill()
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Event sink flush failed: {e}")
+
+    def _overflow(self, rows: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Append rows to the spill file, or drop them when spilling is disabled/fails."""
+        if self.spill_path:
+            try:
+                with self._lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                    for table, record in rows:
+                        f.write(json.dumps({"table": table, "record": record}, default=str) + "\n")
+                self.spilled += len(rows)
+                return
+            except OSError as e:
+                logger.warning(f"⚠️ Could not spill metrics events to {self.spill_path}: {e}")
+        self.dropped += len(rows)
+        logger.warning(f"⚠️ Dropped {len(rows)} metrics events (queue full or database unavailable)")
+
+    def _replay_spill(self) -> None:
+        """Re-queue rows spilled by a previous run (once, when the flusher starts)."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        replay_path = f"{self.spill_path}.{os.getpid()}.{int(time.time())}"
+        try:
+            os.replace(self.spill_path, replay_path)
+            with open(replay_path, "r", encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            os.remove(replay_path)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Could not replay spilled metrics events: {e}")
+            return
+        for row in rows:
+            self.emit(row["table"], row["record"])
+        if rows:
+            logger.info(f"🔁 Re-queued {len(rows)} spilled metrics events")
+
+
+# Shared by every producer in the process
+event_sink = EventSink()
+atexit.register(event_sink.close)
@@ -0,0 +1,448 @@
+"""
+Durable Job Queue for EvolveAI
+
+Small persistent queue for background work (initial playbook building, plan
+outline generation) that used to run in FastAPI BackgroundTasks, where it was
+lost on restart/deploy, shared the API worker's event loop, and was never retried.
+
+- Backends: SQLite file (default, safe across processes on one host) or a
+  Postgres table (JOB_QUEUE_DATABASE_URL, needs `psycopg`). Tests use in-memory SQLite.
+- Idempotency: every job has a key (e.g. kind:user:plan); enqueueing a key that is
+  queued, running or succeeded returns the existing job instead of adding one.
+- Retries: a failing handler is retried with exponential backoff up to
+  JOB_QUEUE_MAX_ATTEMPTS; a job whose worker died is re-claimed once its lease expires.
+- Workers: JobWorker runs JOB_QUEUE_CONCURRENCY jobs at a time, either embedded in
+  the API process (JOB_QUEUE_EMBEDDED_WORKER) or standalone via start_worker.py,
+  so heavy ACE work can scale separately from API workers.
+
+Handlers are async functions registered per job kind with `@job_handler("kind")`
+and receive the JSON payload.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Longest delay between two attempts of the same job
+_MAX_BACKOFF_SECONDS = 600.0
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register an async handler for a job kind."""
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def retry_delay(attempts: int, base_seconds: float) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts."""
+    delay = min(base_seconds * (2 ** max(attempts - 1, 0)), _MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SQLiteJobBackend:
+    """Jobs table in a local SQLite file; claims are serialized by SQLite's write lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS background_jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_after REAL NOT NULL,
+                locked_until REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS background_jobs_ready ON background_jobs (status, run_after)"
+        )
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: str, max_attempts: int) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM background_jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row is not None and row["status"] != FAILED:
+                    self._db.execute("COMMIT")
+                    return {**dict(row), "created": False}
+                if row is not None:
+                    # Exhausted job with the same key: start over with the new payload
+                    job_id = row["id"]
+                    self._db.execute(
+                        """
+                        UPDATE background_jobs SET payload = ?, status = ?, attempts = 0, max_attempts = ?,
+                               run_after = ?, locked_until = NULL, last_error = NULL, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (json.dumps(payload, default=str), QUEUED, max_attempts, now, now, job_id),
+                    )
+                else:
+                    job_id = uuid.uuid4().hex
+                    self._db.execute(
+                        """
+                        INSERT INTO background_jobs
+                            (id, kind, idempotency_key, payload, status, attempts, max_attempts,
+                             run_after, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?)
+                        """,
+                        (job_id, kind, idempotency_key, json.dumps(payload, default=str), QUEUED,
+                         max_attempts, now, now, now),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"id": job_id, "kind": kind, "status": QUEUED, "created": True}
+
+    def claim(self, lease_seconds: float, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        placeholders = ",".join("?" for _ in kinds)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    f"""
+                    SELECT * FROM background_jobs
+                    WHERE kind IN ({placeholders})
+                      AND ((status = ? AND run_after <= ?) OR (status = ? AND locked_until < ?))
+                    ORDER BY run_after
+                    LIMIT 1
+                    """,
+                    (*kinds, QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    """
+                    UPDATE background_jobs SET status = ?, attempts = attempts + 1, locked_until = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (RUNNING, now + lease_seconds, now, row["id"]),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job["attempts"] += 1
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def complete(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE background_jobs SET status = ?, locked_until = NULL, last_error = NULL, updated_at = ? WHERE id = ?",
+                (SUCCEEDED, time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str, retry_at: Optional[float]) -> None:
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE background_jobs SET status = ?, run_after = COALESCE(?, run_after), locked_until = NULL,
+                       last_error = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (QUEUED if retry_at is not None else FAILED, retry_at, error[:2000], time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM background_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM background_jobs WHERE status = ? AND updated_at < ?", (SUCCEEDED, older_than)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class PostgresJobBackend:
+    """Jobs table in Postgres; concurrent workers claim with FOR UPDATE SKIP LOCKED."""
+
+    def __init__(self, database_url: str):
+        try:
+            import psycopg  # type: ignore
+            from psycopg.rows import dict_row  # type: ignore
+        except ImportError as e:
+            raise ImportError(
+                "JOB_QUEUE_BACKEND=postgres requires psycopg (pip install 'psycopg[binary]')"
+            ) from e
+        self._lock = threading.Lock()
+        self._db = psycopg.connect(database_url, autocommit=True, row_factory=dict_row)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS background_jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload JSONB NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_after DOUBLE PRECISION NOT NULL,
+                locked_until DOUBLE PRECISION,
+                last_error TEXT,
+                created_at DOUBLE PRECISION NOT NULL,
+                updated_at DOUBLE PRECISION NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS background_jobs_ready ON background_jobs (status, run_after)"
+        )
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: str, max_attempts: int) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            row = self._db.execute(
+                """
+                INSERT INTO background_jobs
+                    (id, kind, idempotency_key, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+                VALUES (%s, %s, %s, %s::jsonb, %s, 0, %s, %s, %s, %s)
+                ON CONFLICT (idempotency_key) DO UPDATE SET
+                    payload = EXCLUDED.payload, status = EXCLUDED.status, attempts = 0,
+                    max_attempts = EXCLUDED.max_attempts, run_after = EXCLUDED.run_after,
+                    locked_until = NULL, last_error = NULL, updated_at = EXCLUDED.updated_at
+                WHERE background_jobs.status = %s
+                RETURNING id, kind, status
+                """,
+                (job_id, kind, idempotency_key, json.dumps(payload, default=str), QUEUED,
+                 max_attempts, now, now, now, FAILED),
+            ).fetchone()
+            if row is not None:
+                return {**row, "created": True}
+            existing = self._db.execute(
+                "SELECT id, kind, status FROM background_jobs WHERE idempotency_key = %s", (idempotency_key,)
+            ).fetchone()
+        return {**existing, "created": False}
+
+    def claim(self, lease_seconds: float, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                """
+                UPDATE background_jobs SET status = %s, attempts = attempts + 1, locked_until = %s, updated_at = %s
+                WHERE id = (
+                    SELECT id FROM background_jobs
+                    WHERE kind = ANY(%s)
+                      AND ((status = %s AND run_after <= %s) OR (status = %s AND locked_until < %s))
+                    ORDER BY run_after
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+                """,
+                (RUNNING, now + lease_seconds, now, kinds, QUEUED, now, RUNNING, now),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def complete(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE background_jobs SET status = %s, locked_until = NULL, last_error = NULL, updated_at = %s WHERE id = %s",
+                (SUCCEEDED, time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str, retry_at: Optional[float]) -> None:
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE background_jobs SET status = %s, run_after = COALESCE(%s, run_after), locked_until = NULL,
+                       last_error = %s, updated_at = %s
+                WHERE id = %s
+                """,
+                (QUEUED if retry_at is not None else FAILED, retry_at, error[:2000], time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM background_jobs WHERE id = %s", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM background_jobs WHERE status = %s AND updated_at < %s", (SUCCEEDED, older_than)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobQueue:
+    """Enqueue side of the queue (used by API handlers)."""
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+        """
+        Add a job unless one with the same idempotency key is queued, running or done.
+
+        Returns:
+            Dict with the job "id", "status" and "created" (False if deduplicated)
+        """
+        job = await asyncio.to_thread(
+            self.backend.enqueue, kind, payload, idempotency_key, settings.JOB_QUEUE_MAX_ATTEMPTS
+        )
+        if job["created"]:
+            logger.info(f"📥 Queued {kind} job {job['id']} ({idempotency_key})")
+        else:
+            logger.info(f"⏭️ {kind} job for {idempotency_key} already {job['status']} - not queued again")
+        return job
+
+
+class JobWorker:
+    """Claims and runs queued jobs with bounded concurrency, retrying failures with backoff."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        timeout_seconds: Optional[float] = None,
+    ):
+        self.queue = queue
+        self.concurrency = concurrency or settings.JOB_QUEUE_CONCURRENCY
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.JOB_QUEUE_POLL_SECONDS
+        self.timeout_seconds = timeout_seconds or settings.JOB_QUEUE_JOB_TIMEOUT_SECONDS
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def lease_seconds(self) -> float:
+        """How long a claimed job is reserved before another worker may take it over."""
+        return self.timeout_seconds + 60.0
+
+    async def run_once(self) -> bool:
+        """Claim and run one job; False if nothing was ready."""
+        kinds = list(_handlers)
+        if not kinds:
+            return False
+        job = await asyncio.to_thread(self.queue.backend.claim, self.lease_seconds, kinds)
+        if job is None:
+            return False
+
+        kind, job_id, attempts = job["kind"], job["id"], job["attempts"]
+        start_time = time.time()
+        try:
+            await asyncio.wait_for(_handlers[kind](job["payload"]), timeout=self.timeout_seconds)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            if attempts < job["max_attempts"]:
+                delay = retry_delay(attempts, settings.JOB_QUEUE_RETRY_BASE_SECONDS)
+                logger.warning(
+                    f"⚠️ {kind} job {job_id} failed (attempt {attempts}/{job['max_attempts']}), "
+                    f"retrying in {delay:.0f}s: {error}"
+                )
+                await asyncio.to_thread(self.queue.backend.fail, job_id, error, time.time() + delay)
+            else:
+                logger.error(f"❌ {kind} job {job_id} failed permanently after {attempts} attempts: {error}")
+                await asyncio.to_thread(self.queue.backend.fail, job_id, error, None)
+            return True
+
+        await asyncio.to_thread(self.queue.backend.complete, job_id)
+        logger.info(f"✅ {kind} job {job_id} done in {time.time() - start_time:.1f}s")
+        return True
+
+    async def _consume(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Job worker error: {e}")
+                ran = False
+            if not ran:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Start the consumer tasks on the running event loop."""
+        purged = self.queue.backend.purge(time.time() - 7 * 24 * 3600)
+        if purged:
+            logger.info(f"🧹 Purged {purged} finished background jobs")
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        logger.info(f"👷 Job worker started ({self.concurrency} concurrent jobs, handlers: {sorted(_handlers)})")
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and wait for running ones to finish."""
+        self._stopping.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue (backend chosen by JOB_QUEUE_BACKEND)."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                if is_test_environment():
+                    backend = SQLiteJobBackend(":memory:")
+                elif settings.JOB_QUEUE_BACKEND == "postgres":
+                    backend = PostgresJobBackend(settings.JOB_QUEUE_DATABASE_URL)
+                else:
+                    backend = SQLiteJobBackend(settings.JOB_QUEUE_PATH)
+                _job_queue = JobQueue(backend)
+    return _job_queue
@@ -0,0 +1,271 @@
+"""
+Single-Flight Request Coalescing for EvolveAI
+
+Mobile clients retry aggressively, so two or three identical /generate-plan,
+/insights-summary or /initial-questions requests for the same user are often in
+flight at once, each running the full LLM pipeline. `single_flight.do(key, fn)`
+runs `fn` once per key; concurrent duplicates await the leader's result instead.
+
+- Within a worker, duplicates share the leader's future (same result or exception).
+- Across workers on one host, a SQLite lock table (SINGLE_FLIGHT_PATH) holds a
+  lease per key. Duplicates in other workers poll until the leader publishes its
+  result (JSON), which stays readable for SINGLE_FLIGHT_RESULT_TTL_SECONDS. If the
+  leader fails or its lease expires, the next caller runs `fn` itself.
+
+Keys must identify both the user and the operation (e.g. "generate-plan:<user>:<profile>").
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+ACQUIRED = "acquired"
+BUSY = "busy"
+DONE = "done"
+
+
+class SQLiteFlightStore:
+    """Lock table shared by the workers on one host; one row per in-flight or recently finished key."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS single_flight (
+                key TEXT PRIMARY KEY,
+                owner TEXT,
+                lease_until REAL,
+                result TEXT,
+                result_until REAL
+            )
+            """
+        )
+        self._db.execute(
+            "DELETE FROM single_flight WHERE COALESCE(lease_until, 0) < ? AND COALESCE(result_until, 0) < ?",
+            (time.time(), time.time()),
+        )
+
+    def acquire(self, key: str, owner: str, lease_seconds: float) -> Tuple[str, Optional[str]]:
+        """
+        Take the lease for `key` unless another worker holds it or a fresh result exists.
+
+        Returns:
+            (ACQUIRED, None), (BUSY, None) or (DONE, result_json)
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT owner, lease_until, result, result_until FROM single_flight WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    row_owner, lease_until, result, result_until = row
+                    if result is not None and (result_until or 0) > now:
+                        self._db.execute("COMMIT")
+                        return DONE, result
+                    if row_owner is not None and row_owner != owner and (lease_until or 0) > now:
+                        self._db.execute("COMMIT")
+                        return BUSY, None
+                self._db.execute(
+                    """
+                    INSERT OR REPLACE INTO single_flight (key, owner, lease_until, result, result_until)
+                    VALUES (?, ?, ?, NULL, NULL)
+                    """,
+                    (key, owner, now + lease_seconds),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return ACQUIRED, None
+
+    def release(self, key: str, owner: str, result: Optional[str], result_ttl_seconds: float) -> None:
+        """Release the lease, publishing `result` for waiting workers (None: failed, just unlock)."""
+        with self._lock:
+            if result is None or result_ttl_seconds <= 0:
+                self._db.execute("DELETE FROM single_flight WHERE key = ? AND owner = ?", (key, owner))
+            else:
+                self._db.execute(
+                    """
+                    UPDATE single_flight SET owner = NULL, lease_until = NULL, result = ?, result_until = ?
+                    WHERE key = ? AND owner = ?
+                    """,
+                    (result, time.time() + result_ttl_seconds, key, owner),
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        result_ttl_seconds: Optional[float] = None,
+        poll_seconds: float = 0.25,
+    ):
+        """
+        Initialize the coalescer (the lock table is opened on first use).
+
+        Args:
+            path: SQLite lock table for cross-worker coalescing (settings.SINGLE_FLIGHT_PATH;
+                  empty keeps coalescing within this worker; never used in tests)
+            lease_seconds: How long a worker may hold a key (settings.SINGLE_FLIGHT_LEASE_SECONDS)
+            result_ttl_seconds: How long a finished result is served to other workers
+                                (settings.SINGLE_FLIGHT_RESULT_TTL_SECONDS)
+            poll_seconds: Interval at which workers check a key held by another worker
+        """
+        self._path = path
+        self.lease_seconds = lease_seconds if lease_seconds is not None else settings.SINGLE_FLIGHT_LEASE_SECONDS
+        self.result_ttl_seconds = (
+            result_ttl_seconds if result_ttl_seconds is not None else settings.SINGLE_FLIGHT_RESULT_TTL_SECONDS
+        )
+        self.poll_seconds = poll_seconds
+        self._owner = uuid.uuid4().hex
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._store: Optional[SQLiteFlightStore] = None
+        self._store_failed = False
+        self._store_lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.shared = 0
+
+    @property
+    def path(self) -> str:
+        if self._path is not None:
+            return self._path
+        if is_test_environment():
+            return ""
+        return settings.SINGLE_FLIGHT_PATH
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        decode: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Run `fn()` once for all concurrent callers with the same key.
+
+        Args:
+            key: User + operation identity of the work
+            fn: Coroutine function doing the work
+            decode: Rebuilds the result from JSON when it was produced by another worker
+                    (e.g. a Pydantic model's model_validate); default returns the JSON value
+
+        Returns:
+            The leader's result (callers in this worker get the same object)
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            logger.info(f"🔗 Joined in-flight request {key}")
+            return await asyncio.shield(flight)
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._flights[key] = future
+        try:
+            result = await self._run(key, fn, decode)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._flights.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Executions vs. duplicates served from another caller's work."""
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "shared_across_workers": self.shared,
+        }
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]], decode: Optional[Callable[[Any], Any]]) -> Any:
+        store = self._get_store()
+        if store is None:
+            self.leaders += 1
+            return await fn()
+
+        deadline = time.monotonic() + self.lease_seconds
+        while True:
+            try:
+                state, result = await asyncio.to_thread(store.acquire, key, self._owner, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Single-flight lock table unavailable, running {key} locally: {e}")
+                self.leaders += 1
+                return await fn()
+            if state == DONE:
+                self.shared += 1
+                logger.info(f"🔗 Reused result of {key} from another worker")
+                value = json.loads(result)
+                return decode(value) if decode is not None else value
+            if state == ACQUIRED:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"⚠️ {key} still held by another worker after {self.lease_seconds:.0f}s - running it here")
+                self.leaders += 1
+                return await fn()
+            await asyncio.sleep(self.poll_seconds)
+
+        self.leaders += 1
+        encoded: Optional[str] = None
+        try:
+            value = await fn()
+            try:
+                encoded = json.dumps(jsonable_encoder(value))
+            except Exception as e:
+                logger.warning(f"⚠️ Result of {key} is not shareable across workers: {e}")
+            return value
+        finally:
+            try:
+                await asyncio.to_thread(store.release, key, self._owner, encoded, self.result_ttl_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to release single-flight lock {key}: {e}")
+
+    def _get_store(self) -> Optional[SQLiteFlightStore]:
+        if self._store is not None or self._store_failed or not self.path:
+            return self._store
+        with self._store_lock:
+            if self._store is None and not self._store_failed:
+                try:
+                    self._store = SQLiteFlightStore(self.path)
+                except Exception as e:
+                    self._store_failed = True
+                    logger.warning(f"⚠️ Cross-worker request coalescing disabled ({self.path}): {e}")
+        return self._store
+
+
+# Shared by every endpoint in the process
+single_flight = SingleFlight()
@@ -0,0 +1,204 @@
+"""
+Pooled Supabase / PostgREST clients.
+
+Creating a Supabase client per call builds fresh HTTP sessions, so every query pays
+for a new TCP + TLS handshake. This module keeps long-lived clients instead:
+
+- Async PostgREST clients (service role, anon and per-JWT) that all share one
+  keep-alive `httpx.AsyncClient` per event loop. Queries are awaitable:
+  `await client.table("x").select("*").execute()`.
+- Cached synchronous `supabase.Client` instances (service role / anon) for code
+  that still runs synchronously (exercise selection, scripts, RAG).
+
+Usage:
+    from core.utils.supabase_pool import supabase_pool
+
+    client = supabase_pool.service_role_client()
+    result = await client.table("latency").insert(row).execute()
+"""
+
+import asyncio
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from supabase import Client, create_client
+
+from logging_config import get_logger
+from settings import settings
+from core.utils.env_loader import is_test_environment
+
+logger = get_logger(__name__)
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+class _LoopPool:
+    """Shared HTTP session and PostgREST clients bound to one event loop."""
+
+    def __init__(self, max_clients: int):
+        self.session = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+            ),
+        )
+        self.max_clients = max_clients
+        # Keyed by role ("service_role", "anon") or "jwt:<token hash>"; LRU-bounded
+        self.clients: "OrderedDict[str, AsyncPostgrestClient]" = OrderedDict()
+
+
+class SupabaseClientPool:
+    """Process-wide pool of long-lived Supabase clients."""
+
+    def __init__(self, max_clients: int = 256):
+        """
+        Initialize the pool (clients are created lazily).
+
+        Args:
+            max_clients: Maximum number of PostgREST clients kept per event loop
+        """
+        self._max_clients = max_clients
+        self._lock = threading.Lock()
+        self._loop_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopPool]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sync_clients: Dict[str, Client] = {}
+
+    # ------------------------------------------------------------------
+    # Async PostgREST clients
+    # ------------------------------------------------------------------
+
+    def service_role_client(self) -> AsyncPostgrestClient:
+        """Async client authenticated with the service role key (bypasses RLS)."""
+        key = settings.SUPABASE_SERVICE_ROLE_KEY
+        if not key:
+            raise ValueError("Missing Supabase credentials: SUPABASE_SERVICE_ROLE_KEY is not set")
+        return self._get_async_client("service_role", key, key)
+
+    def anon_client(self) -> AsyncPostgrestClient:
+        """Async client authenticated with the anon key."""
+        key = settings.SUPABASE_ANON_KEY
+        if not key:
+            raise ValueError("Missing Supabase credentials: SUPABASE_ANON_KEY is not set")
+        return self._get_async_client("anon", key, key)
+
+    def jwt_client(self, jwt_token: str) -> AsyncPostgrestClient:
+        """Async client using the anon key with the user's JWT (RLS applies)."""
+        if not jwt_token:
+            raise ValueError("JWT token required for a user-scoped Supabase client")
+        key = settings.SUPABASE_ANON_KEY
+        if not key:
+            raise ValueError("Missing Supabase credentials: SUPABASE_ANON_KEY is not set")
+        # Never keep raw tokens as dict keys (they could end up in debug dumps)
+        token_hash = hashlib.sha256(jwt_token.encode("utf-8")).hexdigest()
+        return self._get_async_client(f"jwt:{token_hash}", key, jwt_token)
+
+    def _get_async_client(self, cache_key: str, api_key: str, bearer_token: str) -> AsyncPostgrestClient:
+        """Get or create a PostgREST client on the current event loop's shared session."""
+        if is_test_environment():
+            raise ValueError(
+                "Cannot create Supabase client in test environment. "
+                "Mock DatabaseService methods instead."
+            )
+
+        supabase_url = settings.SUPABASE_URL
+        if not supabase_url:
+            raise ValueError("Missing Supabase credentials: SUPABASE_URL is not set")
+
+        loop_pool = self._get_loop_pool()
+        client = loop_pool.clients.get(cache_key)
+        if client is not None:
+            loop_pool.clients.move_to_end(cache_key)
+            return client
+
+        client = AsyncPostgrestClient(
+            f"{supabase_url.rstrip('/')}/rest/v1",
+            headers={
+                "apiKey": api_key,
+                "Authorization": f"Bearer {bearer_token}",
+            },
+            http_client=loop_pool.session,
+        )
+        loop_pool.clients[cache_key] = client
+        while len(loop_pool.clients) > loop_pool.max_clients:
+            # Evict least recently used clients (they are cheap to re-create on the shared session)
+            loop_pool.clients.popitem(last=False)
+        return client
+
+    def _get_loop_pool(self) -> _LoopPool:
+        """Get the pool bound to the running event loop (httpx sessions are loop-bound)."""
+        loop = asyncio.get_running_loop()
+        loop_pool = self._loop_pools.get(loop)
+        if loop_pool is None or loop_pool.session.is_closed:
+            with self._lock:
+                loop_pool = self._loop_pools.get(loop)
+                if loop_pool is None or loop_pool.session.is_closed:
+                    loop_pool = _LoopPool(self._max_clients)
+                    self._loop_pools[loop] = loop_pool
+                    logger.debug(f"Created pooled Supabase HTTP session (http2={_HTTP2_AVAILABLE})")
+        return loop_pool
+
+    # ------------------------------------------------------------------
+    # Sync clients
+    # ------------------------------------------------------------------
+
+    def sync_client(self, use_service_role: bool = False) -> Client:
+        """
+        Cached synchronous Supabase client (one per key, shared across threads).
+
+        Args:
+            use_service_role: If True, use service role key; otherwise use anon key
+
+        Returns:
+            Long-lived supabase Client instance
+        """
+        role = "service_role" if use_service_role else "anon"
+        client = self._sync_clients.get(role)
+        if client is not None:
+            return client
+
+        supabase_url = settings.SUPABASE_URL
+        supabase_key = (
+            settings.SUPABASE_SERVICE_ROLE_KEY if use_service_role
+            else settings.SUPABASE_ANON_KEY
+        )
+        if not supabase_url or not supabase_key:
+            raise ValueError(
+                f"Missing Supabase credentials: URL={bool(supabase_url)}, "
+                f"Key={role}={bool(supabase_key)}"
+            )
+
+        with self._lock:
+            client = self._sync_clients.get(role)
+            if client is None:
+                client = create_client(supabase_url, supabase_key)
+                self._sync_clients[role] = client
+        return client
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def aclose(self) -> None:
+        """Close the HTTP session bound to the current event loop (call on shutdown)."""
+        loop_pool = self._loop_pools.pop(asyncio.get_running_loop(), None)
+        if loop_pool is not None:
+            loop_pool.clients.clear()
+            await loop_pool.session.aclose()
+            logger.debug("Closed pooled Supabase HTTP session")
+
+
+# Global Supabase client pool
+supabase_pool = SupabaseClientPool()
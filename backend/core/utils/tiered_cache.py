@@ -0,0 +1,196 @@
+"""
+Tiered Cache for EvolveAI
+
+Bounded in-memory LRU in front of an optional SQLite key/value table, shared by
+the process-wide caches and stores (LLM responses, embeddings, plan snapshots,
+insights metrics).
+
+- Memory: thread-safe LRU of decoded values, capped at `max_entries`.
+- Disk: when a path is configured, values are also written (encoded) to a SQLite
+  table so restarts and other workers on the host see them. The file is opened on
+  first use; failures only disable the disk tier.
+
+Entries may carry an expiry time. Memory methods (`get`, `remember`, `forget`)
+never touch the disk, so async callers can serve memory hits inline and run the
+disk methods (`load`, `store`, `delete`) with asyncio.to_thread.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+class TieredCache:
+    """Thread-safe LRU with per-entry expiry and an optional SQLite tier."""
+
+    def __init__(
+        self,
+        table: str,
+        max_entries: Callable[[], int],
+        path: Callable[[], str],
+        encode: Callable[[Any], Any] = _identity,
+        decode: Callable[[Any], Any] = _identity,
+    ):
+        """
+        Initialize the cache (the database is opened on first use).
+
+        Args:
+            table: SQLite table name (also used in log messages)
+            max_entries: Returns the in-memory capacity (read on every insert)
+            path: Returns the SQLite file ('' keeps entries in memory only)
+            encode: Value -> TEXT/BLOB stored on disk
+            decode: Stored TEXT/BLOB -> value
+        """
+        self._table = table
+        self._max_entries = max_entries
+        self._path = path
+        self._encode = encode
+        self._decode = decode
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        self._db_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def persistent(self) -> bool:
+        """Whether entries are (still) written to disk."""
+        return bool(self._path()) and not self._db_failed
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """In-memory value of `key`, or None when it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def remember(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Insert into the in-memory LRU and evict the oldest entries."""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(self._max_entries(), 0):
+                self._entries.popitem(last=False)
+
+    def forget(self, key: Hashable) -> None:
+        """Drop `key` from memory."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    # ------------------------------------------------------------------
+    # Disk tier (blocking; failures are logged and treated as misses)
+    # ------------------------------------------------------------------
+
+    def load(self, key: Hashable) -> Optional[Any]:
+        """Value of `key` on disk (also remembered in memory), or None when missing or expired."""
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    f"SELECT value, expires_at FROM {self._table} "
+                    "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    (str(key), time.time()),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ {self._table} read failed: {e}")
+                return None
+        if row is None:
+            return None
+        try:
+            value = self._decode(row[0])
+        except Exception as e:
+            logger.warning(f"⚠️ {self._table} entry could not be decoded: {e}")
+            return None
+        self.remember(key, value, row[1])
+        return value
+
+    def store(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Write `key` to disk (no-op without a disk tier)."""
+        if not self.persistent:
+            return
+        encoded = self._encode(value)
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (str(key), encoded, expires_at),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ {self._table} write failed: {e}")
+
+    def delete(self, key: Hashable) -> None:
+        """Drop `key` from memory and disk."""
+        self.forget(key)
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(f"DELETE FROM {self._table} WHERE key = ?", (str(key),))
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ {self._table} delete failed: {e}")
+
+    def close(self) -> None:
+        """Close the SQLite connection, if open."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use (disk lock held)."""
+        path = self._path()
+        if self._db is not None or self._db_failed or not path:
+            return self._db
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            db.execute(f"DELETE FROM {self._table} WHERE expires_at <= ?", (time.time(),))
+            db.commit()
+            self._db = db
+        except Exception as e:
+            self._db_failed = True
+            logger.warning(f"⚠️ {self._table} persistence disabled ({path}): {e}")
+        return self._db
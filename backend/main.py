@@ -2,6 +2,8 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import sys
 from logging_config import get_logger
@@ -40,10 +42,53 @@ elif not settings.validate():
     logger.error("❌ Critical environment variables are missing. Server will not start.")
     raise ValueError("Missing required environment variables. Check logs for details.")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: warm process-wide caches before serving requests."""
+    if not is_test_env:
+        # Build the shared training coach once, then load the exercise catalog
+        # so exercise matching answers from memory
+        try:
+            from core.training.training_api import get_training_coach
+            from core.training.helpers.exercise_catalog import exercise_catalog
+            from core.base.knowledge_index import get_knowledge_index
+
+            coach = await asyncio.to_thread(get_training_coach)
+            await asyncio.to_thread(exercise_catalog.ensure_loaded, coach.exercise_selector.supabase)
+            # Maps the on-disk snapshot when RAG_SNAPSHOT_DIR is set, else loads from Supabase
+            await asyncio.to_thread(get_knowledge_index(coach.topic).ensure_loaded, coach.supabase)
+            logger.info("✅ Training coach warmed up")
+        except Exception as e:
+            logger.warning(f"⚠️ Training coach warm-up failed (will initialize lazily): {e}")
+        # Token counting falls back to length estimates until the encoding is loaded
+        from core.training.helpers.prompt_budget import preload_tokenizer
+        await asyncio.to_thread(preload_tokenizer)
+
+    # Run queued background jobs (playbook, outlines) in this process unless a
+    # standalone worker (start_worker.py) handles them
+    job_worker = None
+    if not is_test_env and settings.JOB_QUEUE_EMBEDDED_WORKER:
+        import core.training.helpers.background_jobs  # noqa: F401 - registers job handlers
+        from core.utils.job_queue import JobWorker, get_job_queue
+
+        job_worker = JobWorker(get_job_queue())
+        job_worker.start()
+    yield
+    if job_worker is not None:
+        await job_worker.stop()
+    # Write queued latency/telemetry events, then close pooled Supabase keep-alive connections
+    from core.utils.event_sink import event_sink
+    await asyncio.to_thread(event_sink.close)
+    from core.utils.supabase_pool import supabase_pool
+    await supabase_pool.aclose()
+
+
 app = FastAPI(
     title="EvolveAI Training Plan Generator",
     description="FastAPI backend for generating personalized training plans using enhanced AI training Coach",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # Exception handler for Pydantic validation errors
@@ -94,7 +139,6 @@ app.add_middleware(
 
 # Request timeout middleware
 from starlette.middleware.base import BaseHTTPMiddleware
-import asyncio
 
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "300"))  # Default: 5 minutes
 
@@ -796,6 +796,17 @@ class PDFVectorDBPopulator:
         else:
             return False
 
+    def export_snapshot(self, snapshot_dir: str) -> bool:
+        """Export the knowledge base to memory-mappable snapshots (one directory per topic)."""
+        from core.base.knowledge_index import export_knowledge_snapshots
+
+        exported = export_knowledge_snapshots(self.supabase, snapshot_dir)
+        if not exported:
+            logger.error("No knowledge snapshots were written")
+            return False
+        logger.info(f"💾 Exported knowledge snapshots for topics {exported} to {snapshot_dir}")
+        return True
+
 
 def main():
     """Main function to run the PDF population script."""
@@ -806,17 +817,23 @@ def main():
 Examples:
   python populate_vector_db.py --mode=directory --pdf-dir=./data/pdf
   python populate_vector_db.py --mode=file --pdf-path=./data/document.pdf
+  python populate_vector_db.py --mode=snapshot --snapshot-dir=./data/rag_snapshot
         """,
     )
 
     parser.add_argument(
         "--mode",
-        choices=["directory", "file"],
+        choices=["directory", "file", "snapshot"],
         default="directory",
         help="Processing mode",
     )
     parser.add_argument("--pdf-dir", help="Directory containing PDF files to process")
     parser.add_argument("--pdf-path", help="Path to single PDF file to process")
+    parser.add_argument(
+        "--snapshot-dir",
+        default=settings.RAG_SNAPSHOT_DIR or None,
+        help="Export memory-mapped knowledge snapshots here (after populating, or with --mode=snapshot)",
+    )
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Enable verbose logging"
     )
@@ -844,6 +861,15 @@ Examples:
                 sys.exit(1)
             success = populator.process_single_pdf(args.pdf_path)
 
+        elif args.mode == "snapshot":
+            if not args.snapshot_dir:
+                logger.error("Snapshot directory required for snapshot mode")
+                sys.exit(1)
+
+        # Refresh the snapshots so workers don't serve a stale corpus
+        if args.snapshot_dir and (success or args.mode == "snapshot"):
+            success = populator.export_snapshot(args.snapshot_dir)
+
         if success:
             logger.info("✅ PDF processing completed successfully!")
         else:
@@ -0,0 +1,89 @@
+-- Transactional plan writer used by DatabaseService when TRAINING_PLAN_WRITE_RPC=insert_training_weeks.
+--
+-- Input (p_weeks): array of weekly_schedules records, each with a nested "daily_training"
+-- array, whose items carry nested "strength_exercise" and "endurance_session" arrays.
+-- Parent foreign keys are filled in here.
+--
+-- Output: the generated IDs in the same nested order:
+--   [{"id": <week>, "daily_training": [{"id": <day>, "strength_exercise": [<id>...],
+--                                      "endurance_session": [<id>...]}]}]
+--
+-- The whole tree is inserted in one transaction (all or nothing).
+
+create or replace function public.insert_training_weeks(p_weeks jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_week jsonb;
+    v_day jsonb;
+    v_row jsonb;
+    v_week_id bigint;
+    v_day_id bigint;
+    v_id bigint;
+    v_days jsonb;
+    v_strength_ids jsonb;
+    v_endurance_ids jsonb;
+    v_result jsonb := '[]'::jsonb;
+begin
+    for v_week in select value from jsonb_array_elements(p_weeks) loop
+        insert into public.weekly_schedules (
+            training_plan_id, week_number, focus_theme, primary_goal, progression_lever, created_at, updated_at
+        )
+        select training_plan_id, week_number, focus_theme, primary_goal, progression_lever, created_at, updated_at
+        from jsonb_populate_record(null::public.weekly_schedules, v_week)
+        returning id into v_week_id;
+
+        v_days := '[]'::jsonb;
+        for v_day in select value from jsonb_array_elements(coalesce(v_week -> 'daily_training', '[]'::jsonb)) loop
+            insert into public.daily_training (
+                weekly_schedule_id, day_of_week, is_rest_day, training_type, justification,
+                scheduled_date, created_at, updated_at
+            )
+            select v_week_id, day_of_week, is_rest_day, training_type, justification,
+                   scheduled_date, created_at, updated_at
+            from jsonb_populate_record(null::public.daily_training, v_day)
+            returning id into v_day_id;
+
+            v_strength_ids := '[]'::jsonb;
+            for v_row in select value from jsonb_array_elements(coalesce(v_day -> 'strength_exercise', '[]'::jsonb)) loop
+                insert into public.strength_exercise (
+                    daily_training_id, exercise_id, sets, reps, weight, execution_order, completed,
+                    created_at, updated_at
+                )
+                select v_day_id, exercise_id, sets, reps, weight, execution_order, completed,
+                       created_at, updated_at
+                from jsonb_populate_record(null::public.strength_exercise, v_row)
+                returning id into v_id;
+                v_strength_ids := v_strength_ids || to_jsonb(v_id);
+            end loop;
+
+            v_endurance_ids := '[]'::jsonb;
+            for v_row in select value from jsonb_array_elements(coalesce(v_day -> 'endurance_session', '[]'::jsonb)) loop
+                insert into public.endurance_session (
+                    daily_training_id, name, description, sport_type, training_volume, unit,
+                    heart_rate_zone, execution_order, completed, created_at, updated_at
+                )
+                select v_day_id, name, description, sport_type, training_volume, unit,
+                       heart_rate_zone, execution_order, completed, created_at, updated_at
+                from jsonb_populate_record(null::public.endurance_session, v_row)
+                returning id into v_id;
+                v_endurance_ids := v_endurance_ids || to_jsonb(v_id);
+            end loop;
+
+            v_days := v_days || jsonb_build_array(jsonb_build_object(
+                'id', v_day_id,
+                'strength_exercise', v_strength_ids,
+                'endurance_session', v_endurance_ids
+            ));
+        end loop;
+
+        v_result := v_result || jsonb_build_array(jsonb_build_object(
+            'id', v_week_id,
+            'daily_training', v_days
+        ));
+    end loop;
+
+    return v_result;
+end;
+$$;
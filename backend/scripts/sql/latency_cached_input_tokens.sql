@@ -0,0 +1,5 @@
+-- Input tokens served from the provider's prompt cache, recorded by DatabaseService.log_latency_event
+-- (OpenAI prompt_tokens_details.cached_tokens, Gemini cached_content_token_count,
+-- Anthropic cache_read_input_tokens). Apply before deploying a backend that records it.
+
+alter table public.latency add column if not exists cached_input_tokens integer;
@@ -7,7 +7,7 @@ API keys, and system configuration.
 
 import os
 import logging
-from typing import Optional
+from typing import Dict, Optional
 from pathlib import Path
 
 # Lazy logger initialization to avoid import order issues
@@ -81,6 +81,21 @@ class Settings:
         """Temperature setting for LLM generation"""
         return float(os.getenv("TEMPERATURE", "0.7"))
 
+    @property
+    def LLM_CACHE_MAX_ENTRIES(self) -> int:
+        """Structured LLM responses kept in the in-memory LRU (0 disables the response cache)"""
+        return int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+
+    @property
+    def LLM_CACHE_PATH(self) -> str:
+        """Optional SQLite file persisting cached LLM responses across restarts; empty keeps them in memory only"""
+        return os.getenv("LLM_CACHE_PATH", "")
+
+    @property
+    def PLAN_SUMMARY_CACHE_MAX_ENTRIES(self) -> int:
+        """Encoded week summaries (plan context in prompts) kept in the in-memory LRU (0 disables the cache)"""
+        return int(os.getenv("PLAN_SUMMARY_CACHE_MAX_ENTRIES", "512"))
+
     # Supabase Configuration
     @property
     def SUPABASE_URL(self) -> str:
@@ -107,6 +122,21 @@ class Settings:
         """Asymmetric JWT public key (ES256 for ECC P-256 or RS256 for RSA) - for new signing keys"""
         return os.getenv("SUPABASE_JWT_PUBLIC_KEY", "")
 
+    @property
+    def SUPABASE_POOL_MAX_CONNECTIONS(self) -> int:
+        """Maximum concurrent HTTP connections to Supabase per worker event loop"""
+        return int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "50"))
+    
+    @property
+    def SUPABASE_POOL_MAX_KEEPALIVE(self) -> int:
+        """Maximum idle keep-alive connections kept open to Supabase"""
+        return int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+    
+    @property
+    def SUPABASE_HTTP_TIMEOUT_SECONDS(self) -> float:
+        """Timeout for Supabase PostgREST requests in seconds"""
+        return float(os.getenv("SUPABASE_HTTP_TIMEOUT_SECONDS", "120"))
+
     # Service Configuration
     @property
     def PREMIUM_TIER_ENABLED(self) -> bool:
@@ -123,6 +153,181 @@ class Settings:
         """Whether playbook context matching is enabled"""
         return os.getenv("PLAYBOOK_CONTEXT_MATCHING_ENABLED", "false").lower() == "true"
 
+    @property
+    def SPECULATIVE_INITIAL_QUESTIONS(self) -> bool:
+        """Start initial question content with a keyword-guessed athlete type while the LLM classifies"""
+        return os.getenv("SPECULATIVE_INITIAL_QUESTIONS", "true").lower() == "true"
+
+    @property
+    def SPECULATIVE_PLAN_UPDATES(self) -> bool:
+        """Start the chat week update alongside intent classification for messages that look like change requests"""
+        return os.getenv("SPECULATIVE_PLAN_UPDATES", "false").lower() == "true"
+
+    @property
+    def PLAN_GENERATION_STRATEGY(self) -> str:
+        """Initial plan pipeline: sequential, pipelined (warm exercise matching during LLM calls) or fused (+ modality decision in the plan call)"""
+        strategy = os.getenv("PLAN_GENERATION_STRATEGY", "pipelined").lower()
+        return strategy if strategy in ("sequential", "pipelined", "fused") else "pipelined"
+
+    @property
+    def TRAINING_PLAN_WRITE_RPC(self) -> str:
+        """Postgres function used to insert plan weeks in one transactional call (empty = bulk inserts)"""
+        return os.getenv("TRAINING_PLAN_WRITE_RPC", "")
+
+    # Exercise Catalog Configuration
+    @property
+    def EXERCISE_CATALOG_TTL_SECONDS(self) -> float:
+        """Seconds before the in-memory exercise catalog is reloaded from the database"""
+        return float(os.getenv("EXERCISE_CATALOG_TTL_SECONDS", "3600"))
+
+    # RAG Configuration
+    @property
+    def RAG_INDEX_REFRESH_SECONDS(self) -> float:
+        """Seconds between checks whether the knowledge base changed (in-memory vector index)"""
+        return float(os.getenv("RAG_INDEX_REFRESH_SECONDS", "300"))
+
+    @property
+    def RAG_SNAPSHOT_DIR(self) -> str:
+        """Directory with memory-mapped knowledge snapshots (one subdirectory per topic); empty disables them"""
+        return os.getenv("RAG_SNAPSHOT_DIR", "")
+
+    @property
+    def EMBEDDING_CACHE_MAX_ENTRIES(self) -> int:
+        """Query embeddings kept in the in-memory LRU (0 disables the cache)"""
+        return int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+
+    @property
+    def EMBEDDING_CACHE_PATH(self) -> str:
+        """Optional SQLite file persisting cached embeddings across restarts; empty keeps them in memory only"""
+        return os.getenv("EMBEDDING_CACHE_PATH", "")
+
+    # Metrics Event Sink Configuration
+    @property
+    def EVENT_SINK_BATCH_SIZE(self) -> int:
+        """Queued latency/telemetry rows that trigger an early bulk insert"""
+        return int(os.getenv("EVENT_SINK_BATCH_SIZE", "100"))
+
+    @property
+    def EVENT_SINK_FLUSH_SECONDS(self) -> float:
+        """Maximum delay before queued latency/telemetry rows are written"""
+        return float(os.getenv("EVENT_SINK_FLUSH_SECONDS", "2"))
+
+    @property
+    def EVENT_SINK_MAX_QUEUE(self) -> int:
+        """Queued rows before new events are spilled to file or dropped"""
+        return int(os.getenv("EVENT_SINK_MAX_QUEUE", "10000"))
+
+    @property
+    def EVENT_SINK_SPILL_PATH(self) -> str:
+        """Optional JSON-lines file for events that could not be queued or written; empty drops them"""
+        return os.getenv("EVENT_SINK_SPILL_PATH", "")
+
+    # Background Job Queue Configuration
+    @property
+    def JOB_QUEUE_BACKEND(self) -> str:
+        """Background job storage: 'sqlite' (local file) or 'postgres'"""
+        return os.getenv("JOB_QUEUE_BACKEND", "sqlite").lower()
+
+    @property
+    def JOB_QUEUE_PATH(self) -> str:
+        """SQLite file for the background job queue (shared by API and worker processes on one host)"""
+        return os.getenv("JOB_QUEUE_PATH") or str(Path(__file__).parent / "data" / "jobs.sqlite3")
+
+    @property
+    def JOB_QUEUE_DATABASE_URL(self) -> str:
+        """Postgres connection URL when JOB_QUEUE_BACKEND=postgres"""
+        return os.getenv("JOB_QUEUE_DATABASE_URL", "")
+
+    @property
+    def JOB_QUEUE_CONCURRENCY(self) -> int:
+        """Background jobs run at the same time per worker process"""
+        return int(os.getenv("JOB_QUEUE_CONCURRENCY", "2"))
+
+    @property
+    def JOB_QUEUE_MAX_ATTEMPTS(self) -> int:
+        """Attempts per background job before it is marked failed"""
+        return int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "5"))
+
+    @property
+    def JOB_QUEUE_RETRY_BASE_SECONDS(self) -> float:
+        """First retry delay of a failed background job (doubles per attempt)"""
+        return float(os.getenv("JOB_QUEUE_RETRY_BASE_SECONDS", "15"))
+
+    @property
+    def JOB_QUEUE_POLL_SECONDS(self) -> float:
+        """How often idle workers check for new background jobs"""
+        return float(os.getenv("JOB_QUEUE_POLL_SECONDS", "1"))
+
+    @property
+    def JOB_QUEUE_JOB_TIMEOUT_SECONDS(self) -> float:
+        """Maximum run time of one background job attempt"""
+        return float(os.getenv("JOB_QUEUE_JOB_TIMEOUT_SECONDS", "300"))
+
+    @property
+    def JOB_QUEUE_EMBEDDED_WORKER(self) -> bool:
+        """Run a job worker inside the API process (disable when running start_worker.py separately)"""
+        return os.getenv("JOB_QUEUE_EMBEDDED_WORKER", "true").lower() == "true"
+
+    # Request Coalescing Configuration
+    @property
+    def SINGLE_FLIGHT_PATH(self) -> str:
+        """SQLite lock table coalescing duplicate requests across workers on one host; empty coalesces per worker only"""
+        return os.getenv("SINGLE_FLIGHT_PATH", str(Path(__file__).parent / "data" / "single_flight.sqlite3"))
+
+    @property
+    def SINGLE_FLIGHT_LEASE_SECONDS(self) -> float:
+        """Maximum time one worker holds a coalesced request before others run it themselves"""
+        return float(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "330"))
+
+    @property
+    def SINGLE_FLIGHT_RESULT_TTL_SECONDS(self) -> float:
+        """Seconds a finished result is returned to duplicate requests from other workers"""
+        return float(os.getenv("SINGLE_FLIGHT_RESULT_TTL_SECONDS", "15"))
+
+    # Plan Generation Jobs Configuration
+    @property
+    def PLAN_JOBS_PATH(self) -> str:
+        """SQLite file with plan generation jobs so any worker can serve their polls and events; empty keeps them per worker"""
+        return os.getenv("PLAN_JOBS_PATH", str(Path(__file__).parent / "data" / "plan_jobs.sqlite3"))
+
+    # Insights Metrics Configuration
+    @property
+    def INSIGHTS_METRICS_PATH(self) -> str:
+        """SQLite file with per-week insights aggregates shared by workers and restarts; empty keeps them in memory per worker"""
+        return os.getenv("INSIGHTS_METRICS_PATH", "")
+
+    @property
+    def INSIGHTS_METRICS_MAX_ENTRIES(self) -> int:
+        """Plans whose insights aggregates each worker keeps in memory (LRU)"""
+        return int(os.getenv("INSIGHTS_METRICS_MAX_ENTRIES", "1024"))
+
+    # Plan Snapshot Configuration
+    @property
+    def PLAN_SNAPSHOT_MAX_ENTRIES(self) -> int:
+        """Plan snapshots kept in memory per worker for delta chat/create-week requests (0 disables delta requests)"""
+        return int(os.getenv("PLAN_SNAPSHOT_MAX_ENTRIES", "256"))
+
+    @property
+    def PLAN_SNAPSHOT_PATH(self) -> str:
+        """SQLite file with plan snapshots shared by workers and restarts; empty keeps them in memory per worker"""
+        return os.getenv("PLAN_SNAPSHOT_PATH", "")
+
+    # Prompt Budget Configuration
+    @property
+    def PROMPT_TOKENIZER_ENCODING(self) -> str:
+        """tiktoken encoding used to count prompt tokens locally"""
+        return os.getenv("PROMPT_TOKENIZER_ENCODING", "cl100k_base")
+
+    @property
+    def PROMPT_TOKEN_BUDGETS(self) -> Dict[str, int]:
+        """Input token budget per prompt call site ("site=tokens,..."; 0 disables trimming for a site)"""
+        budgets = {"intent_classification": 8000, "week_update": 16000, "week_create": 16000}
+        for entry in os.getenv("PROMPT_TOKEN_BUDGETS", "").split(","):
+            name, _, tokens = entry.partition("=")
+            if name.strip() and tokens.strip().isdigit():
+                budgets[name.strip()] = int(tokens.strip())
+        return budgets
+
     # Development Configuration
     @property
     def DEBUG(self) -> bool:
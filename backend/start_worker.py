@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Startup script for the EvolveAI background job worker.
+
+Runs queued background jobs (initial playbook, plan outlines) outside the API
+process. Set JOB_QUEUE_EMBEDDED_WORKER=false on the API when running this.
+"""
+
+import asyncio
+import signal
+from dotenv import load_dotenv
+
+# Load environment variables before settings are read
+load_dotenv()
+
+from settings import settings  # noqa: E402
+import core.training.helpers.background_jobs  # noqa: E402,F401 - registers job handlers
+from core.training.helpers.prompt_budget import preload_tokenizer  # noqa: E402
+from core.utils.job_queue import JobWorker, get_job_queue  # noqa: E402
+
+
+async def main() -> None:
+    worker = JobWorker(get_job_queue())
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Load the tokenizer off the event loop before jobs start counting prompt tokens
+    await asyncio.to_thread(preload_tokenizer)
+    worker.start()
+    await stop.wait()
+    print("Stopping job worker (waiting for running jobs)...")
+    await worker.stop()
+
+    from core.utils.event_sink import event_sink
+    from core.utils.supabase_pool import supabase_pool
+
+    await asyncio.to_thread(event_sink.close)
+    await supabase_pool.aclose()
+
+
+if __name__ == "__main__":
+    print("Starting EvolveAI job worker...")
+    print(f"Backend: {settings.JOB_QUEUE_BACKEND}")
+    print(f"Concurrency: {settings.JOB_QUEUE_CONCURRENCY}")
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Unit tests for the streamed (SSE) chat endpoint
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock
+
+from core.training import training_api
+from core.training.helpers.stream_utils import JsonStringFieldStream
+from core.training.schemas.question_schemas import PlanFeedbackRequest
+
+
+def _feed_all(stream, text, size):
+    return "".join(stream.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+@pytest.mark.unit
+class TestJsonStringFieldStream:
+    """Decoding a string field from partial JSON."""
+
+    PAYLOAD = json.dumps({
+        "intent": "question",
+        "needs_plan_update": False,
+        "reasoning": "asks about \"depth\"",
+        "ai_message": "Go \"deep\"\nüber 💪 \\ done",
+    })
+
+    @pytest.mark.parametrize("size", [1, 3, 7, 1000])
+    def test_decodes_across_any_chunk_boundary(self, size):
+        stream = JsonStringFieldStream("ai_message", require={"needs_plan_update": False})
+
+        assert _feed_all(stream, self.PAYLOAD, size) == "Go \"deep\"\nüber 💪 \\ done"
+        assert stream.done
+
+    def test_requirement_blocks_streaming(self):
+        stream = JsonStringFieldStream("ai_message", require={"needs_plan_update": False})
+        payload = self.PAYLOAD.replace('"needs_plan_update": false', '"needs_plan_update": true')
+
+        assert _feed_all(stream, payload, 5) == ""
+
+    def test_field_before_requirement_is_not_streamed(self):
+        stream = JsonStringFieldStream("ai_message", require={"needs_plan_update": False})
+
+        assert stream.feed('{"ai_message": "hi", "needs_plan_update": false}') == ""
+
+
+@pytest.mark.unit
+class TestChatStreamEndpoint:
+    """chat_stream sends message deltas, then the final response."""
+
+    @staticmethod
+    def _request():
+        return PlanFeedbackRequest(
+            user_profile_id=1,
+            plan_id=7,
+            feedback_message="Why squats on Monday?",
+            training_plan={"id": 7, "weekly_schedules": [{"week_number": 1, "daily_trainings": []}]},
+            week_number=1,
+            jwt_token="token",
+        )
+
+    @staticmethod
+    def _events(request, coach):
+        async def run():
+            response = await training_api.chat_stream(request, coach)
+            return [chunk async for chunk in response.body_iterator]
+
+        events = []
+        for chunk in asyncio.run(run()):
+            event_line, data_line = chunk.strip().split("\n")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+        return events
+
+    def test_streams_respond_only_reply(self):
+        async def classify(on_message_delta=None, **_):
+            for part in ["Squats ", "build ", "strength."]:
+                on_message_delta(part)
+                await asyncio.sleep(0)
+            return {
+                "intent": "question", "action": "respond_only", "needs_plan_update": False,
+                "confidence": 0.9, "ai_message": "Squats build strength.",
+            }
+
+        events = self._events(self._request(), Mock(classify_feedback_intent_lightweight=classify))
+
+        assert [data["text"] for name, data in events if name == "message_delta"] == ["Squats ", "build ", "strength."]
+        name, result = events[-1]
+        assert name == "result"
+        assert result["ai_response"] == "Squats build strength."
+        assert result["plan_updated"] is False
+
+    def test_request_errors_become_error_events(self):
+        request = self._request()
+        request.week_number = 3
+        events = self._events(request, Mock())
+
+        assert len(events) == 1
+        name, data = events[0]
+        assert name == "error"
+        assert data["status_code"] == 400
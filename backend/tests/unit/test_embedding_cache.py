@@ -0,0 +1,90 @@
+"""
+Unit tests for the query embedding cache
+"""
+import pytest
+from unittest.mock import Mock, patch
+
+from core.base.embedding_cache import EmbeddingCache, normalize_text
+from core.base.rag_service import RAGTool
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """LRU behaviour, key normalization and the SQLite tier."""
+
+    def test_normalizes_whitespace_but_keeps_case(self):
+        assert normalize_text("  Squat\n\tdepth  cues ") == "Squat depth cues"
+        cache = EmbeddingCache(max_entries=10, path="")
+        cache.put("model", 1536, "squat  depth\n", [0.1, 0.2])
+
+        assert cache.get("model", 1536, " squat depth") == [0.1, 0.2]
+        assert cache.get("model", 1536, "Squat depth") is None
+
+    def test_key_includes_model_and_dimensions(self):
+        cache = EmbeddingCache(max_entries=10, path="")
+        cache.put("model-a", 1536, "text", [1.0])
+
+        assert cache.get("model-b", 1536, "text") is None
+        assert cache.get("model-a", 768, "text") is None
+        assert cache.get("model-a", 1536, "text") == [1.0]
+
+    def test_evicts_least_recently_used(self):
+        cache = EmbeddingCache(max_entries=2, path="")
+        cache.put("m", None, "a", [1.0])
+        cache.put("m", None, "b", [2.0])
+        cache.get("m", None, "a")
+        cache.put("m", None, "c", [3.0])
+
+        assert cache.get("m", None, "b") is None
+        assert cache.get("m", None, "a") == [1.0]
+        assert len(cache) == 2
+
+    def test_counts_hits_and_misses(self):
+        cache = EmbeddingCache(max_entries=10, path="")
+        cache.get("m", None, "a")
+        cache.put("m", None, "a", [1.0])
+        cache.get("m", None, "a")
+        cache.put("m", None, "empty", [])
+
+        assert cache.stats() == {
+            "entries": 1, "hits": 1, "disk_hits": 0, "misses": 1, "hit_rate": 0.5,
+        }
+
+    def test_persists_to_sqlite(self, tmp_path):
+        path = str(tmp_path / "cache" / "embeddings.sqlite")
+        cache = EmbeddingCache(max_entries=10, path=path)
+        cache.put("m", 3, "lesson", [0.5, 0.25, 1.0])
+        cache.close()
+
+        restarted = EmbeddingCache(max_entries=10, path=path)
+        assert restarted.get("m", 3, "lesson") == [0.5, 0.25, 1.0]
+        assert restarted.stats()["disk_hits"] == 1
+        restarted.close()
+
+
+@pytest.mark.unit
+class TestRAGToolEmbeddingCache:
+    """generate_embedding only calls the provider for unseen texts."""
+
+    def test_repeated_text_is_embedded_once(self):
+        rag = RAGTool(Mock(topic="training", supabase=Mock()))
+        cache = EmbeddingCache(max_entries=10, path="")
+
+        with patch("core.base.rag_service.embedding_cache", cache), \
+                patch.object(rag, "_generate_embedding_remote", return_value=[0.1, 0.2]) as remote:
+            first = rag.generate_embedding("How deep should I squat?")
+            second = rag.generate_embedding("How deep  should I squat?\n")
+
+        assert first == second == [0.1, 0.2]
+        remote.assert_called_once()
+
+    def test_failed_embeddings_are_retried(self):
+        rag = RAGTool(Mock(topic="training", supabase=Mock()))
+        cache = EmbeddingCache(max_entries=10, path="")
+
+        with patch("core.base.rag_service.embedding_cache", cache), \
+                patch.object(rag, "_generate_embedding_remote", side_effect=[[], [0.3]]) as remote:
+            assert rag.generate_embedding("query") == []
+            assert rag.generate_embedding("query") == [0.3]
+
+        assert remote.call_count == 2
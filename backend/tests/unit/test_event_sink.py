@@ -0,0 +1,167 @@
+"""
+Unit tests for the batched metrics event sink
+"""
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import Mock, patch
+from postgrest.exceptions import APIError
+
+from core.utils.event_sink import EventSink
+from core.training.helpers.database_service import DatabaseService
+from core.training.helpers.llm_client import LLMClient
+
+
+def _client():
+    client = Mock()
+    client.inserts = []
+    client.table.side_effect = lambda table: Mock(
+        insert=lambda rows: Mock(execute=lambda: client.inserts.append((table, list(rows))))
+    )
+    return client
+
+
+@pytest.mark.unit
+class TestEventSink:
+    """Batching, backpressure and shutdown flushing."""
+
+    def test_flush_bulk_inserts_per_table(self):
+        client = _client()
+        sink = EventSink(client_factory=lambda: client, batch_size=2, max_queue=100, spill_path="", start_thread=False)
+        for i in range(3):
+            sink.emit("latency", {"event": "initial_week", "duration_seconds": i})
+        sink.emit("telemetry_events", {"event": "ace_lesson_added", "user_id": "u1"})
+
+        assert sink.flush() == 4
+        assert [(table, len(rows)) for table, rows in client.inserts] == [
+            ("latency", 2), ("latency", 1), ("telemetry_events", 1)
+        ]
+        assert len(sink) == 0
+
+    def test_full_queue_drops_without_spill_path(self):
+        sink = EventSink(client_factory=_client, batch_size=10, max_queue=2, spill_path="", start_thread=False)
+
+        results = [sink.emit("latency", {"event": str(i)}) for i in range(3)]
+
+        assert results == [True, True, False]
+        assert sink.stats()["dropped"] == 1
+
+    def test_overflow_and_failed_batches_spill_to_file(self, tmp_path):
+        spill = tmp_path / "events.jsonl"
+        client = Mock()
+        client.table.return_value.insert.return_value.execute.side_effect = RuntimeError("down")
+        sink = EventSink(client_factory=lambda: client, batch_size=10, max_queue=1,
+                         spill_path=str(spill), start_thread=False)
+        sink.emit("latency", {"event": "a"})
+        sink.emit("latency", {"event": "b"})
+
+        assert sink.flush() == 0
+
+        lines = [json.loads(line) for line in spill.read_text().splitlines()]
+        assert sorted(line["record"]["event"] for line in lines) == ["a", "b"]
+        assert sink.stats()["spilled"] == 2
+
+    def test_spilled_events_are_replayed_by_flusher(self, tmp_path):
+        spill = tmp_path / "events.jsonl"
+        spill.write_text(json.dumps({"table": "latency", "record": {"event": "old"}}) + "\n")
+        client = _client()
+        sink = EventSink(client_factory=lambda: client, batch_size=10, flush_seconds=0.01,
+                         max_queue=100, spill_path=str(spill), start_thread=True)
+
+        sink.emit("latency", {"event": "new"})
+        deadline = time.time() + 2
+        while sum(len(rows) for _, rows in client.inserts) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        sink.close()
+
+        events = sorted(row["event"] for _, rows in client.inserts for row in rows)
+        assert events == ["new", "old"]
+        assert not spill.exists()
+
+    def test_close_flushes_remaining_events(self):
+        client = _client()
+        sink = EventSink(client_factory=lambda: client, batch_size=100, flush_seconds=60,
+                         max_queue=100, spill_path="", start_thread=True)
+        sink.emit("latency", {"event": "last"})
+
+        sink.close()
+
+        assert client.inserts == [("latency", [{"event": "last"}])]
+
+    def test_unknown_column_is_stripped_and_retried(self):
+        client = Mock()
+        inserts = []
+
+        def insert(rows):
+            inserts.append(rows)
+            if any("cached_input_tokens" in row for row in rows):
+                return Mock(execute=Mock(side_effect=APIError({
+                    "code": "PGRST204",
+                    "message": "Could not find the 'cached_input_tokens' column of 'latency' in the schema cache",
+                })))
+            return Mock(execute=Mock())
+
+        client.table.return_value.insert.side_effect = insert
+        sink = EventSink(client_factory=lambda: client, batch_size=10, max_queue=100, spill_path="", start_thread=False)
+        sink.emit("latency", {"event": "a", "cached_input_tokens": 1024})
+        sink.emit("latency", {"event": "b"})
+
+        assert sink.flush() == 2
+        assert inserts[-1] == [{"event": "a"}, {"event": "b"}]
+
+        # Later batches leave the column out up front
+        sink.emit("latency", {"event": "c", "cached_input_tokens": 512})
+        assert sink.flush() == 1
+        assert inserts[-1] == [{"event": "c"}]
+        assert len(inserts) == 3
+        assert sink.stats()["dropped"] == 0
+
+    def test_other_errors_are_not_retried(self):
+        client = Mock()
+        client.table.return_value.insert.return_value.execute.side_effect = APIError(
+            {"code": "23502", "message": "null value in column \"event\""}
+        )
+        sink = EventSink(client_factory=lambda: client, batch_size=10, max_queue=100, spill_path="", start_thread=False)
+        sink.emit("latency", {"event": None})
+
+        assert sink.flush() == 0
+        assert client.table.return_value.insert.call_count == 1
+        assert sink.stats()["dropped"] == 1
+
+
+@pytest.mark.unit
+class TestLatencyLogging:
+    """log_latency_event queues instead of writing inline."""
+
+    def test_log_latency_event_queues_row(self):
+        sink = EventSink(client_factory=_client, max_queue=100, spill_path="", start_thread=False)
+        completion = Mock(usage=Mock(prompt_tokens=10, completion_tokens=5, total_tokens=15), model="gpt")
+
+        with patch("core.training.helpers.database_service.event_sink", sink):
+            assert asyncio.run(DatabaseService().log_latency_event("initial_week", 1.5, completion)) is True
+
+        table, record = sink._queue[0]
+        assert table == "latency"
+        assert record == {
+            "event": "initial_week", "duration_seconds": 1.5,
+            "input_tokens": 10, "output_tokens": 5, "total_tokens": 15, "model": "gpt",
+        }
+
+    def test_log_latency_event_records_cached_input_tokens(self):
+        sink = EventSink(client_factory=_client, max_queue=100, spill_path="", start_thread=False)
+        completion = LLMClient._CompletionLike("gemini", 2000, 50, 2050, cached_tokens=1024)
+
+        with patch("core.training.helpers.database_service.event_sink", sink):
+            assert asyncio.run(DatabaseService().log_latency_event("feedback_classify", 0.8, completion)) is True
+
+        assert sink._queue[0][1]["cached_input_tokens"] == 1024
+
+    def test_zero_cached_input_tokens_are_left_out(self):
+        sink = EventSink(client_factory=_client, max_queue=100, spill_path="", start_thread=False)
+        completion = LLMClient._CompletionLike("gpt", 2000, 50, 2050, cached_tokens=0)
+
+        with patch("core.training.helpers.database_service.event_sink", sink):
+            asyncio.run(DatabaseService().log_latency_event("feedback_classify", 0.8, completion))
+
+        assert "cached_input_tokens" not in sink._queue[0][1]
@@ -0,0 +1,179 @@
+"""
+Unit tests for ExerciseCatalog - in-memory exercise lookups
+"""
+import pytest
+from unittest.mock import Mock
+
+from core.training.helpers.exercise_catalog import ExerciseCatalog, exercise_catalog
+from core.training.helpers.exercise_matcher import ExerciseMatcher
+from core.training.helpers.exercise_selector import ExerciseSelector
+
+
+EXERCISES = [
+    {
+        "id": 1,
+        "name": "Barbell Bench Press",
+        "equipment": "Barbell",
+        "main_muscles": ["Pectoralis Major"],
+        "difficulty": "Intermediate",
+        "exercise_tier": "foundational",
+        "popularity_score": 1,
+        "alternative_names": ["Bench Press"],
+    },
+    {
+        "id": 2,
+        "name": "Dumbbell Fly",
+        "equipment": "Dumbbell",
+        "main_muscles": ["Pectoralis Major"],
+        "difficulty": "Beginner",
+        "exercise_tier": "accessory",
+        "popularity_score": 2,
+        "alternative_names": [],
+    },
+    {
+        "id": 3,
+        "name": "Barbell Squat",
+        "equipment": "Barbell",
+        "main_muscles": ["Quadriceps", "Gluteus Maximus"],
+        "difficulty": "Beginner",
+        "exercise_tier": "foundational",
+        "popularity_score": 1,
+        "alternative_names": ["Back Squat"],
+    },
+    {
+        "id": 4,
+        "name": "Barbell Pin Press",
+        "equipment": "Barbell",
+        "main_muscles": ["Pectoralis Major"],
+        "difficulty": "Advanced",
+        "exercise_tier": "accessory",
+        "popularity_score": 3,
+        "alternative_names": None,
+    },
+]
+
+
+@pytest.mark.unit
+class TestExerciseCatalog:
+    """Test catalog indexing and lookups."""
+
+    @pytest.fixture
+    def catalog(self):
+        catalog = ExerciseCatalog(ttl_seconds=60)
+        catalog.load_records(EXERCISES)
+        return catalog
+
+    def test_get_by_id_accepts_int_and_str(self, catalog):
+        assert catalog.get_by_id(1)["name"] == "Barbell Bench Press"
+        assert catalog.get_by_id("3")["name"] == "Barbell Squat"
+        assert catalog.get_by_id("999") is None
+        assert catalog.get_by_id("abc") is None
+
+    def test_get_candidates_mirrors_database_filters(self, catalog):
+        candidates = catalog.get_candidates(
+            equipment="Barbell", main_muscle="Pectoralis Major", max_popularity=2
+        )
+        assert [c["id"] for c in candidates] == [1]
+
+        # Popularity filter widens the result
+        candidates = catalog.get_candidates(
+            equipment="Barbell", main_muscle="Pectoralis Major", max_popularity=3
+        )
+        assert [c["id"] for c in candidates] == [1, 4]
+
+    def test_get_candidates_by_muscle_only_and_popularity_only(self, catalog):
+        assert [c["id"] for c in catalog.get_candidates(main_muscle="Pectoralis Major")] == [1, 2]
+        assert [c["id"] for c in catalog.get_candidates(main_muscle="Gluteus Maximus")] == [3]
+        assert [c["id"] for c in catalog.get_candidates(max_popularity=2)] == [1, 2, 3]
+
+    def test_get_by_name_uses_normalized_names_and_alternatives(self, catalog):
+        assert [e["id"] for e in catalog.get_by_name("  bench press ")] == [1]
+        assert [e["id"] for e in catalog.get_by_name("BARBELL SQUAT")] == [3]
+        assert catalog.get_by_name("unknown") == []
+
+    def test_filter_exercises_orders_by_popularity(self, catalog):
+        result = catalog.filter_exercises(
+            difficulties=["Beginner", "Intermediate", "Advanced"],
+            equipment=["Barbell"],
+            max_popularity=3,
+        )
+        assert [e["id"] for e in result] == [1, 3, 4]
+
+    def test_invalidate_marks_stale_but_keeps_serving(self, catalog):
+        version = catalog.version
+        catalog.invalidate()
+        assert catalog.is_stale
+        assert catalog.get_by_id(1) is not None
+        catalog.load_records(EXERCISES)
+        assert catalog.version == version + 1
+        assert not catalog.is_stale
+
+    def test_load_paginates_and_rejects_bad_responses(self):
+        catalog = ExerciseCatalog(ttl_seconds=60)
+        mock_client = Mock()
+        chain = mock_client.table.return_value.select.return_value.order.return_value.range.return_value
+        chain.execute.return_value = Mock(data=EXERCISES)
+        assert catalog.load(mock_client) is True
+        assert len(catalog) == len(EXERCISES)
+
+        broken = ExerciseCatalog(ttl_seconds=60)
+        assert broken.load(Mock()) is False
+        assert not broken.is_loaded
+
+
+@pytest.mark.unit
+class TestCatalogIntegration:
+    """Selector and matcher answer from the shared catalog once it is loaded."""
+
+    @pytest.fixture(autouse=True)
+    def loaded_catalog(self):
+        exercise_catalog.load_records(EXERCISES)
+        yield
+        exercise_catalog.clear()
+
+    def test_selector_uses_catalog_without_database(self):
+        selector = ExerciseSelector()
+        selector.supabase = Mock()
+
+        assert selector.get_exercise_by_id("2")["name"] == "Dumbbell Fly"
+        assert selector.validate_exercise_ids(["1", "42"]) == (["1"], ["42"])
+        exercises = selector._get_exercises_by_popularity("beginner", equipment=["Barbell"])
+        assert [e["id"] for e in exercises] == [3]
+        selector.supabase.table.assert_not_called()
+
+    def test_matcher_uses_catalog_for_candidates_and_fallbacks(self):
+        matcher = ExerciseMatcher()
+        matcher.exercise_selector.supabase = Mock()
+
+        match, score, status = matcher.match_ai_exercise_to_database(
+            "Bench Press", "Pectoralis Major", "Barbell"
+        )
+        assert match["id"] == 1
+        assert score == 0.95
+        assert status == "matched"
+
+        # No equipment+muscle candidates -> name-only fallback from memory
+        match, score, status = matcher.match_ai_exercise_to_database(
+            "Barbell Squat", "Latissimus Dorsi", "Cable"
+        )
+        assert match["id"] == 3
+        assert score == 1.0
+        matcher.exercise_selector.supabase.table.assert_not_called()
+
+    def test_matcher_warm_up_prepares_batch_candidate_sets(self):
+        matcher = ExerciseMatcher()
+        matcher.exercise_selector.supabase = Mock()
+
+        assert exercise_catalog.equipment_values() == ["Barbell", "Dumbbell"]
+        assert exercise_catalog.metadata_groups(["Dumbbell"]) == [("Dumbbell", "Pectoralis Major")]
+        # Three Barbell groups plus the name-only fallback pool
+        assert matcher.warm_up(["Barbell"]) == 4
+        warmed = dict(matcher._prepared_cache)
+
+        results = matcher.match_ai_exercises_batch([
+            {"exercise_name": "Bench Press", "main_muscle": "Pectoralis Major", "equipment": "Barbell"},
+        ])
+        assert results[0][0]["id"] == 1
+        # Matching reused the warmed sets instead of preparing new ones
+        assert matcher._prepared_cache == warmed
+        assert all(matcher._prepared_cache[key] is prepared for key, prepared in warmed.items())
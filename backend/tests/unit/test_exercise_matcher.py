@@ -104,3 +104,80 @@ class TestExerciseMatcher:
             assert isinstance(score, float)
             assert 0.0 <= score <= 1.0
 
+
+
+@pytest.mark.unit
+class TestBatchExerciseMatcher:
+    """Batch matching must give exactly the same results as per-exercise matching."""
+    
+    @pytest.fixture
+    def exercise_matcher(self):
+        """Create ExerciseMatcher instance."""
+        return ExerciseMatcher()
+    
+    @pytest.fixture
+    def candidates(self):
+        """Candidates with alternative names, duplicates and empty values."""
+        return [
+            {"id": 1, "name": "Barbell Bench Press", "alternative_names": ["Bench Press", "Flat Bench"]},
+            {"id": 2, "name": "Dumbbell Bench Press", "alternative_names": ["DB Bench Press"]},
+            {"id": 3, "name": "Incline Barbell Bench Press", "alternative_names": None},
+            {"id": 4, "name": "Push Up", "alternative_names": ["Press Up", "", 42]},
+            {"id": 5, "name": "", "alternative_names": ["Floor Press"]},
+            {"id": 6, "name": "Bench Press", "alternative_names": []},
+            {"id": 7, "name": "Cable Crossover", "alternative_names": ["Cable Fly"]},
+        ]
+    
+    @pytest.fixture
+    def ai_names(self):
+        return [
+            "Bench Press", "bench press ", "Flat Bench", "Incline Bench Press",
+            "DB bench", "Pushups", "Floor Press", "Cable Flyes", "Zercher Squat",
+            "Press", "X",
+        ]
+    
+    def test_batch_matches_single_exercise_results(self, exercise_matcher, candidates, ai_names):
+        """Scores, matches and statuses are identical to match_ai_exercise_to_database."""
+        with patch.object(exercise_matcher, '_get_candidates_by_metadata', return_value=candidates):
+            expected = [
+                exercise_matcher.match_ai_exercise_to_database(name, "Pectoralis Major", "Barbell")
+                for name in ai_names
+            ]
+            batch = exercise_matcher.match_ai_exercises_batch([
+                {"exercise_name": name, "main_muscle": "Pectoralis Major", "equipment": "Barbell"}
+                for name in ai_names
+            ])
+        
+        assert len(batch) == len(expected)
+        for (exp_match, exp_score, exp_status), (match, score, status) in zip(expected, batch):
+            assert match is exp_match
+            assert score == exp_score
+            assert status == exp_status
+    
+    def test_batch_fallbacks_match_single_exercise_results(self, exercise_matcher, candidates, ai_names):
+        """Fallback thresholds (0.85 muscle-only, 0.80 name-only) behave identically."""
+        muscle_candidates = candidates[:3]
+        
+        def fallback_candidates(main_muscle, max_popularity=2):
+            return muscle_candidates if main_muscle else candidates
+        
+        with patch.object(exercise_matcher, '_get_candidates_by_metadata', return_value=[]), \
+                patch.object(exercise_matcher, '_get_fallback_candidates', side_effect=fallback_candidates):
+            expected = [
+                exercise_matcher.match_ai_exercise_to_database(name, "Pectoralis Major", "Cable")
+                for name in ai_names
+            ]
+            batch = exercise_matcher.match_ai_exercises_batch([
+                {"exercise_name": name, "main_muscle": "Pectoralis Major", "equipment": "Cable"}
+                for name in ai_names
+            ])
+        
+        assert batch == expected
+    
+    def test_batch_handles_empty_input_and_invalid_names(self, exercise_matcher, candidates):
+        assert exercise_matcher.match_ai_exercises_batch([]) == []
+        with patch.object(exercise_matcher, '_get_candidates_by_metadata', return_value=candidates):
+            results = exercise_matcher.match_ai_exercises_batch([
+                {"exercise_name": None, "main_muscle": "Pectoralis Major", "equipment": "Barbell"}
+            ])
+        assert results == [(None, 0.0, "no_match")]
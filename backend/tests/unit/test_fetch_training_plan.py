@@ -0,0 +1,147 @@
+"""
+Unit tests for _fetch_complete_training_plan - batched plan tree fetch
+"""
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+
+from core.training.training_api import _fetch_complete_training_plan
+from core.training.helpers.exercise_catalog import exercise_catalog
+
+
+TABLES = {
+    "training_plans": [{"id": 10, "user_profile_id": 1, "title": "Plan"}],
+    "weekly_schedules": [
+        {"id": 20, "training_plan_id": 10, "week_number": 1},
+        {"id": 21, "training_plan_id": 10, "week_number": 2},
+    ],
+    "daily_training": [
+        {"id": 30, "weekly_schedule_id": 20, "day_of_week": "Monday", "is_rest_day": False},
+        {"id": 31, "weekly_schedule_id": 20, "day_of_week": "Tuesday", "is_rest_day": True},
+        {"id": 32, "weekly_schedule_id": 21, "day_of_week": "Monday", "is_rest_day": False},
+    ],
+    "strength_exercise": [
+        {"id": 40, "daily_training_id": 30, "exercise_id": 1, "sets": 3},
+        {"id": 41, "daily_training_id": 30, "exercise_id": 2, "sets": 4},
+        {"id": 42, "daily_training_id": 32, "exercise_id": 999, "sets": 2},
+    ],
+    "endurance_session": [
+        {"id": 50, "daily_training_id": 32, "sport_type": "running"},
+    ],
+    "exercises": [
+        {"id": 1, "name": "Barbell Squat"},
+        {"id": 2, "name": "Bench Press"},
+    ],
+}
+
+
+class _FakeQuery:
+    """Minimal async PostgREST builder over in-memory tables."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.is_single = False
+        self.bounds = None
+
+    def select(self, *_):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, {value}))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, set(values)))
+        return self
+
+    def order(self, *_):
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    async def execute(self):
+        self.client.queries.append(self.table)
+        rows = [
+            dict(row) for row in TABLES[self.table]
+            if all(row.get(column) in values for column, values in self.filters)
+        ]
+        if self.bounds is not None:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        return Mock(data=rows[0] if self.is_single else rows)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.queries = []
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+
+@pytest.mark.unit
+class TestFetchCompleteTrainingPlan:
+    """The plan tree is assembled from a constant number of queries."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+        monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+        client = _FakeClient()
+        with patch("core.utils.env_loader.is_test_environment", return_value=False), \
+                patch("core.utils.supabase_pool.supabase_pool.service_role_client", return_value=client):
+            yield client
+
+    def test_assembles_frontend_shape(self, client):
+        plan = asyncio.run(_fetch_complete_training_plan(1))
+
+        week_1, week_2 = plan["weekly_schedules"]
+        monday, tuesday = week_1["daily_training"]
+        assert [se["id"] for se in monday["strength_exercise"]] == [40, 41]
+        assert monday["strength_exercise"][0]["exercises"] == {"id": 1, "name": "Barbell Squat"}
+        assert monday["endurance_session"] == []
+        assert tuesday["strength_exercise"] == [] and tuesday["endurance_session"] == []
+
+        (week_2_monday,) = week_2["daily_training"]
+        assert week_2_monday["strength_exercise"][0]["exercises"] is None
+        assert week_2_monday["endurance_session"] == [
+            {"id": 50, "daily_training_id": 32, "sport_type": "running"}
+        ]
+
+    def test_query_count_is_independent_of_plan_size(self, client):
+        asyncio.run(_fetch_complete_training_plan(1))
+        assert sorted(client.queries) == sorted([
+            "training_plans", "weekly_schedules", "daily_training",
+            "strength_exercise", "endurance_session", "exercises",
+        ])
+
+    def test_exercise_details_come_from_catalog_when_loaded(self, client):
+        exercise_catalog.load_records([
+            {"id": 1, "name": "Barbell Squat"},
+            {"id": 2, "name": "Bench Press"},
+        ])
+        try:
+            plan = asyncio.run(_fetch_complete_training_plan(1))
+        finally:
+            exercise_catalog.clear()
+
+        # Only the unknown id (999) is queried
+        assert client.queries.count("exercises") == 1
+        monday = plan["weekly_schedules"][0]["daily_training"][0]
+        assert monday["strength_exercise"][1]["exercises"]["name"] == "Bench Press"
+
+    def test_children_beyond_one_page_are_fetched(self, client):
+        # With 2-row pages the three daily_training rows need a second request
+        with patch("core.training.training_api._PAGE_SIZE", 2):
+            plan = asyncio.run(_fetch_complete_training_plan(1))
+
+        assert client.queries.count("daily_training") == 2
+        assert [len(week["daily_training"]) for week in plan["weekly_schedules"]] == [2, 1]
+        assert [se["id"] for se in plan["weekly_schedules"][0]["daily_training"][0]["strength_exercise"]] == [40, 41]
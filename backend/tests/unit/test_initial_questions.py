@@ -0,0 +1,115 @@
+"""
+Unit tests for initial question generation (speculative athlete type)
+"""
+import asyncio
+import logging
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from core.training.training_coach import TrainingCoach
+from core.training.helpers.question_checklist_loader import guess_athlete_type
+from core.training.schemas.question_schemas import (
+    AIQuestionResponse,
+    AthleteTypeClassification,
+    PersonalInfo,
+    QuestionContent,
+)
+
+
+def _personal_info(goal: str) -> PersonalInfo:
+    return PersonalInfo(
+        username="sam",
+        age=30,
+        weight=70,
+        height=175,
+        gender="female",
+        goal_description=goal,
+        experience_level="beginner",
+    )
+
+
+def _coach(primary_type: str, secondary_types=()):
+    """Coach with a fake LLM; records the schema of every call and the content prompts."""
+    coach = TrainingCoach.__new__(TrainingCoach)
+    coach.logger = logging.getLogger("test")
+    coach._filter_valid_questions = lambda questions: questions
+    coach._postprocess_questions = lambda questions: questions
+    coach.calls = []
+    coach.content_prompts = []
+
+    async def aparse_structured(prompt, schema, model_type="lightweight", cache_ttl=None):
+        coach.calls.append(schema)
+        if schema is AthleteTypeClassification:
+            await asyncio.sleep(0.02)
+            return AthleteTypeClassification(
+                primary_type=primary_type,
+                secondary_types=list(secondary_types),
+                confidence=0.9,
+                reasoning="goal mentions it",
+            ), Mock()
+        if schema is QuestionContent:
+            coach.content_prompts.append(prompt)
+            await asyncio.sleep(0.01)
+            return Mock(questions_content=[Mock(question_text="How often do you run?", order=1)]), Mock()
+        if schema is AIQuestionResponse:
+            return Mock(questions=[]), Mock()
+        raise AssertionError(schema)
+
+    coach.llm = Mock(aparse_structured=aparse_structured)
+    return coach
+
+
+@pytest.fixture
+def latency(monkeypatch):
+    monkeypatch.setenv("DEBUG", "false")  # conftest enables mock questions
+    with patch("core.training.training_coach.db_service.log_latency_event", new_callable=AsyncMock) as log:
+        yield log
+
+
+@pytest.mark.unit
+class TestGuessAthleteType:
+    """Local keyword classifier."""
+
+    def test_clear_goals(self):
+        assert guess_athlete_type("I want to run a marathon")["primary_type"] == "endurance"
+        assert guess_athlete_type("Lose weight before summer")["primary_type"] == "functional_fitness"
+        assert guess_athlete_type("Get stronger and build muscle")["primary_type"] == "strength"
+
+    def test_secondary_types_and_ambiguity(self):
+        assert guess_athlete_type("run a marathon and build muscle") == {
+            "primary_type": "endurance",
+            "secondary_types": ["strength"],
+        }
+        assert guess_athlete_type("something else entirely") is None
+        assert guess_athlete_type("soccer and muscle") is None  # tie
+
+
+@pytest.mark.unit
+class TestSpeculativeInitialQuestions:
+    """Speculative content is kept when the LLM agrees and discarded otherwise."""
+
+    def test_speculation_hit_skips_second_content_call(self, latency):
+        coach = _coach("endurance")
+        asyncio.run(coach.generate_initial_questions(_personal_info("I want to run a marathon")))
+
+        assert coach.calls.count(QuestionContent) == 1
+        logged = [call.args[0] for call in latency.await_args_list]
+        assert logged == ["athlete_type_classification", "initial_question_generation", "initial_question_formatting"]
+
+    def test_speculation_miss_regenerates_with_classified_type(self, latency):
+        coach = _coach("sport_specific")
+        asyncio.run(coach.generate_initial_questions(_personal_info("I want to run a marathon")))
+
+        # The speculative call was cancelled; the kept content uses the classified type
+        assert coach.calls.count(QuestionContent) == 2
+        assert "goal mentions it" in coach.content_prompts[-1]
+        logged = [call.args[0] for call in latency.await_args_list]
+        assert "initial_question_speculation_discarded" in logged
+        assert logged.count("initial_question_generation") == 1
+
+    def test_disabled_speculation_is_sequential(self, latency, monkeypatch):
+        monkeypatch.setenv("SPECULATIVE_INITIAL_QUESTIONS", "false")
+        coach = _coach("endurance")
+        asyncio.run(coach.generate_initial_questions(_personal_info("I want to run a marathon")))
+
+        assert coach.calls == [AthleteTypeClassification, QuestionContent, AIQuestionResponse]
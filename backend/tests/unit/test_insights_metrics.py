@@ -0,0 +1,345 @@
+"""
+Unit tests for the incremental insights metrics store
+"""
+import asyncio
+import copy
+import numpy as np
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, Mock, patch
+
+from core.training import training_api
+from core.training.helpers.date_mapper import map_daily_training_dates
+from core.training.helpers.insights_metrics import InsightsMetricsStore
+from core.training.helpers.insights_service import InsightsService
+from core.training.helpers.plan_snapshots import plan_snapshots
+from core.training.schemas.insights_schemas import InsightsSummaryRequest
+
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _week(week_number: int, completed_days: int, weight: float, rpe: float, sessions=("Monday", "Wednesday", "Friday")) -> dict:
+    """Sessions on the given days (rest otherwise); the first `completed_days` sessions are completed."""
+    days = []
+    for day in DAYS:
+        is_rest_day = day not in sessions
+        completed = not is_rest_day and sessions.index(day) < completed_days
+        days.append({
+            "day_of_week": day,
+            "is_rest_day": is_rest_day,
+            "completed": completed,
+            "session_rpe": rpe if completed else None,
+            "strength_exercise": [] if is_rest_day else [{
+                "exercise_name": "Squat",
+                "completed": completed,
+                "sets": 3,
+                "reps": [5, 5, 5],
+                "weights": [weight, weight + 5, weight + 10],
+            }],
+        })
+    return {"week_number": week_number, "completed": False, "daily_trainings": days}
+
+
+def _plan() -> dict:
+    return {
+        "id": 42,
+        "created_at": "2020-01-01T00:00:00",
+        "weekly_schedules": [_week(1, 3, 60, 3.0), _week(2, 3, 70, 3.5), _week(3, 1, 80, 4.0), _week(4, 0, 85, 0)],
+    }
+
+
+@pytest.mark.unit
+class TestWeekAggregates:
+    """Metrics computed from per-week aggregates match the full-plan computation."""
+
+    def test_summarize_week(self):
+        summary = InsightsService.summarize_week(_week(3, 1, 80, 4.0))
+        assert summary["completed"] is True
+        assert summary["volume"] == 80 * 5 + 85 * 5 + 90 * 5
+        assert summary["rpe"] == 4.0
+        assert (summary["sessions_completed"], summary["sessions_planned"]) == (1, 3)
+        assert summary["top_sets"] == {"Squat": 90.0}
+        assert summary["days"][1] == {"day_of_week": "Tuesday", "is_rest_day": True, "completed": False}
+
+    @pytest.mark.parametrize("latest_completed_week", [1, 3])
+    def test_metrics_from_weeks_match_plan_metrics(self, latest_completed_week):
+        plan = _plan()
+        # Week 1 holds today (dates are anchored on it); daily sessions give it past sessions on any weekday
+        plan["weekly_schedules"][0] = _week(1, 1, 60, 3.0, sessions=tuple(DAYS))
+        for week in plan["weekly_schedules"][latest_completed_week:]:
+            week.update(_week(week["week_number"], 0, 90, 0))
+        plan = map_daily_training_dates(plan)
+        weeks = [InsightsService.summarize_week(week) for week in plan["weekly_schedules"]]
+
+        assert InsightsService.volume_progress_from_weeks(weeks) == InsightsService.extract_volume_progress(plan)
+        assert InsightsService.training_frequency_from_weeks(weeks, plan["created_at"]) == \
+            InsightsService.extract_training_frequency(plan)
+        assert InsightsService.training_intensity_from_weeks(weeks) == \
+            InsightsService.extract_training_intensity(plan)
+
+    def test_empty_plan(self):
+        assert InsightsService.volume_progress_from_weeks([]).startswith("Establishing baseline")
+        assert InsightsService.training_frequency_from_weeks([]) == "No training data available"
+        assert InsightsService.training_intensity_from_weeks([]) == ("No RPE data available", "stable")
+
+    def test_version_hash(self):
+        metrics = {"weak_points": [], "top_exercises": [{"name": "Squat", "trend": "improving"}]}
+        today = date(2026, 1, 5)
+        base = InsightsService.calculate_version_hash(42, 3, metrics, today)
+
+        assert base == InsightsService.calculate_version_hash(42, 3, dict(metrics), today)
+        assert base != InsightsService.calculate_version_hash(42, 4, metrics, today)
+        assert base != InsightsService.calculate_version_hash(43, 3, metrics, today)
+        assert base != InsightsService.calculate_version_hash(42, 3, metrics, date(2026, 1, 6))
+        assert base != InsightsService.calculate_version_hash(42, 3, {"weak_points": [], "top_exercises": []}, today)
+
+
+@pytest.mark.unit
+class TestInsightsMetricsStore:
+    """Only changed aggregates are written; the version moves when aggregates change."""
+
+    def test_unchanged_plan_writes_nothing(self):
+        store = InsightsMetricsStore(path="")
+        first = store.sync_plan(_plan())
+        second = store.sync_plan(_plan())
+
+        assert first["version"] == second["version"] == 1
+        assert second["weeks"] == first["weeks"]
+        assert [w["week_number"] for w in second["weeks"]] == [1, 2, 3, 4]
+        assert store.stats() == {"summarized": 8, "reused": 0, "written": 4}
+
+    def test_completed_session_rewrites_only_its_week(self):
+        store = InsightsMetricsStore(path="")
+        store.sync_plan(_plan())
+
+        plan = _plan()
+        plan["weekly_schedules"][2] = _week(3, 2, 80, 4.0)
+        snapshot = store.sync_plan(plan)
+
+        assert snapshot["version"] == 2
+        assert store.stats()["written"] == 5
+        assert snapshot["weeks"][2]["sessions_completed"] == 2
+
+    def test_synced_plan_version_skips_summarizing(self):
+        store = InsightsMetricsStore(path="")
+        store.sync_plan(_plan(), plan_version="1-a")
+        snapshot = store.sync_plan(_plan(), plan_version="1-a")
+
+        assert snapshot["version"] == 1
+        assert store.stats() == {"summarized": 4, "reused": 4, "written": 4}
+
+    def test_delta_on_synced_version_summarizes_only_updates(self):
+        store = InsightsMetricsStore(path="")
+        store.sync_plan(_plan(), plan_version="1-a")
+
+        updated_week = _week(3, 2, 80, 4.0)
+        plan = _plan()
+        plan["weekly_schedules"][2] = updated_week
+        snapshot = store.sync_plan(plan, plan_version="2-b", base_version="1-a", week_updates=[updated_week])
+
+        assert snapshot["version"] == 2
+        assert snapshot["weeks"][2]["sessions_completed"] == 2
+        assert store.stats() == {"summarized": 5, "reused": 3, "written": 5}
+
+        # A delta on a version the aggregates were not synced from summarizes the whole plan
+        store.sync_plan(plan, plan_version="4-d", base_version="3-c", week_updates=[])
+        assert store.stats()["summarized"] == 9
+
+    def test_backend_writes_forget_the_synced_version(self):
+        store = InsightsMetricsStore(path="")
+        store.sync_plan(_plan(), plan_version="1-a")
+        store.record_weeks(42, [_week(2, 1, 70, 3.5)])
+
+        snapshot = store.sync_plan(_plan(), plan_version="1-a")
+        assert snapshot["weeks"][1]["sessions_completed"] == 3
+        assert store.stats()["summarized"] == 9
+
+    def test_scheduled_dates_and_irrelevant_changes_keep_version(self):
+        store = InsightsMetricsStore(path="")
+        store.sync_plan(_plan())
+
+        # Dates are re-mapped from today on every request
+        dated = map_daily_training_dates(_plan())
+        assert store.sync_plan(dated)["version"] == 1
+
+        # A content change that does not affect the aggregates keeps the version
+        renamed = _plan()
+        renamed["weekly_schedules"][0]["focus_theme"] = "Base"
+        assert store.sync_plan(renamed)["version"] == 1
+
+    def test_removed_week_and_new_plan_date_bump_version(self):
+        store = InsightsMetricsStore(path="")
+        store.sync_plan(_plan())
+
+        plan = _plan()
+        plan["weekly_schedules"].pop()
+        snapshot = store.sync_plan(plan)
+        assert snapshot["version"] == 2
+        assert len(snapshot["weeks"]) == 3
+
+        plan["created_at"] = "2020-02-01T00:00:00"
+        snapshot = store.sync_plan(plan)
+        assert snapshot["version"] == 3
+        assert snapshot["created_at"] == "2020-02-01T00:00:00"
+
+    def test_record_weeks_from_backend_saves(self):
+        store = InsightsMetricsStore(path="")
+        store.record_weeks(42, _plan()["weekly_schedules"][:2])
+        assert store.get(42)["version"] == 1
+        assert store.get(7) is None
+
+        # Same aggregates (e.g. week re-saved with new IDs) keep the version
+        resaved = copy.deepcopy(_plan()["weekly_schedules"][1])
+        resaved["id"] = 99
+        store.record_weeks(42, [resaved])
+        assert store.get(42)["version"] == 1
+
+        store.record_weeks(42, [_week(2, 1, 70, 3.5)])
+        assert store.get(42)["version"] == 2
+
+    def test_plan_without_id_is_not_stored(self):
+        store = InsightsMetricsStore(path="")
+        plan = _plan()
+        del plan["id"]
+
+        snapshot = store.sync_plan(plan)
+        assert snapshot["version"] is None
+        assert len(snapshot["weeks"]) == 4
+
+    def test_file_store_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / "insights.sqlite3")
+        worker_a = InsightsMetricsStore(path=path)
+        worker_b = InsightsMetricsStore(path=path)
+
+        worker_a.sync_plan(_plan())
+        snapshot = worker_b.sync_plan(_plan())
+        assert snapshot["version"] == 1
+        assert worker_b.stats()["written"] == 0
+        worker_a.close()
+        worker_b.close()
+
+    def test_in_memory_store_keeps_only_recent_plans(self):
+        store = InsightsMetricsStore(path="", max_entries=2)
+        for plan_id in (1, 2, 3):
+            store.sync_plan({**_plan(), "id": plan_id}, plan_version=f"{plan_id}-a")
+
+        assert store.get(1) is None
+        assert store.get(3)["version"] == 1
+        # An evicted plan is summarized again on its next sync
+        store.sync_plan({**_plan(), "id": 1}, plan_version="1-a")
+        assert store.stats()["reused"] == 0
+        assert store.get(2) is None
+
+
+@pytest.mark.unit
+class TestInsightsSummaryPlanVersion:
+    """/insights-summary reuses the synced aggregates of a plan version."""
+
+    def test_delta_request_summarizes_only_week_updates(self):
+        store = InsightsMetricsStore(path="")
+        coach = Mock()
+        coach.llm.aparse_structured = AsyncMock(side_effect=RuntimeError("offline"))
+        plan_snapshots.clear()
+
+        async def summary(**fields):
+            request = InsightsSummaryRequest(user_profile_id=1, jwt_token="token", **fields)
+            return await training_api._generate_insights_summary(request, coach)
+
+        with patch.object(training_api, "insights_metrics", store), \
+                patch.object(training_api, "extract_user_id_from_jwt", return_value="user-1"), \
+                patch.object(training_api.db_service, "get_insights_summary_cache", AsyncMock(return_value=None)), \
+                patch.object(training_api.db_service, "save_insights_summary_cache", AsyncMock()):
+            full = asyncio.run(summary(training_plan=_plan()))
+            assert full.success and full.plan_version
+            assert store.stats()["summarized"] == 4
+
+            unchanged = asyncio.run(summary(plan_id=42, plan_version=full.plan_version))
+            assert unchanged.plan_version == full.plan_version
+            assert store.stats()["summarized"] == 4
+
+            delta = asyncio.run(summary(
+                plan_id=42, plan_version=full.plan_version, week_updates=[_week(4, 1, 85, 4.0)]
+            ))
+            assert delta.plan_version != full.plan_version
+            assert store.stats()["summarized"] == 5
+            assert store.get(42)["weeks"][3]["sessions_completed"] == 1
+        plan_snapshots.clear()
+
+
+def _dated(plan: dict, last_day: date) -> dict:
+    """Schedule the plan's days consecutively, ending on `last_day`."""
+    days = [day for week in plan["weekly_schedules"] for day in week["daily_trainings"]]
+    for offset, day in enumerate(reversed(days)):
+        day["scheduled_date"] = date.fromordinal(last_day.toordinal() - offset).isoformat()
+    return plan
+
+
+def _plans() -> dict:
+    """Plans in different states, dated as stored."""
+    progressing = _plan()
+    progressing["weekly_schedules"][0] = _week(1, 2, 60, 3.0, sessions=tuple(DAYS))
+    # Nine weeks in the past, the last one partly completed
+    long_plan = _dated({
+        "created_at": "2020-01-01T00:00:00",
+        "weekly_schedules": [_week(n, 7 - n % 3, 50 + 5 * n, 2.0 + 0.4 * (n % 4), sessions=tuple(DAYS)) for n in range(1, 10)],
+    }, date.today())
+    untouched = _plan()
+    for week in untouched["weekly_schedules"]:
+        week.update(_week(week["week_number"], 0, 60, 0))
+    no_rpe = _plan()
+    for week in no_rpe["weekly_schedules"]:
+        for day in week["daily_trainings"]:
+            day["session_rpe"] = None
+    rest_only = {"weekly_schedules": [_week(1, 0, 60, 0, sessions=())]}
+    plans = {
+        "progressing": progressing,
+        "long": long_plan,
+        "untouched": untouched,
+        "no_rpe": no_rpe,
+        "rest_only": rest_only,
+        "empty": {"weekly_schedules": []},
+        "undated": _plan(),
+    }
+    return {
+        key: map_daily_training_dates(plan) if key not in ("long", "undated") else plan
+        for key, plan in plans.items()
+    }
+
+
+@pytest.mark.unit
+class TestInsightsBatch:
+    """Vectorized batch metrics match the per-plan extractors."""
+
+    def test_batch_matches_per_plan_metrics(self):
+        plans = _plans()
+        results = InsightsService.extract_metrics_batch(plans)
+
+        assert list(results) == list(plans)
+        for key, plan in plans.items():
+            intensity, trend = InsightsService.extract_training_intensity(plan)
+            assert results[key] == {
+                "volume_progress": InsightsService.extract_volume_progress(plan),
+                "training_frequency": InsightsService.extract_training_frequency(plan),
+                "training_intensity": intensity,
+                "intensity_trend": trend,
+            }, key
+        # The fixtures cover the interesting branches
+        assert "consistency over 9 weeks" in results["long"]["training_frequency"]
+        assert results["untouched"]["training_frequency"] == "No completed training weeks yet"
+        assert results["no_rpe"]["training_intensity"] == "No RPE data recorded"
+        assert results["undated"]["training_frequency"] == "No past trainings to evaluate yet"
+
+    def test_flatten_plans_columns(self):
+        columns = InsightsService.flatten_plans([_plan(), {"weekly_schedules": []}, _plan()])
+
+        assert columns["plan_created"].tolist() == [date(2020, 1, 1).toordinal(), -1, date(2020, 1, 1).toordinal()]
+        assert columns["week_plan"].tolist() == [0, 0, 0, 0, 2, 2, 2, 2]
+        assert len(columns["day_week"]) == 8 * 7
+        assert len(columns["set_weight"]) == 8 * 3 * 3
+        assert columns["set_week"][:9].tolist() == [0] * 9
+        assert columns["set_weight"][:3].tolist() == [60, 65, 70]
+        assert np.isnan(columns["day_rpe"][1])
+
+    def test_empty_batch(self):
+        assert InsightsService.extract_metrics_batch({}) == {}
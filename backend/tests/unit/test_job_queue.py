@@ -0,0 +1,265 @@
+"""
+Unit tests for the durable background job queue
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from core.utils import job_queue
+from core.utils.job_queue import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    JobQueue,
+    JobWorker,
+    SQLiteJobBackend,
+    job_handler,
+    retry_delay,
+)
+
+
+@pytest.fixture
+def handlers():
+    """Isolate the handler registry per test."""
+    with patch.dict(job_queue._handlers, clear=True):
+        yield job_queue._handlers
+
+
+@pytest.mark.unit
+class TestSQLiteJobBackend:
+    """Idempotency, claiming, retries and lease expiry."""
+
+    def test_enqueue_is_idempotent_per_key(self):
+        backend = SQLiteJobBackend(":memory:")
+        first = backend.enqueue("outline", {"plan_id": 1}, "outline:u1:1", 3)
+        second = backend.enqueue("outline", {"plan_id": 1}, "outline:u1:1", 3)
+        other = backend.enqueue("outline", {"plan_id": 2}, "outline:u1:2", 3)
+
+        assert first["created"] is True
+        assert second["created"] is False
+        assert second["id"] == first["id"]
+        assert other["id"] != first["id"]
+
+    def test_claim_complete(self):
+        backend = SQLiteJobBackend(":memory:")
+        queued = backend.enqueue("outline", {"plan_id": 1}, "k1", 3)
+
+        job = backend.claim(60, ["outline"])
+        assert job["id"] == queued["id"]
+        assert job["payload"] == {"plan_id": 1}
+        assert job["attempts"] == 1
+        assert backend.claim(60, ["outline"]) is None  # leased
+
+        backend.complete(job["id"])
+        assert backend.get(job["id"])["status"] == SUCCEEDED
+        # A succeeded key is not queued again
+        assert backend.enqueue("outline", {"plan_id": 1}, "k1", 3)["created"] is False
+
+    def test_claim_only_registered_kinds(self):
+        backend = SQLiteJobBackend(":memory:")
+        backend.enqueue("playbook", {}, "k1", 3)
+        assert backend.claim(60, ["outline"]) is None
+        assert backend.claim(60, ["playbook"])["kind"] == "playbook"
+
+    def test_failed_job_waits_for_retry_time(self):
+        backend = SQLiteJobBackend(":memory:")
+        backend.enqueue("outline", {}, "k1", 3)
+        job = backend.claim(60, ["outline"])
+
+        backend.fail(job["id"], "boom", time.time() + 3600)
+        row = backend.get(job["id"])
+        assert row["status"] == QUEUED
+        assert row["last_error"] == "boom"
+        assert backend.claim(60, ["outline"]) is None
+
+        backend.fail(job["id"], "boom", time.time() - 1)
+        assert backend.claim(60, ["outline"])["attempts"] == 2
+
+    def test_permanently_failed_key_can_be_requeued(self):
+        backend = SQLiteJobBackend(":memory:")
+        first = backend.enqueue("outline", {"v": 1}, "k1", 1)
+        job = backend.claim(60, ["outline"])
+        backend.fail(job["id"], "boom", None)
+        assert backend.get(job["id"])["status"] == FAILED
+
+        again = backend.enqueue("outline", {"v": 2}, "k1", 1)
+        assert again["created"] is True
+        assert again["id"] == first["id"]
+        job = backend.claim(60, ["outline"])
+        assert job["payload"] == {"v": 2}
+        assert job["attempts"] == 1
+
+    def test_expired_lease_is_reclaimed(self):
+        backend = SQLiteJobBackend(":memory:")
+        backend.enqueue("outline", {}, "k1", 3)
+        job = backend.claim(-1, ["outline"])  # lease already expired (worker died)
+        assert backend.get(job["id"])["status"] == RUNNING
+
+        reclaimed = backend.claim(60, ["outline"])
+        assert reclaimed["id"] == job["id"]
+        assert reclaimed["attempts"] == 2
+
+    def test_file_backend_shared_between_connections(self, tmp_path):
+        path = str(tmp_path / "jobs" / "jobs.sqlite3")
+        producer = SQLiteJobBackend(path)
+        consumer = SQLiteJobBackend(path)
+        producer.enqueue("outline", {"plan_id": 7}, "k1", 3)
+
+        assert consumer.claim(60, ["outline"])["payload"] == {"plan_id": 7}
+        assert producer.claim(60, ["outline"]) is None
+        producer.close()
+        consumer.close()
+
+    def test_retry_delay_backs_off_exponentially(self):
+        with patch("core.utils.job_queue.random.uniform", return_value=1.0):
+            assert [retry_delay(n, 10) for n in (1, 2, 3)] == [10, 20, 40]
+            assert retry_delay(20, 10) == job_queue._MAX_BACKOFF_SECONDS
+
+
+@pytest.mark.unit
+class TestJobWorker:
+    """Running registered handlers with retries."""
+
+    def test_runs_handler_and_marks_succeeded(self, handlers):
+        handler = AsyncMock()
+        job_handler("outline")(handler)
+        queue = JobQueue(SQLiteJobBackend(":memory:"))
+
+        async def run():
+            job = await queue.enqueue("outline", {"plan_id": 3}, "k1")
+            ran = await JobWorker(queue, concurrency=1, poll_seconds=0, timeout_seconds=5).run_once()
+            return job, ran
+
+        job, ran = asyncio.run(run())
+        assert ran is True
+        handler.assert_awaited_once_with({"plan_id": 3})
+        assert queue.backend.get(job["id"])["status"] == SUCCEEDED
+
+    def test_failure_is_retried_then_fails_permanently(self, handlers):
+        job_handler("outline")(AsyncMock(side_effect=RuntimeError("llm down")))
+        queue = JobQueue(SQLiteJobBackend(":memory:"))
+        worker = JobWorker(queue, concurrency=1, poll_seconds=0, timeout_seconds=5)
+
+        async def run():
+            job = await queue.enqueue("outline", {}, "k1")
+            await worker.run_once()
+            first = queue.backend.get(job["id"])
+            await worker.run_once()
+            return first, queue.backend.get(job["id"])
+
+        with patch.object(type(job_queue.settings), "JOB_QUEUE_MAX_ATTEMPTS", 2), \
+             patch.object(type(job_queue.settings), "JOB_QUEUE_RETRY_BASE_SECONDS", 0):
+            first, final = asyncio.run(run())
+        assert first["status"] == QUEUED
+        assert first["last_error"] == "RuntimeError: llm down"
+        assert final["status"] == FAILED
+        assert final["attempts"] == 2
+
+    def test_timeout_counts_as_failure(self, handlers):
+        async def slow(payload):
+            await asyncio.sleep(1)
+
+        job_handler("outline")(slow)
+        queue = JobQueue(SQLiteJobBackend(":memory:"))
+
+        async def run():
+            job = await queue.enqueue("outline", {}, "k1")
+            await JobWorker(queue, concurrency=1, poll_seconds=0, timeout_seconds=0.01).run_once()
+            return queue.backend.get(job["id"])
+
+        row = asyncio.run(run())
+        assert row["status"] == QUEUED
+        assert row["last_error"] == "TimeoutError"
+
+    def test_start_and_stop_drain_queue(self, handlers):
+        done = []
+
+        async def handler(payload):
+            done.append(payload["n"])
+
+        job_handler("outline")(handler)
+        queue = JobQueue(SQLiteJobBackend(":memory:"))
+
+        async def run():
+            for n in range(3):
+                await queue.enqueue("outline", {"n": n}, f"k{n}")
+            worker = JobWorker(queue, concurrency=2, poll_seconds=0.01, timeout_seconds=5)
+            worker.start()
+            for _ in range(100):
+                if len(done) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            await worker.stop()
+
+        asyncio.run(run())
+        assert sorted(done) == [0, 1, 2]
+
+
+@pytest.mark.unit
+class TestPlanBackgroundJobs:
+    """Playbook/outline jobs queued by plan generation."""
+
+    def test_outline_job_is_keyed_per_plan(self):
+        from core.training.helpers import background_jobs
+
+        queue = JobQueue(SQLiteJobBackend(":memory:"))
+        personal_info = Mock()
+        personal_info.model_dump.return_value = {"user_id": "u1"}
+
+        async def run():
+            with patch.object(background_jobs, "get_job_queue", return_value=queue):
+                first = await background_jobs.enqueue_plan_outline("u1", 5, personal_info, "answers", {"id": 5})
+                retry = await background_jobs.enqueue_plan_outline("u1", 5, personal_info, "answers", {"id": 5})
+            return first, retry
+
+        first, retry = asyncio.run(run())
+        assert first["created"] is True
+        assert retry["created"] is False
+        job = queue.backend.claim(60, [background_jobs.PLAN_OUTLINE_JOB])
+        assert job["idempotency_key"] == "build_plan_outline:u1:5"
+        assert job["payload"]["training_plan_data"] == {"id": 5}
+
+    def test_playbook_job_is_keyed_per_plan(self):
+        from core.training.helpers import background_jobs
+
+        queue = JobQueue(SQLiteJobBackend(":memory:"))
+        personal_info = Mock()
+        personal_info.model_dump.return_value = {"user_id": "u1"}
+
+        async def run():
+            with patch.object(background_jobs, "get_job_queue", return_value=queue):
+                first = await background_jobs.enqueue_initial_playbook("u1", 5, personal_info, "answers")
+                retry = await background_jobs.enqueue_initial_playbook("u1", 5, personal_info, "answers")
+                # Re-onboarding within the retention window creates a new plan and a new job
+                regenerated = await background_jobs.enqueue_initial_playbook("u1", 6, personal_info, "answers")
+            return first, retry, regenerated
+
+        first, retry, regenerated = asyncio.run(run())
+        assert (first["created"], retry["created"], regenerated["created"]) == (True, False, True)
+        job = queue.backend.claim(60, [background_jobs.INITIAL_PLAYBOOK_JOB])
+        assert job["idempotency_key"] == "build_initial_playbook:u1:5"
+
+    def test_outline_handler_raises_when_append_fails(self):
+        from core.training.helpers import background_jobs
+
+        coach = Mock()
+        coach._generate_future_week_outlines = AsyncMock(return_value={"weekly_schedules": [{"week_number": 2}]})
+        payload = {
+            "user_id": "u1",
+            "plan_id": 5,
+            "personal_info": {},
+            "formatted_initial_responses": "answers",
+            "training_plan_data": {},
+        }
+
+        with patch.object(background_jobs, "_get_coach", return_value=coach), \
+             patch.object(background_jobs, "PersonalInfo"), \
+             patch.object(background_jobs.db_service, "append_weekly_schedules",
+                          AsyncMock(return_value={"success": False, "error": "db down"})) as append:
+            with pytest.raises(RuntimeError):
+                asyncio.run(background_jobs.build_plan_outline(payload))
+
+        weeks = append.await_args.kwargs["weekly_schedules"]
+        assert weeks == [{"week_number": 2, "training_plan_id": 5, "daily_trainings": []}]
@@ -0,0 +1,172 @@
+"""
+Unit tests for KnowledgeIndex - in-memory vector search for RAG
+"""
+import json
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+
+from core.base.knowledge_index import KnowledgeIndex, get_knowledge_index
+from core.base.rag_service import RAGTool
+
+
+DOCUMENTS = [
+    {"id": 1, "title": "Squat Guide", "keywords": ["squat"], "topic": "training"},
+    {"id": 2, "title": "Running Basics", "keywords": ["running"], "topic": "training"},
+]
+
+EMBEDDINGS = [
+    {"id": 10, "document_id": 1, "chunk_index": 0, "chunk_text": "squat depth", "embedding": json.dumps([1.0, 0.0, 0.0])},
+    {"id": 11, "document_id": 1, "chunk_index": 1, "chunk_text": "squat bar path", "embedding": [0.9, 0.1, 0.0]},
+    {"id": 12, "document_id": 2, "chunk_index": 0, "chunk_text": "easy pace", "embedding": [0.0, 1.0, 0.0]},
+    {"id": 13, "document_id": 2, "chunk_index": 1, "chunk_text": "broken", "embedding": "not json"},
+    {"id": 14, "document_id": 99, "chunk_index": 0, "chunk_text": "other topic", "embedding": [1.0, 0.0, 0.0]},
+]
+
+
+@pytest.mark.unit
+class TestKnowledgeIndex:
+    """Test matrix construction and top-k search."""
+
+    @pytest.fixture
+    def index(self):
+        index = KnowledgeIndex("training", refresh_seconds=60)
+        index.load_records(DOCUMENTS, EMBEDDINGS)
+        return index
+
+    def test_skips_invalid_and_foreign_embeddings(self, index):
+        assert len(index) == 3
+        assert index.dimensions == 3
+        assert np.allclose(np.linalg.norm(index._matrix, axis=1), 1.0)
+
+    def test_search_returns_top_k_best_first(self, index):
+        results = index.search([2.0, 0.0, 0.0], top_k=2)
+        assert [r["chunk_text"] for r in results] == ["squat depth", "squat bar path"]
+        assert results[0]["relevance_score"] == pytest.approx(1.0)
+        assert results[0]["document_title"] == "Squat Guide"
+        assert results[0]["document_keywords"] == ["squat"]
+
+    def test_search_matches_bruteforce_cosine(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(200, 16))
+        index = KnowledgeIndex("training", refresh_seconds=60)
+        index.load_records(
+            [{"id": 1, "title": "Doc"}],
+            [{"document_id": 1, "chunk_index": i, "chunk_text": str(i), "embedding": v.tolist()}
+             for i, v in enumerate(vectors)],
+        )
+        query = rng.normal(size=16)
+        expected = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+
+        results = index.search(query.tolist(), top_k=7)
+
+        assert [int(r["chunk_text"]) for r in results] == list(np.argsort(-expected)[:7])
+
+    def test_search_rejects_dimension_mismatch(self, index):
+        assert index.search([1.0, 0.0], top_k=3) == []
+
+    def test_reloads_only_when_fingerprint_changes(self, index):
+        client = Mock()
+        fingerprint = client.table.return_value.select.return_value.order.return_value.limit.return_value
+        fingerprint.execute.return_value = Mock(count=5, data=[{"id": 14}])
+        index._fingerprint = (5, 14)
+        index._checked_at = None
+
+        with patch("core.base.knowledge_index.is_test_environment", return_value=False), \
+                patch.object(index, "load", return_value=True) as load:
+            assert index.ensure_loaded(client) is True
+            load.assert_not_called()
+
+            index._checked_at = None
+            fingerprint.execute.return_value = Mock(count=6, data=[{"id": 15}])
+            index.ensure_loaded(client)
+            load.assert_called_once_with(client)
+
+
+@pytest.mark.unit
+class TestRAGToolSearch:
+    """search_knowledge_base answers from the shared index."""
+
+    @pytest.fixture(autouse=True)
+    def loaded_index(self):
+        index = get_knowledge_index("training")
+        index.load_records(DOCUMENTS, EMBEDDINGS)
+        yield
+        index.clear()
+
+    def test_search_knowledge_base_uses_index(self):
+        agent = Mock(topic="training", supabase=Mock())
+        rag = RAGTool(agent)
+
+        with patch.object(rag, "generate_embedding", return_value=[1.0, 0.0, 0.0]):
+            results = rag.search_knowledge_base("how deep should I squat", max_results=2)
+
+        assert [r["chunk_text"] for r in results] == ["squat depth", "squat bar path"]
+        agent.supabase.table.assert_not_called()
+
+    def test_poor_results_fall_back_to_top_five(self):
+        agent = Mock(topic="training", supabase=Mock())
+        rag = RAGTool(agent)
+
+        with patch.object(rag, "generate_embedding", return_value=[0.0, 0.0, 1.0]):
+            results = rag.search_knowledge_base("unrelated")
+
+        assert len(results) == 3
+        assert all(r["quality_level"] == "poor" for r in results)
+
+
+@pytest.mark.unit
+class TestKnowledgeSnapshot:
+    """Export to / memory-map from the on-disk snapshot format."""
+
+    @pytest.fixture
+    def index(self):
+        index = KnowledgeIndex("training", refresh_seconds=60, snapshot_dir="")
+        index.load_records(DOCUMENTS, EMBEDDINGS)
+        index._fingerprint = (5, 14)
+        return index
+
+    def test_roundtrip_matches_in_memory_search(self, index, tmp_path):
+        index.export_snapshot(str(tmp_path))
+        mapped = KnowledgeIndex("training", refresh_seconds=60, snapshot_dir="")
+
+        assert mapped.load_snapshot(str(tmp_path)) is True
+        assert isinstance(mapped._matrix, np.memmap)
+        assert mapped.source == "snapshot"
+        assert mapped._fingerprint == (5, 14)
+        query = [0.7, 0.7, 0.0]
+        assert mapped.search(query, top_k=3) == index.search(query, top_k=3)
+
+    def test_roundtrip_preserves_unicode_text(self, tmp_path):
+        index = KnowledgeIndex("training", refresh_seconds=60, snapshot_dir="")
+        index.load_records(
+            [{"id": "doc-1", "title": "Über"}],
+            [{"document_id": "doc-1", "chunk_index": i, "chunk_text": text, "embedding": [1.0, float(i)]}
+             for i, text in enumerate(["Kniebeuge – tiefe", "", "ρυθμός"])],
+        )
+        index.export_snapshot(str(tmp_path))
+        mapped = KnowledgeIndex("training", snapshot_dir="")
+        mapped.load_snapshot(str(tmp_path))
+
+        texts = sorted(r["chunk_text"] for r in mapped.search([1.0, 1.0], top_k=3))
+        assert texts == sorted(["Kniebeuge – tiefe", "", "ρυθμός"])
+        assert mapped.search([1.0, 0.0], top_k=1)[0]["document_id"] == "doc-1"
+
+    def test_inconsistent_snapshot_is_rejected(self, index, tmp_path):
+        index.export_snapshot(str(tmp_path))
+        manifest_path = tmp_path / "manifest.json"
+        manifest = json.loads(manifest_path.read_text())
+        manifest["count"] = 10
+        manifest_path.write_text(json.dumps(manifest))
+        mapped = KnowledgeIndex("training", snapshot_dir="")
+
+        assert mapped.load_snapshot(str(tmp_path)) is False
+        assert mapped.load_snapshot(str(tmp_path / "missing")) is False
+        assert not mapped.is_loaded
+
+    def test_ensure_loaded_prefers_snapshot(self, index, tmp_path):
+        index.export_snapshot(str(tmp_path))
+        mapped = KnowledgeIndex("training", refresh_seconds=60, snapshot_dir=str(tmp_path))
+
+        assert mapped.ensure_loaded(None) is True
+        assert len(mapped) == 3
@@ -0,0 +1,105 @@
+"""
+Unit tests for the content-addressed LLM response cache
+"""
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from pydantic import BaseModel
+
+from core.training.helpers.llm_cache import LLMResponseCache, response_cache_key
+from core.utils.tiered_cache import TieredCache
+
+
+class _Classification(BaseModel):
+    primary_type: str
+    confidence: float
+
+
+class _OtherSchema(BaseModel):
+    primary_type: str
+
+
+@pytest.mark.unit
+class TestLLMResponseCache:
+    """Keys, TTLs, LRU eviction and the SQLite tier."""
+
+    def test_key_depends_on_model_temperature_schema_and_prompt(self):
+        base = response_cache_key("gpt-4o-mini", 0.7, _Classification, "lose weight")
+        assert base == response_cache_key("gpt-4o-mini", 0.7, _Classification, "lose weight")
+        assert base != response_cache_key("gpt-4o", 0.7, _Classification, "lose weight")
+        assert base != response_cache_key("gpt-4o-mini", 0.2, _Classification, "lose weight")
+        assert base != response_cache_key("gpt-4o-mini", 0.7, _OtherSchema, "lose weight")
+        assert base != response_cache_key("gpt-4o-mini", 0.7, _Classification, "run a marathon")
+
+    def test_put_get_and_stats(self):
+        cache = LLMResponseCache(max_entries=10, path="")
+        key = response_cache_key("m", 0.7, _Classification, "p")
+        assert cache.get(key, _Classification) is None
+
+        cache.put(key, _Classification(primary_type="endurance", confidence=0.9), ttl_seconds=60)
+        assert cache.get(key, _Classification) == _Classification(primary_type="endurance", confidence=0.9)
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+        assert stats["by_schema"]["_Classification"] == {"hits": 1, "misses": 1}
+
+    def test_expired_entries_are_misses(self):
+        cache = LLMResponseCache(max_entries=10, path="")
+        cache.put("k", _Classification(primary_type="strength", confidence=0.5), ttl_seconds=10)
+        with patch("core.training.helpers.llm_cache.time.time", return_value=time.time() + 11):
+            assert cache.get("k", _Classification) is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = LLMResponseCache(max_entries=2, path="")
+        for key in ("a", "b"):
+            cache.put(key, _OtherSchema(primary_type=key), ttl_seconds=60)
+        cache.get("a", _OtherSchema)  # a is now most recent
+        cache.put("c", _OtherSchema(primary_type="c"), ttl_seconds=60)
+
+        assert cache.get("b", _OtherSchema) is None
+        assert cache.get("a", _OtherSchema).primary_type == "a"
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = LLMResponseCache(max_entries=0, path="")
+        cache.put("k", _OtherSchema(primary_type="x"), ttl_seconds=60)
+        assert not cache.enabled
+        assert len(cache) == 0
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "llm_cache.sqlite")
+        cache = LLMResponseCache(max_entries=10, path=path)
+        cache.put("k", _OtherSchema(primary_type="hybrid"), ttl_seconds=60)
+        cache.close()
+
+        restarted = LLMResponseCache(max_entries=10, path=path)
+        assert restarted.get("k", _OtherSchema) == _OtherSchema(primary_type="hybrid")
+        assert restarted.stats()["disk_hits"] == 1
+        restarted.close()
+
+    def test_async_disk_tier_runs_off_the_event_loop(self, tmp_path):
+        path = str(tmp_path / "llm_cache.sqlite")
+        disk_threads = []
+
+        def on_thread(method):
+            def wrapper(*args, **kwargs):
+                disk_threads.append(threading.current_thread())
+                return method(*args, **kwargs)
+            return wrapper
+
+        cache = LLMResponseCache(max_entries=10, path=path)
+        asyncio.run(cache.aput("k", _OtherSchema(primary_type="hybrid"), ttl_seconds=60))
+        assert asyncio.run(cache.aget("k", _OtherSchema)) == _OtherSchema(primary_type="hybrid")
+        cache.close()
+
+        restarted = LLMResponseCache(max_entries=10, path=path)
+        with patch.object(TieredCache, "store", on_thread(TieredCache.store)), \
+                patch.object(TieredCache, "load", on_thread(TieredCache.load)):
+            assert asyncio.run(restarted.aget("k", _OtherSchema)) == _OtherSchema(primary_type="hybrid")
+            asyncio.run(restarted.aput("j", _OtherSchema(primary_type="strength"), ttl_seconds=60))
+        assert restarted.stats()["disk_hits"] == 1
+        assert len(disk_threads) == 2
+        assert all(thread is not threading.main_thread() for thread in disk_threads)
+        restarted.close()
@@ -0,0 +1,186 @@
+"""
+Unit tests for LLMClient async variants
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from pydantic import BaseModel
+
+from core.training.helpers.llm_client import LLMClient
+from core.training.helpers.prompt_budget import SegmentedPrompt
+
+
+class _Answer(BaseModel):
+    answer: str
+
+
+@pytest.mark.unit
+class TestAsyncLLMClient:
+    """Test achat_text / achat_parse."""
+
+    @pytest.fixture
+    def gemini_client(self, monkeypatch):
+        monkeypatch.setenv("LLM_MODEL_COMPLEX", "gemini-2.5-flash")
+        monkeypatch.setenv("LLM_MODEL_LIGHTWEIGHT", "gemini-2.5-flash-lite")
+        return LLMClient()
+
+    def test_async_clients_are_shared_across_instances(self, gemini_client):
+        """All LLMClient instances reuse one async client (one connection pool) per provider."""
+        other = LLMClient()
+        assert gemini_client._get_async_client("gemini") is other._get_async_client("gemini")
+
+    def test_achat_parse_gemini_returns_parsed_obj_and_usage(self, gemini_client):
+        response = Mock(
+            parsed={"answer": "yes"},
+            usage_metadata=Mock(prompt_token_count=10, candidates_token_count=5, total_token_count=15),
+        )
+        async_client = Mock()
+        async_client.models.generate_content = AsyncMock(return_value=response)
+
+        with patch.object(gemini_client, "_get_async_instructor_model", return_value=async_client):
+            parsed, completion = asyncio.run(gemini_client.achat_parse("prompt", _Answer, "lightweight"))
+
+        assert parsed == _Answer(answer="yes")
+        assert completion.model == "gemini-2.5-flash-lite"
+        assert completion.usage.total_tokens == 15
+        async_client.models.generate_content.assert_awaited_once()
+
+    def test_achat_text_gemini_joins_messages(self, gemini_client):
+        async_client = Mock()
+        async_client.models.generate_content = AsyncMock(return_value=Mock(text="hello"))
+
+        with patch.object(gemini_client, "_get_async_client", return_value=async_client):
+            text = asyncio.run(gemini_client.achat_text(
+                [{"role": "system", "content": "be brief"}, {"role": "user", "content": "hi"}],
+                model_type="complex",
+            ))
+
+        assert text == "hello"
+        kwargs = async_client.models.generate_content.await_args.kwargs
+        assert kwargs["model"] == "gemini-2.5-flash"
+        assert kwargs["contents"] == "SYSTEM: be brief\nUSER: hi"
+
+    def test_astream_parse_gemini_forwards_chunks_and_parses(self, gemini_client):
+        chunks = [
+            Mock(text='{"answer": "y', usage_metadata=None),
+            Mock(text='es"}', usage_metadata=Mock(prompt_token_count=10, candidates_token_count=5, total_token_count=15)),
+        ]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async_client = Mock()
+        async_client.models.generate_content_stream = AsyncMock(return_value=stream())
+        received = []
+
+        with patch.object(gemini_client, "_get_async_client", return_value=async_client):
+            parsed, completion = asyncio.run(
+                gemini_client.astream_parse("prompt", _Answer, "lightweight", on_text=received.append)
+            )
+
+        assert received == ['{"answer": "y', 'es"}']
+        assert parsed == _Answer(answer="yes")
+        assert completion.usage.total_tokens == 15
+
+
+@pytest.mark.unit
+class TestLLMResponseCaching:
+    """aparse_structured with cache_ttl."""
+
+    @pytest.fixture
+    def gemini_client(self, monkeypatch):
+        monkeypatch.setenv("LLM_MODEL_COMPLEX", "gemini-2.5-flash")
+        monkeypatch.setenv("LLM_MODEL_LIGHTWEIGHT", "gemini-2.5-flash-lite")
+        return LLMClient()
+
+    def test_identical_prompt_is_served_from_cache(self, gemini_client):
+        from core.training.helpers.llm_cache import LLMResponseCache
+
+        cache = LLMResponseCache(max_entries=10, path="")
+        achat_parse = AsyncMock(return_value=(_Answer(answer="yes"), Mock()))
+
+        async def run():
+            with patch("core.training.helpers.llm_client.llm_response_cache", cache), \
+                 patch.object(gemini_client, "achat_parse", achat_parse):
+                first = await gemini_client.aparse_structured("prompt", _Answer, cache_ttl=60)
+                second = await gemini_client.aparse_structured("prompt", _Answer, cache_ttl=60)
+                uncached = await gemini_client.aparse_structured("prompt", _Answer)
+            return first, second, uncached
+
+        first, second, uncached = asyncio.run(run())
+        assert second[0] == first[0] == _Answer(answer="yes")
+        assert second[1].cached is True
+        assert second[1].usage.total_tokens == 0
+        assert achat_parse.await_count == 2  # first call + the call without cache_ttl
+        assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.unit
+class TestPromptPrefixCaching:
+    """Stable prompt prefixes are marked for provider caching; cache reads are reported."""
+
+    PROMPT = SegmentedPrompt(stable=["INSTRUCTIONS\n"], volatile=["user data"])
+
+    def _client(self, monkeypatch, model: str) -> LLMClient:
+        monkeypatch.setenv("LLM_MODEL_COMPLEX", model)
+        monkeypatch.setenv("LLM_MODEL_LIGHTWEIGHT", model)
+        return LLMClient()
+
+    def test_openai_sends_prompt_cache_key_and_reads_cached_tokens(self, monkeypatch):
+        client = self._client(monkeypatch, "gpt-4o-mini")
+        usage = Mock(
+            prompt_tokens=2000, completion_tokens=50, total_tokens=2050,
+            prompt_tokens_details=Mock(cached_tokens=1536),
+        )
+        model = Mock()
+        model.chat.completions.create_with_completion = AsyncMock(
+            return_value=(_Answer(answer="yes"), Mock(usage=usage))
+        )
+
+        with patch.object(client, "_get_async_instructor_model", return_value=model):
+            _, completion = asyncio.run(client.achat_parse(self.PROMPT, _Answer))
+            asyncio.run(client.achat_parse("plain prompt", _Answer))
+
+        first, second = model.chat.completions.create_with_completion.await_args_list
+        assert first.kwargs["messages"] == [{"role": "user", "content": "INSTRUCTIONS\nuser data"}]
+        other_user = SegmentedPrompt(stable=["INSTRUCTIONS\n"], volatile=["other data"])
+        assert first.kwargs["prompt_cache_key"] == LLMClient._openai_cache_kwargs(other_user)["prompt_cache_key"]
+        assert "prompt_cache_key" not in second.kwargs
+        assert completion.usage.cached_tokens == 1536
+
+    def test_anthropic_marks_cache_breakpoint_after_prefix(self, monkeypatch):
+        client = self._client(monkeypatch, "claude-3-5-haiku-latest")
+        usage = Mock(input_tokens=20, output_tokens=10, cache_read_input_tokens=1800, cache_creation_input_tokens=0)
+        model = Mock()
+        model.messages.create_with_completion = AsyncMock(return_value=(_Answer(answer="yes"), Mock(usage=usage)))
+
+        with patch.object(client, "_get_async_instructor_model", return_value=model):
+            _, completion = asyncio.run(client.achat_parse(self.PROMPT, _Answer))
+
+        content = model.messages.create_with_completion.await_args.kwargs["messages"][0]["content"]
+        assert content == [
+            {"type": "text", "text": "INSTRUCTIONS\n", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "user data"},
+        ]
+        assert completion.usage.cached_tokens == 1800
+        assert completion.usage.prompt_tokens == 1820
+        assert LLMClient._anthropic_content("plain prompt") == "plain prompt"
+
+    def test_gemini_reports_cached_content_tokens(self, monkeypatch):
+        client = self._client(monkeypatch, "gemini-2.5-flash")
+        response = Mock(
+            parsed={"answer": "yes"},
+            usage_metadata=Mock(
+                prompt_token_count=2000, candidates_token_count=5, total_token_count=2005,
+                cached_content_token_count=1024,
+            ),
+        )
+        model = Mock()
+        model.models.generate_content = AsyncMock(return_value=response)
+
+        with patch.object(client, "_get_async_instructor_model", return_value=model):
+            _, completion = asyncio.run(client.achat_parse(self.PROMPT, _Answer))
+
+        assert model.models.generate_content.await_args.kwargs["contents"] == "INSTRUCTIONS\nuser data"
+        assert completion.usage.cached_tokens == 1024
@@ -0,0 +1,226 @@
+"""
+Unit tests for job-mode plan generation
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+
+from core.training import training_api
+from core.training.helpers.plan_jobs import PlanJobRegistry
+
+
+@pytest.fixture
+def latency():
+    with patch("core.training.helpers.plan_jobs.db_service.log_latency_event", new_callable=AsyncMock) as log:
+        yield log
+
+
+def _error(e):
+    if isinstance(e, HTTPException):
+        return {"status_code": e.status_code, "detail": e.detail}
+    return {"status_code": 500, "detail": str(e)}
+
+
+@pytest.mark.unit
+class TestPlanJobRegistry:
+    """Jobs record stage events and finish with a result or an error."""
+
+    def test_records_stages_and_result(self, latency):
+        registry = PlanJobRegistry()
+
+        async def run(on_stage):
+            await on_stage("modalities_decided", {"include_endurance": True})
+            await on_stage("saved", {"training_plan_id": 5})
+            return {"success": True, "data": {"id": 5}}
+
+        async def scenario():
+            job = await registry.start("user-1", run, _error)
+            assert job.status == "pending"
+            while not job.finished:
+                await job.wait_for_change(timeout=1)
+            return job, await registry.get(job.id)
+
+        job, fetched = asyncio.run(scenario())
+
+        snapshot = job.snapshot()
+        assert snapshot["status"] == "completed"
+        assert [s["stage"] for s in snapshot["stages"]] == ["modalities_decided", "saved"]
+        assert snapshot["stages"][1]["data"] == {"training_plan_id": 5}
+        assert snapshot["result"] == {"success": True, "data": {"id": 5}}
+        logged = [call.args[0] for call in latency.await_args_list]
+        assert logged == ["plan_stage_modalities_decided", "plan_stage_saved", "plan_job_total"]
+        assert fetched is job
+
+    def test_failure_is_reported(self, latency):
+        registry = PlanJobRegistry()
+
+        async def run(on_stage):
+            raise HTTPException(status_code=400, detail="bad request")
+
+        async def scenario():
+            job = await registry.start("user-1", run, _error)
+            while not job.finished:
+                await job.wait_for_change(timeout=1)
+            return job
+
+        job = asyncio.run(scenario())
+
+        assert job.status == "failed"
+        assert job.error == {"status_code": 400, "detail": "bad request"}
+
+    def test_finished_jobs_expire(self, latency):
+        registry = PlanJobRegistry(ttl_seconds=0)
+
+        async def run(on_stage):
+            return {}
+
+        async def scenario():
+            job = await registry.start("user-1", run, _error)
+            while not job.finished:
+                await job.wait_for_change(timeout=1)
+            job.finished_at -= 1
+            return await registry.get(job.id)
+
+        assert asyncio.run(scenario()) is None
+
+    def test_running_job_is_joined_by_key(self, latency):
+        registry = PlanJobRegistry()
+        release = None
+
+        async def run(on_stage):
+            await on_stage("modalities_decided", {})
+            await release.wait()
+            return {"success": True}
+
+        async def scenario():
+            nonlocal release
+            release = asyncio.Event()
+            first = await registry.start("user-1", run, _error, key="generate-plan:user-1:1")
+            second = await registry.start("user-1", run, _error, key="generate-plan:user-1:1")
+            other = await registry.start("user-1", AsyncMock(return_value={}), _error, key="generate-plan:user-1:2")
+            release.set()
+            while not first.finished:
+                await first.wait_for_change(timeout=1)
+            return first, second, other
+
+        first, second, other = asyncio.run(scenario())
+        assert second is first
+        assert other is not first
+
+
+@pytest.mark.unit
+class TestPlanJobEndpoints:
+    """Polling and SSE endpoints only expose the caller's jobs."""
+
+    def test_events_replay_stages_then_result(self, latency):
+        registry = PlanJobRegistry()
+
+        async def run(on_stage):
+            await on_stage("week_drafted", {"days": 7})
+            await asyncio.sleep(0.01)
+            await on_stage("saved", {"training_plan_id": 3})
+            return {"success": True}
+
+        async def scenario():
+            job = await registry.start("user-1", run, _error)
+            response = await training_api.stream_plan_generation_job(job.id, "Bearer token")
+            return [chunk async for chunk in response.body_iterator]
+
+        with patch.object(training_api, "plan_jobs", registry), \
+                patch.object(training_api, "extract_user_id_from_jwt", return_value="user-1"):
+            chunks = asyncio.run(scenario())
+
+        events = [chunk.split("\n")[0][len("event: "):] for chunk in chunks]
+        assert events == ["stage", "stage", "completed"]
+        assert json.loads(chunks[-1].split("\n")[1][len("data: "):]) == {"success": True}
+
+    def test_other_users_cannot_poll_job(self, latency):
+        registry = PlanJobRegistry()
+
+        async def scenario():
+            job = await registry.start("user-1", AsyncMock(return_value={}), _error)
+            await asyncio.sleep(0)
+            with patch.object(training_api, "extract_user_id_from_jwt", return_value="user-2"):
+                with pytest.raises(HTTPException) as exc:
+                    await training_api.get_plan_generation_job(job.id, "Bearer token")
+            return exc.value
+
+        with patch.object(training_api, "plan_jobs", registry):
+            error = asyncio.run(scenario())
+
+        assert error.status_code == 404
+
+    def test_bearer_token_is_required(self, latency):
+        registry = PlanJobRegistry()
+
+        async def scenario(authorization):
+            job = await registry.start("user-1", AsyncMock(return_value={}), _error)
+            with patch.object(training_api, "extract_user_id_from_jwt", return_value="user-1") as verify:
+                with pytest.raises(HTTPException) as exc:
+                    await training_api.get_plan_generation_job(job.id, authorization)
+            return exc.value, verify
+
+        with patch.object(training_api, "plan_jobs", registry):
+            for authorization in (None, "token", "Bearer "):
+                error, verify = asyncio.run(scenario(authorization))
+                assert error.status_code == 401
+                verify.assert_not_called()
+
+
+@pytest.mark.unit
+class TestSharedPlanJobs:
+    """Jobs are readable from every worker sharing the jobs table."""
+
+    def test_other_worker_polls_and_streams_job(self, latency, tmp_path):
+        path = str(tmp_path / "plan_jobs.sqlite3")
+        worker_a = PlanJobRegistry(path=path)
+        worker_b = PlanJobRegistry(path=path, poll_seconds=0.01)
+
+        async def run(on_stage):
+            await on_stage("week_drafted", {"days": 7})
+            await asyncio.sleep(0.05)
+            await on_stage("saved", {"training_plan_id": 3})
+            return {"success": True, "data": {"id": 3}}
+
+        async def scenario():
+            job = await worker_a.start("user-1", run, _error, key="generate-plan:user-1:1")
+            await asyncio.sleep(0.01)
+            polled = await worker_b.get(job.id)
+            assert polled is not None and not polled.local
+            assert polled.user_id == "user-1"
+
+            joined = await worker_b.start("user-1", run, _error, key="generate-plan:user-1:1")
+            assert joined.id == job.id and not joined.local
+
+            with patch.object(training_api, "plan_jobs", worker_b), \
+                    patch.object(training_api, "extract_user_id_from_jwt", return_value="user-1"):
+                response = await training_api.stream_plan_generation_job(job.id, "Bearer token")
+                return [chunk async for chunk in response.body_iterator]
+
+        chunks = asyncio.run(scenario())
+
+        events = [chunk.split("\n")[0][len("event: "):] for chunk in chunks]
+        assert events == ["stage", "stage", "completed"]
+        assert json.loads(chunks[-1].split("\n")[1][len("data: "):]) == {"success": True, "data": {"id": 3}}
+
+    def test_job_of_a_dead_worker_is_reported_failed(self, latency, tmp_path):
+        path = str(tmp_path / "plan_jobs.sqlite3")
+        worker_a = PlanJobRegistry(path=path)
+        worker_b = PlanJobRegistry(path=path, stale_seconds=0)
+
+        async def scenario():
+            never_finishes = asyncio.Event()
+            job = await worker_a.start("user-1", lambda on_stage: never_finishes.wait(), _error, key="generate-plan:user-1:1")
+            await asyncio.sleep(0.01)
+            polled = await worker_b.get(job.id)
+            restarted = await worker_b.start("user-1", AsyncMock(return_value={}), _error, key="generate-plan:user-1:1")
+            for task in list(worker_a._tasks) + list(worker_b._tasks):
+                task.cancel()
+            return job, polled, restarted
+
+        job, polled, restarted = asyncio.run(scenario())
+        assert job.status == "running"
+        assert polled.status == "failed" and polled.error["status_code"] == 500
+        assert restarted.id != job.id and restarted.local
@@ -0,0 +1,225 @@
+"""
+Unit tests for initial plan generation strategies (sequential / pipelined / fused)
+"""
+import asyncio
+import copy
+import logging
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from core.training.training_coach import TrainingCoach
+from core.training.helpers.exercise_catalog import exercise_catalog
+from core.training.schemas.question_schemas import PersonalInfo
+from core.training.schemas.training_schemas import (
+    ModalityDecision,
+    TrainingPlan,
+    TrainingPlanWithModalities,
+)
+
+
+PLAN = {
+    "title": "Foundation",
+    "summary": "Build a base",
+    "justification": "Week 1",
+    "weekly_schedules": [{"week_number": 1, "daily_trainings": []}],
+    "modality_decision": None,
+}
+
+
+def _personal_info() -> PersonalInfo:
+    return PersonalInfo(
+        username="sam",
+        age=30,
+        weight=70,
+        height=175,
+        gender="female",
+        goal_description="Run a half marathon",
+        experience_level="beginner",
+    )
+
+
+def _day(day_of_week: str, strength=(), endurance=()) -> dict:
+    return {
+        "day_of_week": day_of_week,
+        "is_rest_day": False,
+        "training_type": "mixed" if strength and endurance else "strength" if strength else "endurance",
+        "strength_exercises": [{"exercise_name": name, "equipment": equipment} for name, equipment in strength],
+        "endurance_sessions": [{"name": name} for name in endurance],
+    }
+
+
+MIXED_WEEK_PLAN = {
+    **PLAN,
+    "weekly_schedules": [{"week_number": 1, "daily_trainings": [
+        _day("Monday", strength=[("Back Squat", "Barbell"), ("Push Up", "Body weight")], endurance=["Easy run"]),
+        _day("Wednesday", strength=[("Bench Press", "Barbell")]),
+        _day("Friday", endurance=["Tempo run"]),
+    ]}],
+}
+
+
+def _coach(plan=None):
+    """Coach with a fake LLM and exercise validator; `events` records the order of the steps."""
+    coach = TrainingCoach.__new__(TrainingCoach)
+    coach.logger = logging.getLogger("test")
+    coach.events = []
+    coach.prompts = []
+
+    async def aparse_structured(prompt, schema, model_type="lightweight", cache_ttl=None):
+        coach.events.append(schema.__name__)
+        coach.prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        if schema is ModalityDecision:
+            return ModalityDecision(
+                include_bodyweight_strength=True,
+                include_equipment_strength=False,
+                include_endurance=True,
+                rationale="running goal",
+            ), Mock()
+        decision = ModalityDecision(
+            include_bodyweight_strength=False,
+            include_equipment_strength=False,
+            include_endurance=True,
+            rationale="fused decision",
+        )
+        return Mock(model_dump=lambda: copy.deepcopy(plan or PLAN), modality_decision=decision), Mock()
+
+    async def warm_up(formatted_initial_responses):
+        coach.events.append("warm_up_started")
+        await asyncio.sleep(0.005)
+        coach.events.append("warm_up_done")
+
+    def post_process(plan):
+        coach.events.append("matched")
+        return plan
+
+    coach.llm = Mock(aparse_structured=aparse_structured, lightweight_model_name="fake")
+    coach._warm_exercise_matching = warm_up
+    coach.exercise_validator = Mock(
+        normalize_reps_weight_arrays=lambda plan: plan,
+        post_process_strength_exercises=post_process,
+        validate_training_plan=lambda plan: (plan, []),
+    )
+    return coach
+
+
+@pytest.fixture
+def latency(monkeypatch):
+    monkeypatch.setenv("DEBUG", "false")  # conftest enables mock plans
+    with patch("core.training.training_coach.db_service.log_latency_event", new_callable=AsyncMock) as log:
+        yield log
+
+
+def _generate(coach, on_stage=None):
+    return asyncio.run(coach.generate_initial_training_plan(
+        _personal_info(), "Q: Equipment?\nA: Dumbbells at home", 7, on_stage=on_stage
+    ))
+
+
+@pytest.mark.unit
+class TestPlanGenerationStrategies:
+    """Each strategy produces the plan; only the scheduling of the work differs."""
+
+    def test_sequential_skips_warm_up(self, latency, monkeypatch):
+        monkeypatch.setenv("PLAN_GENERATION_STRATEGY", "sequential")
+        coach = _coach()
+        result = _generate(coach)
+
+        assert result["success"] is True
+        assert coach.events == ["ModalityDecision", "TrainingPlan", "matched"]
+        assert result["metadata"]["plan_generation_strategy"] == "sequential"
+        logged = [call.args[0] for call in latency.await_args_list]
+        assert "initial_plan_sequential" in logged
+
+    def test_pipelined_warms_matcher_during_llm_calls(self, latency, monkeypatch):
+        monkeypatch.setenv("PLAN_GENERATION_STRATEGY", "pipelined")
+        coach = _coach()
+        result = _generate(coach)
+
+        assert result["success"] is True
+        # Warm-up overlaps the modality call and finishes before matching
+        assert coach.events.index("warm_up_started") < coach.events.index("TrainingPlan")
+        assert coach.events.index("warm_up_done") < coach.events.index("matched")
+        assert [e for e in coach.events if e.endswith("Decision") or e.startswith("Training")] == [
+            "ModalityDecision", "TrainingPlan"
+        ]
+        logged = [call.args[0] for call in latency.await_args_list]
+        assert "initial_plan_pipelined" in logged
+
+    def test_fused_decides_modalities_in_plan_call(self, latency, monkeypatch):
+        monkeypatch.setenv("PLAN_GENERATION_STRATEGY", "fused")
+        coach = _coach()
+        stages = []
+
+        async def on_stage(stage, data):
+            stages.append((stage, data))
+
+        result = _generate(coach, on_stage)
+
+        assert "ModalityDecision" not in coach.events
+        assert TrainingPlanWithModalities.__name__ in coach.events
+        assert "modality_decision" in coach.prompts[0]
+        assert "modality_decision" not in result["training_plan"]
+        assert stages[0] == ("modalities_decided", {
+            "include_bodyweight_strength": False,
+            "include_equipment_strength": False,
+            "include_endurance": True,
+            "rationale": "fused decision",
+        })
+        assert result["metadata"]["plan_generation_strategy"] == "fused"
+
+    def test_fused_plan_keeps_only_decided_modalities(self, latency, monkeypatch):
+        monkeypatch.setenv("PLAN_GENERATION_STRATEGY", "fused")
+        result = _generate(_coach(MIXED_WEEK_PLAN))
+
+        # The fused decision excludes both strength modalities
+        monday, wednesday, friday = result["training_plan"]["weekly_schedules"][0]["daily_trainings"]
+        assert (monday["training_type"], monday["strength_exercises"]) == ("endurance", [])
+        assert monday["endurance_sessions"] == [{"name": "Easy run"}]
+        assert (wednesday["training_type"], wednesday["is_rest_day"]) == ("rest", True)
+        assert friday == MIXED_WEEK_PLAN["weekly_schedules"][0]["daily_trainings"][2]
+
+    def test_bodyweight_only_decision_drops_loaded_exercises(self):
+        coach = _coach()
+        training_dict = copy.deepcopy(MIXED_WEEK_PLAN)
+
+        removed = coach._apply_modality_decision(training_dict, True, False, False)
+
+        monday, wednesday, friday = training_dict["weekly_schedules"][0]["daily_trainings"]
+        assert removed == 4
+        assert [e["exercise_name"] for e in monday["strength_exercises"]] == ["Push Up"]
+        assert monday["training_type"] == "strength"
+        assert wednesday["is_rest_day"] and friday["is_rest_day"]
+        assert coach._apply_modality_decision(training_dict, True, False, False) == 0
+
+    def test_unknown_strategy_falls_back_to_pipelined(self, monkeypatch):
+        from settings import settings
+
+        monkeypatch.setenv("PLAN_GENERATION_STRATEGY", "parallel")
+        assert settings.PLAN_GENERATION_STRATEGY == "pipelined"
+
+    def test_fused_schema_extends_training_plan(self):
+        assert issubclass(TrainingPlanWithModalities, TrainingPlan)
+        assert TrainingPlanWithModalities.model_fields["modality_decision"].default is None
+
+
+@pytest.mark.unit
+class TestLikelyEquipment:
+    """Equipment groups warmed before matching."""
+
+    @pytest.fixture(autouse=True)
+    def loaded_catalog(self):
+        exercise_catalog.load_records([
+            {"id": 1, "name": "Push Up", "equipment": "Body weight", "main_muscles": ["Pectoralis Major"]},
+            {"id": 2, "name": "Dumbbell Fly", "equipment": "Dumbbell", "main_muscles": ["Pectoralis Major"]},
+            {"id": 3, "name": "Bench Press", "equipment": "Barbell", "main_muscles": ["Pectoralis Major"]},
+        ])
+        yield
+        exercise_catalog.clear()
+
+    def test_equipment_mentioned_in_answers(self):
+        coach = TrainingCoach.__new__(TrainingCoach)
+        assert coach._likely_equipment("A: Dumbbells and bodyweight") == ["Body weight", "Dumbbell"]
+        assert coach._likely_equipment("A: Full gym access") is None
+        assert coach._likely_equipment("A: Three days a week") is None
+        assert coach._likely_equipment(None) is None
@@ -0,0 +1,241 @@
+"""
+Unit tests for server-side plan snapshots and delta chat/create-week requests
+"""
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, Mock, patch
+
+from core.training import training_api
+from core.training.helpers.plan_snapshots import PlanSnapshotStore, detach_plan, merge_weeks, plan_snapshots
+from core.training.schemas.question_schemas import CreateWeekRequest, PlanFeedbackRequest, PersonalInfo
+
+
+def _week(week_number: int, completed: bool = False) -> dict:
+    return {
+        "week_number": week_number,
+        "daily_trainings": [
+            {"day_of_week": "Monday", "is_rest_day": False, "completed": completed, "strength_exercises": []},
+            {"day_of_week": "Tuesday", "is_rest_day": True, "completed": False},
+        ],
+    }
+
+
+def _plan() -> dict:
+    return {"id": 7, "title": "Foundation", "weekly_schedules": [_week(1), _week(2)]}
+
+
+PLAYBOOK = {"user_id": "user-1", "lessons": [], "total_lessons": 0}
+
+
+@pytest.mark.unit
+class TestPlanSnapshotStore:
+    """Only the current version of a plan resolves, and only for its owner."""
+
+    def test_save_and_resolve(self):
+        store = PlanSnapshotStore(max_entries=8, path="")
+        version = store.save(7, "user-1", _plan(), PLAYBOOK)
+
+        snapshot = store.resolve(7, "user-1", version)
+        assert snapshot.training_plan == _plan()
+        assert snapshot.playbook == PLAYBOOK
+        assert version.startswith("1-")
+
+        # A new version keeps the playbook and makes the old token stale
+        newer = store.save(7, "user-1", merge_weeks(_plan(), [_week(1, completed=True)]))
+        assert newer.startswith("2-")
+        assert store.resolve(7, "user-1", version) is None
+        assert store.resolve(7, "user-1", newer).playbook == PLAYBOOK
+        assert store.stats()["hits"] == 2 and store.stats()["misses"] == 1
+
+    def test_other_owner_and_unknown_plan(self):
+        store = PlanSnapshotStore(max_entries=8, path="")
+        version = store.save(7, "user-1", _plan())
+
+        assert store.resolve(7, "user-2", version) is None
+        assert store.resolve(8, "user-1", version) is None
+        assert store.save(7, None, _plan()) is None
+
+        # Another user can't rotate the owner's version
+        assert store.save(7, "user-2", _plan()) is None
+        assert store.resolve(7, "user-1", version).owner == "user-1"
+
+    def test_disabled_store(self):
+        store = PlanSnapshotStore(max_entries=0, path="")
+        assert store.save(7, "user-1", _plan()) is None
+        assert store.resolve(7, "user-1", "1-abc") is None
+
+    def test_file_store_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / "snapshots.sqlite3")
+        worker_a = PlanSnapshotStore(max_entries=8, path=path)
+        worker_b = PlanSnapshotStore(max_entries=8, path=path)
+
+        first = worker_a.save(7, "user-1", _plan(), PLAYBOOK)
+        assert worker_b.resolve(7, "user-1", first).training_plan == _plan()
+
+        # worker_b saves a newer version; worker_a picks it up instead of its stale copy
+        second = worker_b.save(7, "user-1", merge_weeks(_plan(), [_week(3)]))
+        assert worker_a.resolve(7, "user-1", second).playbook == PLAYBOOK
+        assert len(worker_a.resolve(7, "user-1", second).training_plan["weekly_schedules"]) == 3
+        worker_a.close()
+        worker_b.close()
+
+    def test_async_file_store_writes_off_the_event_loop(self, tmp_path):
+        store = PlanSnapshotStore(max_entries=8, path=str(tmp_path / "snapshots.sqlite3"))
+        threads = []
+        save = store.save
+
+        def recording_save(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return save(*args, **kwargs)
+
+        async def save_and_resolve():
+            version = await store.asave(7, "user-1", _plan(), PLAYBOOK)
+            return await store.aresolve(7, "user-1", version)
+
+        with patch.object(store, "save", recording_save):
+            snapshot = asyncio.run(save_and_resolve())
+        assert snapshot.playbook == PLAYBOOK
+        assert threads and threads[0] is not threading.main_thread()
+        store.close()
+
+    def test_merge_and_detach_leave_the_snapshot_untouched(self):
+        plan = _plan()
+        merged = merge_weeks(plan, [_week(3), _week(1, completed=True)])
+
+        assert [w["week_number"] for w in merged["weekly_schedules"]] == [1, 2, 3]
+        assert merged["weekly_schedules"][0]["daily_trainings"][0]["completed"] is True
+        assert plan == _plan()
+
+        detached = detach_plan(plan)
+        detached["weekly_schedules"][0]["daily_trainings"][0]["scheduled_date"] = "2026-01-05"
+        assert plan == _plan()
+
+
+@pytest.fixture
+def owner():
+    plan_snapshots.clear()
+    with patch("core.training.training_api.extract_user_id_from_jwt", return_value="user-1"):
+        yield
+    plan_snapshots.clear()
+
+
+def _chat_request(**fields) -> PlanFeedbackRequest:
+    return PlanFeedbackRequest(
+        user_profile_id=1,
+        plan_id=7,
+        feedback_message="Why squats on Monday?",
+        week_number=1,
+        jwt_token="token",
+        **fields,
+    )
+
+
+def _respond_only_coach():
+    async def classify(training_plan=None, plan_version=None, **_):
+        coach.seen_plans.append(training_plan)
+        coach.seen_versions.append(plan_version)
+        return {"intent": "question", "action": "respond_only", "needs_plan_update": False, "ai_message": "Strength."}
+
+    coach = Mock(classify_feedback_intent_lightweight=classify, seen_plans=[], seen_versions=[])
+    return coach
+
+
+@pytest.mark.unit
+class TestDeltaChat:
+    """Chat requests can send plan_version + week_updates instead of the full plan."""
+
+    def test_full_request_returns_version_for_delta_requests(self, owner):
+        coach = _respond_only_coach()
+        first = asyncio.run(training_api.chat(_chat_request(training_plan=_plan(), playbook=PLAYBOOK), coach))
+        assert first.plan_version and first.updated_plan["title"] == "Foundation"
+
+        delta = asyncio.run(training_api.chat(
+            _chat_request(plan_version=first.plan_version, week_updates=[_week(1, completed=True)]), coach
+        ))
+        assert delta.success and delta.ai_response == "Strength."
+        assert delta.updated_plan is None
+        assert delta.plan_version != first.plan_version
+        assert coach.seen_plans[-1]["title"] == "Foundation"
+        assert coach.seen_plans[-1]["weekly_schedules"][0]["daily_trainings"][0]["completed"] is True
+        # The classifier gets resolved versions only (they key the cached plan summary)
+        assert coach.seen_versions == [None, delta.plan_version]
+
+        # Without week updates the version is unchanged
+        again = asyncio.run(training_api.chat(_chat_request(plan_version=delta.plan_version), coach))
+        assert again.plan_version == delta.plan_version
+
+    def test_stale_version_is_a_conflict(self, owner):
+        coach = _respond_only_coach()
+        first = asyncio.run(training_api.chat(_chat_request(training_plan=_plan()), coach))
+        asyncio.run(training_api.chat(_chat_request(training_plan=_plan()), coach))
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(training_api.chat(_chat_request(plan_version=first.plan_version), coach))
+        assert error.value.status_code == 409
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(training_api.chat(_chat_request(), coach))
+        assert error.value.status_code == 400
+
+    def test_plan_update_uses_snapshot_playbook_and_saves_new_week(self, owner):
+        coach = _respond_only_coach()
+        version = asyncio.run(training_api.chat(_chat_request(training_plan=_plan(), playbook=PLAYBOOK), coach)).plan_version
+
+        updated_week = {**_week(1), "focus_theme": "Easier"}
+
+        async def classify(**_):
+            return {"intent": "update", "action": "update_week", "needs_plan_update": True, "ai_message": "On it."}
+
+        coach = Mock(
+            classify_feedback_intent_lightweight=classify,
+            update_weekly_schedule=AsyncMock(return_value={
+                "success": True, "training_plan": {"weekly_schedules": [updated_week]}, "ai_message": "Done.",
+            }),
+        )
+        personal_info = PersonalInfo(
+            username="sam", age=30, weight=70, height=175, gender="female",
+            goal_description="Get fit", experience_level="beginner",
+        )
+        with patch.object(training_api.db_service, "update_single_week", AsyncMock(side_effect=lambda p, n, week, **_: week)):
+            response = asyncio.run(training_api.chat(
+                _chat_request(plan_version=version, personal_info=personal_info), coach
+            ))
+
+        assert response.plan_updated is True
+        assert coach.update_weekly_schedule.await_args.kwargs["user_playbook"].user_id == "user-1"
+        snapshot = plan_snapshots.resolve(7, "user-1", response.plan_version)
+        assert snapshot.training_plan["weekly_schedules"][0]["focus_theme"] == "Easier"
+
+
+@pytest.mark.unit
+class TestDeltaCreateWeek:
+    """/create-week resolves the plan from its snapshot."""
+
+    def test_create_week_from_snapshot(self, owner):
+        version = plan_snapshots.save(7, "user-1", _plan())
+        coach = Mock(create_new_weekly_schedule=AsyncMock(side_effect=lambda existing_training_plan, **_: {
+            "success": True,
+            "training_plan": merge_weeks(existing_training_plan, [_week(3)]),
+            "metadata": {"next_week_number": 3},
+        }))
+        request = CreateWeekRequest(
+            plan_id=7,
+            plan_version=version,
+            week_updates=[_week(2, completed=True)],
+            user_profile_id=1,
+            personal_info=PersonalInfo(
+                username="sam", age=30, weight=70, height=175, gender="female",
+                goal_description="Get fit", experience_level="beginner",
+            ),
+            jwt_token="token",
+        )
+        with patch.object(training_api.db_service, "create_single_week", AsyncMock(side_effect=lambda p, week, **_: week)):
+            response = asyncio.run(training_api.create_week(request, coach))
+
+        existing = coach.create_new_weekly_schedule.await_args.kwargs["existing_training_plan"]
+        assert existing["weekly_schedules"][1]["daily_trainings"][0]["completed"] is True
+        assert [w["week_number"] for w in response["data"]["weekly_schedules"]] == [1, 2, 3]
+        snapshot = plan_snapshots.resolve(7, "user-1", response["plan_version"])
+        assert len(snapshot.training_plan["weekly_schedules"]) == 3
@@ -0,0 +1,159 @@
+"""
+Unit tests for the encoded plan-summary cache
+"""
+import asyncio
+import copy
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from core.training.helpers.database_service import DatabaseService
+from core.training.helpers.plan_summary_cache import PlanSummaryCache, plan_summaries
+from core.training.helpers.prompt_generator import PromptGenerator
+
+
+def _week(week_number: int = 1, reps=(8, 8, 8)) -> dict:
+    return {
+        "week_number": week_number,
+        "training_plan_id": 42,
+        "daily_trainings": [
+            {
+                "day_of_week": "Monday",
+                "training_type": "strength",
+                "is_rest_day": False,
+                "strength_exercises": [{
+                    "exercise_id": 3,
+                    "exercise_name": "Squat",
+                    "equipment": "Barbell",
+                    "execution_order": 1,
+                    "sets": 3,
+                    "reps": list(reps),
+                    "weight": [60.0, 60.0, 60.0],
+                }],
+            },
+            {"day_of_week": "Tuesday", "training_type": "rest", "is_rest_day": True},
+        ],
+    }
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    plan_summaries.clear()
+    yield
+    plan_summaries.clear()
+
+
+@pytest.mark.unit
+class TestPlanSummaryCache:
+    """Weeks of an unchanged plan version are encoded once; new versions are encoded again."""
+
+    def test_unchanged_version_is_encoded_once(self):
+        cache = PlanSummaryCache(max_entries=8)
+        encode = Mock(side_effect=lambda week: f"summary of week {week['week_number']}")
+
+        first = cache.get_or_encode(42, _week(), encode, "1-a")
+        second = cache.get_or_encode("42", copy.deepcopy(_week()), encode, "1-a")
+
+        assert second == first == "summary of week 1"
+        assert encode.call_count == 1
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_new_version_other_plan_and_unknown_version_are_encoded_again(self):
+        cache = PlanSummaryCache(max_entries=8)
+        encode = Mock(return_value="summary")
+
+        cache.get_or_encode(42, _week(), encode, "1-a")
+        cache.get_or_encode(42, _week(reps=(10, 10, 10)), encode, "2-b")
+        cache.get_or_encode(7, _week(), encode, "1-a")
+        assert encode.call_count == 3
+
+        # Without a version (or a plan id) nothing is cached
+        cache.get_or_encode(42, _week(), encode)
+        cache.get_or_encode(None, _week(), encode, "1-a")
+        assert encode.call_count == 5
+        assert len(cache) == 3
+
+    def test_invalidate_drops_only_the_rewritten_week(self):
+        cache = PlanSummaryCache(max_entries=8)
+        encode = Mock(return_value="summary")
+        for week_number in (1, 2):
+            cache.get_or_encode(42, _week(week_number), encode, "1-a")
+        cache.get_or_encode(7, _week(1), encode, "1-a")
+
+        assert cache.invalidate(42, 1) == 1
+        assert cache.invalidate(42, 1) == 0
+        assert len(cache) == 2
+        assert cache.invalidate(42) == 1
+        assert len(cache) == 1
+        assert cache.invalidate(7) == 1
+        assert cache._by_plan == {}
+
+    def test_lru_eviction_and_disabled_cache(self):
+        cache = PlanSummaryCache(max_entries=2)
+        encode = Mock(return_value="summary")
+        for week_number in (1, 2, 3):
+            cache.get_or_encode(42, _week(week_number), encode, "1-a")
+        assert len(cache) == 2
+        # Evicted entries leave the per-plan index too
+        assert cache._by_plan[42] == {(42, 2, "1-a"), (42, 3, "1-a")}
+        cache.get_or_encode(42, _week(1), encode, "1-a")
+        assert encode.call_count == 4
+
+        disabled = PlanSummaryCache(max_entries=0)
+        disabled.get_or_encode(42, _week(), encode, "1-a")
+        disabled.get_or_encode(42, _week(), encode, "1-a")
+        assert encode.call_count == 6
+        assert len(disabled) == 0
+
+
+@pytest.mark.unit
+class TestFormatCurrentPlanSummary:
+    """Chat turns on an unchanged plan version reuse the encoded summary."""
+
+    def test_repeated_turns_reuse_encoding(self):
+        plan = {"id": 42, "weekly_schedules": [_week()]}
+        first = PromptGenerator.format_current_plan_summary(plan, plan_version="1-a")
+        second = PromptGenerator.format_current_plan_summary(copy.deepcopy(plan), plan_version="1-a")
+
+        assert second == first
+        assert '"Squat"' in first and '"REST"' in first
+        assert plan_summaries.stats()["hits"] == 1
+        assert PromptGenerator.format_current_plan_summary(plan) == first
+
+    def test_week_dict_uses_its_plan_id(self):
+        PromptGenerator.format_current_plan_summary({"weekly_schedules": [_week()]}, plan_version="1-a")
+        assert plan_summaries.invalidate(42, 1) == 1
+
+    def test_empty_plans_are_not_cached(self):
+        assert "error" in PromptGenerator.format_current_plan_summary({"weekly_schedules": []}, plan_version="1-a")
+        assert "error" in PromptGenerator.format_current_plan_summary(
+            {"weekly_schedules": [{"week_number": 1, "daily_trainings": []}]}, plan_version="1-a"
+        )
+        assert len(plan_summaries) == 0
+
+
+@pytest.mark.unit
+class TestSingleWeekWritesInvalidate:
+    """Saving a week drops its cached summary."""
+
+    @pytest.fixture
+    def service(self):
+        service = DatabaseService()
+        client = Mock()
+        client.table.return_value.delete.return_value.eq.return_value.eq.return_value.execute = AsyncMock()
+        service._create_supabase_client = Mock(return_value=client)
+        service._insert_week_rows = AsyncMock()
+        service._enrich_strength_exercises = AsyncMock()
+        return service
+
+    def test_update_single_week(self, service):
+        PromptGenerator.format_current_plan_summary({"id": 42, "weekly_schedules": [_week(2)]}, plan_version="1-a")
+        assert len(plan_summaries) == 1
+
+        assert asyncio.run(service.update_single_week(42, 2, _week(2, reps=(5, 5, 5)))) is not None
+        assert len(plan_summaries) == 0
+
+    def test_create_single_week(self, service):
+        PromptGenerator.format_current_plan_summary({"id": 42, "weekly_schedules": [_week(3)]}, plan_version="1-a")
+
+        assert asyncio.run(service.create_single_week(42, _week(3))) is not None
+        assert len(plan_summaries) == 0
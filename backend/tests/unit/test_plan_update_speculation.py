@@ -0,0 +1,186 @@
+"""
+Unit tests for speculative plan updates during chat intent classification
+"""
+import asyncio
+import pytest
+from typing import Optional
+from unittest.mock import AsyncMock, Mock, patch
+
+from core.training import training_api
+from core.training.helpers.plan_update_speculation import (
+    defer_event,
+    looks_like_plan_change,
+    plan_update_speculation,
+)
+from core.training.schemas.question_schemas import PersonalInfo, PlanFeedbackRequest
+
+
+WEEK = {"week_number": 1, "daily_trainings": [{"day_of_week": "Monday", "is_rest_day": False}]}
+UPDATED_WEEK = {**WEEK, "focus_theme": "Lighter"}
+
+
+def _request(message: str) -> PlanFeedbackRequest:
+    return PlanFeedbackRequest(
+        user_profile_id=1,
+        plan_id=7,
+        feedback_message=message,
+        training_plan={"id": 7, "weekly_schedules": [WEEK]},
+        week_number=1,
+        playbook={"user_id": "user-1", "lessons": [], "total_lessons": 0},
+        personal_info=PersonalInfo(
+            username="sam", age=30, weight=70, height=175, gender="female",
+            goal_description="Get fit", experience_level="beginner",
+        ),
+        jwt_token="token",
+    )
+
+
+MODALITY_COMPLETION = Mock(usage=Mock(prompt_tokens=200, completion_tokens=50, total_tokens=250))
+UPDATE_COMPLETION = Mock(usage=Mock(prompt_tokens=1200, completion_tokens=300, total_tokens=1500))
+
+
+def _coach(needs_plan_update: bool, update_seconds: Optional[float] = None):
+    """Coach whose classification takes a while; `events` records the order of the steps."""
+    events = []
+    if update_seconds is None:
+        update_seconds = 0.01 if needs_plan_update else 0.5
+
+    async def classify(**_):
+        events.append("classify_started")
+        await asyncio.sleep(0.05)
+        events.append("classified")
+        if needs_plan_update:
+            return {"intent": "update", "action": "update_week", "needs_plan_update": True,
+                    "ai_message": "On it.", "_classify_duration": 0.05}
+        return {"intent": "question", "action": "respond_only", "needs_plan_update": False,
+                "ai_message": "Squats build strength.", "_classify_duration": 0.05}
+
+    async def log(call_info, event, completion):
+        # Same contract as TrainingCoach: events of an unresolved speculation are deferred
+        if not defer_event(call_info, event, 0.01, completion):
+            await training_api.db_service.log_latency_event(event, 0.01, completion)
+
+    async def update_weekly_schedule(call_info=None, **_):
+        events.append("update_started")
+        if call_info is not None:
+            call_info["modality_completion"] = MODALITY_COMPLETION
+        await log(call_info, "modality_selection", MODALITY_COMPLETION)
+        if call_info is not None:
+            call_info["prompt_tokens"] = 1200
+        await asyncio.sleep(update_seconds)
+        if call_info is not None:
+            call_info["completion"] = UPDATE_COMPLETION
+        await log(call_info, "update_week", UPDATE_COMPLETION)
+        events.append("update_done")
+        return {"success": True, "training_plan": {"weekly_schedules": [dict(UPDATED_WEEK)]}, "ai_message": "Done."}
+
+    coach = Mock(classify_feedback_intent_lightweight=classify)
+    coach.update_weekly_schedule = AsyncMock(side_effect=update_weekly_schedule)
+    coach.events = events
+    return coach
+
+
+def _logged(latency, event: str) -> list:
+    return [call for call in latency.await_args_list if call.args[0] == event]
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    monkeypatch.setenv("SPECULATIVE_PLAN_UPDATES", "true")
+    plan_update_speculation.reset()
+    with patch("core.training.training_api.extract_user_id_from_jwt", return_value="user-1"), \
+            patch.object(training_api.db_service, "update_single_week", AsyncMock(side_effect=lambda p, n, week, **_: week)), \
+            patch.object(training_api.db_service, "log_latency_event", AsyncMock()) as latency:
+        yield lambda message, coach: (asyncio.run(training_api.chat(_request(message), coach)), latency)
+    plan_update_speculation.reset()
+
+
+@pytest.mark.unit
+class TestLooksLikePlanChange:
+    """Keyword heuristic for concrete change requests."""
+
+    @pytest.mark.parametrize("message", [
+        "Can you swap squats for lunges?",
+        "I want fewer days this week",
+        "Make Monday easier please",
+        "Tuesday is too hard",
+        "I can't do box jumps",
+        "Do push ups instead of bench press",
+    ])
+    def test_change_requests(self, message):
+        assert looks_like_plan_change(message)
+
+    @pytest.mark.parametrize("message", ["Why squats on Monday?", "Looks great, thanks!", "What does RPE mean?", ""])
+    def test_questions_and_approval(self, message):
+        assert not looks_like_plan_change(message)
+
+
+@pytest.mark.unit
+class TestSpeculativePlanUpdate:
+    """The week update overlaps the classification and is kept or cancelled."""
+
+    def test_kept_when_classifier_asks_for_update(self, chat):
+        coach = _coach(needs_plan_update=True)
+        response, latency = chat("Please swap squats for lunges", coach)
+
+        assert response.plan_updated is True
+        assert response.updated_plan["weekly_schedules"][0]["focus_theme"] == "Lighter"
+        assert coach.update_weekly_schedule.await_count == 1
+        # Stage 2 started before Stage 1 finished
+        assert coach.events.index("update_started") < coach.events.index("classified")
+        assert plan_update_speculation.stats() == {
+            "launched": 1, "kept": 1, "discarded": 0, "hit_rate": 1.0, "wasted_tokens": 0,
+        }
+        # The update's own events are logged once, when the speculation is kept
+        assert len(_logged(latency, "update_week")) == 1
+        assert len(_logged(latency, "modality_selection")) == 1
+        # The kept row carries the time saved: the update finished during the classification
+        saved = _logged(latency, "plan_update_speculation_kept")[0].args[1]
+        assert 0.005 <= saved < 0.04
+
+    def test_kept_update_still_running_logs_its_events_directly(self, chat):
+        coach = _coach(needs_plan_update=True, update_seconds=0.1)
+        response, latency = chat("Please swap squats for lunges", coach)
+
+        assert response.plan_updated is True
+        assert coach.events.index("classified") < coach.events.index("update_done")
+        assert len(_logged(latency, "update_week")) == 1
+        # Overlap ends when the classification returns
+        saved = _logged(latency, "plan_update_speculation_kept")[0].args[1]
+        assert 0.04 <= saved < 0.1
+
+    def test_cancelled_when_no_update_is_needed(self, chat):
+        coach = _coach(needs_plan_update=False)
+        response, latency = chat("Can I swap squats, or is that a bad idea?", coach)
+
+        assert response.plan_updated is False
+        assert response.ai_response == "Squats build strength."
+        assert "update_done" not in coach.events
+        stats = plan_update_speculation.stats()
+        # Modality decision + the prompt estimate of the cancelled update call
+        assert (stats["discarded"], stats["hit_rate"], stats["wasted_tokens"]) == (1, 0.0, 1450)
+        discarded = _logged(latency, "plan_update_speculation_discarded")
+        assert discarded[0].args[2].usage == (1400, 50, 1450)
+        assert not _logged(latency, "modality_selection")
+
+    def test_finished_discarded_update_is_counted_once(self, chat):
+        coach = _coach(needs_plan_update=False, update_seconds=0.01)
+        _, latency = chat("Can I swap squats, or is that a bad idea?", coach)
+
+        assert "update_done" in coach.events
+        assert not _logged(latency, "update_week") and not _logged(latency, "modality_selection")
+        discarded = _logged(latency, "plan_update_speculation_discarded")
+        assert discarded[0].args[2].usage == (1400, 350, 1750)
+        assert plan_update_speculation.stats()["wasted_tokens"] == 1750
+
+    def test_not_started_for_questions_or_when_disabled(self, chat, monkeypatch):
+        coach = _coach(needs_plan_update=False)
+        chat("Why squats on Monday?", coach)
+        assert coach.update_weekly_schedule.await_count == 0
+
+        monkeypatch.setenv("SPECULATIVE_PLAN_UPDATES", "false")
+        coach = _coach(needs_plan_update=True)
+        response, _ = chat("Please swap squats for lunges", coach)
+        assert response.plan_updated is True
+        assert coach.events.index("update_started") > coach.events.index("classified")
+        assert plan_update_speculation.stats()["launched"] == 0
@@ -0,0 +1,217 @@
+"""
+Unit tests for the level-by-level plan writer in DatabaseService
+"""
+import asyncio
+import itertools
+import pytest
+from unittest.mock import Mock, patch
+from postgrest.exceptions import APIError
+
+from core.training.helpers.database_service import DatabaseService
+
+
+class _FakeInsert:
+    def __init__(self, client, table, records):
+        self.client = client
+        self.table = table
+        self.records = records if isinstance(records, list) else [records]
+
+    async def execute(self):
+        self.client.inserts.append((self.table, self.records))
+        return Mock(data=[{**record, "id": next(self.client.ids)} for record in self.records])
+
+
+class _FakeSelect:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.ids = []
+
+    def select(self, *_):
+        return self
+
+    def in_(self, _column, values):
+        self.ids = list(values)
+        return self
+
+    async def execute(self):
+        self.client.selects.append((self.table, self.ids))
+        return Mock(data=[
+            {"id": i, "name": f"Exercise {i}", "main_muscles": ["Quadriceps"], "equipment": "Barbell"}
+            for i in self.ids
+        ])
+
+
+class _FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def insert(self, records):
+        return _FakeInsert(self.client, self.name, records)
+
+    def select(self, *args):
+        return _FakeSelect(self.client, self.name).select(*args)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.ids = itertools.count(100)
+        self.inserts = []
+        self.selects = []
+
+    def table(self, name):
+        return _FakeTable(self, name)
+
+
+def _week(week_number, exercise_ids):
+    return {
+        "week_number": week_number,
+        "focus_theme": "Base",
+        "daily_trainings": [
+            {
+                "day_of_week": "Monday",
+                "is_rest_day": False,
+                "training_type": "mixed",
+                "scheduled_date": "2026-01-05",
+                "strength_exercises": [
+                    {"exercise_id": exercise_id, "sets": 3, "reps": [8, 8, 8], "weight": [0.0] * 3}
+                    for exercise_id in exercise_ids
+                ],
+                "endurance_sessions": [{"name": "Easy run", "training_volume": 30.0}],
+            },
+            {"day_of_week": "Tuesday", "is_rest_day": True},
+        ],
+    }
+
+
+@pytest.mark.unit
+class TestPlanWriter:
+    """Weeks are written with one bulk insert per hierarchy level."""
+
+    @pytest.fixture
+    def service(self):
+        return DatabaseService()
+
+    def test_inserts_one_bulk_request_per_level(self, service):
+        client = _FakeClient()
+        weeks = [_week(1, [1, 2]), _week(2, [3]), _week(3, [1])]
+        rows = service._build_week_rows(10, weeks, include_scheduled_date=True)
+
+        asyncio.run(service._insert_week_rows(client, rows))
+
+        tables = [table for table, _ in client.inserts]
+        assert sorted(tables) == sorted([
+            "weekly_schedules", "daily_training", "strength_exercise", "endurance_session"
+        ])
+        inserted = dict(client.inserts)
+        assert len(inserted["weekly_schedules"]) == 3
+        assert len(inserted["daily_training"]) == 6
+        assert len(inserted["strength_exercise"]) == 4
+        assert inserted["daily_training"][0]["scheduled_date"] == "2026-01-05"
+
+    def test_maps_generated_ids_back_by_position(self, service):
+        client = _FakeClient()
+        weeks = [_week(1, [1, 2]), _week(2, [3])]
+        rows = service._build_week_rows(10, weeks)
+
+        asyncio.run(service._insert_week_rows(client, rows))
+
+        inserted = dict(client.inserts)
+        for week, record in zip(weeks, inserted["weekly_schedules"]):
+            assert week["training_plan_id"] == 10
+            assert week["week_number"] == record["week_number"]
+        monday = weeks[1]["daily_trainings"][0]
+        assert monday["weekly_schedule_id"] == weeks[1]["id"]
+        assert monday["strength_exercises"][0]["daily_training_id"] == monday["id"]
+        strength_record = next(
+            r for r in inserted["strength_exercise"] if r["daily_training_id"] == monday["id"]
+        )
+        assert strength_record["exercise_id"] == 3
+        assert monday["endurance_sessions"][0]["daily_training_id"] == monday["id"]
+        assert "scheduled_date" not in inserted["daily_training"][0]
+
+    def test_drops_unmatched_and_removed_exercises(self, service):
+        week = _week(1, [1, None, 2])
+        week["daily_trainings"][0]["strength_exercises"][2]["_remove_from_plan"] = True
+
+        service._build_week_rows(10, [week], drop_removed=True)
+
+        assert [ex["exercise_id"] for ex in week["daily_trainings"][0]["strength_exercises"]] == [1]
+
+    def test_uses_transactional_rpc_when_configured(self, service, monkeypatch):
+        monkeypatch.setenv("TRAINING_PLAN_WRITE_RPC", "insert_training_weeks")
+        week = _week(1, [1, 2])
+        rows = service._build_week_rows(10, [week])
+        client = Mock()
+        client.rpc.return_value.execute = Mock(return_value=asyncio.sleep(0, result=Mock(data=[{
+            "id": 7,
+            "daily_training": [
+                {"id": 8, "strength_exercise": [9, 10], "endurance_session": [11]},
+                {"id": 12, "strength_exercise": [], "endurance_session": []},
+            ],
+        }])))
+
+        asyncio.run(service._insert_week_rows(client, rows))
+
+        name, params = client.rpc.call_args.args
+        assert name == "insert_training_weeks"
+        assert len(params["p_weeks"][0]["daily_training"][0]["strength_exercise"]) == 2
+        client.table.assert_not_called()
+        monday = week["daily_trainings"][0]
+        assert (week["id"], monday["id"]) == (7, 8)
+        assert [ex["id"] for ex in monday["strength_exercises"]] == [9, 10]
+        assert monday["endurance_sessions"][0]["id"] == 11
+
+    def test_falls_back_to_bulk_inserts_only_when_rpc_is_missing(self, service, monkeypatch):
+        monkeypatch.setenv("TRAINING_PLAN_WRITE_RPC", "insert_training_weeks")
+        week = _week(1, [1, 2])
+        rows = service._build_week_rows(10, [week])
+        client = _FakeClient()
+        client.rpc = Mock()
+        client.rpc.return_value.execute = Mock(side_effect=APIError({"code": "PGRST202", "message": "not found"}))
+
+        asyncio.run(service._insert_week_rows(client, rows))
+
+        assert [table for table, _ in client.inserts][0] == "weekly_schedules"
+        assert week["id"] is not None
+
+    @pytest.mark.parametrize("error", [
+        APIError({"code": "23503", "message": "foreign key violation"}),
+        TimeoutError("read timed out"),
+    ])
+    def test_rpc_errors_that_may_have_written_are_raised(self, service, monkeypatch, error):
+        monkeypatch.setenv("TRAINING_PLAN_WRITE_RPC", "insert_training_weeks")
+        rows = service._build_week_rows(10, [_week(1, [1])])
+        client = _FakeClient()
+        client.rpc = Mock()
+        client.rpc.return_value.execute = Mock(side_effect=error)
+
+        with pytest.raises(type(error)):
+            asyncio.run(service._insert_week_rows(client, rows))
+        assert client.inserts == []
+
+    def test_rpc_id_mapping_errors_are_raised(self, service, monkeypatch):
+        monkeypatch.setenv("TRAINING_PLAN_WRITE_RPC", "insert_training_weeks")
+        rows = service._build_week_rows(10, [_week(1, [1])])
+        client = _FakeClient()
+        client.rpc = Mock()
+        # Committed, but returned an unexpected shape
+        client.rpc.return_value.execute = Mock(return_value=asyncio.sleep(0, result=Mock(data=[{"id": 7}])))
+
+        with pytest.raises(KeyError):
+            asyncio.run(service._insert_week_rows(client, rows))
+        assert client.inserts == []
+
+    def test_enrichment_bulk_fetches_metadata(self, service):
+        client = _FakeClient()
+        weeks = [_week(1, [1, 2]), _week(2, [2])]
+
+        with patch("core.training.helpers.exercise_catalog.exercise_catalog.get_by_id", return_value=None):
+            enriched = asyncio.run(service._enrich_strength_exercises(client, weeks))
+
+        assert enriched == 3
+        assert len(client.selects) == 1
+        exercise = weeks[0]["daily_trainings"][0]["strength_exercises"][1]
+        assert exercise["exercise_name"] == "Exercise 2"
+        assert exercise["main_muscle"] == "Quadriceps"
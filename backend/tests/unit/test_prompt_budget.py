@@ -0,0 +1,238 @@
+"""
+Unit tests for token-budgeted prompt assembly
+"""
+import asyncio
+import copy
+import pytest
+import threading
+from unittest.mock import Mock
+
+from core.training.helpers import prompt_budget
+from core.training.helpers.prompt_budget import (
+    SegmentedPrompt,
+    count_tokens,
+    fit_to_budget,
+    static_section,
+    static_section_tokens,
+)
+from core.training.helpers.prompt_generator import PromptGenerator
+from core.training.schemas.question_schemas import PersonalInfo
+
+
+def _personal_info() -> PersonalInfo:
+    return PersonalInfo(
+        username="sam",
+        age=30,
+        weight=70,
+        height=175,
+        gender="female",
+        goal_description="Run a half marathon",
+        experience_level="beginner",
+    )
+
+
+LESSONS = [
+    {"text": "Enjoys long runs on Sundays", "confidence": 0.9, "helpful_count": 3, "positive": True},
+    {"text": "Prefers short sessions after work", "confidence": 0.3, "helpful_count": 1, "positive": True},
+    {"text": "Knee pain on box jumps", "confidence": 0.6, "harmful_count": 1, "positive": False},
+]
+TURNS = [f"User: message number {n} " + "with some detail " * 20 for n in range(1, 6)]
+
+
+def _budget(monkeypatch, call_site: str, tokens: int) -> None:
+    monkeypatch.setenv("PROMPT_TOKEN_BUDGETS", f"{call_site}={tokens}")
+
+
+@pytest.mark.unit
+class TestStaticSections:
+    """Static sections are built once and counted."""
+
+    def test_built_once_and_interned(self):
+        calls = []
+
+        @static_section
+        def section() -> str:
+            calls.append(1)
+            return "**RULES:**\n" + "• rule\n" * 3
+
+        first = section()
+        assert section() is first
+        assert len(calls) == 1
+        assert static_section_tokens()[section.__qualname__] == count_tokens(first)
+
+    def test_prompt_generator_sections_are_shared(self):
+        assert PromptGenerator._get_training_principles() is PromptGenerator._get_training_principles()
+        assert "PromptGenerator._get_training_principles" in static_section_tokens()
+
+    def test_length_estimate_without_tokenizer(self, monkeypatch):
+        monkeypatch.setattr(prompt_budget, "_encoding_loaded", True)
+        monkeypatch.setattr(prompt_budget, "_encoding", None)
+        assert count_tokens("") == 0
+        assert count_tokens("abcdefgh") == 2
+        assert count_tokens("abcdefghi") == 3
+
+
+@pytest.mark.unit
+class TestTokenizerLoading:
+    """Loading the encoding never blocks the event loop."""
+
+    @pytest.fixture
+    def slow_encoding(self, monkeypatch):
+        import tiktoken
+
+        release = threading.Event()
+        encoding = Mock(encode=lambda text, **_: text.split())
+
+        def get_encoding(name):
+            release.wait(5)
+            return encoding
+
+        monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+        monkeypatch.setattr(prompt_budget, "_encoding_loaded", False)
+        monkeypatch.setattr(prompt_budget, "_encoding", None)
+        monkeypatch.setattr(prompt_budget, "_loader", None)
+        return release
+
+    def test_estimates_on_event_loop_until_loaded(self, slow_encoding):
+        async def count():
+            return count_tokens("abcdefgh ijkl")
+
+        # The encoding is still loading in the background: the length estimate is used
+        assert asyncio.run(count()) == 4
+        slow_encoding.set()
+        prompt_budget._loader.join(5)
+        assert asyncio.run(count()) == 2
+
+    def test_preload_off_the_event_loop(self, slow_encoding):
+        slow_encoding.set()
+
+        async def preload():
+            return await asyncio.to_thread(prompt_budget.preload_tokenizer)
+
+        assert asyncio.run(preload()) is True
+        assert count_tokens("abcdefgh ijkl") == 2
+        assert prompt_budget._loader is None
+
+
+@pytest.mark.unit
+class TestFitToBudget:
+    """Lowest-priority items are dropped until the prompt fits."""
+
+    @staticmethod
+    def _render(turns, lessons):
+        return "INSTRUCTIONS " * 50 + "\n".join(turns) + "\n" + "\n".join(lessons)
+
+    def test_under_budget_is_untouched(self, monkeypatch):
+        _budget(monkeypatch, "test_site", 100000)
+        prompt = fit_to_budget("test_site", self._render, turns=TURNS, lessons=["a", "b"])
+        assert prompt == self._render(TURNS, ["a", "b"])
+
+    def test_no_budget_disables_trimming(self, monkeypatch):
+        monkeypatch.delenv("PROMPT_TOKEN_BUDGETS", raising=False)
+        assert fit_to_budget("unknown_site", self._render, turns=TURNS, lessons=[]) == self._render(TURNS, [])
+
+    def test_drops_oldest_turns_first(self, monkeypatch):
+        lessons = ["lesson low", "lesson high"]
+        budget = count_tokens(self._render(TURNS[2:], lessons))
+        _budget(monkeypatch, "test_site", budget)
+
+        prompt = fit_to_budget("test_site", self._render, turns=TURNS, lessons=lessons)
+        assert prompt == self._render(TURNS[2:], lessons)
+
+    def test_then_lowest_priority_lessons_keeping_one_of_each(self, monkeypatch):
+        lessons = [f"lesson {n} " + "detail " * 30 for n in range(4)]
+        budget = count_tokens(self._render(TURNS[-1:], lessons[2:]))
+        _budget(monkeypatch, "test_site", budget)
+
+        prompt = fit_to_budget("test_site", self._render, turns=TURNS, lessons=lessons)
+        assert prompt == self._render(TURNS[-1:], lessons[2:])
+
+        # Fixed sections alone exceed the budget: one item of each part is kept
+        _budget(monkeypatch, "test_site", 1)
+        prompt = fit_to_budget("test_site", self._render, turns=TURNS, lessons=lessons)
+        assert prompt == self._render(TURNS[-1:], lessons[-1:])
+
+
+@pytest.mark.unit
+class TestBudgetedPrompts:
+    """Prompt call sites trim conversation turns and low-confidence lessons."""
+
+    def _update_prompt(self, turns):
+        return PromptGenerator.update_weekly_schedule_prompt(
+            personal_info=_personal_info(),
+            feedback_message="Make Monday easier",
+            week_number=2,
+            current_week_summary="Monday: Squat 3x5",
+            user_playbook=LESSONS,
+            conversation_history=turns,
+        )
+
+    def test_week_update_trims_turns_then_low_confidence_lessons(self, monkeypatch):
+        monkeypatch.delenv("PROMPT_TOKEN_BUDGETS", raising=False)
+        full = self._update_prompt(TURNS)
+        assert all(turn in full for turn in TURNS)
+
+        without_turns = self._update_prompt(TURNS[-1:])
+        _budget(monkeypatch, "week_update", count_tokens(without_turns) - 5)
+        prompt = self._update_prompt(TURNS)
+
+        assert TURNS[0] not in prompt and TURNS[-1] in prompt
+        assert "Prefers short sessions after work" not in prompt
+        assert "Enjoys long runs on Sundays" in prompt and "Knee pain on box jumps" in prompt
+        assert count_tokens(prompt) <= count_tokens(without_turns) - 5
+
+    def test_week_create_trims_low_confidence_lessons(self, monkeypatch):
+        def create_prompt():
+            return PromptGenerator.create_new_weekly_schedule_prompt(
+                personal_info=_personal_info(),
+                completed_weeks_context="Week 1 done",
+                progress_summary="All sessions completed",
+                playbook_lessons=LESSONS,
+            )
+
+        monkeypatch.delenv("PROMPT_TOKEN_BUDGETS", raising=False)
+        _budget(monkeypatch, "week_create", count_tokens(create_prompt()) - 5)
+        prompt = create_prompt()
+        assert "Prefers short sessions after work" not in prompt
+        assert "Enjoys long runs on Sundays" in prompt
+
+    def test_intent_classification_keeps_latest_turn(self, monkeypatch):
+        def intent_prompt(turns):
+            return PromptGenerator.generate_lightweight_intent_classification_prompt(
+                feedback_message="Can I do this at home?", conversation_context=turns
+            )
+
+        assert "No previous conversation." in intent_prompt([])
+        _budget(monkeypatch, "intent_classification", count_tokens(intent_prompt(TURNS[-2:])))
+        prompt = intent_prompt(TURNS)
+        assert TURNS[2] not in prompt
+        assert TURNS[3] in prompt and TURNS[4] in prompt
+
+
+@pytest.mark.unit
+class TestStablePrefixes:
+    """Static coaching instructions come first and are identical for every user."""
+
+    def test_segmented_prompt_is_the_full_string(self):
+        prompt = SegmentedPrompt(stable=["A", "B"], volatile=["c"])
+        assert prompt == "ABc" and "Bc" in prompt
+        assert (prompt.stable_prefix, prompt.volatile_suffix) == ("AB", "c")
+        assert copy.deepcopy(prompt).stable_prefix == "AB"
+
+    def test_initial_plan_prompt_prefix_is_user_independent(self):
+        other = _personal_info().model_copy(update={"username": "alex", "goal_description": "Get stronger"})
+        first = PromptGenerator.generate_initial_training_plan_prompt(_personal_info(), "Q: Days?\nA: 3")
+        second = PromptGenerator.generate_initial_training_plan_prompt(other, "Q: Days?\nA: 5")
+
+        assert first.stable_prefix == second.stable_prefix
+        assert "TRAINING PRINCIPLES" in first.stable_prefix
+        assert "sam" not in first.stable_prefix and "sam" in first.volatile_suffix
+        assert "Run a half marathon" in first.volatile_suffix
+
+    def test_intent_prompt_prefix_is_user_independent(self):
+        prompt = PromptGenerator.generate_lightweight_intent_classification_prompt(
+            feedback_message="Could Friday be a rest day?", conversation_context=TURNS[-1:]
+        )
+        assert "CLASSIFY THEIR INTENT" in prompt.stable_prefix
+        assert "Could Friday be a rest day?" not in prompt.stable_prefix
+        assert prompt.volatile_suffix.index(TURNS[-1]) < prompt.volatile_suffix.index("Could Friday be a rest day?")
@@ -0,0 +1,123 @@
+"""
+Unit tests for single-flight request coalescing
+"""
+import asyncio
+import pytest
+
+from core.utils.single_flight import ACQUIRED, BUSY, DONE, SingleFlight, SQLiteFlightStore
+
+
+@pytest.mark.unit
+class TestSingleFlightInProcess:
+    """Concurrent duplicates within one worker."""
+
+    def test_concurrent_duplicates_share_one_execution(self):
+        flights = SingleFlight(path="")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"plan_id": 7}
+
+        async def run():
+            return await asyncio.gather(*(flights.do("generate-plan:u1:1", work) for _ in range(3)))
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert results == [{"plan_id": 7}] * 3
+        assert results[0] is results[1]
+        assert flights.stats()["coalesced"] == 2
+
+    def test_different_keys_run_separately(self):
+        flights = SingleFlight(path="")
+        calls = []
+
+        async def work(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        async def run():
+            return await asyncio.gather(
+                flights.do("insights-summary:u1:a", lambda: work("u1")),
+                flights.do("insights-summary:u2:a", lambda: work("u2")),
+            )
+
+        assert asyncio.run(run()) == ["u1", "u2"]
+        assert sorted(calls) == ["u1", "u2"]
+
+    def test_exception_is_shared_and_key_released(self):
+        flights = SingleFlight(path="")
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("llm down")
+
+        async def run():
+            return await asyncio.gather(
+                flights.do("k", failing), flights.do("k", failing), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(calls) == 1
+
+        async def ok():
+            return "ok"
+
+        # A finished flight does not affect later calls
+        assert asyncio.run(flights.do("k", ok)) == "ok"
+        assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.unit
+class TestSingleFlightAcrossWorkers:
+    """Coalescing through the SQLite lock table."""
+
+    def test_store_lease_and_result(self, tmp_path):
+        path = str(tmp_path / "flights.sqlite3")
+        worker_a = SQLiteFlightStore(path)
+        worker_b = SQLiteFlightStore(path)
+
+        assert worker_a.acquire("k", "a", 60) == (ACQUIRED, None)
+        assert worker_b.acquire("k", "b", 60) == (BUSY, None)
+        worker_a.release("k", "a", '{"ok": true}', 60)
+        assert worker_b.acquire("k", "b", 60) == (DONE, '{"ok": true}')
+
+        # Failed leader: lock is dropped so the next caller runs the work
+        assert worker_a.acquire("k2", "a", 60) == (ACQUIRED, None)
+        worker_a.release("k2", "a", None, 60)
+        assert worker_b.acquire("k2", "b", 60) == (ACQUIRED, None)
+
+        # Expired lease (leader died) can be taken over
+        assert worker_a.acquire("k3", "a", -1) == (ACQUIRED, None)
+        assert worker_b.acquire("k3", "b", 60) == (ACQUIRED, None)
+        worker_a.close()
+        worker_b.close()
+
+    def test_duplicate_in_other_worker_reuses_result(self, tmp_path):
+        path = str(tmp_path / "flights.sqlite3")
+        worker_a = SingleFlight(path=path, lease_seconds=5, result_ttl_seconds=5, poll_seconds=0.01)
+        worker_b = SingleFlight(path=path, lease_seconds=5, result_ttl_seconds=5, poll_seconds=0.01)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"success": True, "summary": "steady progress"}
+
+        async def duplicate():
+            await asyncio.sleep(0.01)  # arrives while worker A holds the lease
+            return await worker_b.do("insights-summary:u1:x", work, decode=lambda value: ("decoded", value))
+
+        async def run():
+            return await asyncio.gather(worker_a.do("insights-summary:u1:x", work), duplicate())
+
+        result_a, result_b = asyncio.run(run())
+        assert len(calls) == 1
+        assert result_a == {"success": True, "summary": "steady progress"}
+        assert result_b == ("decoded", result_a)
+        assert worker_b.stats()["shared_across_workers"] == 1
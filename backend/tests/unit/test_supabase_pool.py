@@ -0,0 +1,88 @@
+"""
+Unit tests for SupabaseClientPool - long-lived pooled Supabase clients
+"""
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+
+from core.utils.supabase_pool import SupabaseClientPool
+
+
+@pytest.fixture
+def credentials(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon-key")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+
+
+@pytest.mark.unit
+class TestSupabaseClientPool:
+    """Test client reuse, per-JWT caching and lifecycle."""
+
+    @pytest.fixture
+    def pool(self, credentials):
+        pool = SupabaseClientPool(max_clients=2)
+        with patch("core.utils.supabase_pool.is_test_environment", return_value=False):
+            yield pool
+
+    def test_refuses_async_clients_in_test_environment(self, credentials):
+        pool = SupabaseClientPool()
+
+        async def run():
+            with pytest.raises(ValueError):
+                pool.service_role_client()
+
+        asyncio.run(run())
+
+    def test_clients_are_reused_and_share_one_session(self, pool):
+        async def run():
+            service = pool.service_role_client()
+            anon = pool.anon_client()
+            assert pool.service_role_client() is service
+            assert service is not anon
+            assert service.session is anon.session
+            assert str(service.base_url) == "https://example.supabase.co/rest/v1"
+            assert service.headers["Authorization"] == "Bearer service-key"
+            assert anon.headers["Authorization"] == "Bearer anon-key"
+            await pool.aclose()
+
+        asyncio.run(run())
+
+    def test_jwt_clients_are_cached_per_token_and_lru_bounded(self, pool):
+        async def run():
+            first = pool.jwt_client("token-a")
+            assert pool.jwt_client("token-a") is first
+            assert first.headers["Authorization"] == "Bearer token-a"
+            assert first.headers["apiKey"] == "anon-key"
+
+            pool.jwt_client("token-b")
+            pool.jwt_client("token-c")
+            # max_clients=2 evicts the least recently used token
+            assert pool.jwt_client("token-a") is not first
+
+            with pytest.raises(ValueError):
+                pool.jwt_client("")
+            await pool.aclose()
+
+        asyncio.run(run())
+
+    def test_each_event_loop_gets_its_own_session(self, pool):
+        async def get_session():
+            session = pool.anon_client().session
+            await pool.aclose()
+            return session
+
+        first = asyncio.run(get_session())
+        second = asyncio.run(get_session())
+        assert first is not second
+        assert first.is_closed
+
+    def test_sync_client_is_created_once_per_role(self, credentials):
+        pool = SupabaseClientPool()
+        with patch("core.utils.supabase_pool.create_client", side_effect=lambda *_: Mock()) as create:
+            anon = pool.sync_client()
+            assert pool.sync_client() is anon
+            service = pool.sync_client(use_service_role=True)
+            assert service is not anon
+            assert create.call_count == 2
+            create.assert_any_call("https://example.supabase.co", "service-key")
@@ -0,0 +1,61 @@
+"""
+Unit tests for the shared memory + SQLite cache
+"""
+import time
+import pytest
+
+from core.utils.tiered_cache import TieredCache
+
+
+def _cache(path: str = "", max_entries: int = 2) -> TieredCache:
+    return TieredCache(
+        "test_entries",
+        max_entries=lambda: max_entries,
+        path=lambda: path,
+        encode=lambda value: ",".join(value),
+        decode=lambda value: value.split(","),
+    )
+
+
+@pytest.mark.unit
+class TestTieredCache:
+    """Bounded LRU, expiry and the optional disk tier."""
+
+    def test_lru_eviction_and_expiry(self):
+        cache = _cache()
+        cache.remember("a", ["1"])
+        cache.remember("b", ["2"])
+        assert cache.get("a") == ["1"]  # a is now most recent
+        cache.remember("c", ["3"])
+        assert cache.get("b") is None and len(cache) == 2
+
+        cache.remember("d", ["4"], expires_at=time.time() - 1)
+        assert cache.get("d") is None
+        assert not cache.persistent
+        assert cache.load("a") is None
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        writer, reader = _cache(path), _cache(path)
+        writer.store("a", ["1", "2"])
+        writer.store("old", ["x"], expires_at=time.time() - 1)
+
+        assert reader.get("a") is None
+        assert reader.load("a") == ["1", "2"]
+        assert reader.get("a") == ["1", "2"]  # remembered after the load
+        assert reader.load("old") is None
+
+        writer.delete("a")
+        reader.forget("a")
+        assert reader.load("a") is None
+        writer.close()
+        reader.close()
+
+    def test_unusable_path_disables_the_disk_tier(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        cache = _cache(str(blocker / "cache.sqlite3"))
+
+        cache.store("a", ["1"])
+        assert cache.load("a") is None
+        assert not cache.persistent
@@ -0,0 +1,49 @@
+"""
+Unit tests for the shared TrainingCoach instance
+"""
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from core.training import training_api
+from core.training.training_coach import TrainingCoach
+
+
+@pytest.mark.unit
+class TestSharedTrainingCoach:
+    """get_training_coach builds one coach per worker."""
+
+    @pytest.fixture(autouse=True)
+    def reset_shared_coach(self):
+        training_api._training_coach = None
+        yield
+        training_api._training_coach = None
+
+    def test_coach_is_built_once_across_threads(self):
+        with patch.object(training_api, "TrainingCoach", side_effect=lambda: Mock()) as factory:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(training_api.get_training_coach()))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert factory.call_count == 1
+        assert all(coach is results[0] for coach in results)
+
+    def test_modality_rationale_is_isolated_per_request(self):
+        coach = TrainingCoach.__new__(TrainingCoach)
+
+        async def request(rationale):
+            coach.last_modality_rationale = rationale
+            await asyncio.sleep(0)
+            return coach.last_modality_rationale
+
+        async def run():
+            return await asyncio.gather(request("strength"), request("endurance"))
+
+        assert asyncio.run(run()) == ["strength", "endurance"]